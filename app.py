@@ -1,5 +1,6 @@
 import customtkinter as ctk
-from typing import Dict, Type, Optional
+from typing import Dict, Type, Optional, Tuple
+import importlib
 import json
 import os
 
@@ -9,15 +10,10 @@ from config.constants import (
     SCREEN_REPORTS, SCREEN_CASHIER_MAIN,
     SCREEN_MIN_WIDTH, SCREEN_MIN_HEIGHT
 )
+from config.settings import STALL_DETECTOR_ENABLED, STARTUP_TIMELINE_PRINT, BACKUP_ENABLED, MAINTENANCE_ENABLED
 from ui.base.base_frame import BaseFrame
-from ui.screens.login.login_screen import LoginScreen
-from ui.screens.dashboard.dashboard_screen import DashboardScreen
-from ui.screens.pos.pos_screen import POSScreen
-from ui.screens.inventory.inventory_screen import InventoryScreen
-from ui.screens.customers.customers_screen import CustomersScreen
-from ui.screens.settings.settings_screen import SettingsScreen
-from ui.screens.reports.reports_screen import ReportsScreen
-from ui.screens.cashier.cashier_main_screen import CashierMainScreen
+from utils.session import SessionManager
+from utils import metrics, startup
 
 class SupermarketApp(ctk.CTk):
     """Main application class"""
@@ -25,6 +21,7 @@ class SupermarketApp(ctk.CTk):
     def __init__(self):
         # Load settings before initializing UI
         self.load_settings()
+        startup.mark("settings")
         
         super().__init__()
         
@@ -37,22 +34,84 @@ class SupermarketApp(ctk.CTk):
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
         
+        # Write out pending session changes when the window closes
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Initialize screens
-        self.screens: Dict[str, Type[BaseFrame]] = {}
+        self.screens: Dict[str, Tuple[str, str]] = {}
+        self._screen_classes: Dict[str, Type[BaseFrame]] = {}
         self.current_screen: Optional[BaseFrame] = None
+        startup.mark("window")
+        
+        # Register screens; each module is imported the first time its screen is shown
+        self.register_screen(SCREEN_LOGIN, "ui.screens.login.login_screen", "LoginScreen")
+        self.register_screen(SCREEN_DASHBOARD, "ui.screens.dashboard.dashboard_screen", "DashboardScreen")
+        self.register_screen(SCREEN_POS, "ui.screens.pos.pos_screen", "POSScreen")
+        self.register_screen(SCREEN_INVENTORY, "ui.screens.inventory.inventory_screen", "InventoryScreen")
+        self.register_screen(SCREEN_CUSTOMERS, "ui.screens.customers.customers_screen", "CustomersScreen")
+        self.register_screen(SCREEN_SETTINGS, "ui.screens.settings.settings_screen", "SettingsScreen")
+        self.register_screen(SCREEN_REPORTS, "ui.screens.reports.reports_screen", "ReportsScreen")
+        self.register_screen(SCREEN_CASHIER_MAIN, "ui.screens.cashier.cashier_main_screen", "CashierMainScreen")
+        
+        # Started once the login window is up (see start_background_services)
+        self.backup_scheduler = None
+        self.maintenance_scheduler = None
+        self.stall_detector = None
         
-        # Register screens
-        self.register_screen(SCREEN_LOGIN, LoginScreen)
-        self.register_screen(SCREEN_DASHBOARD, DashboardScreen)
-        self.register_screen(SCREEN_POS, POSScreen)
-        self.register_screen(SCREEN_INVENTORY, InventoryScreen)
-        self.register_screen(SCREEN_CUSTOMERS, CustomersScreen)
-        self.register_screen(SCREEN_SETTINGS, SettingsScreen)
-        self.register_screen(SCREEN_REPORTS, ReportsScreen)
-        self.register_screen(SCREEN_CASHIER_MAIN, CashierMainScreen)
+        # Write service and UI latency metrics to the logs folder periodically
+        metrics.start_exporter()
         
         # Show initial screen
         self.show_screen(SCREEN_LOGIN)
+        startup.mark("login screen")
+        self.after_idle(self.on_first_frame)
+    
+    def on_first_frame(self):
+        """Close the startup timeline once the main loop has drawn the login window"""
+        startup.mark("first frame")
+        self.start_background_services()
+        startup.finish(show=STARTUP_TIMELINE_PRINT)
+    
+    def start_background_services(self):
+        """Import and start what the login window doesn't need, after it is drawn"""
+        # Apply checkouts journaled but not committed by a previous run
+        sale_service = importlib.import_module("services.sale_service")
+        sale_service.SaleService().replay_checkout_journal()
+        startup.mark("database")
+        
+        # Back up the database in small steps while the tills keep trading
+        if BACKUP_ENABLED:
+            self.backup_scheduler = importlib.import_module("database.backup").BackupScheduler()
+            self.backup_scheduler.start()
+        
+        # Maintain the database once nobody has touched the till for a while
+        if MAINTENANCE_ENABLED:
+            self.maintenance_scheduler = importlib.import_module("database.maintenance").MaintenanceScheduler()
+            self.bind_all("<Any-KeyPress>", self._on_user_activity, add="+")
+            self.bind_all("<Any-ButtonPress>", self._on_user_activity, add="+")
+            self.maintenance_scheduler.start()
+        
+        # Record what the UI thread was doing whenever the window freezes
+        if STALL_DETECTOR_ENABLED:
+            self.stall_detector = importlib.import_module("utils.stall_detector").StallDetector(self)
+            self.stall_detector.start()
+    
+    def _on_user_activity(self, event=None):
+        """Postpone idle maintenance while the till is in use"""
+        self.maintenance_scheduler.touch()
+    
+    def on_close(self):
+        """Flush the session file and metrics and close the application"""
+        SessionManager().flush(timeout=5.0)
+        if self.stall_detector:
+            self.stall_detector.stop()
+        if self.backup_scheduler:
+            self.backup_scheduler.stop()
+        self.destroy()
+        # The window is gone; maintain the database before the process exits
+        if self.maintenance_scheduler:
+            self.maintenance_scheduler.run_at_close()
+        metrics.stop_exporter()
     
     def load_settings(self):
         """Load application settings"""
@@ -71,9 +130,19 @@ class SupermarketApp(ctk.CTk):
             # Use default theme
             ctk.set_appearance_mode("system")
     
-    def register_screen(self, name: str, screen_class: Type[BaseFrame]):
-        """Register a screen with the application"""
-        self.screens[name] = screen_class
+    def register_screen(self, name: str, module_path: str, class_name: str):
+        """Register a screen with the application; its module is imported on first show"""
+        self.screens[name] = (module_path, class_name)
+    
+    def get_screen_class(self, name: str) -> Type[BaseFrame]:
+        """Import a registered screen's module if needed and return its class"""
+        screen_class = self._screen_classes.get(name)
+        if screen_class is None:
+            module_path, class_name = self.screens[name]
+            screen_class = getattr(importlib.import_module(module_path), class_name)
+            self._screen_classes[name] = screen_class
+            startup.mark(f"import {name}")
+        return screen_class
     
     def show_screen(self, name: str, data: Optional[Dict] = None):
         """Show a screen by name"""
@@ -85,7 +154,7 @@ class SupermarketApp(ctk.CTk):
             self.current_screen.grid_forget()
         
         # Create and show new screen
-        screen_class = self.screens[name]
+        screen_class = self.get_screen_class(name)
         self.current_screen = screen_class(self)
         self.current_screen.grid(row=0, column=0, sticky="nsew")
         
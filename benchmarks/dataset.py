@@ -0,0 +1,323 @@
+"""Seeded generator for a supermarket-sized benchmark database.
+
+At ``--scale 1`` it writes 100k products, 1M customers, 10M sale lines and
+20M inventory ledger rows; smaller scales shrink every table in proportion.
+The same seed always gives the same data. Rows go in through ``executemany``
+in chunks with journaling and syncing off, then the database is switched
+back to the app's normal journal mode and analysed.
+
+Usage:
+    python -m benchmarks.dataset /tmp/bench.db --scale 0.01
+    python -m benchmarks.dataset /tmp/bench.db --customers 200000 --sale-lines 0
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.constants import CATEGORIES, TAX_RATE, PAYMENT_CASH, PAYMENT_CARD, PAYMENT_MOBILE
+from database.db_manager import DBManager
+from services.customer_service import CustomerService
+from utils.security import hash_password
+
+# Row counts at scale 1
+FULL_SIZE = {
+    "products": 100_000,
+    "customers": 1_000_000,
+    "sale_lines": 10_000_000,
+    "ledger_rows": 20_000_000,
+}
+
+CHUNK_SIZE = 50_000
+CASHIERS = 5
+
+# Cheap hash so generating users doesn't dominate small runs
+BENCH_PASSWORD = "bench"
+BENCH_HASH_METHOD = "pbkdf2:sha256:1000"
+
+_BRANDS = ["Golden Farm", "Nature's Best", "Blue Valley", "Sunrise", "Old Mill", "Fresh Choice",
+           "Green Leaf", "Royal", "Happy Cow", "Ocean Pride", "Mountain Spring", "Daily"]
+_ADJECTIVES = ["Organic", "Classic", "Light", "Extra", "Premium", "Family", "Original", "Spicy",
+               "Sweet", "Whole", "Smoked", "Low Fat"]
+_NOUNS = {
+    "Beverages": ["Orange Juice", "Cola", "Sparkling Water", "Green Tea", "Coffee Beans", "Lemonade"],
+    "Bread/Bakery": ["Sourdough", "Baguette", "Croissants", "Bagels", "Rye Bread", "Muffins"],
+    "Canned/Jarred Goods": ["Tomato Sauce", "Chickpeas", "Tuna", "Peaches", "Olives", "Soup"],
+    "Dairy": ["Milk", "Yogurt", "Cheddar", "Butter", "Cream", "Mozzarella"],
+    "Dry/Baking Goods": ["Flour", "Rice", "Pasta", "Oats", "Sugar", "Lentils"],
+    "Frozen Foods": ["Pizza", "Peas", "Ice Cream", "Fish Fingers", "Berries", "Dumplings"],
+    "Meat & Poultry": ["Chicken Breast", "Beef Mince", "Sausages", "Lamb Chops", "Turkey", "Bacon"],
+    "Produce": ["Apples", "Bananas", "Tomatoes", "Potatoes", "Spinach", "Carrots"],
+    "Cleaners": ["Dish Soap", "Bleach", "Glass Cleaner", "Laundry Liquid", "Sponges", "Floor Cleaner"],
+    "Paper Goods": ["Paper Towels", "Toilet Paper", "Napkins", "Tissues", "Baking Paper", "Paper Plates"],
+    "Personal Care": ["Shampoo", "Toothpaste", "Soap", "Deodorant", "Lotion", "Razors"],
+    "Other": ["Batteries", "Candles", "Light Bulbs", "Matches", "Bin Bags", "Foil"],
+}
+_SIZES = ["250g", "500g", "1kg", "330ml", "1L", "2L", "6 pack", "12 pack", "Large", "Small"]
+_FIRST_NAMES = ["James", "Mary", "Ahmed", "Fatima", "Li", "Wei", "Maria", "Jose", "Anna", "Peter",
+                "Sara", "Omar", "Yuki", "Kenji", "Olga", "Ivan", "Grace", "David", "Amina", "Lucas",
+                "Emma", "Noah", "Chloe", "Ravi", "Priya", "Hana", "Tom", "Nina", "Leo", "Zara"]
+_LAST_NAMES = ["Smith", "Garcia", "Chen", "Khan", "Müller", "Rossi", "Silva", "Kim", "Nguyen", "Ali",
+               "Brown", "Martin", "Haddad", "Tanaka", "Novak", "Jones", "Lopez", "Dubois", "Singh", "Cohen"]
+_STREETS = ["High", "Station", "Church", "Park", "Market", "Mill", "Bridge", "King", "Queen", "Oak"]
+_CITIES = ["Springfield", "Riverside", "Fairview", "Lakeside", "Hillcrest", "Greenville"]
+_PAYMENTS = [PAYMENT_CASH] * 5 + [PAYMENT_CARD] * 4 + [PAYMENT_MOBILE]
+
+
+def sizes_for(scale: float = 1.0, **overrides: Optional[int]) -> Dict[str, int]:
+    """Row counts for a scale, with explicit counts taking precedence"""
+    sizes = {name: max(1, int(count * scale)) for name, count in FULL_SIZE.items()}
+    sizes.update({name: count for name, count in overrides.items() if count is not None})
+    return sizes
+
+
+def _fast_pragmas(conn: sqlite3.Connection):
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -262144")
+    conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+
+
+def _insert_chunks(conn: sqlite3.Connection, sql: str, rows):
+    """executemany over an iterator, one transaction per chunk"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            conn.executemany(sql, chunk)
+            conn.commit()
+            chunk = []
+    if chunk:
+        conn.executemany(sql, chunk)
+        conn.commit()
+
+
+def _generate_users(conn: sqlite3.Connection):
+    password_hash = hash_password(BENCH_PASSWORD, BENCH_HASH_METHOD)
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO users (username, password, full_name, email, role)
+        VALUES (?, ?, ?, ?, 'cashier')
+        """,
+        [(f"cashier{i}", password_hash, f"Cashier {i}", f"cashier{i}@example.com")
+         for i in range(1, CASHIERS + 1)]
+    )
+    conn.commit()
+    return [row[0] for row in conn.execute("SELECT id FROM users WHERE is_active = 1")]
+
+
+def _generate_products(conn: sqlite3.Connection, rng: random.Random, count: int):
+    def rows():
+        for i in range(count):
+            category = CATEGORIES[i % len(CATEGORIES)]
+            brand = rng.choice(_BRANDS)
+            noun = rng.choice(_NOUNS[category])
+            price = round(rng.lognormvariate(1.2, 0.8), 2) + 0.29
+            yield (
+                f"{brand} {rng.choice(_ADJECTIVES)} {noun} {rng.choice(_SIZES)}",
+                f"{noun} by {brand}",
+                category,
+                f"{2000000000000 + i:013d}",
+                price,
+                round(price * rng.uniform(0.55, 0.8), 2),
+                rng.choice((5, 10, 20)),
+            )
+
+    _insert_chunks(conn, """
+        INSERT INTO products (name, description, category, barcode, price, cost_price, reorder_level)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows())
+
+
+def _generate_customers(conn: sqlite3.Connection, rng: random.Random, count: int, start: datetime):
+    span = (datetime.now() - start).total_seconds()
+
+    def rows():
+        for i in range(count):
+            first = rng.choice(_FIRST_NAMES)
+            last = rng.choice(_LAST_NAMES)
+            created = start + timedelta(seconds=span * i / count)
+            yield (
+                f"{first} {last}",
+                f"(555) {i // 10000:03d}-{i % 10000:04d}",
+                f"555{i:07d}",
+                f"{first}.{last}{i}@example.com".lower() if rng.random() < 0.7 else None,
+                f"{rng.randint(1, 300)} {rng.choice(_STREETS)} St, {rng.choice(_CITIES)}",
+                created.strftime("%Y-%m-%d %H:%M:%S"),
+            )
+
+    _insert_chunks(conn, """
+        INSERT INTO customers (name, phone, phone_normalized, email, address, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, rows())
+
+
+def _generate_sales(conn: sqlite3.Connection, rng: random.Random, sizes: Dict[str, int],
+                    user_ids, start: datetime):
+    """Sales, their lines and a stock ledger whose quantities add up"""
+    products = conn.execute("SELECT id, price FROM products ORDER BY id").fetchall()
+    customer_ids = conn.execute("SELECT MIN(id), MAX(id) FROM customers").fetchone()
+    product_count = len(products)
+    stock = [rng.randint(50, 500) for _ in products]
+    points: Dict[int, int] = {}
+
+    lines_target = sizes["sale_lines"]
+    # Ledger rows beyond one per sale line are restocks
+    extra_ratio = max(0, sizes["ledger_rows"] - lines_target) / max(1, lines_target)
+
+    span = (datetime.now() - start).total_seconds()
+    sale_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM sales").fetchone()[0]
+    sale_rows, item_rows, ledger_rows = [], [], []
+    lines_written = 0
+    extra = 0.0
+    day, day_sequence = None, 0
+
+    def ledger(product, change, when, kind, reason, user_id):
+        before = stock[product]
+        stock[product] = before + change
+        ledger_rows.append((products[product][0], change, before, stock[product], kind, reason, user_id, when))
+
+    def flush():
+        conn.executemany("""
+            INSERT INTO sales (id, invoice_number, customer_id, user_id, total_amount, discount_amount,
+                               tax_amount, payment_method, payment_status, sale_date, loyalty_points)
+            VALUES (?, ?, ?, ?, ?, 0, ?, ?, 'completed', ?, ?)
+        """, sale_rows)
+        conn.executemany("""
+            INSERT INTO sale_items (sale_id, product_id, quantity, unit_price, subtotal)
+            VALUES (?, ?, ?, ?, ?)
+        """, item_rows)
+        conn.executemany("""
+            INSERT INTO inventory_transactions (product_id, quantity_change, previous_quantity, new_quantity,
+                                                transaction_type, reason, user_id, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, ledger_rows)
+        conn.commit()
+        sale_rows.clear()
+        item_rows.clear()
+        ledger_rows.clear()
+
+    while lines_written < lines_target:
+        sale_id += 1
+        # Sales are spread evenly over the history, oldest first
+        when_dt = start + timedelta(seconds=span * lines_written / lines_target)
+        when = when_dt.strftime("%Y-%m-%d %H:%M:%S")
+        if when[:10] != day:
+            day, day_sequence = when[:10], 0
+        day_sequence += 1
+        invoice = f"INV-{when_dt.strftime('%Y%m%d')}-{day_sequence:04d}"
+        user_id = rng.choice(user_ids)
+        line_count = min(rng.randint(1, 7), lines_target - lines_written)
+
+        subtotal = 0.0
+        for _ in range(line_count):
+            # Skewed towards low ids so some products are best sellers
+            product = int(product_count * rng.random() ** 2)
+            product_id, price = products[product]
+            quantity = rng.choice((1, 1, 1, 2, 2, 3, 6))
+            if stock[product] < quantity:
+                ledger(product, rng.randint(24, 240), when, 'manual', 'Restock', user_id)
+            ledger(product, -quantity, when, 'sale', f'Sale #{invoice}', user_id)
+            item_rows.append((sale_id, product_id, quantity, price, round(price * quantity, 2)))
+            subtotal += price * quantity
+
+            extra += extra_ratio
+            while extra >= 1:
+                extra -= 1
+                ledger(rng.randrange(product_count), rng.randint(24, 240), when, 'manual', 'Restock', user_id)
+        lines_written += line_count
+
+        tax = round(subtotal * TAX_RATE, 2)
+        total = round(subtotal + tax, 2)
+        customer_id = None
+        loyalty_points = 0
+        if customer_ids[0] is not None and rng.random() < 0.4:
+            customer_id = rng.randint(customer_ids[0], customer_ids[1])
+            loyalty_points = CustomerService.points_for(total)
+            points[customer_id] = points.get(customer_id, 0) + loyalty_points
+        sale_rows.append((sale_id, invoice, customer_id, user_id, total, tax,
+                          rng.choice(_PAYMENTS), when, loyalty_points))
+
+        if len(item_rows) >= CHUNK_SIZE:
+            flush()
+
+    # Top up the ledger if the sales didn't produce enough rows
+    ledger_total = conn.execute("SELECT COUNT(*) FROM inventory_transactions").fetchone()[0] + len(ledger_rows)
+    when = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    while ledger_total < sizes["ledger_rows"]:
+        ledger(rng.randrange(product_count), rng.randint(24, 240), when, 'manual', 'Restock', user_ids[0])
+        ledger_total += 1
+        if len(ledger_rows) >= CHUNK_SIZE:
+            flush()
+    flush()
+
+    conn.executemany("UPDATE products SET stock_quantity = ? WHERE id = ?",
+                     [(stock[i], products[i][0]) for i in range(product_count)])
+    conn.executemany("UPDATE customers SET loyalty_points = ? WHERE id = ?",
+                     [(value, customer_id) for customer_id, value in points.items()])
+    conn.commit()
+
+
+def generate(db_path: str, scale: float = 1.0, seed: int = 42, days: int = 730,
+             **overrides: Optional[int]) -> Dict[str, int]:
+    """Create (or extend) a benchmark database and return the row counts written"""
+    sizes = sizes_for(scale, **overrides)
+    DBManager(db_path).close()
+
+    rng = random.Random(seed)
+    start = datetime.now().replace(microsecond=0) - timedelta(days=days)
+
+    conn = sqlite3.connect(db_path)
+    _fast_pragmas(conn)
+    try:
+        user_ids = _generate_users(conn)
+        _generate_products(conn, rng, sizes["products"])
+        _generate_customers(conn, rng, sizes["customers"], start)
+        _generate_sales(conn, rng, sizes, user_ids, start)
+
+        # Back to the settings the app runs with, and fresh planner statistics
+        conn.execute("PRAGMA locking_mode = NORMAL")
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a database with synthetic supermarket data")
+    parser.add_argument("db_path", help="Database file to create (should not exist yet)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Fraction of the full-size dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=730, help="Days of sales history")
+    for name in FULL_SIZE:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, dest=name,
+                            help=f"Override the {name.replace('_', ' ')} count")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db_path):
+        print(f"Warning: {args.db_path} exists; generated rows are added to it")
+
+    started = time.perf_counter()
+    sizes = generate(args.db_path, args.scale, args.seed, args.days,
+                     **{name: getattr(args, name) for name in FULL_SIZE})
+    elapsed = time.perf_counter() - started
+
+    print(", ".join(f"{count:,} {name.replace('_', ' ')}" for name, count in sizes.items()))
+    print(f"Generated in {elapsed:.1f}s: {args.db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Checkout throughput with and without the group-commit write queue.
+
+Usage:
+    python -m benchmarks.group_commit --lanes 1 2 4 8 --duration 5
+"""
+
+import os
+import sys
+import json
+import tempfile
+import argparse
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.ledger_split import build_database, run_lanes
+from database.write_queue import get_write_queue, stop_write_queues
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-lane checkout benchmark: group commit vs one commit per sale")
+    parser.add_argument("--lanes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for lanes in args.lanes:
+        for mode, use_write_queue in (("direct", False), ("write_queue", True)):
+            with tempfile.TemporaryDirectory() as tmp:
+                db_path = os.path.join(tmp, "bench.db")
+                build_database(db_path)
+                stats = run_lanes(db_path, lanes, args.duration, use_write_queue=use_write_queue)
+                if use_write_queue:
+                    queue_stats = get_write_queue(db_path).stats
+                    stats["batches"] = queue_stats["batches"]
+                    stats["busy_retries"] = queue_stats["busy_retries"]
+                    stop_write_queues()
+                results.append({"lanes": lanes, "mode": mode, **stats})
+
+    print(f"{'lanes':>5} {'mode':<12} {'sales':>7} {'failed':>7} {'sales/s':>9} {'ops/batch':>10}")
+    for row in results:
+        per_batch = round(row["sales"] / row["batches"], 1) if row.get("batches") else "-"
+        print(f"{row['lanes']:>5} {row['mode']:<12} {row['sales']:>7} {row['failed']:>7} "
+              f"{row['sales_per_second']:>9} {per_batch:>10}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"duration": args.duration, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
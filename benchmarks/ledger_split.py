@@ -0,0 +1,142 @@
+"""Checkout throughput with several lanes writing at once, ledger split vs. single file.
+
+Usage:
+    python -m benchmarks.ledger_split --lanes 4 --duration 10 --backoffice 1
+"""
+
+import os
+import sys
+import json
+import random
+import sqlite3
+import tempfile
+import argparse
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database.db_manager import DBManager
+from database.ledger import split_ledger
+from services.sale_service import SaleService
+from services.product_service import ProductService
+
+
+def build_database(db_path: str, products: int = 200, seed: int = 42):
+    """Create a benchmark database with plenty of stock"""
+    DBManager(db_path).close()
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        """
+        INSERT INTO products (name, description, category, barcode, price, cost_price, stock_quantity, reorder_level)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (f"Bench product {i}", "", "Other", f"BENCH{i:08d}",
+             round(rng.uniform(0.5, 50), 2), 0.0, 10 ** 9, 10)
+            for i in range(products)
+        ]
+    )
+    conn.execute("UPDATE products SET stock_quantity = ?", (10 ** 9,))
+    conn.commit()
+    conn.close()
+
+
+def run_lanes(db_path: str, lanes: int, duration: float, backoffice: int = 0, seed: int = 42,
+              use_write_queue: Optional[bool] = None) -> Dict[str, Any]:
+    """Run checkout lanes (and optional back-office writers) for a fixed duration"""
+    conn = sqlite3.connect(db_path)
+    product_rows = conn.execute("SELECT id, price FROM products").fetchall()
+    conn.close()
+
+    stats = {"sales": 0, "failed": 0, "backoffice_writes": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def checkout_lane(lane: int):
+        rng = random.Random(seed + lane)
+        service = SaleService(db_path, use_write_queue=use_write_queue)
+        completed = failed = 0
+        while time.perf_counter() < deadline:
+            cart = rng.sample(product_rows, rng.randint(1, 5))
+            items = [{"product_id": pid, "quantity": rng.randint(1, 3), "price": price} for pid, price in cart]
+            subtotal = sum(item["quantity"] * item["price"] for item in items)
+            sale = service.create_sale({
+                "user_id": 1,
+                "items": items,
+                "total": subtotal * 1.1,
+                "tax": subtotal * 0.1,
+                "payment_method": "cash"
+            })
+            if sale:
+                completed += 1
+            else:
+                failed += 1
+        with lock:
+            stats["sales"] += completed
+            stats["failed"] += failed
+
+    def backoffice_lane(lane: int):
+        rng = random.Random(seed * 7 + lane)
+        service = ProductService(db_path)
+        writes = 0
+        while time.perf_counter() < deadline:
+            product_id, price = rng.choice(product_rows)
+            product = service.get_product(product_id)
+            if product:
+                product["price"] = price
+                if service.update_product(product_id, product):
+                    writes += 1
+            time.sleep(0.01)
+        with lock:
+            stats["backoffice_writes"] += writes
+
+    threads = [threading.Thread(target=checkout_lane, args=(i,)) for i in range(lanes)]
+    threads += [threading.Thread(target=backoffice_lane, args=(i,)) for i in range(backoffice)]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stats["elapsed"] = round(elapsed, 3)
+    stats["sales_per_second"] = round(stats["sales"] / elapsed, 1)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-lane checkout benchmark: split ledger vs single file")
+    parser.add_argument("--lanes", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--backoffice", type=int, default=1, help="Concurrent product-editing writers")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("single_file", "split_ledger"):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            build_database(db_path)
+            if mode == "split_ledger":
+                split_ledger(db_path)
+            results[mode] = run_lanes(db_path, args.lanes, args.duration, args.backoffice)
+
+    print(f"{'mode':<14} {'sales':>7} {'failed':>7} {'sales/s':>9} {'backoffice':>11}")
+    for mode, stats in results.items():
+        print(f"{mode:<14} {stats['sales']:>7} {stats['failed']:>7} "
+              f"{stats['sales_per_second']:>9} {stats['backoffice_writes']:>11}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"lanes": args.lanes, "duration": args.duration, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Concurrent checkout load: N tills selling through SaleService.create_sale at once.
+
+Each lane is a thread or a separate process (like real tills sharing one
+database file) and replays carts on a fixed schedule, so a slow sale delays
+the ones queued behind it instead of silently lowering the offered load.
+Latency is measured from each sale's scheduled start, service time from
+when it actually started. Busy retries are counted by the write queue; a
+direct commit waits inside SQLite's busy handler instead, which shows up as
+latency. Exit status is non-zero when a ``--max-*``/``--min-*`` gate is
+exceeded, so the run can guard changes to the connection and write paths.
+
+Usage:
+    python -m benchmarks.dataset /tmp/bench.db --scale 0.01
+    python -m benchmarks.loadgen /tmp/bench.db --lanes 8 --rate 200 --duration 30
+    python -m benchmarks.loadgen /tmp/bench.db --lanes 4 --processes --direct --max-p99-ms 250
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import sqlite3
+import tempfile
+import argparse
+import threading
+import multiprocessing
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.constants import TAX_RATE, PAYMENT_CASH, PAYMENT_CARD, PAYMENT_MOBILE
+from database.ledger import ledger_path_for
+
+_PAYMENTS = [PAYMENT_CASH] * 5 + [PAYMENT_CARD] * 4 + [PAYMENT_MOBILE]
+
+# Time allowed for every lane to import and connect before the clock starts
+START_DELAY = 3.0
+
+
+def prepare_database(source: str, workdir: str) -> str:
+    """Copy the benchmark database (and ledger) and give every product ample stock"""
+    db_path = os.path.join(workdir, "loadgen.db")
+    shutil.copyfile(source, db_path)
+    ledger = ledger_path_for(source)
+    if ledger.exists():
+        shutil.copyfile(ledger, ledger_path_for(db_path))
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE products SET stock_quantity = ?", (10 ** 9,))
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def make_cart(rng: random.Random, products: List[tuple], customers: Optional[tuple],
+              user_id: int) -> Dict[str, Any]:
+    """A cart shaped like the generated history: 1-7 lines, skewed to best sellers"""
+    lines = {}
+    for _ in range(rng.randint(1, 7)):
+        product_id, price = products[int(len(products) * rng.random() ** 2)]
+        quantity = rng.choice((1, 1, 1, 2, 2, 3, 6))
+        line = lines.setdefault(product_id, {"product_id": product_id, "quantity": 0, "price": price})
+        line["quantity"] += quantity
+
+    subtotal = sum(line["quantity"] * line["price"] for line in lines.values())
+    sale = {
+        "user_id": user_id,
+        "items": list(lines.values()),
+        "total": round(subtotal * (1 + TAX_RATE), 2),
+        "tax": round(subtotal * TAX_RATE, 2),
+        "payment_method": rng.choice(_PAYMENTS)
+    }
+    if customers and customers[0] is not None and rng.random() < 0.4:
+        sale["customer_id"] = rng.randint(*customers)
+    return sale
+
+
+def run_lane(lane: int, db_path: str, use_write_queue: bool, first_at: float, end_at: float,
+             interval: float, seed: int) -> Dict[str, Any]:
+    """Sell carts on this lane's schedule until the run ends"""
+    from services.sale_service import SaleService
+
+    rng = random.Random(seed + lane)
+    conn = sqlite3.connect(db_path)
+    products = conn.execute("SELECT id, price FROM products WHERE is_active = 1").fetchall()
+    customers = conn.execute("SELECT MIN(id), MAX(id) FROM customers").fetchone()
+    user_id = conn.execute("SELECT MIN(id) FROM users").fetchone()[0]
+    conn.close()
+
+    service = SaleService(db_path, use_write_queue=use_write_queue)
+    latencies, service_times = [], []
+    failed = 0
+
+    scheduled = first_at
+    while True:
+        now = time.time()
+        if now < scheduled:
+            time.sleep(scheduled - now)
+        if scheduled >= end_at or (not interval and time.time() >= end_at):
+            break
+
+        cart = make_cart(rng, products, customers, user_id)
+        began = time.time()
+        sale = service.create_sale(cart)
+        finished = time.time()
+
+        if sale:
+            latencies.append((finished - scheduled) * 1000)
+            service_times.append((finished - began) * 1000)
+        else:
+            failed += 1
+        scheduled = scheduled + interval if interval else finished
+
+    return {"lane": lane, "latencies": latencies, "service_times": service_times, "failed": failed}
+
+
+def _process_lane(args, results):
+    """Process entry point: run one lane and report its write queue counters too"""
+    result = run_lane(*args)
+    db_path, use_write_queue = args[1], args[2]
+    if use_write_queue:
+        from database.write_queue import get_write_queue, stop_write_queues
+        result["busy_retries"] = get_write_queue(db_path).stats["busy_retries"]
+        stop_write_queues()
+    results.put(result)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def summarise(lane_results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles and failure counts across lanes"""
+    latencies = sorted(x for r in lane_results for x in r["latencies"])
+    service_times = sorted(x for r in lane_results for x in r["service_times"])
+    sales = len(latencies)
+    return {
+        "sales": sales,
+        "failed": sum(r["failed"] for r in lane_results),
+        "busy_retries": sum(r.get("busy_retries", 0) for r in lane_results),
+        "sales_per_second": round(sales / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, fraction), 2)
+            for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))
+        },
+        "service_ms": {
+            name: round(percentile(service_times, fraction), 2)
+            for name, fraction in (("p50", 0.5), ("p99", 0.99))
+        },
+    }
+
+
+def run(db_path: str, lanes: int, rate: float, duration: float, processes: bool = False,
+        use_write_queue: bool = True, seed: int = 42) -> Dict[str, Any]:
+    """Run every lane against ``db_path`` and summarise the results"""
+    # A rate of 0 runs each lane flat out (closed loop)
+    interval = lanes / rate if rate else 0.0
+    start_at = time.time() + START_DELAY
+    end_at = start_at + duration
+    # Stagger lanes across one interval so they don't all fire together
+    lane_args = [
+        (lane, db_path, use_write_queue, start_at + interval * lane / lanes, end_at, interval, seed)
+        for lane in range(lanes)
+    ]
+
+    if processes:
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        workers = [context.Process(target=_process_lane, args=(args, results)) for args in lane_args]
+        for worker in workers:
+            worker.start()
+        lane_results = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+    else:
+        lane_results = [None] * lanes
+
+        def thread_lane(args):
+            lane_results[args[0]] = run_lane(*args)
+
+        threads = [threading.Thread(target=thread_lane, args=(args,)) for args in lane_args]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if use_write_queue:
+            from database.write_queue import get_write_queue, stop_write_queues
+            lane_results[0]["busy_retries"] = get_write_queue(db_path).stats["busy_retries"]
+            stop_write_queues()
+
+    summary = summarise(lane_results, duration)
+    summary.update({
+        "lanes": lanes,
+        "mode": "processes" if processes else "threads",
+        "write_path": "write_queue" if use_write_queue else "direct",
+        "target_rate": rate,
+        "duration": duration,
+    })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-lane concurrent checkout load test")
+    parser.add_argument("db_path", help="Benchmark database (see benchmarks.dataset); a copy is used")
+    parser.add_argument("--lanes", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=50.0, help="Target sales per second over all lanes, 0 = flat out")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--processes", action="store_true", help="Run each lane in its own process")
+    parser.add_argument("--direct", action="store_true", help="Commit each sale itself instead of via the write queue")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--in-place", action="store_true", help="Sell into db_path itself instead of a copy")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--max-p99-ms", type=float, help="Fail if p99 latency is above this")
+    parser.add_argument("--max-failed", type=int, help="Fail if more sales than this fail")
+    parser.add_argument("--min-rate", type=float, help="Fail if fewer sales per second than this complete")
+    args = parser.parse_args()
+
+    if not Path(args.db_path).exists():
+        parser.error(f"{args.db_path} does not exist; generate it with python -m benchmarks.dataset")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = args.db_path if args.in_place else prepare_database(args.db_path, workdir)
+        result = run(str(db_path), args.lanes, args.rate, args.duration,
+                     processes=args.processes, use_write_queue=not args.direct, seed=args.seed)
+
+    latency = result["latency_ms"]
+    print(f"{result['lanes']} lanes ({result['mode']}, {result['write_path']}), "
+          f"target {result['target_rate'] or 'max'} sales/s for {result['duration']}s")
+    print(f"  completed {result['sales']} sales, {result['sales_per_second']} sales/s, "
+          f"{result['failed']} failed, {result['busy_retries']} busy retries")
+    print(f"  latency ms  p50 {latency['p50']}  p90 {latency['p90']}  p99 {latency['p99']}  max {latency['max']}")
+    print(f"  service ms  p50 {result['service_ms']['p50']}  p99 {result['service_ms']['p99']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    failures = []
+    if args.max_p99_ms is not None and latency["p99"] > args.max_p99_ms:
+        failures.append(f"p99 latency {latency['p99']}ms > {args.max_p99_ms}ms")
+    if args.max_failed is not None and result["failed"] > args.max_failed:
+        failures.append(f"{result['failed']} failed sales > {args.max_failed}")
+    if args.min_rate is not None and result["sales_per_second"] < args.min_rate:
+        failures.append(f"{result['sales_per_second']} sales/s < {args.min_rate}")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Password hashing cost per PASSWORD_HASH_METHOD setting.
+
+For each method this times hashing a new password, verifying it (what
+every login pays) and a login that also upgrades a hash made with the
+currently configured method.
+
+Usage:
+    python -m benchmarks.login_latency --rounds 10
+    python -m benchmarks.login_latency --methods scrypt:16384:8:1 pbkdf2:sha256:600000
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.settings import PASSWORD_HASH_METHOD
+from utils.security import hash_password, verify_password, needs_rehash
+
+DEFAULT_METHODS = [
+    "scrypt:16384:8:1",
+    "scrypt:32768:8:1",
+    "scrypt:65536:8:1",
+    "pbkdf2:sha256:260000",
+    "pbkdf2:sha256:600000",
+]
+
+PASSWORD = "correct horse battery staple"
+
+
+def _time_ms(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "max_ms": round(samples[-1], 2),
+    }
+
+
+def measure(method: str, rounds: int) -> dict:
+    """Time hashing, verification and an upgrading login for one method"""
+    stored = hash_password(PASSWORD, method)
+    old = hash_password(PASSWORD)
+
+    hash_samples = [_time_ms(hash_password, PASSWORD, method) for _ in range(rounds)]
+    verify_samples = [_time_ms(verify_password, PASSWORD, stored) for _ in range(rounds)]
+
+    def upgrade_login():
+        if verify_password(PASSWORD, old) and needs_rehash(old, method):
+            hash_password(PASSWORD, method)
+
+    upgrade_samples = [_time_ms(upgrade_login) for _ in range(rounds)]
+
+    return {
+        "method": method,
+        "hash": _summary(hash_samples),
+        "verify": _summary(verify_samples),
+        "upgrade_login": _summary(upgrade_samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login latency for each password hash setting")
+    parser.add_argument("--methods", nargs="+", default=DEFAULT_METHODS)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = [measure(method, args.rounds) for method in args.methods]
+
+    print(f"Configured method: {PASSWORD_HASH_METHOD}")
+    print(f"{'method':<24} {'hash ms':>9} {'verify ms':>10} {'verify max':>11} {'upgrade ms':>11}")
+    for row in results:
+        print(f"{row['method']:<24} {row['hash']['median_ms']:>9} {row['verify']['median_ms']:>10} "
+              f"{row['verify']['max_ms']:>11} {row['upgrade_login']['median_ms']:>11}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"configured": PASSWORD_HASH_METHOD, "rounds": args.rounds, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
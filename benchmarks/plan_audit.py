@@ -0,0 +1,78 @@
+"""Query-plan regression check for the hot service queries.
+
+Runs ``EXPLAIN QUERY PLAN`` for every query in ``database.plan_audit.QUERIES``
+against a benchmark database and exits non-zero when a hot query scans a
+whole table or sorts through a temporary B-tree it isn't allowed to. Run it
+after changing a service query or an index; the plans depend on the
+statistics, so use a generated database of realistic size.
+
+``--coverage`` also runs every benchmark scenario once with SQL tracing and
+lists the SELECTs they issued that the registry doesn't cover. Like the
+scenarios, it writes sales, so never point it at the shop's database.
+
+Usage:
+    python -m benchmarks.dataset /tmp/bench.db --scale 0.01
+    python -m benchmarks.plan_audit /tmp/bench.db
+    python -m benchmarks.plan_audit /tmp/bench.db --verbose --coverage
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from typing import List
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import tracing
+from database.db_manager import DBManager
+from database.plan_audit import audit, format_audit, registered_fingerprints
+
+
+def uncovered_queries(db_path: str) -> List[str]:
+    """Fingerprints of SELECTs the benchmark scenarios run that aren't in the registry"""
+    from benchmarks.scenarios import build_scenarios
+
+    scenarios = build_scenarios(db_path)
+    tracing.reset_stats()
+    for _, func in scenarios:
+        func()
+
+    registered = registered_fingerprints()
+    return [
+        f"{row['caller']}: {row['fingerprint']}"
+        for row in tracing.get_summary(limit=10_000)
+        if row["fingerprint"].upper().startswith(("SELECT", "WITH"))
+        and row["fingerprint"] not in registered
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the query plans of the hot service queries")
+    parser.add_argument("db_path", help="Benchmark database (see benchmarks.dataset)")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan, not just failing ones")
+    parser.add_argument("--coverage", action="store_true",
+                        help="Also list queries the benchmark scenarios run that aren't audited")
+    args = parser.parse_args()
+
+    if not Path(args.db_path).exists():
+        parser.error(f"{args.db_path} does not exist; generate it with python -m benchmarks.dataset")
+
+    # Bring the schema (and its indexes) up to date first
+    DBManager(args.db_path).close()
+
+    results = audit(args.db_path)
+    print(format_audit(results, args.verbose))
+    failed = any(result["failed"] for result in results)
+
+    if args.coverage:
+        missing = uncovered_queries(args.db_path)
+        print(f"\n{len(missing)} queries run by the scenarios are not in the registry")
+        for line in missing:
+            print(f"  {line}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
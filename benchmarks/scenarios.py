@@ -0,0 +1,178 @@
+"""Repeatable timings of the app's hot paths against a benchmark database.
+
+Each scenario calls the same service method the UI does, once to warm up
+and then ``--repeat`` times; the JSON output can be passed back with
+``--compare`` to see how a change moved each number. The checkout scenario
+writes sales, so point it at a generated database, never the shop's.
+
+Usage:
+    python -m benchmarks.dataset /tmp/bench.db --scale 0.1
+    python -m benchmarks.scenarios /tmp/bench.db --json before.json
+    python -m benchmarks.scenarios /tmp/bench.db --compare before.json --only reports.sales_summary
+    python -m benchmarks.scenarios /tmp/bench.db --memory   # service logic only, no SQLite
+
+With ``--memory`` the database is copied into in-memory repositories first,
+so the numbers are the Python-side cost of the services; scenarios that still
+query SQLite directly are left out.
+"""
+
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import statistics
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.constants import TAX_RATE, PAYMENT_CASH
+from database.repositories import InMemoryRepositories
+from services.inventory_service import InventoryService
+from services.product_service import ProductService
+from services.reports_service import ReportsService
+from services.sale_service import SaleService
+from services.statistics_service import StatisticsService
+
+Scenario = Tuple[str, Callable[[], Any]]
+
+
+def _row_counts(db_path: str) -> Dict[str, int]:
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("products", "customers", "sales", "sale_items", "inventory_transactions")
+        }
+    finally:
+        conn.close()
+
+
+# Scenarios whose services don't go through the repositories yet
+_SQL_ONLY = ("inventory.load", "inventory.search", "dashboard.today_stats")
+
+
+def build_scenarios(db_path: str, seed: int = 42, memory: bool = False) -> List[Scenario]:
+    """Name and callable for every scenario, sharing warm service caches like the UI does"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    products = conn.execute("SELECT id, price, barcode FROM products WHERE is_active = 1").fetchall()
+    user_id = conn.execute("SELECT MIN(id) FROM users").fetchone()[0]
+    conn.close()
+
+    repositories = InMemoryRepositories.from_database(db_path) if memory else None
+    product_service = ProductService(db_path, repositories=repositories)
+    inventory_service = InventoryService(db_path, use_write_queue=False, repositories=repositories)
+    sale_service = SaleService(db_path, use_write_queue=False, repositories=repositories)
+    stats_service = StatisticsService(db_path)
+    reports_service = ReportsService(db_path, repositories=repositories)
+
+    today = datetime.now()
+    month_start = (today - timedelta(days=30)).strftime('%Y-%m-%d')
+    month_end = today.strftime('%Y-%m-%d 23:59:59')
+
+    def checkout():
+        cart = rng.sample(products, min(len(products), rng.randint(1, 7)))
+        items = [{"product_id": pid, "quantity": 1, "price": price} for pid, price, _ in cart]
+        subtotal = sum(item["price"] for item in items)
+        return sale_service.create_sale({
+            "user_id": user_id,
+            "items": items,
+            "total": subtotal * (1 + TAX_RATE),
+            "tax": subtotal * TAX_RATE,
+            "payment_method": PAYMENT_CASH
+        })
+
+    def cold_catalog():
+        product_service.clear_cache()
+        return product_service.get_products()
+
+    scenarios = [
+        ("checkout", checkout),
+        ("catalog.cold_load", cold_catalog),
+        ("catalog.barcode_lookup", lambda: product_service.get_products(search_term=rng.choice(products)[2])),
+        ("catalog.search", lambda: product_service.get_products(search_term="organic milk")),
+        ("inventory.load", inventory_service.get_all_products),
+        ("inventory.search", lambda: inventory_service.search_products("organic")),
+        ("inventory.recent_transactions", inventory_service.get_recent_transactions),
+        ("dashboard.today_stats", stats_service.get_today_stats),
+        ("reports.sales_summary", lambda: reports_service.get_sales_summary(month_start, month_end)),
+        ("reports.top_products", lambda: reports_service.get_top_products(10, month_start, month_end)),
+        ("reports.inventory_status", reports_service.get_inventory_status),
+        ("reports.customer_analytics", lambda: reports_service.get_customer_analytics(month_start, month_end)),
+        ("reports.daily_report", reports_service.get_daily_report),
+    ]
+    if memory:
+        scenarios = [(name, func) for name, func in scenarios if name not in _SQL_ONLY]
+    return scenarios
+
+
+def time_scenario(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Warm up once, then time ``repeat`` calls"""
+    func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time checkout, catalog, inventory, dashboard and report paths")
+    parser.add_argument("db_path", help="Benchmark database (see benchmarks.dataset)")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="+", help="Run only scenarios whose name starts with one of these")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    parser.add_argument("--memory", action="store_true", help="Run the services on in-memory repositories")
+    args = parser.parse_args()
+
+    if not Path(args.db_path).exists():
+        parser.error(f"{args.db_path} does not exist; generate it with python -m benchmarks.dataset")
+
+    scenarios = build_scenarios(args.db_path, args.seed, args.memory)
+    if args.only:
+        scenarios = [(name, func) for name, func in scenarios if name.startswith(tuple(args.only))]
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f).get("results", {})
+
+    results = {}
+    print(f"{'scenario':<32} {'median ms':>10} {'p95 ms':>9} {'max ms':>9} {'vs base':>8}")
+    for name, func in scenarios:
+        results[name] = stats = time_scenario(func, args.repeat)
+        change = "-"
+        if name in baseline and baseline[name]["median_ms"]:
+            change = f"{stats['median_ms'] / baseline[name]['median_ms']:.2f}x"
+        print(f"{name:<32} {stats['median_ms']:>10} {stats['p95_ms']:>9} {stats['max_ms']:>9} {change:>8}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "repeat": args.repeat,
+                "backend": "memory" if args.memory else "sqlite",
+                "rows": _row_counts(args.db_path),
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -57,6 +57,13 @@ PAYMENT_METHODS = [
     "Mobile Payment"
 ]
 
+# Inventory transaction types
+TRANSACTION_TYPES = [
+    "sale",
+    "manual",
+    "correction"
+]
+
 # Screen settings
 SCREEN_MIN_WIDTH = 1024
 SCREEN_MIN_HEIGHT = 768
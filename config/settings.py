@@ -19,13 +19,77 @@ DATA_DIR = BASE_DIR / 'data'
 ASSETS_DIR = BASE_DIR / 'assets'
 LOGO_PATH = ASSETS_DIR / 'logo.png'
 
-# Create directories if they don't exist
-DATA_DIR.mkdir(exist_ok=True)
-ASSETS_DIR.mkdir(exist_ok=True)
+def ensure_directories():
+    """Create the data and assets directories if they don't exist"""
+    DATA_DIR.mkdir(exist_ok=True)
+    ASSETS_DIR.mkdir(exist_ok=True)
 
 # Database
 DATABASE_PATH = DATA_DIR / 'supermarket.db'
 
+# Yearly archive partitions for closed sales periods
+ARCHIVE_DIR = DATA_DIR / 'archive'
+
+# Online backups in small steps so checkouts keep the lock between them
+BACKUP_ENABLED = os.environ.get('SUPERMARKET_BACKUPS', '1') != '0'
+BACKUP_DIR = DATA_DIR / 'backups'
+BACKUP_INTERVAL = 30 * 60  # seconds between scheduled runs; skipped when nothing changed
+BACKUP_KEEP = 24  # newest backups kept by rotation
+BACKUP_PAGES_PER_STEP = 256  # database pages copied per step
+BACKUP_STEP_SLEEP = 0.01  # seconds to pause between steps
+BACKUP_MAX_RESTARTS = 3  # copies restarted by writes before the last one runs in a single step
+
+# Group-commit write queue for checkout, stock and loyalty writes
+WRITE_QUEUE_ENABLED = True
+WRITE_QUEUE_MAX_BATCH = 64  # operations per transaction
+WRITE_QUEUE_MAX_DELAY = 0.002  # seconds to wait for more operations
+DATABASE_BUSY_TIMEOUT = 5.0  # seconds to wait on a locked database
+
+# SQL tracing (off by default): per-statement timings on every connection, slow statements logged
+SQL_TRACE_ENABLED = os.environ.get('SUPERMARKET_SQL_TRACE', '0') != '0'
+# Without tracing, statements slower than the threshold are still logged (timing only, no statistics)
+SLOW_QUERY_LOG_ENABLED = os.environ.get('SUPERMARKET_SLOW_QUERY_LOG', '1') != '0'
+SLOW_QUERY_THRESHOLD_MS = 100
+LOG_DIR = DATA_DIR / 'logs'
+SLOW_QUERY_LOG_PATH = LOG_DIR / 'slow_queries.log'
+SLOW_QUERY_LOG_MAX_BYTES = 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 3
+
+# Metrics: service and UI latency histograms, exported periodically
+METRICS_ENABLED = os.environ.get('SUPERMARKET_METRICS', '1') != '0'
+METRICS_EXPORT_FORMAT = "prometheus"  # or "json"
+METRICS_EXPORT_PATH = LOG_DIR / 'metrics.prom'
+METRICS_EXPORT_INTERVAL = 60  # seconds
+
+# Tk main-loop stall detector: samples the UI thread when a heartbeat is late
+STALL_DETECTOR_ENABLED = os.environ.get('SUPERMARKET_STALL_DETECTOR', '1') != '0'
+STALL_HEARTBEAT_MS = 50
+STALL_THRESHOLD_MS = 100
+STALL_LOG_PATH = LOG_DIR / 'stalls.log'
+STALL_REPORT_PATH = LOG_DIR / 'stall_report.txt'
+
+# One JSON line per launch with the time each startup phase took
+STARTUP_LOG_PATH = LOG_DIR / 'startup.log'
+STARTUP_TIMELINE_PRINT = os.environ.get('SUPERMARKET_STARTUP_TIMELINE') == '1'
+
+# Database maintenance (statistics, vacuum, checkpoints, index checks) while the till is idle
+MAINTENANCE_ENABLED = os.environ.get('SUPERMARKET_MAINTENANCE', '1') != '0'
+MAINTENANCE_IDLE_SECONDS = 120  # no input for this long counts as idle
+MAINTENANCE_INTERVAL = 6 * 3600  # seconds between idle runs
+MAINTENANCE_TASK_BUDGET = 2.0  # seconds per task in an idle run
+MAINTENANCE_CLOSE_BUDGET = 10.0  # seconds per task in the run after closing
+MAINTENANCE_ANALYSIS_LIMIT = 1000  # rows sampled per index by ANALYZE
+MAINTENANCE_VACUUM_PAGES = 256  # pages released per incremental vacuum step
+MAINTENANCE_MIN_FREE_FRACTION = 0.1  # free pages worth a full VACUUM when closing
+MAINTENANCE_VACUUM_BYTES_PER_SECOND = 20 * 1024 * 1024  # assumed full VACUUM speed on a slow till disk
+MAINTENANCE_LOG_PATH = LOG_DIR / 'maintenance.log'
+
+# Till identity; every POS process sharing a database needs its own lane id
+LANE_ID = os.environ.get('SUPERMARKET_LANE_ID', 'lane1')
+
+# Record checkouts in a local journal and apply them to the database in the background
+CHECKOUT_JOURNAL_ENABLED = True
+
 # Default admin credentials
 DEFAULT_ADMIN_USERNAME = "admin"
 DEFAULT_ADMIN_PASSWORD = "admin123"
@@ -46,8 +110,32 @@ MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
 DEFAULT_REORDER_LEVEL = 10
 LOW_STOCK_THRESHOLD = 5
 
+# Loyalty points earned per unit of currency spent (rounded down per sale)
+LOYALTY_POINTS_RATE = 0.01
+
+# Customer directory cache
+CUSTOMER_CACHE_SIZE = 5000  # customers kept in memory
+CUSTOMER_CACHE_TTL = 30  # seconds before a cached customer is re-read
+
+# Query cache for hot lookups on users, products and customers
+QUERY_CACHE_ENABLED = True
+QUERY_CACHE_SIZE = 2000  # results kept in memory
+
+# Shared product catalog, warmed up in the background while the login screen is shown
+CATALOG_CACHE_TTL = 30  # seconds before the catalog is reloaded in the background
+CATALOG_MAX_STALE = 300  # seconds after which a read waits for a fresh catalog
+CATALOG_WARMUP_ENABLED = True
+WARMUP_TOP_PRODUCTS = 60  # best sellers whose thumbnails are decoded ahead
+WARMUP_TOP_SELLERS_DAYS = 30
+WARMUP_IMAGE_WORKERS = 2
+PRODUCT_THUMBNAIL_SIZE = (120, 80)
+THUMBNAIL_CACHE_SIZE = 500  # decoded thumbnails kept in memory
+
 # Security settings
 PASSWORD_MIN_LENGTH = 8
+# Work factor for new password hashes, as "scrypt:N:r:p" or "pbkdf2:sha256:iterations".
+# Stored hashes made with other parameters are upgraded at the next login.
+PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
 SESSION_TIMEOUT = 3600  # 1 hour in seconds
 
 # Logging settings
@@ -0,0 +1,256 @@
+"""Year-partitioned archive for closed sales periods.
+
+Closed years of ``sales``, ``sale_items`` and ``inventory_transactions`` are
+moved out of the hot database into ``data/archive/sales_<year>.db``. Readers
+attach the archive files they need on demand and query through TEMP views
+that UNION the hot tables with every attached partition.
+"""
+
+import os
+import re
+import sqlite3
+from datetime import datetime, date
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from config.settings import DATABASE_PATH, ARCHIVE_DIR
+from database.connection import get_db_connection
+from database.ledger import ledger_schema
+from database.schema_utils import copy_table_ddl
+
+# Tables moved into the yearly archive files
+ARCHIVED_TABLES = ('sales', 'sale_items', 'inventory_transactions')
+
+# Cross-partition view name for each archived table
+VIEW_NAMES = {
+    'sales': 'all_sales',
+    'sale_items': 'all_sale_items',
+    'inventory_transactions': 'all_inventory_transactions'
+}
+
+# SQLite allows 10 attached databases by default; keep headroom for others
+MAX_ATTACHED_ARCHIVES = 8
+
+_ARCHIVE_FILE_RE = re.compile(r'^sales_(\d{4})\.db$')
+
+DateLike = Union[str, datetime, date, None]
+
+
+class ArchiveRangeError(ValueError):
+    """A date range spans more archive years than can be attached at once"""
+
+
+def archive_path(year: int) -> Path:
+    """Get the archive file path for a year"""
+    return Path(ARCHIVE_DIR) / f"sales_{year}.db"
+
+
+def list_archive_years() -> List[int]:
+    """List the years that have an archive file, oldest first"""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+
+    years = []
+    for name in os.listdir(ARCHIVE_DIR):
+        match = _ARCHIVE_FILE_RE.match(name)
+        if match:
+            years.append(int(match.group(1)))
+    return sorted(years)
+
+
+def _year_of(value: DateLike) -> Optional[int]:
+    """Extract the year from a date, datetime or 'YYYY-...' string"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.year
+    return int(str(value)[:4])
+
+
+def _schema_name(year: int) -> str:
+    return f"archive_{year}"
+
+
+def _attached_schemas(conn: sqlite3.Connection) -> List[str]:
+    return [row[1] for row in conn.execute("PRAGMA database_list")]
+
+
+def _table_columns(conn: sqlite3.Connection, schema: str, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _hot_schema(conn: sqlite3.Connection, table: str) -> str:
+    """Get the schema holding the live copy of a table"""
+    return ledger_schema(conn, table)
+
+
+def attach_archives(
+    conn: sqlite3.Connection,
+    start_date: DateLike = None,
+    end_date: DateLike = None
+) -> Dict[str, str]:
+    """Attach the archive partitions overlapping a date range.
+
+    Returns the table name to query for each archived table: the plain table
+    when no partition overlaps the range, otherwise a TEMP view that UNIONs
+    the hot table with the attached partitions.
+    """
+    start_year = _year_of(start_date)
+    end_year = _year_of(end_date)
+
+    years = [
+        year for year in list_archive_years()
+        if (start_year is None or year >= start_year)
+        and (end_year is None or year <= end_year)
+    ]
+
+    if not years:
+        return {table: table for table in ARCHIVED_TABLES}
+
+    # A shorter range would silently leave sales out of totals, so refuse instead
+    if len(years) > MAX_ATTACHED_ARCHIVES:
+        raise ArchiveRangeError(
+            f"The range covers {len(years)} archived years ({years[0]}-{years[-1]}); "
+            f"at most {MAX_ATTACHED_ARCHIVES} can be queried at once, please narrow it"
+        )
+
+    schemas = [_schema_name(year) for year in years]
+    attached = _attached_schemas(conn)
+    for name in attached:
+        if name.startswith('archive_') and name not in schemas:
+            try:
+                conn.execute(f"DETACH DATABASE {name}")
+            except sqlite3.OperationalError:
+                pass  # Still read by the open transaction; it just stays out of the views
+    for year, schema in zip(years, schemas):
+        if schema not in attached:
+            conn.execute("ATTACH DATABASE ? AS " + schema, (str(archive_path(year)),))
+
+    for table in ARCHIVED_TABLES:
+        hot_schema = _hot_schema(conn, table)
+        columns = _table_columns(conn, hot_schema, table)
+        selects = [f"SELECT {', '.join(columns)} FROM {hot_schema}.{table}"]
+
+        for schema in schemas:
+            archived_columns = set(_table_columns(conn, schema, table))
+            if not archived_columns:
+                continue
+            # Columns added to the hot table after the archive was written read as NULL
+            select_list = ', '.join(
+                column if column in archived_columns else f"NULL AS {column}"
+                for column in columns
+            )
+            selects.append(f"SELECT {select_list} FROM {schema}.{table}")
+
+        view = VIEW_NAMES[table]
+        conn.execute(f"DROP VIEW IF EXISTS temp.{view}")
+        conn.execute(f"CREATE TEMP VIEW {view} AS " + " UNION ALL ".join(selects))
+
+    return dict(VIEW_NAMES)
+
+
+def archive_year(year: int, db_path: Optional[str] = None) -> Dict[str, int]:
+    """Move one closed year out of the hot database into its archive file.
+
+    The copy and the delete run in a single transaction spanning both files,
+    so a crash leaves every row in exactly one place. Returns the number of
+    rows moved per table.
+    """
+    if year >= datetime.now().year:
+        raise ValueError(f"Cannot archive the open period {year}")
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+
+    start = f"{year}-01-01"
+    end = f"{year + 1}-01-01"
+    schema = 'archive'
+
+    conn = get_db_connection(db_path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS " + schema, (str(archive_path(year)),))
+
+        for table in ARCHIVED_TABLES:
+            copy_table_ddl(conn, table, _hot_schema(conn, table), schema)
+        conn.commit()
+
+        sales_schema = _hot_schema(conn, 'sales')
+        items_schema = _hot_schema(conn, 'sale_items')
+        ledger_source = _hot_schema(conn, 'inventory_transactions')
+
+        statements = {
+            'sales': (
+                sales_schema,
+                "sale_date >= ? AND sale_date < ?"
+            ),
+            'sale_items': (
+                items_schema,
+                f"sale_id IN (SELECT id FROM {sales_schema}.sales WHERE sale_date >= ? AND sale_date < ?)"
+            ),
+            'inventory_transactions': (
+                ledger_source,
+                "created_at >= ? AND created_at < ?"
+            )
+        }
+
+        moved = {}
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Copy everything first; sale_items are selected through their sale
+            for table in ARCHIVED_TABLES:
+                source_schema, where = statements[table]
+                columns = ', '.join(_table_columns(conn, source_schema, table))
+                cursor.execute(f"""
+                    INSERT INTO {schema}.{table} ({columns})
+                    SELECT {columns} FROM {source_schema}.{table}
+                    WHERE {where}
+                """, (start, end))
+                moved[table] = cursor.rowcount
+
+            # Delete children before the sales they are selected through
+            for table in ('sale_items', 'sales', 'inventory_transactions'):
+                source_schema, where = statements[table]
+                cursor.execute(
+                    f"DELETE FROM {source_schema}.{table} WHERE {where}",
+                    (start, end)
+                )
+
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+        return moved
+    finally:
+        conn.close()
+
+
+def archive_closed_periods(before_year: Optional[int] = None,
+                           db_path: Optional[str] = None) -> Dict[int, Dict[str, int]]:
+    """Archive every year older than ``before_year`` (default: the current year)"""
+    before_year = before_year or datetime.now().year
+    before_year = min(before_year, datetime.now().year)
+
+    conn = get_db_connection(db_path)
+    try:
+        years = set()
+        for table, column in (('sales', 'sale_date'), ('inventory_transactions', 'created_at')):
+            rows = conn.execute(f"""
+                SELECT DISTINCT CAST(strftime('%Y', {column}) AS INTEGER)
+                FROM {_hot_schema(conn, table)}.{table}
+                WHERE {column} < ?
+            """, (f"{before_year}-01-01",)).fetchall()
+            years.update(row[0] for row in rows if row[0])
+    finally:
+        conn.close()
+
+    return {year: archive_year(year, db_path) for year in sorted(years)}
+
+
+def vacuum_hot_database(db_path: Optional[str] = None):
+    """Rebuild the hot database file to release pages freed by archiving"""
+    conn = sqlite3.connect(db_path or DATABASE_PATH)
+    try:
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
@@ -0,0 +1,323 @@
+"""Online backups of the shop database while the tills keep trading.
+
+Copies are made with SQLite's backup API a few pages at a time, sleeping
+between steps, so a checkout never waits more than one step for the lock. If
+another connection writes to the database mid-copy, SQLite restarts the copy
+from a consistent point; the result is always a snapshot, never a torn file.
+
+Each backup is a directory ``data/backups/<timestamp>/`` holding the main
+database, the split ledger if there is one, and ``manifest.json``. It is built
+under a ``.partial`` name and only renamed into place once every file has
+passed ``PRAGMA integrity_check``. Runs are incremental: a scheduled run is
+skipped when the database files have not changed since the last backup, and
+the yearly archive files (written once, then read-only) are copied into
+``data/backups/archive/`` only when they are new or changed.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from config.settings import (
+    DATABASE_PATH, BACKUP_DIR, BACKUP_KEEP, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP,
+    BACKUP_MAX_RESTARTS, BACKUP_INTERVAL
+)
+from database.archive import archive_path, list_archive_years
+from database.connection import get_db_connection
+from database.ledger import LEDGER_SCHEMA, ledger_path_for
+from utils import metrics
+
+PathLike = Union[str, Path, None]
+
+MANIFEST_NAME = 'manifest.json'
+ARCHIVE_BACKUP_DIR = 'archive'
+STAMP_FORMAT = '%Y%m%d-%H%M%S'
+
+
+def _backup_seconds():
+    return metrics.histogram("backup_seconds", "Time taken by each database backup, verification included")
+
+
+def _backups_total():
+    return metrics.counter("backups_total", "Database backup runs by result")
+
+
+def _file_state(path: Path) -> Optional[List[int]]:
+    """Modification time and size, to tell whether a file changed since a backup"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _source_state(db_path: Path) -> Dict[str, Optional[List[int]]]:
+    return {
+        'main': _file_state(db_path),
+        'ledger': _file_state(ledger_path_for(db_path))
+    }
+
+
+def list_backups(backup_dir: PathLike = None) -> List[Path]:
+    """Completed backup directories, oldest first"""
+    backup_dir = Path(backup_dir or BACKUP_DIR)
+    if not backup_dir.is_dir():
+        return []
+    return sorted(
+        path for path in backup_dir.iterdir()
+        if path.is_dir() and path.name != ARCHIVE_BACKUP_DIR and not path.name.endswith('.partial')
+        and (path / MANIFEST_NAME).exists()
+    )
+
+
+def read_manifest(backup: Path) -> Dict[str, Any]:
+    """Load a backup's manifest"""
+    with open(Path(backup) / MANIFEST_NAME, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def has_changed(db_path: PathLike = None, backup_dir: PathLike = None) -> bool:
+    """Whether the database files changed since the newest backup"""
+    backups = list_backups(backup_dir)
+    if not backups:
+        return True
+    try:
+        return read_manifest(backups[-1]).get('source') != _source_state(Path(db_path or DATABASE_PATH))
+    except (OSError, ValueError):
+        return True
+
+
+def verify_database(path: PathLike) -> bool:
+    """Open a copy read-only and run ``PRAGMA integrity_check`` on it"""
+    try:
+        conn = sqlite3.connect(f"{Path(path).as_uri()}?mode=ro", uri=True)
+        try:
+            result = conn.execute("PRAGMA integrity_check").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Error verifying backup {path}: {e}")
+        return False
+
+    if result != [('ok',)]:
+        print(f"Backup {path} failed the integrity check: {result[0][0]}")
+        return False
+    return True
+
+
+class _Restarted(Exception):
+    """The source changed mid-copy and SQLite started the copy over"""
+
+
+def _copy_online(source: sqlite3.Connection, target_path: Path, name: str = 'main',
+                 pages: int = BACKUP_PAGES_PER_STEP, step_sleep: float = BACKUP_STEP_SLEEP) -> Dict[str, int]:
+    """Copy one schema of ``source`` a few pages at a time.
+
+    A write from another connection between steps makes SQLite start over.
+    Rather than chase a busy till forever, each restart retries with larger
+    steps; the last attempt copies in a single step, holding the read lock
+    (and making writers wait) for as long as one file copy takes.
+    """
+    stats = {'steps': 0, 'restarts': 0, 'pages': 0}
+
+    while True:
+        last_remaining = None
+        single_step = pages < 0 or stats['restarts'] >= BACKUP_MAX_RESTARTS
+
+        def progress(status, remaining, total):
+            nonlocal last_remaining
+            stats['steps'] += 1
+            stats['pages'] = total
+            # Every step copies at least one page, so no progress means SQLite started over
+            if last_remaining is not None and remaining >= last_remaining:
+                raise _Restarted()
+            last_remaining = remaining
+            # Leave the lock free for checkouts between steps
+            if remaining and step_sleep:
+                time.sleep(step_sleep)
+
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target, pages=-1 if single_step else pages, progress=progress, name=name)
+            return stats
+        except _Restarted:
+            stats['restarts'] += 1
+            pages *= 8
+        finally:
+            target.close()
+
+
+def _copy_archives(backup_dir: Path, pages: int, step_sleep: float) -> List[str]:
+    """Copy archive files that are new or changed since they were last backed up"""
+    archive_dir = backup_dir / ARCHIVE_BACKUP_DIR
+    state_path = archive_dir / MANIFEST_NAME
+    try:
+        with open(state_path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+
+    copied = []
+    for year in list_archive_years():
+        source_path = archive_path(year)
+        file_state = _file_state(source_path)
+        if state.get(source_path.name) == file_state:
+            continue
+
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = archive_dir / f"{source_path.name}.partial"
+        source = sqlite3.connect(f"{source_path.as_uri()}?mode=ro", uri=True)
+        try:
+            _copy_online(source, temp_path, pages=pages, step_sleep=step_sleep)
+        finally:
+            source.close()
+        if not verify_database(temp_path):
+            temp_path.unlink()
+            raise sqlite3.DatabaseError(f"Archive backup of {source_path.name} is corrupt")
+        os.replace(temp_path, archive_dir / source_path.name)
+        state[source_path.name] = file_state
+        copied.append(source_path.name)
+
+    if copied:
+        with open(state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+    return copied
+
+
+def backup_database(db_path: PathLike = None, backup_dir: PathLike = None,
+                    pages: int = BACKUP_PAGES_PER_STEP, step_sleep: float = BACKUP_STEP_SLEEP,
+                    keep: int = BACKUP_KEEP, only_if_changed: bool = False,
+                    include_archives: bool = True) -> Optional[Path]:
+    """Back up the database (and split ledger) into a new verified backup directory.
+
+    Returns the backup directory, or None when the run was skipped because
+    nothing changed or the backup failed.
+    """
+    db_path = Path(db_path or DATABASE_PATH)
+    backup_dir = Path(backup_dir or BACKUP_DIR)
+    source_state = _source_state(db_path)
+
+    if only_if_changed and not has_changed(db_path, backup_dir):
+        _backups_total().inc(result='unchanged')
+        return None
+
+    started = time.perf_counter()
+    started_at = datetime.now()
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    partial = Path(tempfile.mkdtemp(prefix=started_at.strftime(STAMP_FORMAT) + '-', suffix='.partial',
+                                    dir=backup_dir))
+    try:
+        files = {}
+        source = get_db_connection(db_path)
+        try:
+            schemas = [row[1] for row in source.execute("PRAGMA database_list")]
+            targets = {'main': db_path.name}
+            if LEDGER_SCHEMA in schemas:
+                targets[LEDGER_SCHEMA] = ledger_path_for(db_path).name
+            for schema, file_name in targets.items():
+                files[file_name] = _copy_online(source, partial / file_name, schema, pages, step_sleep)
+        finally:
+            source.close()
+
+        for file_name in files:
+            if not verify_database(partial / file_name):
+                raise sqlite3.DatabaseError(f"Backup of {file_name} is corrupt")
+
+        archives = _copy_archives(backup_dir, pages, step_sleep) if include_archives else []
+
+        duration = time.perf_counter() - started
+        with open(partial / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': started_at.isoformat(timespec='seconds'),
+                'database': str(db_path),
+                'source': source_state,
+                'files': files,
+                'archives_copied': archives,
+                'duration_seconds': round(duration, 3),
+                'integrity_check': 'ok'
+            }, f, indent=2)
+
+        target = backup_dir / started_at.strftime(STAMP_FORMAT)
+        suffix = 1
+        while target.exists():
+            suffix += 1
+            target = backup_dir / f"{started_at.strftime(STAMP_FORMAT)}-{suffix}"
+        os.replace(partial, target)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Error backing up database: {e}")
+        shutil.rmtree(partial, ignore_errors=True)
+        _backups_total().inc(result='failed')
+        return None
+
+    _backup_seconds().observe(duration)
+    _backups_total().inc(result='ok')
+    rotate_backups(backup_dir, keep)
+    return target
+
+
+def rotate_backups(backup_dir: PathLike = None, keep: int = BACKUP_KEEP) -> List[Path]:
+    """Delete all but the ``keep`` newest backups; returns the deleted directories"""
+    backups = list_backups(backup_dir)
+    removed = backups[:-keep] if keep > 0 else []
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+    return removed
+
+
+def restore_backup(backup: PathLike, db_path: PathLike = None) -> bool:
+    """Copy a verified backup over the database; only while no till is running"""
+    backup = Path(backup)
+    db_path = Path(db_path or DATABASE_PATH)
+    targets = {db_path.name: db_path, ledger_path_for(db_path).name: ledger_path_for(db_path)}
+    try:
+        files = read_manifest(backup)['files']
+        for file_name in files:
+            if not verify_database(backup / file_name):
+                return False
+        for file_name in files:
+            source = sqlite3.connect(f"{(backup / file_name).as_uri()}?mode=ro", uri=True)
+            try:
+                _copy_online(source, targets[file_name], step_sleep=0)
+            finally:
+                source.close()
+        return True
+    except (sqlite3.Error, OSError, KeyError, ValueError) as e:
+        print(f"Error restoring backup: {e}")
+        return False
+
+
+class BackupScheduler:
+    """Runs incremental backups from a background thread"""
+
+    def __init__(self, db_path: PathLike = None, interval: float = BACKUP_INTERVAL):
+        self.db_path = db_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start backing up every ``interval`` seconds"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Stop the scheduler; a backup in progress finishes first up to ``timeout``"""
+        thread = self._thread
+        self._thread = None
+        self._stop.set()
+        if thread:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            backup_database(self.db_path, only_if_changed=True)
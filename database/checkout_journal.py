@@ -0,0 +1,395 @@
+"""Crash-durable checkout journal applied to SQLite in the background.
+
+A completed cart is appended to ``journal/<db>_checkout_<lane>.journal`` next
+to the database and fsync'd before the till moves on, so finishing a sale
+never waits for the database lock. A worker thread applies entries through
+the group-commit write queue and records each entry id in
+``checkout_journal_applied`` in the same transaction, which makes replay after
+a crash idempotent. Once every entry is applied the journal is truncated.
+
+An entry the database refuses (e.g. stock ran out on another lane) is kept in
+``checkout_journal_applied`` with its cart and error for a manager to review
+(``get_failed_entries``), and ``on_failure`` is called with the sale data of
+entries recorded by this process.
+
+Only one process per lane id may use a journal file.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from config.settings import DATABASE_PATH, DATETIME_FORMAT, LANE_ID
+from database.connection import get_db_connection, is_busy_error
+from database.write_queue import get_write_queue
+from utils import metrics
+
+# Seconds between attempts while the database stays locked
+RETRY_DELAY = 0.5
+
+WriteSale = Callable[[sqlite3.Cursor, Dict[str, Any]], int]
+OnFailure = Callable[[Dict[str, Any]], None]
+
+
+def journal_path_for(db_path: Union[str, Path, None] = None, lane_id: str = LANE_ID) -> Path:
+    """Get the checkout journal file for a database and lane"""
+    path = Path(db_path or DATABASE_PATH)
+    return path.parent / 'journal' / f"{path.stem}_checkout_{lane_id}.journal"
+
+
+def encode_entry(entry_id: str, sale_data: Dict[str, Any], created_at: str) -> bytes:
+    """Encode a cart as one compact journal line"""
+    return json.dumps({
+        "id": entry_id,
+        "t": created_at,
+        "u": sale_data["user_id"],
+        "c": sale_data.get("customer_id"),
+        "p": sale_data["payment_method"],
+        "tot": sale_data["total"],
+        "tax": sale_data["tax"],
+        "d": sale_data.get("discount", 0.0),
+        "i": [
+            [item["product_id"], item["quantity"], item["price"], item.get("discount_percent", 0.0)]
+            for item in sale_data["items"]
+        ]
+    }, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def decode_entry(line: bytes) -> Dict[str, Any]:
+    """Decode a journal line back into an entry id and sale data"""
+    raw = json.loads(line)
+    return {
+        "id": raw["id"],
+        "sale_data": {
+            "user_id": raw["u"],
+            "customer_id": raw["c"],
+            "payment_method": raw["p"],
+            "total": raw["tot"],
+            "tax": raw["tax"],
+            "discount": raw["d"],
+            "sale_date": raw["t"],
+            "items": [
+                {"product_id": pid, "quantity": qty, "price": price, "discount_percent": discount}
+                for pid, qty, price, discount in raw["i"]
+            ]
+        }
+    }
+
+
+class CheckoutJournal:
+    """Append-only checkout journal for one lane"""
+
+    def __init__(self, write_sale: WriteSale, db_path: Optional[Union[str, Path]] = None,
+                 lane_id: str = LANE_ID, on_failure: Optional[OnFailure] = None):
+        self.write_sale = write_sale
+        self.on_failure = on_failure
+        self.db_path = db_path or DATABASE_PATH
+        self.path = journal_path_for(self.db_path, lane_id)
+
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        # entry id -> entry, in journal order
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._applied: Dict[str, int] = {}
+
+    def start(self):
+        """Open the journal, replay unapplied entries and start the worker"""
+        with self._lock:
+            if self._thread:
+                return
+            os.makedirs(self.path.parent, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+            self._load_unapplied()
+            self._thread = threading.Thread(target=self._run, name="checkout-journal", daemon=True)
+            self._thread.start()
+            metrics.gauge("checkout_journal_pending", "Journaled sales not yet in the database") \
+                .set_function(self.pending_count, lane=self.path.stem)
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Try to apply what is pending, then stop the worker and close the file"""
+        if not self._thread:
+            return
+        self.flush(timeout)
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout)
+        with self._lock:
+            os.close(self._fd)
+            self._fd = None
+            self._thread = None
+
+    def record_sale(self, sale_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Durably record a completed cart and return a provisional sale"""
+        if not self._thread:
+            self.start()
+
+        entry_id = uuid.uuid4().hex
+        created_at = datetime.utcnow().strftime(DATETIME_FORMAT)
+        line = encode_entry(entry_id, sale_data, created_at)
+
+        with self._lock:
+            os.write(self._fd, line)
+            os.fsync(self._fd)
+            # "live": recorded by this process, so its stock is already off the catalog
+            self._pending[entry_id] = {"id": entry_id, "sale_data": dict(sale_data, sale_date=created_at), "live": True}
+            self._idle.clear()
+        self._wake.set()
+
+        return self._provisional_sale(entry_id, sale_data, created_at)
+
+    def sale_id(self, entry_id: str) -> Optional[int]:
+        """Get the sale id an entry was applied as, if it has been applied"""
+        return self._applied.get(entry_id)
+
+    def pending_count(self) -> int:
+        """Number of recorded sales not yet in the database"""
+        return len(self._pending)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every recorded sale has been applied"""
+        if not self._pending:
+            return True
+        self._wake.set()
+        return self._idle.wait(timeout)
+
+    def _provisional_sale(self, entry_id: str, sale_data: Dict[str, Any], created_at: str) -> Dict[str, Any]:
+        """Build a sale dict for the ticket before the database has the sale"""
+        return {
+            "id": None,
+            "journal_id": entry_id,
+            "invoice_number": f"PENDING-{entry_id[:8].upper()}",
+            "customer_id": sale_data.get("customer_id"),
+            "user_id": sale_data["user_id"],
+            "total": float(sale_data["total"]),
+            "discount": float(sale_data.get("discount", 0.0)),
+            "tax": float(sale_data["tax"]),
+            "payment_method": sale_data["payment_method"],
+            "payment_status": "pending",
+            "sale_date": created_at,
+            "items": [{
+                "product_id": item["product_id"],
+                "product_name": item.get("product_name", ""),
+                "quantity": item["quantity"],
+                "price": float(item["price"]),
+                "discount_percent": float(item.get("discount_percent", 0.0)),
+                "subtotal": (item["quantity"] * item["price"]) * (1 - item.get("discount_percent", 0.0) / 100)
+            } for item in sale_data["items"]]
+        }
+
+    def _load_unapplied(self):
+        """Queue journal entries the database has not seen yet"""
+        with open(self.path, 'rb') as f:
+            data = f.read()
+
+        entries = []
+        for line in data.splitlines():
+            try:
+                entries.append(decode_entry(line))
+            except (ValueError, KeyError, TypeError):
+                # A torn last line from a crash mid-append was never acknowledged
+                continue
+
+        # Terminate a torn line so the next append starts on its own line
+        if data and not data.endswith(b'\n'):
+            os.write(self._fd, b'\n')
+            os.fsync(self._fd)
+
+        if not entries:
+            return
+
+        conn = get_db_connection(self.db_path)
+        try:
+            _create_applied_table(conn)
+            applied = set()
+            ids = [entry["id"] for entry in entries]
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = conn.execute(
+                    "SELECT entry_id FROM checkout_journal_applied WHERE entry_id IN "
+                    f"({', '.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                applied.update(row[0] for row in rows)
+        finally:
+            conn.close()
+
+        for entry in entries:
+            if entry["id"] not in applied:
+                self._pending[entry["id"]] = entry
+
+        if self._pending:
+            print(f"Replaying {len(self._pending)} checkout journal entries")
+
+    def _apply_entry(self, cursor: sqlite3.Cursor, entry: Dict[str, Any]) -> int:
+        """Apply one entry inside the write queue's transaction"""
+        cursor.execute(
+            "SELECT sale_id FROM checkout_journal_applied WHERE entry_id = ?",
+            (entry["id"],)
+        )
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+
+        sale_id = self.write_sale(cursor, entry["sale_data"])
+        cursor.execute(
+            "INSERT INTO checkout_journal_applied (entry_id, sale_id) VALUES (?, ?)",
+            (entry["id"], sale_id)
+        )
+        return sale_id
+
+    @staticmethod
+    def _record_failure(cursor: sqlite3.Cursor, entry: Dict[str, Any], error: str):
+        sale_data = entry["sale_data"]
+        cart = encode_entry(entry["id"], sale_data, sale_data["sale_date"]).decode('utf-8').strip()
+        cursor.execute(
+            "INSERT OR IGNORE INTO checkout_journal_applied (entry_id, sale_id, error, entry) VALUES (?, NULL, ?, ?)",
+            (entry["id"], error, cart)
+        )
+
+    def _apply_pending(self) -> bool:
+        """Apply a snapshot of the pending entries. Returns False if the database stayed busy."""
+        with self._lock:
+            entries: List[Dict[str, Any]] = list(self._pending.values())
+        if not entries:
+            return True
+
+        write_queue = get_write_queue(self.db_path)
+        futures = [(entry, write_queue.submit(self._apply_entry, entry)) for entry in entries]
+
+        busy = False
+        for entry, future in futures:
+            try:
+                self._applied[entry["id"]] = future.result()
+            except Exception as e:
+                if is_busy_error(e):
+                    busy = True
+                    continue
+                # The cart can't be applied as recorded (e.g. stock ran out); keep it for review
+                print(f"Error applying checkout journal entry {entry['id']}: {e}")
+                try:
+                    write_queue.submit(self._record_failure, entry, str(e)).result()
+                except Exception as record_error:
+                    if is_busy_error(record_error):
+                        busy = True
+                        continue
+                    raise
+                if self.on_failure and entry.get("live"):
+                    try:
+                        self.on_failure(entry["sale_data"])
+                    except Exception as callback_error:
+                        print(f"Error handling failed checkout journal entry {entry['id']}: {callback_error}")
+            with self._lock:
+                self._pending.pop(entry["id"], None)
+
+        return not busy
+
+    def _compact(self):
+        """Truncate the journal once everything in it is applied"""
+        with self._lock:
+            if self._pending:
+                return
+            if os.fstat(self._fd).st_size:
+                os.ftruncate(self._fd, 0)
+                os.fsync(self._fd)
+            self._idle.set()
+
+    def _run(self):
+        conn = get_db_connection(self.db_path)
+        try:
+            _create_applied_table(conn)
+        finally:
+            conn.close()
+
+        while True:
+            self._wake.wait(RETRY_DELAY if self._pending else None)
+            self._wake.clear()
+            if self._stopping:
+                break
+            try:
+                if self._apply_pending():
+                    self._compact()
+            except Exception as e:
+                print(f"Checkout journal error: {e}")
+
+
+def _create_applied_table(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS checkout_journal_applied (
+            entry_id TEXT PRIMARY KEY,
+            sale_id INTEGER,
+            error TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            entry TEXT
+        )
+    """)
+    # The refused cart itself, for review (added after the table first shipped)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(checkout_journal_applied)")]
+    if 'entry' not in columns:
+        conn.execute("ALTER TABLE checkout_journal_applied ADD COLUMN entry TEXT")
+    conn.commit()
+
+
+def get_failed_entries(db_path: Optional[Union[str, Path]] = None) -> List[Dict[str, Any]]:
+    """List journal entries that could not be applied, with their carts where recorded"""
+    conn = get_db_connection(db_path)
+    try:
+        _create_applied_table(conn)
+        rows = conn.execute("""
+            SELECT entry_id, error, applied_at, entry
+            FROM checkout_journal_applied
+            WHERE sale_id IS NULL
+            ORDER BY applied_at
+        """).fetchall()
+    finally:
+        conn.close()
+
+    failed = []
+    for entry_id, error, failed_at, cart in rows:
+        try:
+            sale_data = decode_entry(cart.encode('utf-8'))["sale_data"] if cart else None
+        except (ValueError, KeyError, TypeError):
+            sale_data = None
+        failed.append({"entry_id": entry_id, "error": error, "failed_at": failed_at, "sale_data": sale_data})
+    return failed
+
+
+_journals: Dict[str, CheckoutJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_checkout_journal(write_sale: WriteSale, db_path: Optional[Union[str, Path]] = None,
+                         on_failure: Optional[OnFailure] = None) -> CheckoutJournal:
+    """Get the started checkout journal for a database file"""
+    key = str(db_path or DATABASE_PATH)
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = CheckoutJournal(write_sale, key, on_failure=on_failure)
+            _journals[key] = journal
+        journal.start()
+        return journal
+
+
+def stop_checkout_journals():
+    """Apply what can be applied and close every journal"""
+    with _journals_lock:
+        journals = list(_journals.values())
+        _journals.clear()
+    for journal in journals:
+        journal.stop()
+
+
+atexit.register(stop_checkout_journals)
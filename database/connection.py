@@ -1,7 +1,30 @@
 import sqlite3
 from pathlib import Path
+from typing import Optional, Union
 
-def get_db_connection():
-    """Get a connection to the SQLite database"""
-    db_path = Path(__file__).parent.parent / 'data' / 'supermarket.db'
-    return sqlite3.connect(db_path) 
\ No newline at end of file
+from config.settings import DATABASE_PATH, DATABASE_BUSY_TIMEOUT, SQL_TRACE_ENABLED, SLOW_QUERY_LOG_ENABLED
+from database.ledger import attach_ledger
+from database.tracing import SlowQueryConnection, TracedConnection
+
+def get_db_connection(db_path: Optional[Union[str, Path]] = None, **kwargs) -> sqlite3.Connection:
+    """Get a connection to the SQLite database.
+
+    All services open their connections here so storage options such as the
+    split inventory ledger, SQL tracing and the slow-query log, apply everywhere.
+    """
+    db_path = db_path or DATABASE_PATH
+    kwargs.setdefault('timeout', DATABASE_BUSY_TIMEOUT)
+    if SQL_TRACE_ENABLED:
+        kwargs.setdefault('factory', TracedConnection)
+    elif SLOW_QUERY_LOG_ENABLED:
+        kwargs.setdefault('factory', SlowQueryConnection)
+    conn = sqlite3.connect(db_path, **kwargs)
+    attach_ledger(conn, db_path)
+    return conn
+
+def is_busy_error(error: Exception) -> bool:
+    """Check whether an error means another connection holds the database lock"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
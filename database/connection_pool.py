@@ -3,6 +3,7 @@ import threading
 from queue import Queue
 from typing import Optional
 from config.settings import DATABASE_PATH
+from database.connection import get_db_connection
 
 class ConnectionPool:
     """Simple SQLite connection pool for better performance"""
@@ -14,7 +15,7 @@ class ConnectionPool:
         
         # Initialize pool with connections
         for _ in range(pool_size):
-            conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
+            conn = get_db_connection(DATABASE_PATH, check_same_thread=False)
             conn.row_factory = sqlite3.Row
             self.pool.put(conn)
     
@@ -1,27 +1,46 @@
 import os
 import sqlite3
+import threading
 from typing import Optional, List, Dict, Any
 
 from config.settings import DATABASE_PATH, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
 from config.constants import ROLE_ADMIN
+from database.connection import get_db_connection
+from database.ledger import ledger_schema
+from database.migrations import run_migrations
 from utils.security import hash_password
 
+# Database files whose schema has been checked by this process
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
 class DBManager:
     """Database manager for the application"""
     
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or DATABASE_PATH
+        
         # Create database directory if it doesn't exist
-        os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
         # Initialize database
-        self.conn = sqlite3.connect(DATABASE_PATH)
+        self.conn = get_db_connection(self.db_path)
         self.conn.row_factory = sqlite3.Row
         
-        # Create tables if they don't exist
-        self.create_tables()
-        
-        # Create default admin user if no users exist
-        self.create_default_admin()
+        # Schema setup only needs to run once per process
+        with _init_lock:
+            key = os.path.abspath(self.db_path)
+            if key not in _initialized_paths:
+                # Create tables if they don't exist
+                self.create_tables()
+                
+                # Bring existing databases up to the current schema
+                run_migrations(self.conn)
+                
+                # Create default admin user if no users exist
+                self.create_default_admin()
+                
+                _initialized_paths.add(key)
     
     def create_tables(self):
         """Create database tables if they don't exist"""
@@ -86,9 +105,10 @@ class DBManager:
                 sample_products
             )
         
-        # Inventory transactions table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS inventory_transactions (
+        # Inventory transactions table (lives in the ledger file when split)
+        ledger = ledger_schema(self.conn)
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {ledger}.inventory_transactions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             product_id INTEGER NOT NULL,
             quantity_change INTEGER NOT NULL,
@@ -151,6 +171,23 @@ class DBManager:
         )
         ''')
         
+        # Held (parked) carts, shared by every lane
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS held_sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lane_id TEXT NOT NULL,
+            user_id INTEGER,
+            customer_id INTEGER,
+            customer_name TEXT,
+            items TEXT NOT NULL,
+            item_count INTEGER NOT NULL,
+            subtotal REAL NOT NULL,
+            tax REAL NOT NULL,
+            total REAL NOT NULL,
+            held_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
         # Create indexes for performance
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_category ON products(category)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)')
@@ -6,8 +6,8 @@ from pathlib import Path
 # Add parent directory to Python path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from werkzeug.security import generate_password_hash
 from config.settings import DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from utils.security import hash_password
 
 def init_db():
     """Initialize the database with schema and sample data"""
@@ -38,7 +38,7 @@ def init_db():
             cursor.executescript(f.read())
         
         # Create default admin user with password from settings
-        password_hash = generate_password_hash(DEFAULT_ADMIN_PASSWORD)
+        password_hash = hash_password(DEFAULT_ADMIN_PASSWORD)
         cursor.execute("""
             INSERT INTO users (
                 username, password_hash, full_name, email, role,
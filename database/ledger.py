@@ -0,0 +1,112 @@
+"""Optional split of the append-only audit tables into their own database file.
+
+When ``<db>_ledger.db`` exists next to the main database, every connection
+from ``get_db_connection`` attaches it as ``ledger``. The tables in
+``LEDGER_TABLES`` then live only in that file and unqualified queries resolve
+to them, so services keep their SQL unchanged. A transaction touching both
+files (checkout, stock adjustment) commits atomically through SQLite's
+super-journal as long as the databases stay in rollback-journal mode.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Union
+
+from config.settings import DATABASE_PATH
+from database.schema_utils import copy_table_ddl
+
+# Append-only audit tables kept in the ledger file
+LEDGER_TABLES = ('inventory_transactions',)
+
+LEDGER_SCHEMA = 'ledger'
+
+PathLike = Union[str, Path, None]
+
+
+def ledger_path_for(db_path: PathLike = None) -> Path:
+    """Get the ledger file path for a main database file"""
+    path = Path(db_path or DATABASE_PATH)
+    return path.with_name(f"{path.stem}_ledger{path.suffix}")
+
+
+def is_ledger_split(db_path: PathLike = None) -> bool:
+    """Check whether the database uses a separate ledger file"""
+    return os.path.exists(ledger_path_for(db_path))
+
+
+def attach_ledger(conn: sqlite3.Connection, db_path: PathLike = None) -> bool:
+    """Attach the ledger file to a connection if the ledger is split"""
+    ledger_path = ledger_path_for(db_path)
+    if not os.path.exists(ledger_path):
+        return False
+
+    conn.execute(f"ATTACH DATABASE ? AS {LEDGER_SCHEMA}", (str(ledger_path),))
+    return True
+
+
+def ledger_schema(conn: sqlite3.Connection, table: str = 'inventory_transactions') -> str:
+    """Get the schema that holds a table on this connection"""
+    if table in LEDGER_TABLES:
+        for row in conn.execute("PRAGMA database_list"):
+            if row[1] == LEDGER_SCHEMA:
+                return LEDGER_SCHEMA
+    return 'main'
+
+
+def _move_tables(conn: sqlite3.Connection, source: str, target: str):
+    """Copy the ledger tables from one schema to another and drop the source"""
+    cursor = conn.cursor()
+    for table in LEDGER_TABLES:
+        copy_table_ddl(conn, table, source, target)
+
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for table in LEDGER_TABLES:
+            columns = ', '.join(row[1] for row in conn.execute(f"PRAGMA {source}.table_info({table})"))
+            cursor.execute(f"INSERT INTO {target}.{table} ({columns}) SELECT {columns} FROM {source}.{table}")
+            cursor.execute(f"DROP TABLE {source}.{table}")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+def split_ledger(db_path: PathLike = None) -> bool:
+    """Move the ledger tables into their own file. Returns False if already split."""
+    if is_ledger_split(db_path):
+        return False
+
+    ledger_path = ledger_path_for(db_path)
+    conn = sqlite3.connect(db_path or DATABASE_PATH)
+    try:
+        conn.execute(f"ATTACH DATABASE ? AS {LEDGER_SCHEMA}", (str(ledger_path),))
+        _move_tables(conn, 'main', LEDGER_SCHEMA)
+        return True
+    except sqlite3.Error:
+        conn.close()
+        conn = None
+        # Don't leave a half-created ledger file that would get attached
+        if os.path.exists(ledger_path):
+            os.remove(ledger_path)
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+
+def merge_ledger(db_path: PathLike = None) -> bool:
+    """Move the ledger tables back into the main file and remove the ledger file"""
+    if not is_ledger_split(db_path):
+        return False
+
+    ledger_path = ledger_path_for(db_path)
+    conn = sqlite3.connect(db_path or DATABASE_PATH)
+    try:
+        conn.execute(f"ATTACH DATABASE ? AS {LEDGER_SCHEMA}", (str(ledger_path),))
+        _move_tables(conn, LEDGER_SCHEMA, 'main')
+    finally:
+        conn.close()
+
+    os.remove(ledger_path)
+    return True
@@ -0,0 +1,418 @@
+"""Database maintenance run while the till is idle or after closing.
+
+Each run works through four tasks on the main database and the split ledger:
+
+- ``optimize``: ``ANALYZE`` tables that have no statistics yet, then
+  ``PRAGMA optimize`` for the rest, sampling at most ``analysis_limit`` rows
+  per index.
+- ``vacuum``: ``PRAGMA incremental_vacuum`` in small steps to hand pages
+  freed by deletes and archiving back to the file system. Files still in
+  ``auto_vacuum = NONE`` are converted with one full ``VACUUM``, which needs
+  the database to itself, so only closing runs do it, and only for files
+  small enough to rebuild within the task budget. Larger files are left to
+  ``--run``, which converts them without a time limit.
+- ``checkpoint``: ``PRAGMA wal_checkpoint(TRUNCATE)`` for files in WAL mode
+  (the shop database keeps the rollback journal, so this is usually skipped).
+- ``indexes``: ``PRAGMA integrity_check(<table>)`` on as many tables as fit
+  in the budget, continuing where the previous run stopped; closing runs
+  ``REINDEX`` tables whose indexes disagree with them.
+
+Every task has a time budget and stops, rolled back by SQLite, as soon as it
+runs out or the till is used again. The report records file size and free
+pages before and after, and which of the hot queries in the plan audit
+(``database.plan_audit``) changed plan or stopped failing it. Runs are
+appended as JSON lines to ``MAINTENANCE_LOG_PATH``:
+
+    python -m database.maintenance --run    # maintain now (as if after closing)
+    python -m database.maintenance          # recent runs
+    python -m database.maintenance --db /tmp/copy.db --log /tmp/maintenance.log --run
+"""
+
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from config.settings import (
+    DATABASE_PATH, MAINTENANCE_IDLE_SECONDS, MAINTENANCE_INTERVAL, MAINTENANCE_TASK_BUDGET,
+    MAINTENANCE_CLOSE_BUDGET, MAINTENANCE_ANALYSIS_LIMIT, MAINTENANCE_VACUUM_PAGES,
+    MAINTENANCE_MIN_FREE_FRACTION, MAINTENANCE_VACUUM_BYTES_PER_SECOND, MAINTENANCE_LOG_PATH
+)
+from database.connection import get_db_connection
+from database.plan_audit import QUERIES, hot_plans, plan_problems
+from utils import metrics
+
+PathLike = Union[str, Path, None]
+
+# Where each database's index check stopped, so the next run continues there
+_next_table: Dict[str, int] = {}
+
+
+class _Stop(Exception):
+    """The task ran out of time or the till was used again"""
+
+
+def _schemas(conn: sqlite3.Connection) -> List[str]:
+    return [row[1] for row in conn.execute("PRAGMA database_list") if row[1] != 'temp']
+
+
+def _file_stats(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Total bytes and free pages over every database file of the connection"""
+    size = free = 0
+    for schema in _schemas(conn):
+        page_size = conn.execute(f"PRAGMA {schema}.page_size").fetchone()[0]
+        size += conn.execute(f"PRAGMA {schema}.page_count").fetchone()[0] * page_size
+        free += conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+    return {"bytes": size, "free_pages": free}
+
+
+def query_plans(conn: sqlite3.Connection) -> Dict[str, str]:
+    """``EXPLAIN QUERY PLAN`` of each hot query, one line per query"""
+    return hot_plans(conn)
+
+
+def _full_scans(plans: Dict[str, str]) -> List[str]:
+    """Hot queries whose plan fails the plan audit"""
+    return sorted(name for name, plan in plans.items() if plan_problems(QUERIES[name], plan.split("; ")))
+
+
+class MaintenanceRun:
+    """One pass over the maintenance tasks, each within its own time budget"""
+
+    def __init__(self, db_path: PathLike = None, task_budget: float = MAINTENANCE_TASK_BUDGET,
+                 should_stop: Optional[Callable[[], bool]] = None, closing: bool = False,
+                 full_vacuum: bool = False):
+        self.db_path = str(db_path or DATABASE_PATH)
+        self.task_budget = task_budget
+        self.should_stop = should_stop or (lambda: False)
+        self.closing = closing
+        # Convert files of any size with an uninterrupted VACUUM (the --run CLI)
+        self.full_vacuum = full_vacuum
+        self._deadline = 0.0
+        self.conn = get_db_connection(self.db_path, isolation_level=None)
+
+    def _check(self):
+        if time.monotonic() > self._deadline or self.should_stop():
+            raise _Stop()
+
+    def _progress(self) -> int:
+        # Non-zero interrupts the running statement
+        return 1 if time.monotonic() > self._deadline or self.should_stop() else 0
+
+    def run(self) -> Dict[str, Any]:
+        """Run every task and return the report"""
+        tasks = [
+            ("optimize", self.optimize),
+            ("vacuum", self.vacuum),
+            ("checkpoint", self.checkpoint),
+            ("indexes", self.check_indexes),
+        ]
+        task_seconds = metrics.histogram("maintenance_seconds", "Time spent on each database maintenance task")
+        task_results = metrics.counter("maintenance_tasks_total", "Database maintenance tasks by outcome")
+
+        started_at = datetime.now()
+        try:
+            before = _file_stats(self.conn)
+            plans_before = query_plans(self.conn)
+            report: Dict[str, Any] = {"tasks": {}}
+            for name, task in tasks:
+                if self.should_stop():
+                    report["tasks"][name] = {"status": "stopped"}
+                    continue
+                start = time.perf_counter()
+                self._deadline = time.monotonic() + self.task_budget
+                self.conn.set_progress_handler(self._progress, 1000)
+                try:
+                    result = task() or {}
+                    result.setdefault("status", "done")
+                except _Stop:
+                    result = {"status": "stopped"}
+                except sqlite3.OperationalError as e:
+                    # Interrupted by the progress handler, or the database stayed locked
+                    result = {"status": "stopped" if "interrupt" in str(e) else "failed", "error": str(e)}
+                except sqlite3.Error as e:
+                    result = {"status": "failed", "error": str(e)}
+                finally:
+                    self.conn.set_progress_handler(None, 0)
+                    if self.conn.in_transaction:
+                        self.conn.execute("ROLLBACK")
+                result["seconds"] = round(time.perf_counter() - start, 3)
+                task_seconds.observe(result["seconds"], task=name)
+                task_results.inc(task=name, status=result["status"])
+                report["tasks"][name] = result
+
+            after = _file_stats(self.conn)
+            plans_after = query_plans(self.conn)
+        finally:
+            self.conn.close()
+
+        report.update({
+            "timestamp": started_at.isoformat(timespec="seconds"),
+            "database": self.db_path,
+            "closing": self.closing,
+            "bytes_before": before["bytes"],
+            "bytes_after": after["bytes"],
+            "free_pages_before": before["free_pages"],
+            "free_pages_after": after["free_pages"],
+            "plans_changed": sorted(name for name in plans_after if plans_after[name] != plans_before.get(name)),
+            "full_scans_before": _full_scans(plans_before),
+            "full_scans_after": _full_scans(plans_after),
+        })
+        return report
+
+    def optimize(self) -> Dict[str, Any]:
+        """Analyze tables without statistics, then let ``PRAGMA optimize`` refresh stale ones"""
+        self.conn.execute(f"PRAGMA analysis_limit = {int(MAINTENANCE_ANALYSIS_LIMIT)}")
+        analyzed = []
+        for schema in self._schemas_checked():
+            tables = [row[0] for row in self.conn.execute(
+                f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )]
+            has_stats = set()
+            if self.conn.execute(
+                f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone():
+                has_stats = {row[0] for row in self.conn.execute(f"SELECT DISTINCT tbl FROM {schema}.sqlite_stat1")}
+            for table in tables:
+                # Empty tables get no statistics row, so they would be analyzed every run
+                if table not in has_stats and self.conn.execute(f'SELECT 1 FROM {schema}."{table}" LIMIT 1').fetchone():
+                    self.conn.execute(f'ANALYZE {schema}."{table}"')
+                    analyzed.append(table)
+                    self._check()
+            self.conn.execute(f"PRAGMA {schema}.optimize")
+        return {"analyzed": analyzed}
+
+    def vacuum(self) -> Dict[str, Any]:
+        """Return free pages to the file system, a few at a time"""
+        released, converted, skipped = 0, [], []
+        for schema in self._schemas_checked():
+            mode = self.conn.execute(f"PRAGMA {schema}.auto_vacuum").fetchone()[0]
+            pages = self.conn.execute(f"PRAGMA {schema}.page_count").fetchone()[0]
+            free = self.conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+            if not free:
+                continue
+
+            if mode == 2:  # INCREMENTAL
+                while free:
+                    self.conn.execute(f"PRAGMA {schema}.incremental_vacuum({int(MAINTENANCE_VACUUM_PAGES)})").fetchall()
+                    now_free = self.conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+                    released += free - now_free
+                    free = now_free
+                    self._check()
+            elif free / pages < MAINTENANCE_MIN_FREE_FRACTION:
+                continue
+            elif self.closing and (self.full_vacuum or self._vacuum_fits(schema, pages)):
+                # One full rebuild; afterwards the file can be shrunk incrementally
+                self.conn.execute(f"PRAGMA {schema}.auto_vacuum = INCREMENTAL")
+                if self.full_vacuum:
+                    self.conn.set_progress_handler(None, 0)
+                try:
+                    self.conn.execute(f"VACUUM {schema}")
+                finally:
+                    self.conn.set_progress_handler(self._progress, 1000)
+                released += free
+                converted.append(schema)
+            else:
+                skipped.append(schema)
+
+        result: Dict[str, Any] = {"pages_released": released}
+        if converted:
+            result["converted_to_incremental"] = converted
+        if skipped:
+            result["needs_full_vacuum"] = skipped
+        return result
+
+    def _vacuum_fits(self, schema: str, pages: int) -> bool:
+        """Whether a full VACUUM of the file is expected to finish within the task budget"""
+        page_size = self.conn.execute(f"PRAGMA {schema}.page_size").fetchone()[0]
+        return pages * page_size / MAINTENANCE_VACUUM_BYTES_PER_SECOND <= self.task_budget
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """Checkpoint and truncate the WAL of files in WAL mode"""
+        checkpointed = {}
+        for schema in self._schemas_checked():
+            if self.conn.execute(f"PRAGMA {schema}.journal_mode").fetchone()[0] != 'wal':
+                continue
+            busy, wal_pages, moved = self.conn.execute(f"PRAGMA {schema}.wal_checkpoint(TRUNCATE)").fetchone()
+            checkpointed[schema] = {"busy": bool(busy), "wal_pages": wal_pages, "checkpointed": moved}
+        if not checkpointed:
+            return {"status": "skipped", "reason": "no database in WAL mode"}
+        return {"files": checkpointed}
+
+    def check_indexes(self) -> Dict[str, Any]:
+        """Check tables and their indexes, continuing from where the last run stopped"""
+        tables = [
+            (schema, row[0]) for schema in _schemas(self.conn)
+            for row in self.conn.execute(
+                f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+                "ORDER BY name"
+            )
+        ]
+        if not tables:
+            return {"checked": []}
+
+        start = _next_table.get(self.db_path, 0) % len(tables)
+        checked, problems, reindexed = [], {}, []
+        for offset in range(len(tables)):
+            schema, table = tables[(start + offset) % len(tables)]
+            result = [row[0] for row in self.conn.execute(f'PRAGMA {schema}.integrity_check("{table}")')]
+            checked.append(table)
+            _next_table[self.db_path] = (start + offset + 1) % len(tables)
+            if result != ['ok']:
+                problems[table] = result[:5]
+                print(f"Warning: integrity check of {table} failed: {result[0]}")
+                if self.closing and any("index" in line for line in result):
+                    self.conn.execute(f'REINDEX {schema}."{table}"')
+                    reindexed.append(table)
+            self._check()
+
+        result: Dict[str, Any] = {"checked": checked}
+        if problems:
+            result["problems"] = problems
+        if reindexed:
+            result["reindexed"] = reindexed
+        return result
+
+    def _schemas_checked(self) -> List[str]:
+        schemas = _schemas(self.conn)
+        self._check()
+        return schemas
+
+
+def run_maintenance(db_path: PathLike = None, task_budget: float = MAINTENANCE_TASK_BUDGET,
+                    should_stop: Optional[Callable[[], bool]] = None, closing: bool = False,
+                    log_path: PathLike = None, full_vacuum: bool = False) -> Optional[Dict[str, Any]]:
+    """Run the maintenance tasks once and append the report to the maintenance log"""
+    try:
+        report = MaintenanceRun(db_path, task_budget, should_stop, closing, full_vacuum).run()
+    except sqlite3.Error as e:
+        print(f"Error running database maintenance: {e}")
+        return None
+
+    path = Path(log_path or MAINTENANCE_LOG_PATH)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+    except OSError as e:
+        print(f"Error writing maintenance log: {e}")
+    return report
+
+
+class MaintenanceScheduler:
+    """Runs maintenance from a background thread once the till has been idle for a while"""
+
+    def __init__(self, db_path: PathLike = None, idle_seconds: float = MAINTENANCE_IDLE_SECONDS,
+                 interval: float = MAINTENANCE_INTERVAL):
+        self.db_path = db_path
+        self.idle_seconds = idle_seconds
+        self.interval = interval
+        self._last_activity = time.monotonic()
+        self._last_run = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def touch(self):
+        """Note that the till is in use; a run in progress stops at its next check"""
+        self._last_activity = time.monotonic()
+
+    def start(self):
+        """Start watching for idle periods"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Stop the scheduler, interrupting a run in progress"""
+        thread = self._thread
+        self._thread = None
+        self._stop.set()
+        if thread:
+            thread.join(timeout)
+
+    def run_at_close(self, task_budget: float = MAINTENANCE_CLOSE_BUDGET) -> Optional[Dict[str, Any]]:
+        """Stop the idle runs and do a closing run, including work that needs the database to itself"""
+        self.stop()
+        with self._lock:
+            return run_maintenance(self.db_path, task_budget, closing=True)
+
+    def _run(self):
+        check_every = min(5.0, self.idle_seconds)
+        while not self._stop.wait(check_every):
+            now = time.monotonic()
+            if now - self._last_activity < self.idle_seconds or now - self._last_run < self.interval:
+                continue
+            started = self._last_activity
+            with self._lock:
+                run_maintenance(
+                    self.db_path,
+                    should_stop=lambda: self._stop.is_set() or self._last_activity != started
+                )
+            self._last_run = time.monotonic()
+
+
+def load_runs(log_path: PathLike = None) -> List[Dict[str, Any]]:
+    """Every run recorded in the maintenance log, oldest first"""
+    path = Path(log_path or MAINTENANCE_LOG_PATH)
+    if not path.exists():
+        return []
+    runs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                continue
+    return runs
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['timestamp']}  {'closing' if report['closing'] else 'idle'}  "
+        f"{report['bytes_before'] / 1024 / 1024:.1f} MB -> {report['bytes_after'] / 1024 / 1024:.1f} MB, "
+        f"free pages {report['free_pages_before']} -> {report['free_pages_after']}"
+    ]
+    for name, task in report["tasks"].items():
+        details = ", ".join(f"{key}={value}" for key, value in task.items() if key not in ("status", "seconds"))
+        lines.append(f"  {name:<11} {task['status']:<8} {task.get('seconds', 0):>7.3f}s  {details}")
+    lines.append(f"  plans changed: {', '.join(report['plans_changed']) or 'none'}")
+    lines.append(f"  full scans: {len(report['full_scans_before'])} -> {len(report['full_scans_after'])}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run or review idle-time database maintenance")
+    parser.add_argument("--db", help="Database file (default: the shop database)")
+    parser.add_argument("--log", help="Maintenance log (default: MAINTENANCE_LOG_PATH)")
+    parser.add_argument("--run", action="store_true",
+                        help="Run maintenance now, as after closing, converting files of any size to incremental vacuum")
+    parser.add_argument("--budget", type=float, default=MAINTENANCE_CLOSE_BUDGET, help="Seconds per task")
+    parser.add_argument("--last", type=int, default=5, help="Runs to show")
+    args = parser.parse_args()
+
+    if args.run:
+        report = run_maintenance(args.db, args.budget, closing=True, log_path=args.log, full_vacuum=True)
+        if report is None:
+            sys.exit(1)
+        print(format_report(report))
+        return
+
+    runs = load_runs(args.log)[-args.last:]
+    if not runs:
+        print("No maintenance runs recorded yet")
+    for run in runs:
+        print(format_report(run))
+
+
+if __name__ == "__main__":
+    # Add project root to Python path
+    sys.path.append(str(Path(__file__).parent.parent))
+    main()
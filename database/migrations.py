@@ -0,0 +1,171 @@
+"""Versioned schema migrations keyed on ``PRAGMA user_version``.
+
+``DBManager`` creates the base tables with ``CREATE TABLE IF NOT EXISTS``;
+changes to existing tables (new columns, backfills, indexes) are added here
+as numbered steps. Each step runs once, in its own transaction together with
+the version bump.
+"""
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+from database.ledger import ledger_schema
+from utils.phone import normalize_phone
+
+
+def _customer_lookup_indexes(conn: sqlite3.Connection):
+    """Normalised phone column plus indexes for phone, name and email lookups"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(customers)")]
+    if 'phone_normalized' not in columns:
+        conn.execute("ALTER TABLE customers ADD COLUMN phone_normalized TEXT")
+
+    conn.create_function('normalize_phone', 1, normalize_phone, deterministic=True)
+    conn.execute("UPDATE customers SET phone_normalized = normalize_phone(phone)")
+
+    # Older rows may share a number; the unique index keeps it on the oldest customer
+    # and the others are listed in customer_phone_duplicates until someone fixes them
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS customer_phone_duplicates (
+            customer_id INTEGER PRIMARY KEY,
+            phone TEXT,
+            kept_customer_id INTEGER NOT NULL
+        )
+    """)
+    duplicates = conn.execute("""
+        SELECT c.id, c.phone, kept.id
+        FROM customers c
+        JOIN (
+            SELECT phone_normalized, MIN(id) AS id FROM customers
+            WHERE phone_normalized IS NOT NULL
+            GROUP BY phone_normalized
+        ) kept ON kept.phone_normalized = c.phone_normalized
+        WHERE c.id != kept.id
+        ORDER BY c.id
+    """).fetchall()
+    if duplicates:
+        print(f"Warning: {len(duplicates)} customers share a phone number with an older customer; "
+              "phone lookup finds the older customer until the number is fixed:")
+        for customer_id, phone, kept_id in duplicates:
+            print(f"  customer {customer_id} ({phone}) duplicates customer {kept_id}")
+        conn.executemany(
+            "INSERT OR REPLACE INTO customer_phone_duplicates (customer_id, phone, kept_customer_id) "
+            "VALUES (?, ?, ?)",
+            duplicates
+        )
+        conn.executemany(
+            "UPDATE customers SET phone_normalized = NULL WHERE id = ?",
+            [(customer_id,) for customer_id, _, _ in duplicates]
+        )
+
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_phone_normalized
+        ON customers(phone_normalized) WHERE phone_normalized IS NOT NULL
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_email ON customers(email COLLATE NOCASE)")
+
+
+def _sale_loyalty_points(conn: sqlite3.Connection):
+    """Points earned per sale; NULL marks historic sales that never accrued"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(sales)")]
+    if 'loyalty_points' not in columns:
+        conn.execute("ALTER TABLE sales ADD COLUMN loyalty_points INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_customer ON sales(customer_id)")
+
+
+def _table_change_counters(conn: sqlite3.Connection):
+    """Per-table change counters bumped by triggers, for the query cache"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_changes (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for table in ("users", "products", "customers"):
+        conn.execute("INSERT OR IGNORE INTO table_changes (table_name) VALUES (?)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_changes
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE table_changes SET version = version + 1 WHERE table_name = '{table}';
+                END
+            """)
+
+
+def _hot_query_indexes(conn: sqlite3.Connection):
+    """Indexes the plan audit (``database.plan_audit``) needs for the hot queries"""
+    # Sales per product (inventory totals, top sellers); covers the inventory sum
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sale_items_product ON sale_items(product_id, subtotal)")
+
+    # Low-stock report: only products at or below their reorder level, already in report order
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_products_low_stock
+        ON products((stock_quantity * 1.0 / reorder_level))
+        WHERE stock_quantity <= reorder_level
+    """)
+    # Dashboard low-stock count and the fixed-threshold low-stock list
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_stock ON products(stock_quantity)")
+
+    # Stock history per product and across products, newest first (keyset on created_at, id)
+    schema = ledger_schema(conn)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {schema}.idx_inventory_transactions_product
+        ON inventory_transactions(product_id, created_at, id)
+    """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {schema}.idx_inventory_transactions_created
+        ON inventory_transactions(created_at, id)
+    """)
+
+    # An analysed database would otherwise plan around indexes it has no statistics for
+    conn.execute("PRAGMA analysis_limit = 1000")
+    for index_schema, index in (('main', 'idx_sale_items_product'), ('main', 'idx_products_low_stock'),
+                                ('main', 'idx_products_stock'), (schema, 'idx_inventory_transactions_product'),
+                                (schema, 'idx_inventory_transactions_created')):
+        analysed = conn.execute(
+            f"SELECT 1 FROM {index_schema}.sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+        if analysed:
+            conn.execute(f"ANALYZE {index_schema}.{index}")
+
+
+# (version, step) pairs, in order; never renumber or edit a released step
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _customer_lookup_indexes),
+    (2, _sale_loyalty_points),
+    (3, _table_change_counters),
+    (4, _hot_query_indexes),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the schema version stored in the main database file"""
+    return conn.execute("PRAGMA main.user_version").fetchone()[0]
+
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """Apply every migration newer than the database. Returns the new version."""
+    version = get_schema_version(conn)
+
+    for target, step in MIGRATIONS:
+        if target <= version:
+            continue
+
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            if get_schema_version(conn) >= target:
+                conn.rollback()
+                version = target
+                continue
+            step(conn)
+            conn.execute(f"PRAGMA main.user_version = {int(target)}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        version = target
+
+    return version
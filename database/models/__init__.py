@@ -4,5 +4,6 @@ from database.models.user import User
 from database.models.product import Product
 from database.models.customer import Customer
 from database.models.sale import Sale, SaleItem
+from database.models.session import Session
 
-__all__ = ['User', 'Product', 'Customer', 'Sale', 'SaleItem'] 
\ No newline at end of file
+__all__ = ['User', 'Product', 'Customer', 'Sale', 'SaleItem', 'Session'] 
\ No newline at end of file
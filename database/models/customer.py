@@ -1,8 +1,36 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import sqlite3
 from datetime import datetime
 
 from database.db_manager import DBManager
+from database.query_cache import query_cache
+from utils.phone import normalize_phone
+
+_MAX_CHAR = 0x10FFFF
+_SURROGATES = range(0xD800, 0xE000)
+
+def _prefix_range(prefix: str) -> Tuple[str, Optional[str]]:
+    """Bounds (lo, hi) so that lo <= value < hi matches every value starting with prefix.
+
+    NOCASE only folds ASCII letters, to lower case, so the prefix is folded the
+    same way first. hi is None when no string sorts after every match.
+    """
+    lo = ''.join(c.lower() if 'A' <= c <= 'Z' else c for c in prefix)
+    stem = lo.rstrip(chr(_MAX_CHAR))
+    if not stem:
+        return lo, None
+    next_char = ord(stem[-1]) + 1
+    if next_char in _SURROGATES:
+        # Surrogates cannot be stored; the next storable character sorts the same way in UTF-8
+        next_char = _SURROGATES.stop
+    return lo, stem[:-1] + chr(next_char)
+
+def _range_clause(column: str, bounds: Tuple[str, Optional[str]]) -> Tuple[str, List[str]]:
+    """WHERE clause (and params) for a prefix range on an indexed column"""
+    lo, hi = bounds
+    if hi is None:
+        return f"{column} >= ?", [lo]
+    return f"{column} >= ? AND {column} < ?", [lo, hi]
 
 class Customer:
     """Customer model class"""
@@ -16,8 +44,13 @@ class Customer:
         self.email = email
         self.address = address
         self.loyalty_points = loyalty_points
-        self.created_at = created_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.updated_at = updated_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if not created_at or not updated_at:
+            # Only new objects lack timestamps; format the clock once for both
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            created_at = created_at or now
+            updated_at = updated_at or now
+        self.created_at = created_at
+        self.updated_at = updated_at
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Customer':
@@ -49,26 +82,25 @@ class Customer:
     @classmethod
     def get_by_id(cls, customer_id: int) -> Optional['Customer']:
         """Get a customer by ID"""
-        db = DBManager()
-        try:
-            result = db.execute_query(
-                "SELECT * FROM customers WHERE id = ?",
-                (customer_id,)
-            )
-            if result and len(result) > 0:
-                return cls.from_dict(result[0])
-            return None
-        finally:
-            db.close()
+        row = query_cache.fetch_one(
+            "SELECT * FROM customers WHERE id = ?",
+            (customer_id,),
+            as_dict=True
+        )
+        return cls.from_dict(row) if row else None
     
     @classmethod
     def get_by_phone(cls, phone: str) -> Optional['Customer']:
-        """Get a customer by phone number"""
+        """Get a customer by phone number, ignoring spaces and punctuation"""
+        phone_normalized = normalize_phone(phone)
+        if not phone_normalized:
+            return None
+        
         db = DBManager()
         try:
             result = db.execute_query(
-                "SELECT * FROM customers WHERE phone = ?",
-                (phone,)
+                "SELECT * FROM customers WHERE phone_normalized = ?",
+                (phone_normalized,)
             )
             if result and len(result) > 0:
                 return cls.from_dict(result[0])
@@ -88,19 +120,75 @@ class Customer:
         finally:
             db.close()
     
+    @staticmethod
+    def _search_filter(search_term: str):
+        """SQL (and params) selecting ids whose name, email or phone starts with the term"""
+        # Prefix ranges use the NOCASE name/email indexes and the phone index
+        name_bounds = _prefix_range(search_term)
+        name_clause, params = _range_clause("name COLLATE NOCASE", name_bounds)
+        email_clause, email_params = _range_clause("email COLLATE NOCASE", name_bounds)
+        query = f"""
+            SELECT id FROM customers WHERE {name_clause}
+            UNION
+            SELECT id FROM customers WHERE {email_clause}
+        """
+        params += email_params
+        
+        phone_prefix = normalize_phone(search_term)
+        if phone_prefix:
+            phone_clause, phone_params = _range_clause("phone_normalized", _prefix_range(phone_prefix))
+            query += f"""
+                UNION
+                SELECT id FROM customers WHERE {phone_clause}
+            """
+            params += phone_params
+        
+        return query, params
+    
     @classmethod
-    def search(cls, search_term: str) -> List['Customer']:
-        """Search for customers by name, phone, or email"""
+    def search(cls, search_term: str, limit: Optional[int] = None) -> List['Customer']:
+        """Search for customers whose name, email or phone starts with the term"""
+        search_term = search_term.strip()
+        if not search_term:
+            return cls.get_all()
+        
+        id_query, params = cls._search_filter(search_term)
+        query = f"SELECT * FROM customers WHERE id IN ({id_query}) ORDER BY name COLLATE NOCASE"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        
         db = DBManager()
         try:
-            results = db.execute_query(
-                """
-                SELECT * FROM customers 
-                WHERE name LIKE ? OR phone LIKE ? OR email LIKE ?
-                ORDER BY name
-                """,
-                (f"%{search_term}%", f"%{search_term}%", f"%{search_term}%")
-            )
+            results = db.execute_query(query, tuple(params))
+            return [cls.from_dict(row) for row in results] if results else []
+        finally:
+            db.close()
+    
+    @classmethod
+    def get_page(cls, search_term: str = "", after: Optional[Tuple[str, int]] = None,
+                 limit: int = 100) -> List['Customer']:
+        """Get one page of customers ordered by name, continuing after the (name, id) of the last row"""
+        query = "SELECT * FROM customers WHERE 1=1"
+        params = []
+        
+        search_term = (search_term or "").strip()
+        if search_term:
+            id_query, id_params = cls._search_filter(search_term)
+            query += f" AND id IN ({id_query})"
+            params.extend(id_params)
+        
+        if after:
+            # Written as a range so SQLite can seek the name index
+            query += " AND name COLLATE NOCASE >= ? AND (name COLLATE NOCASE > ? OR id > ?)"
+            params.extend([after[0], after[0], after[1]])
+        
+        query += " ORDER BY name COLLATE NOCASE, id LIMIT ?"
+        params.append(limit)
+        
+        db = DBManager()
+        try:
+            results = db.execute_query(query, tuple(params))
             return [cls.from_dict(row) for row in results] if results else []
         finally:
             db.close()
@@ -115,31 +203,33 @@ class Customer:
                 # Update existing customer
                 query = """
                     UPDATE customers SET 
-                    name = ?, phone = ?, email = ?, address = ?,
+                    name = ?, phone = ?, phone_normalized = ?, email = ?, address = ?,
                     loyalty_points = ?, updated_at = ?
                     WHERE id = ?
                 """
                 params = (
-                    self.name, self.phone, self.email, self.address,
+                    self.name, self.phone, normalize_phone(self.phone), self.email, self.address,
                     self.loyalty_points, self.updated_at, self.id
                 )
             else:
                 # Insert new customer
                 query = """
                     INSERT INTO customers (
-                        name, phone, email, address,
+                        name, phone, phone_normalized, email, address,
                         loyalty_points, created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """
                 params = (
-                    self.name, self.phone, self.email, self.address,
+                    self.name, self.phone, normalize_phone(self.phone), self.email, self.address,
                     self.loyalty_points, self.created_at, self.updated_at
                 )
             
-            result = db.execute_query(query, params)
+            cursor = db.conn.cursor()
+            cursor.execute(query, params)
+            db.conn.commit()
             
-            if not self.id and result:
-                self.id = result[0]['id']
+            if not self.id:
+                self.id = cursor.lastrowid
             
             return True
         except sqlite3.Error as e:
@@ -166,10 +256,87 @@ class Customer:
         finally:
             db.close()
     
+    @staticmethod
+    def add_loyalty_points(customer_id: int, points: int) -> Optional[int]:
+        """Atomically add (or remove) points; returns the new balance"""
+        db = DBManager()
+        try:
+            cursor = db.conn.cursor()
+            cursor.execute("""
+                UPDATE customers
+                SET loyalty_points = loyalty_points + ?,
+                    updated_at = ?
+                WHERE id = ?
+            """, (points, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), customer_id))
+            
+            if cursor.rowcount == 0:
+                db.conn.rollback()
+                return None
+            
+            cursor.execute("SELECT loyalty_points FROM customers WHERE id = ?", (customer_id,))
+            balance = cursor.fetchone()[0]
+            db.conn.commit()
+            return balance
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+        finally:
+            db.close()
+    
+    @staticmethod
+    def reaccrue_loyalty_points(rate: float) -> int:
+        """Credit every customer for completed sales that never accrued points.
+
+        Both statements are set-based and run in one transaction; the sales
+        are then stamped with their points so the job never credits twice.
+        """
+        db = DBManager()
+        try:
+            cursor = db.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                UPDATE customers
+                SET loyalty_points = loyalty_points + (
+                        SELECT SUM(MAX(0, CAST(s.total_amount * ? AS INTEGER)))
+                        FROM sales s
+                        WHERE s.customer_id = customers.id
+                        AND s.loyalty_points IS NULL
+                        AND s.payment_status = 'completed'
+                    ),
+                    updated_at = ?
+                WHERE id IN (
+                    SELECT customer_id FROM sales
+                    WHERE loyalty_points IS NULL
+                    AND payment_status = 'completed'
+                    AND customer_id IS NOT NULL
+                )
+            """, (rate, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            
+            cursor.execute("""
+                UPDATE sales
+                SET loyalty_points = MAX(0, CAST(total_amount * ? AS INTEGER))
+                WHERE loyalty_points IS NULL
+                AND payment_status = 'completed'
+                AND customer_id IN (SELECT id FROM customers)
+            """, (rate,))
+            credited = cursor.rowcount
+            
+            db.conn.commit()
+            return credited
+        except sqlite3.Error:
+            db.conn.rollback()
+            raise
+        finally:
+            db.close()
+    
     def update_loyalty_points(self, points: int) -> bool:
         """Update customer loyalty points"""
         if not self.id:
             return False
         
-        self.loyalty_points += points
-        return self.save() 
\ No newline at end of file
+        balance = self.add_loyalty_points(self.id, points)
+        if balance is None:
+            return False
+        
+        self.loyalty_points = balance
+        return True 
\ No newline at end of file
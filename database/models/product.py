@@ -5,6 +5,12 @@ from datetime import datetime
 class Product:
     """Product model class"""
     
+    # Table and stored columns (besides id) for the unit of work
+    __table__ = "products"
+    __columns__ = ("name", "description", "category", "barcode", "price", "cost_price",
+                   "stock_quantity", "reorder_level", "image_path", "is_active",
+                   "created_at", "updated_at")
+    
     def __init__(self, id: Optional[int] = None, name: str = "", description: str = "", 
                  category: str = "", barcode: str = "", price: float = 0.0,
                  cost_price: float = 0.0, stock_quantity: int = 0,
@@ -21,8 +27,13 @@ class Product:
         self.reorder_level = reorder_level
         self.image_path = image_path
         self.is_active = is_active
-        self.created_at = created_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.updated_at = updated_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if not created_at or not updated_at:
+            # Only new objects lack timestamps; format the clock once for both
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            created_at = created_at or now
+            updated_at = updated_at or now
+        self.created_at = created_at
+        self.updated_at = updated_at
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Product':
@@ -141,61 +152,24 @@ class Product:
     
     def save(self) -> bool:
         """Save the product to the database"""
-        from database.db_manager import DBManager
+        from database.models.session import Session
         
-        db = DBManager()
         self.updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        if self.id:
-            # Update existing product
-            try:
-                db.execute_query(
-                    """
-                    UPDATE products SET 
-                    name = ?, description = ?, category = ?, barcode = ?,
-                    price = ?, cost_price = ?, stock_quantity = ?, reorder_level = ?,
-                    image_path = ?, is_active = ?, updated_at = ?
-                    WHERE id = ?
-                    """,
-                    (
-                        self.name, self.description, self.category, self.barcode,
-                        self.price, self.cost_price, self.stock_quantity, self.reorder_level,
-                        self.image_path, 1 if self.is_active else 0, self.updated_at,
-                        self.id
-                    )
-                )
-                return True
-            except sqlite3.Error:
-                return False
-        else:
-            # Insert new product
-            try:
-                result = db.execute_query(
-                    """
-                    INSERT INTO products (
-                        name, description, category, barcode, price, cost_price,
-                        stock_quantity, reorder_level, image_path, is_active,
-                        created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    RETURNING id
-                    """,
-                    (
-                        self.name, self.description, self.category, self.barcode,
-                        self.price, self.cost_price, self.stock_quantity, self.reorder_level,
-                        self.image_path, 1 if self.is_active else 0,
-                        self.created_at, self.updated_at
-                    )
-                )
-                
-                if result and len(result) > 0:
-                    self.id = result[0]['id']
-                    return True
-                return False
-            except sqlite3.Error:
-                return False
+        try:
+            with Session() as session:
+                session.add(self)
+            return True
+        except sqlite3.Error:
+            return False
     
-    def update_stock(self, quantity_change: int) -> bool:
-        """Update product stock quantity"""
+    def update_stock(self, quantity_change: int, session: Optional['Session'] = None) -> bool:
+        """Update product stock quantity, writing only the stock columns.
+
+        With a session the change is written when the session commits,
+        together with the rest of its unit of work.
+        """
+        from database.models.session import Session
+        
         if not self.id:
             return False
         
@@ -203,8 +177,20 @@ class Product:
         if new_quantity < 0:
             return False
         
-        self.stock_quantity = new_quantity
-        return self.save()
+        if session is not None:
+            session.attach(self)
+            self.stock_quantity = new_quantity
+            return True
+        
+        previous_quantity = self.stock_quantity
+        try:
+            with Session() as session:
+                session.attach(self)
+                self.stock_quantity = new_quantity
+            return True
+        except sqlite3.Error:
+            self.stock_quantity = previous_quantity
+            return False
 
     @property
     def stock(self) -> int:
@@ -6,6 +6,10 @@ import uuid
 class SaleItem:
     """Sale item model class"""
     
+    # Table and stored columns (besides id) for the unit of work
+    __table__ = "sale_items"
+    __columns__ = ("sale_id", "product_id", "quantity", "unit_price", "discount_percent", "subtotal")
+    
     def __init__(self, id: Optional[int] = None, sale_id: Optional[int] = None,
                  product_id: int = 0, quantity: int = 0, unit_price: float = 0.0,
                  discount_percent: float = 0.0, subtotal: float = 0.0):
@@ -46,6 +50,12 @@ class SaleItem:
 class Sale:
     """Sale model class"""
     
+    __table__ = "sales"
+    __columns__ = ("invoice_number", "customer_id", "user_id", "total_amount", "discount_amount",
+                   "tax_amount", "payment_method", "payment_status", "sale_date")
+    # Child collections saved with the sale, and the key that points back at it
+    __children__ = {"items": "sale_id"}
+    
     def __init__(self, id: Optional[int] = None, invoice_number: str = "",
                  customer_id: Optional[int] = None, user_id: int = 0,
                  total_amount: float = 0.0, discount_amount: float = 0.0,
@@ -170,108 +180,12 @@ class Sale:
         return []
     
     def save(self) -> bool:
-        """Save the sale to the database"""
-        from database.db_manager import DBManager
-        
-        db = DBManager()
-        
-        if self.id:
-            # Update existing sale
-            try:
-                db.execute_query(
-                    """
-                    UPDATE sales SET 
-                    invoice_number = ?, customer_id = ?, user_id = ?,
-                    total_amount = ?, discount_amount = ?, tax_amount = ?,
-                    payment_method = ?, payment_status = ?, sale_date = ?
-                    WHERE id = ?
-                    """,
-                    (
-                        self.invoice_number, self.customer_id, self.user_id,
-                        self.total_amount, self.discount_amount, self.tax_amount,
-                        self.payment_method, self.payment_status, self.sale_date,
-                        self.id
-                    )
-                )
-                return True
-            except sqlite3.Error:
-                return False
-        else:
-            # Insert new sale
-            try:
-                result = db.execute_query(
-                    """
-                    INSERT INTO sales (
-                        invoice_number, customer_id, user_id, total_amount,
-                        discount_amount, tax_amount, payment_method, payment_status, sale_date
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    RETURNING id
-                    """,
-                    (
-                        self.invoice_number, self.customer_id, self.user_id,
-                        self.total_amount, self.discount_amount, self.tax_amount,
-                        self.payment_method, self.payment_status, self.sale_date
-                    )
-                )
-                
-                if result and len(result) > 0:
-                    self.id = result[0]['id']
-                    
-                    # Save sale items
-                    for item in self.items:
-                        item.sale_id = self.id
-                        self._save_sale_item(item)
-                    
-                    return True
-                return False
-            except sqlite3.Error:
-                return False
-    
-    def _save_sale_item(self, item: SaleItem) -> bool:
-        """Save a sale item to the database"""
-        from database.db_manager import DBManager
-        
-        db = DBManager()
+        """Save the sale and its items to the database in one transaction"""
+        from database.models.session import Session
         
-        if item.id:
-            # Update existing sale item
-            try:
-                db.execute_query(
-                    """
-                    UPDATE sale_items SET 
-                    sale_id = ?, product_id = ?, quantity = ?,
-                    unit_price = ?, discount_percent = ?, subtotal = ?
-                    WHERE id = ?
-                    """,
-                    (
-                        item.sale_id, item.product_id, item.quantity,
-                        item.unit_price, item.discount_percent, item.subtotal,
-                        item.id
-                    )
-                )
-                return True
-            except sqlite3.Error:
-                return False
-        else:
-            # Insert new sale item
-            try:
-                result = db.execute_query(
-                    """
-                    INSERT INTO sale_items (
-                        sale_id, product_id, quantity, unit_price,
-                        discount_percent, subtotal
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                    RETURNING id
-                    """,
-                    (
-                        item.sale_id, item.product_id, item.quantity,
-                        item.unit_price, item.discount_percent, item.subtotal
-                    )
-                )
-                
-                if result and len(result) > 0:
-                    item.id = result[0]['id']
-                    return True
-                return False
-            except sqlite3.Error:
-                return False
\ No newline at end of file
+        try:
+            with Session() as session:
+                session.add(self)
+            return True
+        except sqlite3.Error:
+            return False
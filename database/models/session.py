@@ -0,0 +1,253 @@
+"""Unit of work for the model classes.
+
+A ``Session`` collects the objects of one operation and writes them in a
+single transaction when it ends:
+
+    with Session() as session:
+        product = session.get(Product, 5)
+        product.stock_quantity -= 2
+        session.add(Sale(user_id=1, items=[SaleItem(product_id=5, quantity=2)]))
+
+- New objects are inserted per table with one ``executemany``; their IDs are
+  allocated up front under the write lock, so children (a sale's items) get
+  their foreign key before the batch runs.
+- Loaded or attached objects are compared with a snapshot at flush, and only
+  the changed columns are written (plus ``updated_at`` where the table has it).
+- An identity map returns the same object for the same row, so a product
+  read twice in one operation is read once and changed in one place.
+
+The session takes the write lock with its first statement, so reads and the
+writes based on them can't interleave with another lane's.
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from database.connection import get_db_connection
+
+# Parents before children, so foreign keys point at rows that exist
+FLUSH_ORDER = ("users", "customers", "products", "sales", "sale_items")
+
+Key = Tuple[str, int]
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _table(obj_or_cls: Any) -> str:
+    return obj_or_cls.__table__
+
+
+def _values(obj: Any) -> Tuple[Any, ...]:
+    return tuple(getattr(obj, column) for column in obj.__columns__)
+
+
+class Session:
+    """Tracks new and changed model objects and writes them in one transaction"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        # Make sure the schema and migrations are in place
+        from database.db_manager import DBManager
+        manager = DBManager(db_path)
+        self.db_path = manager.db_path
+        manager.close()
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._identity: Dict[Key, Any] = {}
+        self._snapshots: Dict[int, Tuple[Any, ...]] = {}
+        self._new: List[Any] = []
+        self._full_updates: List[Any] = []
+        self._inserted: List[Any] = []
+        self.stats = {"selects": 0, "inserts": 0, "updates": 0}
+
+    def __enter__(self) -> "Session":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.close()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """The session's connection, inside its write transaction"""
+        if self._conn is None:
+            self._conn = get_db_connection(self.db_path, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    # Identity map
+
+    def get(self, cls: Type, object_id: int) -> Optional[Any]:
+        """The object for a row, loaded once per session"""
+        obj = self._identity.get((_table(cls), object_id))
+        if obj is None:
+            obj = self.get_many(cls, [object_id]).get(object_id)
+        return obj
+
+    def get_many(self, cls: Type, object_ids: Iterable[int]) -> Dict[int, Any]:
+        """Objects by ID, loading the ones not yet in the session with one query"""
+        table = _table(cls)
+        found, missing = {}, []
+        for object_id in dict.fromkeys(object_ids):
+            obj = self._identity.get((table, object_id))
+            if obj is None:
+                missing.append(object_id)
+            else:
+                found[object_id] = obj
+
+        # Stay under SQLite's bound parameter limit
+        for i in range(0, len(missing), 500):
+            chunk = missing[i:i + 500]
+            self.stats["selects"] += 1
+            rows = self.connection.execute(
+                f"SELECT * FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for row in rows:
+                found[row["id"]] = self._track(cls.from_dict(dict(row)))
+        return found
+
+    def _track(self, obj: Any) -> Any:
+        self._identity[(_table(obj), obj.id)] = obj
+        self._snapshots[id(obj)] = _values(obj)
+        return obj
+
+    def attach(self, obj: Any) -> Any:
+        """Track an object loaded elsewhere, taking its current values as the stored ones"""
+        if obj.id is None:
+            raise ValueError("Only stored objects can be attached; use add() for new ones")
+        tracked = self._identity.get((_table(obj), obj.id))
+        if tracked is obj:
+            return obj
+        if tracked is not None:
+            raise ValueError(f"Another object for {_table(obj)} {obj.id} is already in this session")
+        return self._track(obj)
+
+    def add(self, obj: Any) -> Any:
+        """Insert a new object (and its children) or write every column of a stored one"""
+        if obj.id is None:
+            if not any(pending is obj for pending in self._new):
+                self._new.append(obj)
+        elif self._identity.get((_table(obj), obj.id)) is not obj:
+            self._full_updates.append(obj)
+            self._track(obj)
+
+        for attribute, foreign_key in getattr(obj, "__children__", {}).items():
+            for child in getattr(obj, attribute):
+                if obj.id is not None:
+                    setattr(child, foreign_key, obj.id)
+                self.add(child)
+        return obj
+
+    # Writing
+
+    def _allocate_ids(self, table: str, count: int) -> int:
+        """First of ``count`` unused IDs; the write lock keeps them ours"""
+        conn = self.connection
+        last = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+        try:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        except sqlite3.OperationalError:
+            row = None  # no AUTOINCREMENT tables
+        if row and row[0] > last:
+            last = row[0]
+        return last + 1
+
+    def _insert_new(self):
+        by_table: Dict[str, List[Any]] = {}
+        for obj in self._new:
+            by_table.setdefault(_table(obj), []).append(obj)
+        self._new = []
+
+        for table in sorted(by_table, key=lambda name: FLUSH_ORDER.index(name) if name in FLUSH_ORDER else len(FLUSH_ORDER)):
+            objects = by_table[table]
+            first_id = self._allocate_ids(table, len(objects))
+            for offset, obj in enumerate(objects):
+                obj.id = first_id + offset
+                # Children get their parent's new key before their own batch
+                for attribute, foreign_key in getattr(obj, "__children__", {}).items():
+                    for child in getattr(obj, attribute):
+                        setattr(child, foreign_key, obj.id)
+
+            columns = ("id",) + objects[0].__columns__
+            self.connection.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [(obj.id,) + _values(obj) for obj in objects]
+            )
+            self.stats["inserts"] += len(objects)
+            for obj in objects:
+                self._inserted.append(obj)
+                self._track(obj)
+
+    def _changed_columns(self, obj: Any) -> Tuple[str, ...]:
+        snapshot = self._snapshots.get(id(obj))
+        if snapshot is None or any(obj is full for full in self._full_updates):
+            return obj.__columns__
+        return tuple(column for column, old in zip(obj.__columns__, snapshot) if getattr(obj, column) != old)
+
+    def _update_dirty(self):
+        # Same table and same changed columns -> one executemany
+        batches: Dict[Tuple[str, Tuple[str, ...]], List[tuple]] = {}
+        for obj in self._identity.values():
+            columns = self._changed_columns(obj)
+            if not columns:
+                continue
+            if "updated_at" in obj.__columns__ and "updated_at" not in columns:
+                obj.updated_at = _now()
+                columns += ("updated_at",)
+            batches.setdefault((_table(obj), columns), []).append(
+                tuple(getattr(obj, column) for column in columns) + (obj.id,)
+            )
+            self._snapshots[id(obj)] = _values(obj)
+        self._full_updates = []
+
+        for (table, columns), rows in batches.items():
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            self.connection.executemany(f"UPDATE {table} SET {assignments} WHERE id = ?", rows)
+            self.stats["updates"] += len(rows)
+
+    def flush(self):
+        """Write pending inserts and changes without committing"""
+        # Changes first: new objects are snapshotted as they are inserted
+        self._update_dirty()
+        self._insert_new()
+
+    def commit(self):
+        """Flush and commit; the objects stay tracked for further changes"""
+        self.flush()
+        if self._conn is not None:
+            self._conn.execute("COMMIT")
+            self._conn.close()
+            self._conn = None
+        self._inserted = []
+
+    def rollback(self):
+        """Discard everything written since the last commit"""
+        if self._conn is not None:
+            try:
+                self._conn.execute("ROLLBACK")
+            finally:
+                self._conn.close()
+                self._conn = None
+        # Inserted objects were never stored; new ones stay unsaved
+        for obj in self._inserted:
+            self._identity.pop((_table(obj), obj.id), None)
+            self._snapshots.pop(id(obj), None)
+            obj.id = None
+        self._inserted = []
+        self._new = []
+        self._full_updates = []
+
+    def close(self):
+        """Roll back anything uncommitted and forget all objects"""
+        if self._conn is not None:
+            self.rollback()
+        self._identity.clear()
+        self._snapshots.clear()
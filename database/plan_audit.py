@@ -0,0 +1,475 @@
+"""Query-plan audit for the service queries.
+
+``QUERIES`` registers the SQL each service and repository runs, with
+representative parameters. ``audit`` runs ``EXPLAIN QUERY PLAN`` for every
+entry and flags hot queries that scan a whole table or index, or sort or
+group through a temporary B-tree, unless the entry allows that step (a
+whole-catalog load has to scan; a report sorted by an aggregate has to sort).
+
+New service SQL belongs in the registry; ``python -m benchmarks.plan_audit
+--coverage`` lists statements the benchmark scenarios ran that are not in it.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config.settings import DATABASE_PATH, LOW_STOCK_THRESHOLD
+from database.connection import get_db_connection
+from database.models.customer import Customer
+from database.repositories.sqlite import _PRODUCT_COLUMNS, _SALE_COLUMNS, _ledger_filter, _range_filter
+from database.tracing import fingerprint
+
+# Parameters like the UI's: the benchmark data runs up to today
+_today = datetime.now()
+_DAY = (_today.strftime('%Y-%m-%d'), (_today + timedelta(days=1)).strftime('%Y-%m-%d'))
+_MONTH_AGO = (_today - timedelta(days=30)).strftime('%Y-%m-%d')
+_RANGE = (_MONTH_AGO, _today.strftime('%Y-%m-%d 23:59:59'))
+
+
+class AuditedQuery(NamedTuple):
+    sql: str
+    params: tuple = ()
+    # Hot queries fail the audit on a full scan or temp B-tree they don't allow
+    hot: bool = True
+    # Plan steps accepted for this query, matched by prefix
+    allow: Tuple[str, ...] = ()
+
+
+def _customer_search(term: str) -> AuditedQuery:
+    id_query, params = Customer._search_filter(term)
+    return AuditedQuery(
+        f"SELECT * FROM customers WHERE id IN ({id_query}) ORDER BY name COLLATE NOCASE LIMIT ?",
+        tuple(params) + (50,),
+        allow=("USE TEMP B-TREE FOR ORDER BY", "CREATE BLOOM FILTER")
+    )
+
+
+def _customer_page() -> AuditedQuery:
+    return AuditedQuery(
+        "SELECT * FROM customers WHERE 1=1"
+        " AND name COLLATE NOCASE >= ? AND (name COLLATE NOCASE > ? OR id > ?)"
+        " ORDER BY name COLLATE NOCASE, id LIMIT ?",
+        ('M', 'M', 0, 100),
+        # Ties on name are ordered by id within the name index range
+        allow=("USE TEMP B-TREE FOR RIGHT PART OF ORDER BY",)
+    )
+
+
+def _ledger_for_product(**filters) -> AuditedQuery:
+    conditions, params = _ledger_filter(**filters)
+    return AuditedQuery(f"""
+            SELECT
+                t.id, t.quantity_change, t.previous_quantity,
+                t.new_quantity, t.transaction_type, t.reason,
+                t.notes, t.created_at,
+                u.username as user_name
+            FROM inventory_transactions t
+            LEFT JOIN users u ON t.user_id = u.id
+            WHERE t.product_id = ?{conditions}
+            ORDER BY t.created_at DESC, t.id DESC
+            LIMIT ?
+        """, tuple([1] + params + [100]), allow=(
+            # The user filter lists matching staff accounts once, before the ledger seek
+            "SCAN users USING COVERING INDEX",
+        ))
+
+
+def _ledger_recent(**filters) -> AuditedQuery:
+    conditions, params = _ledger_filter(**filters)
+    return AuditedQuery(f"""
+            SELECT
+                t.id, t.quantity_change, t.previous_quantity,
+                t.new_quantity, t.transaction_type, t.reason,
+                t.notes, t.created_at,
+                u.username as user_name,
+                p.name as product_name
+            FROM inventory_transactions t
+            JOIN products p ON t.product_id = p.id
+            LEFT JOIN users u ON t.user_id = u.id
+            WHERE 1=1{conditions}
+            ORDER BY t.created_at DESC, t.id DESC
+            LIMIT ?
+        """, tuple(params + [100]), allow=(
+            # Newest first along the index, stopping at LIMIT
+            "SCAN t USING INDEX idx_inventory_transactions_created", "SCAN users USING COVERING INDEX",
+        ))
+
+
+_sales_condition, _ = _range_filter("sale_date", *_RANGE)
+
+QUERIES: Dict[str, AuditedQuery] = {
+    # Products
+    "products.list_active": AuditedQuery(f"""
+            SELECT {_PRODUCT_COLUMNS}
+            FROM products
+            WHERE is_active = 1
+            ORDER BY name
+        """, allow=("SCAN products",)),  # the whole catalog
+    "products.get": AuditedQuery(f"""
+            SELECT {_PRODUCT_COLUMNS}
+            FROM products
+            WHERE id = ?
+        """, (1,)),
+    "products.take_stock": AuditedQuery("""
+                SELECT stock_quantity
+                FROM products
+                WHERE id = ? AND stock_quantity >= ?
+            """, (1, 1)),
+    "products.adjust_stock": AuditedQuery("""
+                SELECT stock_quantity
+                FROM products
+                WHERE id = ? AND is_active = 1
+            """, (1,)),
+    "products.low_stock": AuditedQuery("""
+            SELECT
+                id, name, category, stock_quantity, reorder_level,
+                price, cost_price
+            FROM products
+            WHERE stock_quantity <= reorder_level
+            ORDER BY (stock_quantity * 1.0 / reorder_level)
+        """, allow=(
+            # The partial index holds only the products at or below their reorder level
+            "SCAN products USING INDEX idx_products_low_stock", "USE TEMP B-TREE FOR ORDER BY"
+        )),
+    "products.category_summary": AuditedQuery("""
+            SELECT
+                category,
+                COUNT(*) as total_products,
+                SUM(stock_quantity) as total_stock,
+                SUM(stock_quantity * price) as stock_value
+            FROM products
+            GROUP BY category
+        """, allow=("SCAN products",)),  # totals over the whole catalog
+    "products.stock_summary": AuditedQuery("""
+            SELECT
+                COUNT(*) as total_products,
+                SUM(stock_quantity) as total_stock,
+                SUM(stock_quantity * price) as total_stock_value,
+                COUNT(CASE WHEN stock_quantity <= reorder_level THEN 1 END) as low_stock_count
+            FROM products
+        """, allow=("SCAN products",)),
+    "products.top_selling_ids": AuditedQuery("""
+                SELECT si.product_id
+                FROM sales s
+                CROSS JOIN sale_items si ON si.sale_id = s.id
+                WHERE s.sale_date >= ?
+                GROUP BY si.product_id
+                ORDER BY SUM(si.quantity) DESC
+                LIMIT ?
+            """, (_MONTH_AGO, 60), allow=("USE TEMP B-TREE FOR GROUP BY", "USE TEMP B-TREE FOR ORDER BY")),
+    "products.low_stock_below": AuditedQuery("""
+                SELECT
+                    id, name, description, price, stock_quantity, category, barcode,
+                    created_at, updated_at
+                FROM products
+                WHERE stock_quantity <= ?
+                ORDER BY stock_quantity ASC
+            """, (10,)),
+
+    # Inventory screen
+    "inventory.all_products": AuditedQuery("""
+                SELECT
+                    p.id, p.name, p.description, p.category, p.barcode,
+                    p.price, p.cost_price, p.stock_quantity, p.reorder_level,
+                    p.image_path, p.is_active, p.created_at, p.updated_at,
+                    COALESCE(SUM(si.subtotal), 0) as total_sales
+                FROM products p
+                LEFT JOIN sale_items si ON p.id = si.product_id
+                WHERE p.is_active = 1
+                GROUP BY p.id
+                ORDER BY p.name
+            """, allow=("SCAN p", "USE TEMP B-TREE FOR ORDER BY")),  # every product with its sales total
+    "inventory.search": AuditedQuery("""
+                SELECT id, name, description, barcode, category,
+                       price, stock_quantity, created_at, updated_at
+                FROM products
+                WHERE is_active = 1
+                AND (name LIKE ? OR description LIKE ? OR barcode LIKE ?)
+                ORDER BY name
+            """, ('%milk%',) * 3, allow=("SCAN products",)),  # substring LIKE can't use an index
+    "inventory.get_product": AuditedQuery("""
+                SELECT id, name, description, barcode, category,
+                       price, stock_quantity, created_at, updated_at
+                FROM products
+                WHERE id = ? AND is_active = 1
+            """, (1,)),
+
+    # Sales
+    "sales.last_invoice_number": AuditedQuery("""
+            SELECT invoice_number
+            FROM sales
+            WHERE invoice_number >= ? AND invoice_number < ?
+            ORDER BY invoice_number DESC
+            LIMIT 1
+        """, (f"INV-{_today:%Y%m%d}-", f"INV-{_today:%Y%m%d}.")),
+    "sales.get": AuditedQuery(f"SELECT {_SALE_COLUMNS} FROM sales WHERE id = ?", (1,)),
+    "sales.items": AuditedQuery("""
+            SELECT
+                si.product_id, p.name, si.quantity, si.unit_price,
+                si.discount_percent, si.subtotal
+            FROM sale_items si
+            JOIN products p ON p.id = si.product_id
+            WHERE si.sale_id = ?
+        """, (1,)),
+    "sales.find": AuditedQuery(f"""
+                SELECT {_SALE_COLUMNS}
+                FROM sales
+                WHERE {_sales_condition}
+                ORDER BY sale_date DESC
+            """, _RANGE),
+    "sales.total": AuditedQuery("""
+                SELECT COALESCE(SUM(total_amount), 0)
+                FROM sales
+                WHERE sale_date BETWEEN ? AND ?
+            """, _RANGE),
+    "sales.summary": AuditedQuery("""
+                SELECT
+                    COALESCE(COUNT(*), 0) as total_sales,
+                    COALESCE(SUM(total_amount), 0) as total_revenue,
+                    COALESCE(SUM(discount_amount), 0) as total_discounts,
+                    COALESCE(SUM(tax_amount), 0) as total_tax,
+                    COALESCE(AVG(total_amount), 0) as average_sale,
+                    COALESCE(COUNT(DISTINCT customer_id), 0) as unique_customers
+                FROM sales
+                WHERE sale_date BETWEEN ? AND ?
+            """, _RANGE, allow=("USE TEMP B-TREE FOR count(DISTINCT)",)),
+    "sales.payment_method_totals": AuditedQuery(f"""
+                SELECT
+                    payment_method,
+                    COUNT(*) as count,
+                    SUM(total_amount) as total
+                FROM sales
+                WHERE {_sales_condition}
+                GROUP BY payment_method
+            """, _RANGE, allow=("USE TEMP B-TREE FOR GROUP BY",)),
+    "sales.hourly_totals": AuditedQuery("""
+                SELECT
+                    strftime('%H', sale_date) as hour,
+                    COUNT(*) as count,
+                    SUM(total_amount) as total
+                FROM sales
+                WHERE sale_date BETWEEN ? AND ?
+                GROUP BY hour
+                ORDER BY hour
+            """, _RANGE, allow=("USE TEMP B-TREE FOR GROUP BY",)),
+    "sales.top_products": AuditedQuery("""
+                SELECT
+                    p.id,
+                    p.name,
+                    p.category,
+                    SUM(si.quantity) as total_quantity,
+                    SUM(si.subtotal) as total_revenue,
+                    COUNT(DISTINCT s.id) as times_sold
+                FROM products p
+                JOIN sale_items si ON p.id = si.product_id
+                JOIN sales s ON si.sale_id = s.id
+                WHERE s.sale_date BETWEEN ? AND ?
+                GROUP BY p.id
+                ORDER BY total_quantity DESC
+                LIMIT ?
+            """, _RANGE + (10,), allow=(
+                "USE TEMP B-TREE FOR GROUP BY", "USE TEMP B-TREE FOR ORDER BY", "USE TEMP B-TREE FOR count(DISTINCT)"
+            )),
+    "sales.top_customers": AuditedQuery("""
+                SELECT
+                    c.id,
+                    c.name,
+                    COUNT(s.id) as visit_count,
+                    SUM(s.total_amount) as total_spent,
+                    AVG(s.total_amount) as average_purchase,
+                    MAX(s.sale_date) as last_visit,
+                    c.loyalty_points
+                FROM customers c
+                JOIN sales s ON c.id = s.customer_id
+                WHERE s.sale_date BETWEEN ? AND ?
+                GROUP BY c.id
+                ORDER BY total_spent DESC
+                LIMIT ?
+            """, _RANGE + (10,), allow=("USE TEMP B-TREE FOR GROUP BY", "USE TEMP B-TREE FOR ORDER BY")),
+    "sales.customer_segments": AuditedQuery("""
+                WITH customer_stats AS (
+                    SELECT
+                        c.id,
+                        COUNT(s.id) as visit_count,
+                        SUM(s.total_amount) as total_spent,
+                        AVG(s.total_amount) as average_purchase
+                    FROM customers c
+                    LEFT JOIN sales s ON c.id = s.customer_id
+                    WHERE s.sale_date BETWEEN ? AND ?
+                    GROUP BY c.id
+                )
+                SELECT
+                    CASE
+                        WHEN total_spent > 1000 THEN 'VIP'
+                        WHEN total_spent > 500 THEN 'Regular'
+                        WHEN total_spent > 100 THEN 'Occasional'
+                        ELSE 'New'
+                    END as segment,
+                    COUNT(*) as customer_count,
+                    SUM(total_spent) as segment_revenue,
+                    AVG(visit_count) as avg_visits
+                FROM customer_stats
+                GROUP BY segment
+            """, _RANGE, allow=("USE TEMP B-TREE FOR GROUP BY", "SCAN customer_stats", "CO-ROUTINE customer_stats",
+                                "MATERIALIZE customer_stats")),
+    "sales.customer_summary": AuditedQuery("""
+                SELECT
+                    COUNT(DISTINCT customer_id) as active_customers,
+                    COUNT(DISTINCT CASE WHEN customer_id IS NULL THEN s.id END) as guest_transactions,
+                    AVG(total_amount) as average_transaction,
+                    CASE
+                        WHEN COUNT(DISTINCT customer_id) > 0 THEN SUM(total_amount) / COUNT(DISTINCT customer_id)
+                        ELSE 0
+                    END as revenue_per_customer
+                FROM sales s
+                WHERE sale_date BETWEEN ? AND ?
+            """, _RANGE, allow=("USE TEMP B-TREE FOR count(DISTINCT)",)),
+
+    # Dashboard
+    "dashboard.today_sales": AuditedQuery("""
+                SELECT COALESCE(SUM(total_amount), 0)
+                FROM sales
+                WHERE sale_date >= ? AND sale_date < ?
+            """, _DAY),
+    "dashboard.items_sold": AuditedQuery("""
+                SELECT COALESCE(SUM(quantity), 0)
+                FROM sale_items si
+                JOIN sales s ON s.id = si.sale_id
+                WHERE s.sale_date >= ? AND s.sale_date < ?
+            """, _DAY),
+    "dashboard.low_stock_count": AuditedQuery("""
+                SELECT COUNT(*)
+                FROM products
+                WHERE stock_quantity <= ?
+            """, (LOW_STOCK_THRESHOLD,)),
+    "dashboard.customer_count": AuditedQuery("""
+                SELECT COUNT(*)
+                FROM customers
+            """, allow=("SCAN customers",)),  # counting every row reads the smallest index
+
+    # Customers
+    "customers.get": AuditedQuery("""
+            SELECT id, name, phone, email, address, loyalty_points, created_at, updated_at
+            FROM customers
+            WHERE id = ?
+        """, (1,)),
+    "customers.by_phone": AuditedQuery("SELECT * FROM customers WHERE phone_normalized = ?", ('0555123456',)),
+    "customers.search": _customer_search("mar"),
+    "customers.search_phone": _customer_search("0555"),
+    "customers.page": _customer_page(),
+    "customers.add_loyalty_points": AuditedQuery("""
+                UPDATE customers
+                SET loyalty_points = loyalty_points + ?,
+                    updated_at = DATETIME('now')
+                WHERE id = ?
+            """, (10, 1)),
+
+    # Users
+    "users.get": AuditedQuery("""
+            SELECT id, username, full_name, email, role
+            FROM users
+            WHERE id = ? AND is_active = 1
+        """, (1,)),
+    "users.login": AuditedQuery("""
+                SELECT id, username, password, full_name, email, role
+                FROM users
+                WHERE username = ? AND is_active = 1
+            """, ('admin',)),
+    "users.by_username": AuditedQuery("""
+                SELECT id, username, full_name, email, role
+                FROM users
+                WHERE username = ? AND is_active = 1
+            """, ('admin',)),
+
+    # Inventory ledger
+    "ledger.for_product": _ledger_for_product(),
+    "ledger.for_product_page": _ledger_for_product(after=(_MONTH_AGO, 1_000_000)),
+    "ledger.for_product_filtered": _ledger_for_product(
+        after=(_MONTH_AGO, 1_000_000), user="adm", transaction_type="manual", reason="restock"
+    ),
+    "ledger.recent": _ledger_recent(),
+    "ledger.recent_page": _ledger_recent(after=(_MONTH_AGO, 1_000_000)),
+    "ledger.recent_filtered": _ledger_recent(after=(_MONTH_AGO, 1_000_000), transaction_type="sale", reason="Sale #"),
+
+    # Query cache bookkeeping: one row per counted table
+    "query_cache.counted": AuditedQuery(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'table_changes'", hot=False
+    ),
+    "query_cache.versions": AuditedQuery("SELECT table_name, version FROM table_changes", hot=False),
+
+    # Held carts: a handful of rows at most
+    "held_sales.list": AuditedQuery("""
+                SELECT id, lane_id, user_id, customer_id, customer_name,
+                       item_count, subtotal, tax, total, held_at
+                FROM held_sales
+             ORDER BY held_at, id""", hot=False),
+}
+
+
+def plan_problems(query: AuditedQuery, steps: Iterable[str]) -> List[str]:
+    """Plan steps that scan a table or sort through a temp B-tree, unless the query allows them"""
+    return [
+        step for step in steps
+        if ((step.startswith("SCAN ") and step != "SCAN CONSTANT ROW") or step.startswith("USE TEMP B-TREE"))
+        and not step.startswith(query.allow)
+    ]
+
+
+def explain(conn, sql: str, params: tuple = ()) -> List[str]:
+    """The steps of a statement's query plan"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def audit(db_path: Optional[str] = None, names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """Explain every registered query and list the plan steps each one should not have"""
+    conn = get_db_connection(db_path or DATABASE_PATH)
+    results = []
+    try:
+        for name in (names or QUERIES):
+            query = QUERIES[name]
+            result: Dict[str, Any] = {"name": name, "hot": query.hot, "plan": [], "problems": []}
+            try:
+                result["plan"] = explain(conn, query.sql, query.params)
+            except Exception as e:
+                result["error"] = str(e)
+            result["problems"] = plan_problems(query, result["plan"])
+            result["failed"] = bool(result.get("error")) or (query.hot and bool(result["problems"]))
+            results.append(result)
+    finally:
+        conn.close()
+    return results
+
+
+def registered_fingerprints() -> Dict[str, str]:
+    """Fingerprint of each registered statement, as SQL tracing groups them"""
+    return {fingerprint(query.sql): name for name, query in QUERIES.items()}
+
+
+def hot_plans(conn) -> Dict[str, str]:
+    """Plan of each hot query on a connection, one line per query"""
+    plans = {}
+    for name, query in QUERIES.items():
+        if not query.hot:
+            continue
+        try:
+            plans[name] = "; ".join(explain(conn, query.sql, query.params))
+        except Exception:
+            continue  # table not in this database
+    return plans
+
+
+def format_audit(results: List[Dict[str, Any]], verbose: bool = False) -> str:
+    """One line per query, with the plan of failing ones (or of all with ``verbose``)"""
+    lines = []
+    for result in results:
+        status = "FAIL" if result["failed"] else ("warn" if result["problems"] else "ok")
+        lines.append(f"{status:<5} {result['name']}")
+        if result.get("error"):
+            lines.append(f"      error: {result['error']}")
+        if verbose or result["problems"] or result.get("error"):
+            for step in result["plan"]:
+                marker = "!" if step in result["problems"] else " "
+                lines.append(f"    {marker} {step}")
+    failed = sum(result["failed"] for result in results)
+    lines.append(f"{len(results)} queries, {failed} failed")
+    return "\n".join(lines)
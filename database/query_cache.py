@@ -0,0 +1,180 @@
+"""Read-through cache for hot point and lookup queries.
+
+Results are keyed by the whitespace-normalised SQL and its parameters and
+tagged with the tables the statement reads. Migration 3 installs triggers
+that bump a per-table counter in ``table_changes`` on every insert, update
+and delete, whichever process or code path made it, so an entry stays valid
+exactly as long as the counters of its tables are unchanged.
+
+Each database gets one long-lived read connection. Before every cacheable
+lookup it runs ``PRAGMA data_version``, which only changes when another
+connection commits; only then are the counters re-read. A hit therefore
+costs no new connection and no table read, just that one pragma, and a
+miss runs on the same connection.
+
+Only statements that read nothing but ``CACHED_TABLES`` are cached; others
+still run on the shared connection but always hit the database. Never use
+the cache for reads inside a write transaction.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+
+from config.settings import DATABASE_PATH, QUERY_CACHE_ENABLED, QUERY_CACHE_SIZE
+from database.connection import get_db_connection
+from utils import metrics
+
+# Tables with change counters (see migrations._table_change_counters)
+CACHED_TABLES = frozenset({"users", "products", "customers"})
+
+_TABLE_NAME = re.compile(r'\b(?:FROM|JOIN)\s+(?:main\.)?"?([A-Za-z_]\w*)', re.IGNORECASE)
+
+CacheKey = Tuple[str, str, Tuple[Any, ...]]
+
+
+@lru_cache(maxsize=512)
+def _parse(sql: str) -> Tuple[str, FrozenSet[str]]:
+    """Normalised SQL and the tables it reads"""
+    normalised = " ".join(sql.split())
+    return normalised, frozenset(name.lower() for name in _TABLE_NAME.findall(normalised))
+
+
+class _Database:
+    """Shared read connection and table counters of one database file"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+        # Make sure the tables, migrations and change-counter triggers exist
+        from database.db_manager import DBManager
+        DBManager(db_path).close()
+
+        self.conn = get_db_connection(db_path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.Lock()
+        self.data_version: Optional[int] = None
+        self.versions: Dict[str, int] = {}
+        self.counted = bool(self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'table_changes'"
+        ).fetchone())
+
+    def sync(self):
+        """Re-read the table counters if anything was committed since the last check"""
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self.data_version:
+            self.versions = dict(self.conn.execute("SELECT table_name, version FROM table_changes"))
+            self.data_version = data_version
+
+
+class QueryCache:
+    """Size-bounded LRU of query results, invalidated per table by change counters"""
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE, enabled: bool = QUERY_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        # key -> (columns, rows, {table: version when read})
+        self._entries: "OrderedDict[CacheKey, tuple]" = OrderedDict()
+        self._databases: Dict[str, _Database] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "uncached": 0}
+        # Lookups on different databases count concurrently
+        self._stats_lock = threading.Lock()
+
+        self._requests = metrics.counter("query_cache_requests_total", "Query cache lookups by result")
+        metrics.gauge("query_cache_entries", "Results held by the query cache").set_function(self.__len__)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fetch(self, sql: str, params: Sequence[Any] = (), db_path: Union[str, Path, None] = None,
+              as_dict: bool = False) -> List[Any]:
+        """Rows of a SELECT as tuples (or dicts), from the cache when still valid"""
+        normalised, tables = _parse(sql)
+        params = tuple(params)
+        database = self._database(str(db_path or DATABASE_PATH))
+
+        with database.lock:
+            cacheable = (self.enabled and database.counted and tables and tables <= CACHED_TABLES)
+            if not cacheable:
+                self._count("uncached")
+                cursor = database.conn.execute(normalised, params)
+                columns = [column[0] for column in cursor.description or ()]
+                return self._rows(columns, cursor.fetchall(), as_dict)
+
+            database.sync()
+            key = (database.db_path, normalised, params)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and all(database.versions.get(t) == v for t, v in entry[2].items()):
+                    self._entries.move_to_end(key)
+                    self._count("hits")
+                    return self._rows(entry[0], entry[1], as_dict)
+
+            # Read the counters and the rows from one snapshot
+            database.conn.execute("BEGIN")
+            try:
+                versions = {
+                    name: version for name, version
+                    in database.conn.execute("SELECT table_name, version FROM table_changes")
+                    if name in tables
+                }
+                cursor = database.conn.execute(normalised, params)
+                columns = [column[0] for column in cursor.description or ()]
+                rows = cursor.fetchall()
+            finally:
+                database.conn.execute("COMMIT")
+
+        with self._lock:
+            self._entries[key] = (columns, rows, versions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._count("misses")
+        return self._rows(columns, rows, as_dict)
+
+    def fetch_one(self, sql: str, params: Sequence[Any] = (), db_path: Union[str, Path, None] = None,
+                  as_dict: bool = False) -> Optional[Any]:
+        """First row of a SELECT, or None"""
+        rows = self.fetch(sql, params, db_path, as_dict)
+        return rows[0] if rows else None
+
+    def clear(self):
+        """Forget every cached result"""
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        """Forget everything and close the shared connections"""
+        self.clear()
+        with self._lock:
+            databases, self._databases = list(self._databases.values()), {}
+        for database in databases:
+            with database.lock:
+                database.conn.close()
+
+    def _database(self, db_path: str) -> _Database:
+        database = self._databases.get(db_path)
+        if database is None:
+            with self._lock:
+                database = self._databases.get(db_path)
+                if database is None:
+                    database = self._databases[db_path] = _Database(db_path)
+        return database
+
+    def _count(self, result: str):
+        with self._stats_lock:
+            self.stats[result] += 1
+        self._requests.inc(result=result)
+
+    @staticmethod
+    def _rows(columns: List[str], rows: List[tuple], as_dict: bool) -> List[Any]:
+        if as_dict:
+            return [dict(zip(columns, row)) for row in rows]
+        return list(rows)
+
+
+# Shared by every service so one lane's reads warm the cache for all screens
+query_cache = QueryCache()
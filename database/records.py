@@ -0,0 +1,169 @@
+"""Compact row objects for query results.
+
+``record_type`` generates a class with ``__slots__`` for a fixed column list,
+an ``__init__`` taking the columns in SELECT order (converting the ones given
+a converter) and read/write properties for alias names. Aliases such as
+``stock`` for ``stock_quantity`` are therefore not stored twice, and a row
+costs a fraction of the memory of a dict with the same keys.
+
+Records still behave like the dicts the services used to return:
+``record['stock']``, ``record.get('image_path')``, ``'barcode' in record``,
+``dict(record)`` and item assignment all work, so screens and dialogs need no
+changes. Keys that are neither columns nor aliases can be assigned too; they
+are kept in a small per-record dict created on first use.
+
+    rows = ProductRecord.from_rows(cursor.fetchall())
+"""
+
+from itertools import starmap
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+class Record:
+    """Base class of generated records: mapping access over slots"""
+
+    __slots__ = ("_extra",)
+
+    _fields: tuple = ()
+    _aliases: Dict[str, str] = {}
+    _keys: tuple = ()
+    _keyset: frozenset = frozenset()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> List["Record"]:
+        """Build one record per row"""
+        return list(starmap(cls, rows))
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._keyset:
+            return getattr(self, key)
+        extra = getattr(self, "_extra", None)
+        if extra is not None and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self._keyset:
+            setattr(self, key, value)
+            return
+        extra = getattr(self, "_extra", None)
+        if extra is None:
+            extra = self._extra = {}
+        extra[key] = value
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._keyset:
+            return True
+        extra = getattr(self, "_extra", None)
+        return extra is not None and key in extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        """Columns, aliases and extra keys, like the dicts this replaces"""
+        extra = getattr(self, "_extra", None)
+        return list(self._keys) + list(extra) if extra else list(self._keys)
+
+    def values(self) -> List[Any]:
+        return [self[key] for key in self.keys()]
+
+    def items(self) -> List[tuple]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict copy, aliases included"""
+        return dict(self.items())
+
+    copy = to_dict
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self._fields)
+        return f"{type(self).__name__}({values})"
+
+
+def _alias(field: str) -> property:
+    def set_field(self, value):
+        setattr(self, field, value)
+    return property(attrgetter(field), set_field, doc=f"Alias for {field}")
+
+
+def record_type(name: str, fields: Sequence[str], aliases: Optional[Dict[str, str]] = None,
+                converters: Optional[Dict[str, Callable[[Any], Any]]] = None) -> type:
+    """Generate a slotted record class for rows with the given columns"""
+    fields = tuple(fields)
+    aliases = dict(aliases or {})
+    converters = dict(converters or {})
+    for field in fields:
+        if not field.isidentifier() or field.startswith("_"):
+            raise ValueError(f"Invalid field name: {field!r}")
+    for alias, field in aliases.items():
+        if field not in fields or alias in fields:
+            raise ValueError(f"Invalid alias {alias!r} for {field!r}")
+
+    # Generated like namedtuple's __new__, so a row costs one call and no loop
+    namespace = {f"_convert_{field}": converters[field] for field in fields if field in converters}
+    body = "\n".join(
+        f"    self.{field} = _convert_{field}({field})" if field in converters else f"    self.{field} = {field}"
+        for field in fields
+    )
+    exec(f"def __init__(self, {', '.join(fields)}):\n{body or '    pass'}", namespace)
+
+    attributes = {
+        "__slots__": fields,
+        "__init__": namespace["__init__"],
+        "_fields": fields,
+        "_aliases": aliases,
+        "_keys": fields + tuple(aliases),
+        "_keyset": frozenset(fields) | frozenset(aliases),
+        "__module__": __name__,
+    }
+    attributes.update((alias, _alias(field)) for alias, field in aliases.items())
+    return type(name, (Record,), attributes)
+
+
+# Active products, as cached by the product catalog
+ProductRecord = record_type(
+    "ProductRecord",
+    ("id", "name", "description", "category", "barcode",
+     "price", "cost_price", "stock_quantity", "reorder_level",
+     "image_path", "is_active", "created_at", "updated_at"),
+    aliases={"stock": "stock_quantity"},
+    converters={"price": float, "cost_price": float, "stock_quantity": int, "reorder_level": int,
+                "is_active": bool},
+)
+
+# Products on the inventory screen, with their sales total
+InventoryProductRecord = record_type(
+    "InventoryProductRecord",
+    ProductRecord._fields + ("total_sales",),
+    aliases={"stock": "stock_quantity", "low_stock_threshold": "reorder_level", "last_updated": "updated_at"},
+    converters={"price": float, "cost_price": float, "stock_quantity": int, "reorder_level": int,
+                "is_active": bool, "total_sales": float},
+)
+
+# Search results and single products in the inventory service
+ProductSummaryRecord = record_type(
+    "ProductSummaryRecord",
+    ("id", "name", "description", "barcode", "category",
+     "price", "stock_quantity", "created_at", "updated_at"),
+    aliases={"stock": "stock_quantity", "last_updated": "updated_at"},
+    converters={"price": float, "stock_quantity": int},
+)
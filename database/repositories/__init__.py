@@ -0,0 +1,22 @@
+"""Storage behind the services, one repository per aggregate.
+
+``SQLiteRepositories`` is what the app runs on. ``InMemoryRepositories``
+implements the same interfaces with plain Python tables, so service logic can
+be benchmarked and tested deterministically without a database file:
+
+    repositories = InMemoryRepositories()
+    repositories.products.add(name="Milk", price=1.2, stock_quantity=10)
+    SaleService(repositories=repositories).create_sale(...)
+"""
+
+from database.repositories.base import (
+    CustomerRepository, LedgerRepository, ProductRepository, Repositories,
+    SaleRepository, UserRepository
+)
+from database.repositories.sqlite import SQLiteRepositories
+from database.repositories.memory import InMemoryRepositories
+
+__all__ = [
+    'Repositories', 'ProductRepository', 'SaleRepository', 'CustomerRepository',
+    'UserRepository', 'LedgerRepository', 'SQLiteRepositories', 'InMemoryRepositories'
+]
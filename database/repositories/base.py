@@ -0,0 +1,168 @@
+from abc import ABC, abstractmethod
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
+
+# Date ranges are closed, ``start <= sale_date <= end``, on DATETIME_FORMAT
+# strings; a date without a time ('2024-05-01') sorts before that day's sales.
+
+# Ledger pages are newest first; ``after`` is the (created_at, id) of the last
+# row of the previous page. Filters: ``user`` is a username prefix,
+# ``transaction_type`` an exact type and ``reason`` a substring of the reason,
+# all case-insensitive.
+
+
+class ProductRepository(ABC):
+    """Products and their stock levels"""
+
+    @abstractmethod
+    def list_active(self) -> List[Any]:
+        """Active products ordered by name, as ProductRecords"""
+
+    @abstractmethod
+    def get(self, product_id: int) -> Optional[Any]:
+        """A product by ID (active or not), as a ProductRecord"""
+
+    @abstractmethod
+    def take_stock(self, product_id: int, quantity: int) -> Optional[Tuple[int, int]]:
+        """Remove sold stock if there is enough; (previous, new) quantity or None"""
+
+    @abstractmethod
+    def adjust_stock(self, product_id: int, quantity_change: int) -> Optional[Tuple[int, int]]:
+        """Change an active product's stock unless it would go negative; (previous, new) or None"""
+
+    @abstractmethod
+    def low_stock(self) -> List[Dict[str, Any]]:
+        """Products at or below their reorder level, most urgent first"""
+
+    @abstractmethod
+    def category_summary(self) -> List[Dict[str, Any]]:
+        """Product count, stock and stock value per category"""
+
+    @abstractmethod
+    def stock_summary(self) -> Dict[str, Any]:
+        """Product count, stock, stock value and low-stock count over all products"""
+
+
+class SaleRepository(ABC):
+    """Sales, their items and the aggregates reports are built from"""
+
+    @abstractmethod
+    def last_invoice_number(self, prefix: str) -> Optional[str]:
+        """Highest invoice number starting with ``prefix``"""
+
+    @abstractmethod
+    def add(self, sale: Dict[str, Any]) -> int:
+        """Insert a sale row and return its ID"""
+
+    @abstractmethod
+    def add_item(self, sale_id: int, product_id: int, quantity: int, unit_price: float,
+                 discount_percent: float, subtotal: float):
+        """Insert one line of a sale"""
+
+    @abstractmethod
+    def get(self, sale_id: int) -> Optional[Dict[str, Any]]:
+        """A sale with its items"""
+
+    @abstractmethod
+    def find(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Sales with their items in a date range, newest first"""
+
+    @abstractmethod
+    def total(self, start: str, end: str) -> float:
+        """Sum of sale totals in a date range"""
+
+    @abstractmethod
+    def summary(self, start: str, end: str) -> Dict[str, Any]:
+        """Count, revenue, discounts, tax, average and distinct customers in a date range"""
+
+    @abstractmethod
+    def payment_method_totals(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Sale count and total per payment method"""
+
+    @abstractmethod
+    def hourly_totals(self, start: str, end: str) -> List[Dict[str, Any]]:
+        """Sale count and total per hour of day, in hour order"""
+
+    @abstractmethod
+    def top_products(self, start: str, end: str, limit: int) -> List[Dict[str, Any]]:
+        """Best selling products by quantity"""
+
+    @abstractmethod
+    def top_customers(self, start: str, end: str, limit: int) -> List[Dict[str, Any]]:
+        """Customers who spent the most"""
+
+    @abstractmethod
+    def customer_segments(self, start: str, end: str) -> List[Dict[str, Any]]:
+        """Customers bucketed by spend (VIP, Regular, Occasional, New)"""
+
+    @abstractmethod
+    def customer_summary(self, start: str, end: str) -> Dict[str, Any]:
+        """Active customers, guest sales, average sale and revenue per customer"""
+
+
+class CustomerRepository(ABC):
+    """Customers and their loyalty balances"""
+
+    @abstractmethod
+    def get(self, customer_id: int) -> Optional[Dict[str, Any]]:
+        """A customer by ID"""
+
+    @abstractmethod
+    def add_loyalty_points(self, customer_id: int, points: int) -> bool:
+        """Add (or remove) loyalty points"""
+
+
+class UserRepository(ABC):
+    """Staff accounts"""
+
+    @abstractmethod
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """An active user by ID, without the password hash"""
+
+
+class LedgerRepository(ABC):
+    """Inventory transactions, one per stock movement"""
+
+    @abstractmethod
+    def record(self, product_id: int, quantity_change: int, previous_quantity: int, new_quantity: int,
+               transaction_type: str, reason: str = "", notes: Optional[str] = None,
+               user_id: Optional[int] = None):
+        """Append a stock movement"""
+
+    @abstractmethod
+    def for_product(self, product_id: int, limit: int = 50, after: Optional[Tuple[str, int]] = None,
+                    user: Optional[str] = None, transaction_type: Optional[str] = None,
+                    reason: Optional[str] = None) -> List[Dict[str, Any]]:
+        """A page of a product's movements, newest first"""
+
+    @abstractmethod
+    def recent(self, limit: int = 50, after: Optional[Tuple[str, int]] = None,
+               user: Optional[str] = None, transaction_type: Optional[str] = None,
+               reason: Optional[str] = None) -> List[Dict[str, Any]]:
+        """A page of movements across all products, newest first"""
+
+
+class Repositories(ABC):
+    """One storage backend: a repository per aggregate plus transactions"""
+
+    # Database file, or None when the backend is not SQLite
+    db_path: Optional[str] = None
+    # Identifies the backend, e.g. for sharing a product catalog
+    name: str = ""
+
+    products: ProductRepository
+    sales: SaleRepository
+    customers: CustomerRepository
+    users: UserRepository
+    ledger: LedgerRepository
+
+    @abstractmethod
+    def bound(self, cursor) -> "Repositories":
+        """Repositories that run on a cursor inside the caller's transaction"""
+
+    @abstractmethod
+    def reader(self) -> ContextManager["Repositories"]:
+        """Repositories sharing one read connection, for several queries in a row"""
+
+    @abstractmethod
+    def transaction(self) -> ContextManager["Repositories"]:
+        """Repositories whose writes commit together, or not at all on error"""
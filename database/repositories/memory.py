@@ -0,0 +1,598 @@
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import DATETIME_FORMAT
+from database.connection import get_db_connection
+from database.records import ProductRecord
+from database.repositories.base import (
+    CustomerRepository, LedgerRepository, ProductRepository, Repositories,
+    SaleRepository, UserRepository
+)
+
+Clock = Callable[[], datetime]
+
+
+def _in_range(value: str, start: Optional[str], end: Optional[str]) -> bool:
+    return (not start or value >= start) and (not end or value <= end)
+
+
+def _average(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+def _copy_product(product: Any) -> Any:
+    # Callers (e.g. the product catalog) change records in place; the table's own must not move
+    return ProductRecord(*map(product.__getattribute__, ProductRecord._fields))
+
+
+class _MemoryRepository:
+    """Shares the store's tables, lock and undo log"""
+
+    def __init__(self, store: "InMemoryRepositories"):
+        self.store = store
+
+    def _now(self) -> str:
+        return self.store.clock().strftime(DATETIME_FORMAT)
+
+
+class InMemoryProductRepository(_MemoryRepository, ProductRepository):
+    def add(self, **fields) -> Any:
+        """Insert a product (for seeding); missing columns get the schema defaults"""
+        store = self.store
+        with store.lock:
+            product_id = store.next_id("products", fields.pop("id", None))
+            now = self._now()
+            product = ProductRecord(
+                product_id, fields.get("name", ""), fields.get("description", ""),
+                fields.get("category", ""), fields.get("barcode"),
+                fields.get("price", 0.0), fields.get("cost_price", 0.0),
+                fields.get("stock_quantity", 0), fields.get("reorder_level", 10),
+                fields.get("image_path"), fields.get("is_active", True),
+                fields.get("created_at") or now, fields.get("updated_at") or now
+            )
+            store.products_by_id[product_id] = product
+            store.on_undo(lambda: store.products_by_id.pop(product_id, None))
+            return _copy_product(product)
+
+    def list_active(self) -> List[Any]:
+        with self.store.lock:
+            products = [_copy_product(p) for p in self.store.products_by_id.values() if p.is_active]
+        products.sort(key=lambda product: product.name)
+        return products
+
+    def get(self, product_id: int) -> Optional[Any]:
+        product = self.store.products_by_id.get(product_id)
+        return _copy_product(product) if product else None
+
+    def _set_stock(self, product: Any, new_stock: int):
+        previous = (product.stock_quantity, product.updated_at)
+        product.stock_quantity = new_stock
+        product.updated_at = self._now()
+
+        def undo():
+            product.stock_quantity, product.updated_at = previous
+        self.store.on_undo(undo)
+
+    def take_stock(self, product_id: int, quantity: int) -> Optional[Tuple[int, int]]:
+        with self.store.lock:
+            product = self.store.products_by_id.get(product_id)
+            if product is None or product.stock_quantity < quantity:
+                return None
+            previous = product.stock_quantity
+            self._set_stock(product, previous - quantity)
+            return previous, product.stock_quantity
+
+    def adjust_stock(self, product_id: int, quantity_change: int) -> Optional[Tuple[int, int]]:
+        with self.store.lock:
+            product = self.store.products_by_id.get(product_id)
+            if product is None or not product.is_active or product.stock_quantity + quantity_change < 0:
+                return None
+            previous = product.stock_quantity
+            self._set_stock(product, previous + quantity_change)
+            return previous, product.stock_quantity
+
+    def low_stock(self) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            products = [p for p in self.store.products_by_id.values() if p.stock_quantity <= p.reorder_level]
+
+        # SQLite sorts the NULL of a zero reorder level first
+        def urgency(product):
+            if not product.reorder_level:
+                return (0, 0.0)
+            return (1, product.stock_quantity / product.reorder_level)
+
+        products.sort(key=urgency)
+        return [{
+            'id': p.id,
+            'name': p.name,
+            'category': p.category,
+            'stock_quantity': p.stock_quantity,
+            'reorder_level': p.reorder_level,
+            'price': p.price,
+            'cost_price': p.cost_price
+        } for p in products]
+
+    def category_summary(self) -> List[Dict[str, Any]]:
+        categories: Dict[str, Dict[str, Any]] = {}
+        with self.store.lock:
+            for p in self.store.products_by_id.values():
+                entry = categories.setdefault(p.category, {
+                    'category': p.category, 'total_products': 0, 'total_stock': 0, 'stock_value': 0.0
+                })
+                entry['total_products'] += 1
+                entry['total_stock'] += p.stock_quantity
+                entry['stock_value'] += p.stock_quantity * p.price
+        return [categories[name] for name in sorted(categories, key=lambda name: (name is not None, name or ""))]
+
+    def stock_summary(self) -> Dict[str, Any]:
+        with self.store.lock:
+            products = list(self.store.products_by_id.values())
+        return {
+            'total_products': len(products),
+            'total_stock': sum(p.stock_quantity for p in products) if products else None,
+            'total_stock_value': sum(p.stock_quantity * p.price for p in products) if products else None,
+            'low_stock_count': sum(1 for p in products if p.stock_quantity <= p.reorder_level)
+        }
+
+
+class InMemorySaleRepository(_MemoryRepository, SaleRepository):
+    def last_invoice_number(self, prefix: str) -> Optional[str]:
+        with self.store.lock:
+            numbers = self.store.invoice_numbers
+            i = bisect_left(numbers, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+            if i and numbers[i - 1].startswith(prefix):
+                return numbers[i - 1]
+            return None
+
+    def add(self, sale: Dict[str, Any]) -> int:
+        store = self.store
+        with store.lock:
+            sale_id = store.next_id("sales")
+            store.sales_by_id[sale_id] = {
+                "id": sale_id,
+                "invoice_number": sale["invoice_number"],
+                "customer_id": sale.get("customer_id"),
+                "user_id": sale["user_id"],
+                "total_amount": sale["total_amount"],
+                "discount_amount": sale.get("discount_amount", 0.0),
+                "tax_amount": sale["tax_amount"],
+                "payment_method": sale["payment_method"],
+                "payment_status": sale.get("payment_status", "completed"),
+                "sale_date": sale.get("sale_date") or self._now(),
+                "loyalty_points": sale.get("loyalty_points", 0)
+            }
+            insort(store.invoice_numbers, sale["invoice_number"])
+
+            def undo():
+                store.sales_by_id.pop(sale_id, None)
+                store.invoice_numbers.remove(sale["invoice_number"])
+            store.on_undo(undo)
+            return sale_id
+
+    def add_item(self, sale_id: int, product_id: int, quantity: int, unit_price: float,
+                 discount_percent: float, subtotal: float):
+        store = self.store
+        with store.lock:
+            items = store.sale_items[sale_id]
+            items.append({
+                "product_id": product_id,
+                "quantity": quantity,
+                "unit_price": unit_price,
+                "discount_percent": discount_percent,
+                "subtotal": subtotal
+            })
+            store.on_undo(items.pop)
+
+    def _sales_between(self, start: Optional[str], end: Optional[str]) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            return [sale for sale in self.store.sales_by_id.values() if _in_range(sale["sale_date"], start, end)]
+
+    def _sale_dict(self, sale: Dict[str, Any]) -> Dict[str, Any]:
+        products = self.store.products_by_id
+        items = [{
+            "product_id": item["product_id"],
+            "product_name": products[item["product_id"]].name,
+            "quantity": item["quantity"],
+            "price": float(item["unit_price"]),
+            "discount_percent": float(item["discount_percent"]),
+            "subtotal": float(item["subtotal"])
+        } for item in self.store.sale_items.get(sale["id"], ()) if item["product_id"] in products]
+        return {
+            "id": sale["id"],
+            "invoice_number": sale["invoice_number"],
+            "customer_id": sale["customer_id"],
+            "user_id": sale["user_id"],
+            "total": float(sale["total_amount"]),
+            "discount": float(sale["discount_amount"]),
+            "tax": float(sale["tax_amount"]),
+            "payment_method": sale["payment_method"],
+            "payment_status": sale["payment_status"],
+            "sale_date": sale["sale_date"],
+            "items": items
+        }
+
+    def get(self, sale_id: int) -> Optional[Dict[str, Any]]:
+        with self.store.lock:
+            sale = self.store.sales_by_id.get(sale_id)
+            return self._sale_dict(sale) if sale else None
+
+    def find(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        sales = self._sales_between(start, end)
+        sales.sort(key=lambda sale: sale["sale_date"], reverse=True)
+        with self.store.lock:
+            return [self._sale_dict(sale) for sale in sales]
+
+    def total(self, start: str, end: str) -> float:
+        return float(sum(sale["total_amount"] for sale in self._sales_between(start, end)))
+
+    def summary(self, start: str, end: str) -> Dict[str, Any]:
+        sales = self._sales_between(start, end)
+        totals = [sale["total_amount"] for sale in sales]
+        return {
+            'total_sales': len(sales),
+            'total_revenue': sum(totals),
+            'total_discounts': sum(sale["discount_amount"] for sale in sales),
+            'total_tax': sum(sale["tax_amount"] for sale in sales),
+            'average_sale': _average(totals) or 0,
+            'unique_customers': len({sale["customer_id"] for sale in sales if sale["customer_id"] is not None})
+        }
+
+    def _grouped(self, sales: List[Dict[str, Any]], key: Callable[[Dict[str, Any]], Any]) -> Dict[Any, List[float]]:
+        groups: Dict[Any, List[float]] = defaultdict(list)
+        for sale in sales:
+            groups[key(sale)].append(sale["total_amount"])
+        return groups
+
+    def payment_method_totals(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        groups = self._grouped(self._sales_between(start, end), lambda sale: sale["payment_method"])
+        return [{
+            'payment_method': method,
+            'count': len(totals),
+            'total': float(sum(totals))
+        } for method, totals in sorted(groups.items(), key=lambda group: group[0] or "")]
+
+    def hourly_totals(self, start: str, end: str) -> List[Dict[str, Any]]:
+        groups = self._grouped(self._sales_between(start, end), lambda sale: sale["sale_date"][11:13])
+        return [{
+            'hour': hour,
+            'count': len(totals),
+            'total': sum(totals)
+        } for hour, totals in sorted(groups.items())]
+
+    def top_products(self, start: str, end: str, limit: int) -> List[Dict[str, Any]]:
+        stats: Dict[int, Dict[str, Any]] = {}
+        with self.store.lock:
+            for sale in self._sales_between(start, end):
+                for item in self.store.sale_items.get(sale["id"], ()):
+                    product = self.store.products_by_id.get(item["product_id"])
+                    if product is None:
+                        continue
+                    entry = stats.setdefault(product.id, {
+                        'id': product.id, 'name': product.name, 'category': product.category,
+                        'total_quantity': 0, 'total_revenue': 0.0, 'sales': set()
+                    })
+                    entry['total_quantity'] += item["quantity"]
+                    entry['total_revenue'] += item["subtotal"]
+                    entry['sales'].add(sale["id"])
+
+        rows = sorted(stats.values(), key=lambda entry: entry['total_quantity'], reverse=True)[:limit]
+        for entry in rows:
+            entry['times_sold'] = len(entry.pop('sales'))
+        return rows
+
+    def _customer_stats(self, start: str, end: str) -> Dict[int, Dict[str, Any]]:
+        stats: Dict[int, Dict[str, Any]] = {}
+        with self.store.lock:
+            for sale in self._sales_between(start, end):
+                customer = self.store.customers_by_id.get(sale["customer_id"])
+                if customer is None:
+                    continue
+                entry = stats.setdefault(customer["id"], {
+                    'customer': customer, 'totals': [], 'last_visit': sale["sale_date"]
+                })
+                entry['totals'].append(sale["total_amount"])
+                entry['last_visit'] = max(entry['last_visit'], sale["sale_date"])
+        return stats
+
+    def top_customers(self, start: str, end: str, limit: int) -> List[Dict[str, Any]]:
+        rows = [{
+            'id': entry['customer']["id"],
+            'name': entry['customer']["name"],
+            'visit_count': len(entry['totals']),
+            'total_spent': sum(entry['totals']),
+            'average_purchase': _average(entry['totals']),
+            'last_visit': entry['last_visit'],
+            'loyalty_points': entry['customer']["loyalty_points"]
+        } for entry in self._customer_stats(start, end).values()]
+        rows.sort(key=lambda row: row['total_spent'], reverse=True)
+        return rows[:limit]
+
+    def customer_segments(self, start: str, end: str) -> List[Dict[str, Any]]:
+        segments: Dict[str, Dict[str, Any]] = {}
+        for entry in self._customer_stats(start, end).values():
+            spent = sum(entry['totals'])
+            if spent > 1000:
+                name = 'VIP'
+            elif spent > 500:
+                name = 'Regular'
+            elif spent > 100:
+                name = 'Occasional'
+            else:
+                name = 'New'
+            segment = segments.setdefault(name, {'spent': [], 'visits': []})
+            segment['spent'].append(spent)
+            segment['visits'].append(len(entry['totals']))
+        return [{
+            'segment': name,
+            'customer_count': len(segment['spent']),
+            'segment_revenue': sum(segment['spent']),
+            'avg_visits': _average(segment['visits'])
+        } for name, segment in sorted(segments.items())]
+
+    def customer_summary(self, start: str, end: str) -> Dict[str, Any]:
+        sales = self._sales_between(start, end)
+        totals = [sale["total_amount"] for sale in sales]
+        customers = {sale["customer_id"] for sale in sales if sale["customer_id"] is not None}
+        return {
+            'active_customers': len(customers),
+            'guest_transactions': sum(1 for sale in sales if sale["customer_id"] is None),
+            'average_transaction': _average(totals),
+            'revenue_per_customer': sum(totals) / len(customers) if customers else 0
+        }
+
+
+class InMemoryCustomerRepository(_MemoryRepository, CustomerRepository):
+    def add(self, **fields) -> Dict[str, Any]:
+        """Insert a customer (for seeding)"""
+        store = self.store
+        with store.lock:
+            customer_id = store.next_id("customers", fields.pop("id", None))
+            now = self._now()
+            customer = {
+                "id": customer_id, "name": "", "phone": None, "email": None, "address": None,
+                "loyalty_points": 0, "created_at": now, "updated_at": now
+            }
+            customer.update(fields)
+            store.customers_by_id[customer_id] = customer
+            store.on_undo(lambda: store.customers_by_id.pop(customer_id, None))
+            return dict(customer)
+
+    def get(self, customer_id: int) -> Optional[Dict[str, Any]]:
+        customer = self.store.customers_by_id.get(customer_id)
+        return dict(customer) if customer else None
+
+    def add_loyalty_points(self, customer_id: int, points: int) -> bool:
+        with self.store.lock:
+            customer = self.store.customers_by_id.get(customer_id)
+            if customer is None:
+                return False
+            previous = (customer["loyalty_points"], customer["updated_at"])
+            customer["loyalty_points"] += points
+            customer["updated_at"] = self._now()
+
+            def undo():
+                customer["loyalty_points"], customer["updated_at"] = previous
+            self.store.on_undo(undo)
+            return True
+
+
+class InMemoryUserRepository(_MemoryRepository, UserRepository):
+    def add(self, **fields) -> Dict[str, Any]:
+        """Insert a user (for seeding)"""
+        store = self.store
+        with store.lock:
+            user_id = store.next_id("users", fields.pop("id", None))
+            user = {"id": user_id, "username": "", "full_name": None, "email": None,
+                    "role": "cashier", "is_active": True}
+            user.update(fields)
+            store.users_by_id[user_id] = user
+            store.on_undo(lambda: store.users_by_id.pop(user_id, None))
+            return dict(user)
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        user = self.store.users_by_id.get(user_id)
+        if not user or not user["is_active"]:
+            return None
+        return {key: user[key] for key in ("id", "username", "full_name", "email", "role")}
+
+
+class InMemoryLedgerRepository(_MemoryRepository, LedgerRepository):
+    def record(self, product_id: int, quantity_change: int, previous_quantity: int, new_quantity: int,
+               transaction_type: str, reason: str = "", notes: Optional[str] = None,
+               user_id: Optional[int] = None):
+        store = self.store
+        with store.lock:
+            store.ledger_entries.append({
+                "id": store.next_id("inventory_transactions"),
+                "product_id": product_id,
+                "quantity_change": quantity_change,
+                "previous_quantity": previous_quantity,
+                "new_quantity": new_quantity,
+                "transaction_type": transaction_type,
+                "reason": reason,
+                "notes": notes,
+                "user_id": user_id,
+                "created_at": self._now()
+            })
+            store.on_undo(store.ledger_entries.pop)
+
+    def _transaction_dict(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        user = self.store.users_by_id.get(entry["user_id"])
+        return {
+            "id": entry["id"],
+            "quantity_change": entry["quantity_change"],
+            "previous_quantity": entry["previous_quantity"],
+            "new_quantity": entry["new_quantity"],
+            "transaction_type": entry["transaction_type"],
+            "reason": entry["reason"],
+            "notes": entry["notes"],
+            "created_at": entry["created_at"],
+            "user_name": user["username"] if user and user["username"] else "System"
+        }
+
+    def _page(self, entries: List[Dict[str, Any]], limit: int, after: Optional[Tuple[str, int]],
+              user: Optional[str], transaction_type: Optional[str],
+              reason: Optional[str]) -> List[Dict[str, Any]]:
+        users = self.store.users_by_id
+        user = user.lower() if user else None
+        reason = reason.lower() if reason else None
+        matching = []
+        for entry in entries:
+            if after and (entry["created_at"], entry["id"]) >= after:
+                continue
+            if user:
+                row = users.get(entry["user_id"])
+                if not row or not (row["username"] or "").lower().startswith(user):
+                    continue
+            if transaction_type and entry["transaction_type"].lower() != transaction_type.lower():
+                continue
+            if reason and reason not in (entry["reason"] or "").lower():
+                continue
+            matching.append(entry)
+        return sorted(matching, key=lambda entry: (entry["created_at"], entry["id"]), reverse=True)[:limit]
+
+    def for_product(self, product_id: int, limit: int = 50, after: Optional[Tuple[str, int]] = None,
+                    user: Optional[str] = None, transaction_type: Optional[str] = None,
+                    reason: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            entries = [entry for entry in self.store.ledger_entries if entry["product_id"] == product_id]
+            return [
+                self._transaction_dict(entry)
+                for entry in self._page(entries, limit, after, user, transaction_type, reason)
+            ]
+
+    def recent(self, limit: int = 50, after: Optional[Tuple[str, int]] = None,
+               user: Optional[str] = None, transaction_type: Optional[str] = None,
+               reason: Optional[str] = None) -> List[Dict[str, Any]]:
+        products = self.store.products_by_id
+        with self.store.lock:
+            entries = [entry for entry in self.store.ledger_entries if entry["product_id"] in products]
+            return [
+                dict(self._transaction_dict(entry), product_name=products[entry["product_id"]].name)
+                for entry in self._page(entries, limit, after, user, transaction_type, reason)
+            ]
+
+
+class InMemoryRepositories(Repositories):
+    """Plain Python tables behind the repository interfaces.
+
+    Nothing touches disk, so service logic can be timed and tested without
+    SQLite in the numbers. Pass a fixed ``clock`` for reproducible timestamps.
+    """
+
+    def __init__(self, clock: Clock = datetime.utcnow):
+        self.db_path = None
+        self.name = f"memory:{id(self):x}"
+        self.clock = clock
+        self.lock = threading.RLock()
+        self._undo: Optional[List[Callable[[], Any]]] = None
+
+        self.products = InMemoryProductRepository(self)
+        self.sales = InMemorySaleRepository(self)
+        self.customers = InMemoryCustomerRepository(self)
+        self.users = InMemoryUserRepository(self)
+        self.ledger = InMemoryLedgerRepository(self)
+
+        # The tables themselves
+        self.products_by_id: Dict[int, Any] = {}
+        self.sales_by_id: Dict[int, Dict[str, Any]] = {}
+        self.sale_items: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.customers_by_id: Dict[int, Dict[str, Any]] = {}
+        self.users_by_id: Dict[int, Dict[str, Any]] = {}
+        self.ledger_entries: List[Dict[str, Any]] = []
+        # Sorted, standing in for the index on sales.invoice_number
+        self.invoice_numbers: List[str] = []
+        # Last ID handed out per table, like sqlite_sequence
+        self.sequences: Dict[str, int] = defaultdict(int)
+
+    def next_id(self, table: str, requested: Optional[int] = None) -> int:
+        """An unused row ID for a table (``requested`` if given)"""
+        with self.lock:
+            row_id = requested or self.sequences[table] + 1
+            self.sequences[table] = max(self.sequences[table], row_id)
+            return row_id
+
+    def on_undo(self, undo: Callable[[], Any]):
+        """Remember how to revert a write if the current transaction fails"""
+        if self._undo is not None:
+            self._undo.append(undo)
+
+    def bound(self, cursor=None) -> "InMemoryRepositories":
+        return self
+
+    @contextmanager
+    def reader(self) -> Iterator["InMemoryRepositories"]:
+        yield self
+
+    @contextmanager
+    def transaction(self) -> Iterator["InMemoryRepositories"]:
+        with self.lock:
+            outer, self._undo = self._undo, []
+            try:
+                yield self
+            except Exception:
+                for undo in reversed(self._undo):
+                    undo()
+                raise
+            finally:
+                if outer is not None:
+                    outer.extend(self._undo)
+                self._undo = outer
+
+    @classmethod
+    def from_database(cls, db_path, clock: Clock = datetime.utcnow) -> "InMemoryRepositories":
+        """Copy a database's products, customers, users and hot sales (not the ledger) into memory"""
+        repositories = cls(clock)
+        conn = get_db_connection(db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, name, description, category, barcode,
+                       price, cost_price, stock_quantity, reorder_level,
+                       image_path, is_active, created_at, updated_at
+                FROM products
+            """)
+            repositories.products_by_id = {row[0]: ProductRecord(*row) for row in cursor.fetchall()}
+
+            cursor.execute("""
+                SELECT id, name, phone, email, address, loyalty_points, created_at, updated_at
+                FROM customers
+            """)
+            columns = [column[0] for column in cursor.description]
+            repositories.customers_by_id = {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+
+            cursor.execute("SELECT id, username, full_name, email, role, is_active FROM users")
+            columns = [column[0] for column in cursor.description]
+            repositories.users_by_id = {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+
+            cursor.execute("""
+                SELECT id, invoice_number, customer_id, user_id,
+                       total_amount, discount_amount, tax_amount,
+                       payment_method, payment_status, sale_date, loyalty_points
+                FROM sales
+            """)
+            columns = [column[0] for column in cursor.description]
+            repositories.sales_by_id = {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+            repositories.invoice_numbers = sorted(sale["invoice_number"] for sale in repositories.sales_by_id.values())
+
+            cursor.execute("""
+                SELECT sale_id, product_id, quantity, unit_price, discount_percent, subtotal
+                FROM sale_items
+                ORDER BY id
+            """)
+            for row in cursor.fetchall():
+                repositories.sale_items[row[0]].append({
+                    "product_id": row[1], "quantity": row[2], "unit_price": row[3],
+                    "discount_percent": row[4], "subtotal": row[5]
+                })
+        finally:
+            conn.close()
+
+        for table, rows in (("products", repositories.products_by_id), ("sales", repositories.sales_by_id),
+                            ("customers", repositories.customers_by_id), ("users", repositories.users_by_id)):
+            repositories.sequences[table] = max(rows, default=0)
+        return repositories
@@ -0,0 +1,636 @@
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from database.archive import attach_archives, list_archive_years
+from database.connection import get_db_connection
+from database.query_cache import query_cache
+from database.records import ProductRecord
+from database.repositories.base import (
+    CustomerRepository, LedgerRepository, ProductRepository, Repositories,
+    SaleRepository, UserRepository
+)
+
+_PRODUCT_COLUMNS = """
+    id, name, description, category, barcode,
+    price, cost_price, stock_quantity, reorder_level,
+    image_path, is_active, created_at, updated_at
+"""
+
+_SALE_COLUMNS = """
+    id, invoice_number, customer_id, user_id,
+    total_amount, discount_amount, tax_amount,
+    payment_method, payment_status, sale_date
+"""
+
+
+def _range_filter(column: str, start: Optional[str], end: Optional[str]) -> Tuple[str, List[str]]:
+    """SQL condition and parameters for an optional closed date range"""
+    conditions, params = [], []
+    if start:
+        conditions.append(f"{column} >= ?")
+        params.append(start)
+    if end:
+        conditions.append(f"{column} <= ?")
+        params.append(end)
+    return " AND ".join(conditions) or "1=1", params
+
+
+def _sale_dict(row: Sequence[Any], items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "id": row[0],
+        "invoice_number": row[1],
+        "customer_id": row[2],
+        "user_id": row[3],
+        "total": float(row[4]),
+        "discount": float(row[5]),
+        "tax": float(row[6]),
+        "payment_method": row[7],
+        "payment_status": row[8],
+        "sale_date": row[9],
+        "items": items
+    }
+
+
+def _ledger_filter(after: Optional[Tuple[str, int]] = None, user: Optional[str] = None,
+                   transaction_type: Optional[str] = None, reason: Optional[str] = None) -> Tuple[str, List[Any]]:
+    """SQL conditions (each starting with AND) and parameters for a page of ledger rows"""
+    conditions, params = [], []
+    if after:
+        # Written as a range so SQLite can seek the (created_at, id) indexes
+        conditions.append("t.created_at <= ? AND (t.created_at < ? OR t.id < ?)")
+        params.extend([after[0], after[0], after[1]])
+    if user:
+        # On the ledger row itself, so the join order (and index) stays the same
+        conditions.append("t.user_id IN (SELECT id FROM users WHERE username LIKE ?)")
+        params.append(f"{user}%")
+    if transaction_type:
+        conditions.append("t.transaction_type = ? COLLATE NOCASE")
+        params.append(transaction_type)
+    if reason:
+        conditions.append("t.reason LIKE ?")
+        params.append(f"%{reason}%")
+    return "".join(f" AND {condition}" for condition in conditions), params
+
+
+def _transaction_dict(row: Sequence[Any]) -> Dict[str, Any]:
+    transaction = {
+        "id": row[0],
+        "quantity_change": row[1],
+        "previous_quantity": row[2],
+        "new_quantity": row[3],
+        "transaction_type": row[4],
+        "reason": row[5],
+        "notes": row[6],
+        "created_at": row[7],
+        "user_name": row[8] if row[8] else "System"
+    }
+    if len(row) > 9:
+        transaction["product_name"] = row[9]
+    return transaction
+
+
+class _SQLiteRepository:
+    """Runs on the caller's cursor when bound, otherwise on a short-lived connection"""
+
+    def __init__(self, db_path: str, cursor: Optional[sqlite3.Cursor] = None, use_cache: bool = True):
+        self.db_path = db_path
+        self._bound_cursor = cursor
+        self._use_cache = use_cache
+
+    @contextmanager
+    def _cursor(self) -> Iterator[sqlite3.Cursor]:
+        if self._bound_cursor is not None:
+            yield self._bound_cursor
+            return
+        conn = get_db_connection(self.db_path)
+        try:
+            yield conn.cursor()
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _fetch(self, sql: str, params: Sequence[Any] = (), cached: bool = False) -> List[tuple]:
+        if cached and self._use_cache:
+            return query_cache.fetch(sql, params, self.db_path)
+        with self._cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class SQLiteProductRepository(_SQLiteRepository, ProductRepository):
+    def list_active(self) -> List[Any]:
+        return ProductRecord.from_rows(self._fetch(f"""
+            SELECT {_PRODUCT_COLUMNS}
+            FROM products
+            WHERE is_active = 1
+            ORDER BY name
+        """))
+
+    def get(self, product_id: int) -> Optional[Any]:
+        rows = self._fetch(f"""
+            SELECT {_PRODUCT_COLUMNS}
+            FROM products
+            WHERE id = ?
+        """, (product_id,), cached=True)
+        return ProductRecord(*rows[0]) if rows else None
+
+    def take_stock(self, product_id: int, quantity: int) -> Optional[Tuple[int, int]]:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT stock_quantity
+                FROM products
+                WHERE id = ? AND stock_quantity >= ?
+            """, (product_id, quantity))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            new_stock = row[0] - quantity
+            cursor.execute("""
+                UPDATE products
+                SET stock_quantity = ?,
+                    updated_at = DATETIME('now')
+                WHERE id = ?
+            """, (new_stock, product_id))
+            return row[0], new_stock
+
+    def adjust_stock(self, product_id: int, quantity_change: int) -> Optional[Tuple[int, int]]:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT stock_quantity
+                FROM products
+                WHERE id = ? AND is_active = 1
+            """, (product_id,))
+            row = cursor.fetchone()
+            if not row or row[0] + quantity_change < 0:
+                return None
+            new_stock = row[0] + quantity_change
+            cursor.execute("""
+                UPDATE products SET
+                stock_quantity = ?,
+                updated_at = DATETIME('now')
+                WHERE id = ?
+            """, (new_stock, product_id))
+            return row[0], new_stock
+
+    def low_stock(self) -> List[Dict[str, Any]]:
+        return [{
+            'id': row[0],
+            'name': row[1],
+            'category': row[2],
+            'stock_quantity': row[3],
+            'reorder_level': row[4],
+            'price': row[5],
+            'cost_price': row[6]
+        } for row in self._fetch("""
+            SELECT
+                id, name, category, stock_quantity, reorder_level,
+                price, cost_price
+            FROM products
+            WHERE stock_quantity <= reorder_level
+            ORDER BY (stock_quantity * 1.0 / reorder_level)
+        """, cached=True)]
+
+    def category_summary(self) -> List[Dict[str, Any]]:
+        return [{
+            'category': row[0],
+            'total_products': row[1],
+            'total_stock': row[2],
+            'stock_value': row[3]
+        } for row in self._fetch("""
+            SELECT
+                category,
+                COUNT(*) as total_products,
+                SUM(stock_quantity) as total_stock,
+                SUM(stock_quantity * price) as stock_value
+            FROM products
+            GROUP BY category
+        """, cached=True)]
+
+    def stock_summary(self) -> Dict[str, Any]:
+        row = self._fetch("""
+            SELECT
+                COUNT(*) as total_products,
+                SUM(stock_quantity) as total_stock,
+                SUM(stock_quantity * price) as total_stock_value,
+                COUNT(CASE WHEN stock_quantity <= reorder_level THEN 1 END) as low_stock_count
+            FROM products
+        """, cached=True)[0]
+        return {
+            'total_products': row[0],
+            'total_stock': row[1],
+            'total_stock_value': row[2],
+            'low_stock_count': row[3]
+        }
+
+
+class SQLiteSaleRepository(_SQLiteRepository, SaleRepository):
+    def last_invoice_number(self, prefix: str) -> Optional[str]:
+        # Bump the prefix's last character for the upper bound, so this is a range scan
+        rows = self._fetch("""
+            SELECT invoice_number
+            FROM sales
+            WHERE invoice_number >= ? AND invoice_number < ?
+            ORDER BY invoice_number DESC
+            LIMIT 1
+        """, (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)))
+        return rows[0][0] if rows else None
+
+    def add(self, sale: Dict[str, Any]) -> int:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO sales (
+                    invoice_number, customer_id, user_id,
+                    total_amount, discount_amount, tax_amount,
+                    payment_method, payment_status, sale_date,
+                    loyalty_points
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, DATETIME('now')), ?)
+            """, (
+                sale["invoice_number"],
+                sale.get("customer_id"),
+                sale["user_id"],
+                sale["total_amount"],
+                sale.get("discount_amount", 0.0),
+                sale["tax_amount"],
+                sale["payment_method"],
+                sale.get("payment_status", "completed"),
+                sale.get("sale_date"),
+                sale.get("loyalty_points", 0)
+            ))
+            return cursor.lastrowid
+
+    def add_item(self, sale_id: int, product_id: int, quantity: int, unit_price: float,
+                 discount_percent: float, subtotal: float):
+        with self._cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO sale_items (
+                    sale_id, product_id, quantity,
+                    unit_price, discount_percent, subtotal
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, (sale_id, product_id, quantity, unit_price, discount_percent, subtotal))
+
+    @staticmethod
+    def _items(cursor: sqlite3.Cursor, table: str, sale_id: int) -> List[Dict[str, Any]]:
+        cursor.execute(f"""
+            SELECT
+                si.product_id, p.name, si.quantity, si.unit_price,
+                si.discount_percent, si.subtotal
+            FROM {table} si
+            JOIN products p ON p.id = si.product_id
+            WHERE si.sale_id = ?
+        """, (sale_id,))
+        return [{
+            "product_id": row[0],
+            "product_name": row[1],
+            "quantity": row[2],
+            "price": float(row[3]),
+            "discount_percent": float(row[4]),
+            "subtotal": float(row[5])
+        } for row in cursor.fetchall()]
+
+    def get(self, sale_id: int) -> Optional[Dict[str, Any]]:
+        with self._cursor() as cursor:
+            cursor.execute(f"SELECT {_SALE_COLUMNS} FROM sales WHERE id = ?", (sale_id,))
+            sale_row = cursor.fetchone()
+            tables = {"sales": "sales", "sale_items": "sale_items"}
+
+            if not sale_row:
+                # Closed periods live in the yearly archive files; look one year at a time, newest first
+                for year in reversed(list_archive_years()):
+                    tables = attach_archives(cursor.connection, str(year), str(year))
+                    cursor.execute(f"SELECT {_SALE_COLUMNS} FROM {tables['sales']} WHERE id = ?", (sale_id,))
+                    sale_row = cursor.fetchone()
+                    if sale_row:
+                        break
+                else:
+                    return None
+
+            return _sale_dict(sale_row, self._items(cursor, tables["sale_items"], sale_id))
+
+    def find(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._cursor() as cursor:
+            tables = attach_archives(cursor.connection, start, end)
+            condition, params = _range_filter("sale_date", start, end)
+            cursor.execute(f"""
+                SELECT {_SALE_COLUMNS}
+                FROM {tables["sales"]}
+                WHERE {condition}
+                ORDER BY sale_date DESC
+            """, params)
+            return [
+                _sale_dict(row, self._items(cursor, tables["sale_items"], row[0]))
+                for row in cursor.fetchall()
+            ]
+
+    def total(self, start: str, end: str) -> float:
+        with self._cursor() as cursor:
+            tables = attach_archives(cursor.connection, start, end)
+            cursor.execute(f"""
+                SELECT COALESCE(SUM(total_amount), 0)
+                FROM {tables["sales"]}
+                WHERE sale_date BETWEEN ? AND ?
+            """, (start, end))
+            return float(cursor.fetchone()[0])
+
+    def summary(self, start: str, end: str) -> Dict[str, Any]:
+        with self._cursor() as cursor:
+            tables = attach_archives(cursor.connection, start, end)
+            cursor.execute(f"""
+                SELECT
+                    COALESCE(COUNT(*), 0) as total_sales,
+                    COALESCE(SUM(total_amount), 0) as total_revenue,
+                    COALESCE(SUM(discount_amount), 0) as total_discounts,
+                    COALESCE(SUM(tax_amount), 0) as total_tax,
+                    COALESCE(AVG(total_amount), 0) as average_sale,
+                    COALESCE(COUNT(DISTINCT customer_id), 0) as unique_customers
+                FROM {tables["sales"]}
+                WHERE sale_date BETWEEN ? AND ?
+            """, (start, end))
+            row = cursor.fetchone() or (0, 0, 0, 0, 0, 0)
+        return {
+            'total_sales': row[0],
+            'total_revenue': row[1],
+            'total_discounts': row[2],
+            'total_tax': row[3],
+            'average_sale': row[4],
+            'unique_customers': row[5]
+        }
+
+    def payment_method_totals(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._cursor() as cursor:
+            tables = attach_archives(cursor.connection, start, end)
+            condition, params = _range_filter("sale_date", start, end)
+            cursor.execute(f"""
+                SELECT
+                    payment_method,
+                    COUNT(*) as count,
+                    SUM(total_amount) as total
+                FROM {tables["sales"]}
+                WHERE {condition}
+                GROUP BY payment_method
+            """, params)
+            return [{
+                'payment_method': row[0],
+                'count': row[1],
+                'total': float(row[2])
+            } for row in cursor.fetchall()]
+
+    def hourly_totals(self, start: str, end: str) -> List[Dict[str, Any]]:
+        with self._cursor() as cursor:
+            tables = attach_archives(cursor.connection, start, end)
+            cursor.execute(f"""
+                SELECT
+                    strftime('%H', sale_date) as hour,
+                    COUNT(*) as count,
+                    SUM(total_amount) as total
+                FROM {tables["sales"]}
+                WHERE sale_date BETWEEN ? AND ?
+                GROUP BY hour
+                ORDER BY hour
+            """, (start, end))
+            return [{
+                'hour': row[0],
+                'count': row[1],
+                'total': row[2]
+            } for row in cursor.fetchall()]
+
+    def top_products(self, start: str, end: str, limit: int) -> List[Dict[str, Any]]:
+        with self._cursor() as cursor:
+            tables = attach_archives(cursor.connection, start, end)
+            cursor.execute(f"""
+                SELECT
+                    p.id,
+                    p.name,
+                    p.category,
+                    SUM(si.quantity) as total_quantity,
+                    SUM(si.subtotal) as total_revenue,
+                    COUNT(DISTINCT s.id) as times_sold
+                FROM products p
+                JOIN {tables["sale_items"]} si ON p.id = si.product_id
+                JOIN {tables["sales"]} s ON si.sale_id = s.id
+                WHERE s.sale_date BETWEEN ? AND ?
+                GROUP BY p.id
+                ORDER BY total_quantity DESC
+                LIMIT ?
+            """, (start, end, limit))
+            return [{
+                'id': row[0],
+                'name': row[1],
+                'category': row[2],
+                'total_quantity': row[3],
+                'total_revenue': row[4],
+                'times_sold': row[5]
+            } for row in cursor.fetchall()]
+
+    def top_customers(self, start: str, end: str, limit: int) -> List[Dict[str, Any]]:
+        with self._cursor() as cursor:
+            tables = attach_archives(cursor.connection, start, end)
+            cursor.execute(f"""
+                SELECT
+                    c.id,
+                    c.name,
+                    COUNT(s.id) as visit_count,
+                    SUM(s.total_amount) as total_spent,
+                    AVG(s.total_amount) as average_purchase,
+                    MAX(s.sale_date) as last_visit,
+                    c.loyalty_points
+                FROM customers c
+                JOIN {tables["sales"]} s ON c.id = s.customer_id
+                WHERE s.sale_date BETWEEN ? AND ?
+                GROUP BY c.id
+                ORDER BY total_spent DESC
+                LIMIT ?
+            """, (start, end, limit))
+            return [{
+                'id': row[0],
+                'name': row[1],
+                'visit_count': row[2],
+                'total_spent': row[3],
+                'average_purchase': row[4],
+                'last_visit': row[5],
+                'loyalty_points': row[6]
+            } for row in cursor.fetchall()]
+
+    def customer_segments(self, start: str, end: str) -> List[Dict[str, Any]]:
+        with self._cursor() as cursor:
+            tables = attach_archives(cursor.connection, start, end)
+            cursor.execute(f"""
+                WITH customer_stats AS (
+                    SELECT
+                        c.id,
+                        COUNT(s.id) as visit_count,
+                        SUM(s.total_amount) as total_spent,
+                        AVG(s.total_amount) as average_purchase
+                    FROM customers c
+                    LEFT JOIN {tables["sales"]} s ON c.id = s.customer_id
+                    WHERE s.sale_date BETWEEN ? AND ?
+                    GROUP BY c.id
+                )
+                SELECT
+                    CASE
+                        WHEN total_spent > 1000 THEN 'VIP'
+                        WHEN total_spent > 500 THEN 'Regular'
+                        WHEN total_spent > 100 THEN 'Occasional'
+                        ELSE 'New'
+                    END as segment,
+                    COUNT(*) as customer_count,
+                    SUM(total_spent) as segment_revenue,
+                    AVG(visit_count) as avg_visits
+                FROM customer_stats
+                GROUP BY segment
+            """, (start, end))
+            return [{
+                'segment': row[0],
+                'customer_count': row[1],
+                'segment_revenue': row[2],
+                'avg_visits': row[3]
+            } for row in cursor.fetchall()]
+
+    def customer_summary(self, start: str, end: str) -> Dict[str, Any]:
+        with self._cursor() as cursor:
+            tables = attach_archives(cursor.connection, start, end)
+            cursor.execute(f"""
+                SELECT
+                    COUNT(DISTINCT customer_id) as active_customers,
+                    COUNT(DISTINCT CASE WHEN customer_id IS NULL THEN s.id END) as guest_transactions,
+                    AVG(total_amount) as average_transaction,
+                    CASE
+                        WHEN COUNT(DISTINCT customer_id) > 0 THEN SUM(total_amount) / COUNT(DISTINCT customer_id)
+                        ELSE 0
+                    END as revenue_per_customer
+                FROM {tables["sales"]} s
+                WHERE sale_date BETWEEN ? AND ?
+            """, (start, end))
+            row = cursor.fetchone()
+        return {
+            'active_customers': row[0],
+            'guest_transactions': row[1],
+            'average_transaction': row[2],
+            'revenue_per_customer': row[3]
+        }
+
+
+class SQLiteCustomerRepository(_SQLiteRepository, CustomerRepository):
+    def get(self, customer_id: int) -> Optional[Dict[str, Any]]:
+        rows = self._fetch("""
+            SELECT id, name, phone, email, address, loyalty_points, created_at, updated_at
+            FROM customers
+            WHERE id = ?
+        """, (customer_id,), cached=True)
+        if not rows:
+            return None
+        return dict(zip(("id", "name", "phone", "email", "address", "loyalty_points",
+                         "created_at", "updated_at"), rows[0]))
+
+    def add_loyalty_points(self, customer_id: int, points: int) -> bool:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                UPDATE customers
+                SET loyalty_points = loyalty_points + ?,
+                    updated_at = DATETIME('now')
+                WHERE id = ?
+            """, (points, customer_id))
+            return cursor.rowcount > 0
+
+
+class SQLiteUserRepository(_SQLiteRepository, UserRepository):
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        rows = self._fetch("""
+            SELECT id, username, full_name, email, role
+            FROM users
+            WHERE id = ? AND is_active = 1
+        """, (user_id,), cached=True)
+        if not rows:
+            return None
+        return dict(zip(("id", "username", "full_name", "email", "role"), rows[0]))
+
+
+class SQLiteLedgerRepository(_SQLiteRepository, LedgerRepository):
+    def record(self, product_id: int, quantity_change: int, previous_quantity: int, new_quantity: int,
+               transaction_type: str, reason: str = "", notes: Optional[str] = None,
+               user_id: Optional[int] = None):
+        with self._cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO inventory_transactions (
+                    product_id, quantity_change, previous_quantity,
+                    new_quantity, transaction_type, reason,
+                    notes, user_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (product_id, quantity_change, previous_quantity, new_quantity,
+                  transaction_type, reason, notes, user_id))
+
+    def for_product(self, product_id: int, limit: int = 50, after: Optional[Tuple[str, int]] = None,
+                    user: Optional[str] = None, transaction_type: Optional[str] = None,
+                    reason: Optional[str] = None) -> List[Dict[str, Any]]:
+        conditions, params = _ledger_filter(after, user, transaction_type, reason)
+        return [_transaction_dict(row) for row in self._fetch(f"""
+            SELECT
+                t.id, t.quantity_change, t.previous_quantity,
+                t.new_quantity, t.transaction_type, t.reason,
+                t.notes, t.created_at,
+                u.username as user_name
+            FROM inventory_transactions t
+            LEFT JOIN users u ON t.user_id = u.id
+            WHERE t.product_id = ?{conditions}
+            ORDER BY t.created_at DESC, t.id DESC
+            LIMIT ?
+        """, [product_id] + params + [limit])]
+
+    def recent(self, limit: int = 50, after: Optional[Tuple[str, int]] = None,
+               user: Optional[str] = None, transaction_type: Optional[str] = None,
+               reason: Optional[str] = None) -> List[Dict[str, Any]]:
+        conditions, params = _ledger_filter(after, user, transaction_type, reason)
+        return [_transaction_dict(row) for row in self._fetch(f"""
+            SELECT
+                t.id, t.quantity_change, t.previous_quantity,
+                t.new_quantity, t.transaction_type, t.reason,
+                t.notes, t.created_at,
+                u.username as user_name,
+                p.name as product_name
+            FROM inventory_transactions t
+            JOIN products p ON t.product_id = p.id
+            LEFT JOIN users u ON t.user_id = u.id
+            WHERE 1=1{conditions}
+            ORDER BY t.created_at DESC, t.id DESC
+            LIMIT ?
+        """, params + [limit])]
+
+
+class SQLiteRepositories(Repositories):
+    """Repositories over one SQLite database file (with its archives and ledger)"""
+
+    def __init__(self, db_path, cursor: Optional[sqlite3.Cursor] = None, use_cache: bool = True):
+        self.db_path = str(db_path)
+        self.name = self.db_path
+        self.products = SQLiteProductRepository(self.db_path, cursor, use_cache)
+        self.sales = SQLiteSaleRepository(self.db_path, cursor, use_cache)
+        self.customers = SQLiteCustomerRepository(self.db_path, cursor, use_cache)
+        self.users = SQLiteUserRepository(self.db_path, cursor, use_cache)
+        self.ledger = SQLiteLedgerRepository(self.db_path, cursor, use_cache)
+
+    def bound(self, cursor: sqlite3.Cursor) -> "SQLiteRepositories":
+        # The query cache must not see reads made inside a write transaction
+        return SQLiteRepositories(self.db_path, cursor, use_cache=False)
+
+    @contextmanager
+    def reader(self) -> Iterator["SQLiteRepositories"]:
+        conn = get_db_connection(self.db_path)
+        try:
+            yield SQLiteRepositories(self.db_path, conn.cursor())
+        finally:
+            conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator["SQLiteRepositories"]:
+        conn = get_db_connection(self.db_path, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.bound(cursor)
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
@@ -0,0 +1,45 @@
+"""Schema helpers shared by the modules that move tables between database files."""
+
+import re
+import sqlite3
+
+
+def copy_table_ddl(conn: sqlite3.Connection, table: str, source: str, target: str):
+    """Create ``target.table`` and its indexes from ``source.table``.
+
+    Foreign keys are dropped outside ``main`` because SQLite cannot reference
+    tables in another database file.
+    """
+    row = conn.execute(
+        f"SELECT sql FROM {source}.sqlite_master WHERE type = 'table' AND name = ?",
+        (table,)
+    ).fetchone()
+
+    if not row:
+        raise ValueError(f"Table {table} not found in {source}")
+
+    ddl = re.sub(
+        r'^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?["`]?\w+["`]?',
+        f"CREATE TABLE IF NOT EXISTS {target}.{table}",
+        row[0],
+        count=1,
+        flags=re.IGNORECASE
+    )
+    if target != 'main':
+        ddl = re.sub(r',\s*FOREIGN\s+KEY\s*\([^)]*\)\s*REFERENCES\s+\w+\s*\([^)]*\)', '', ddl,
+                     flags=re.IGNORECASE)
+    conn.execute(ddl)
+
+    indexes = conn.execute(
+        f"SELECT sql FROM {source}.sqlite_master "
+        "WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    ).fetchall()
+    for (index_sql,) in indexes:
+        conn.execute(re.sub(
+            r'^\s*CREATE\s+(UNIQUE\s+)?INDEX\s+(IF\s+NOT\s+EXISTS\s+)?["`]?(\w+)["`]?',
+            lambda m: f"CREATE {m.group(1) or ''}INDEX IF NOT EXISTS {target}.{m.group(3)}",
+            index_sql,
+            count=1,
+            flags=re.IGNORECASE
+        ))
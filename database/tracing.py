@@ -0,0 +1,451 @@
+"""SQL tracing for every connection opened through ``get_db_connection``.
+
+Statements run through a traced connection are grouped by fingerprint (the
+SQL with literals replaced by ``?``) and counted with their total and
+worst duration, rows returned and the service method that ran them.
+Duration covers execute plus fetching, so a SELECT is charged for reading
+its rows too. Statements SQLite runs that never pass through ``execute`` -
+the implicit BEGIN before a write, trigger bodies - are counted through
+``set_trace_callback``. Statements slower than ``SLOW_QUERY_THRESHOLD_MS``
+are written to a rotating slow-query log.
+
+Full tracing is opt-in (``SQL_TRACE_ENABLED``). Without it, connections are
+``SlowQueryConnection``: they only time ``execute`` and commits and write the
+statements over the threshold to the same log, keeping no statistics.
+
+Usage:
+    python -m database.tracing                # hottest statements in the slow-query log
+    python -m database.tracing --sort max --limit 10
+"""
+
+import re
+import sys
+import time
+import logging
+import sqlite3
+import argparse
+import threading
+from collections import Counter
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config.settings import (
+    BASE_DIR, SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG_PATH,
+    SLOW_QUERY_LOG_MAX_BYTES, SLOW_QUERY_LOG_BACKUPS
+)
+
+_stats: Dict[str, Dict[str, Any]] = {}
+_stats_lock = threading.Lock()
+
+_slow_logger: Optional[logging.Logger] = None
+_slow_logger_lock = threading.Lock()
+
+_THIS_FILE = str(Path(__file__).resolve())
+_PROJECT_DIR = str(Path(BASE_DIR).resolve())
+_SERVICES_DIR = str(Path(BASE_DIR, 'services').resolve())
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_SLOW_LINE = re.compile(r"(?P<ms>[\d.]+)ms rows=(?P<rows>\d+) caller=(?P<caller>\S+) \| (?P<sql>.*)$")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """SQL with literals and whitespace normalised, so repeats of a query group together"""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return _PLACEHOLDER_LIST.sub("(?, ...)", sql)
+
+
+class _ThreadState(threading.local):
+    # Statement being run through execute/commit on this thread
+    current = None
+    in_script = False
+
+
+_local = _ThreadState()
+
+
+@lru_cache(maxsize=4096)
+def _classify(filename: str, qualname: str) -> tuple:
+    """(label, is a service method) of the code in a frame; label is None outside the project"""
+    label, is_service = None, False
+    try:
+        path = Path(filename).resolve()
+        if str(path) != _THIS_FILE and str(path).startswith(_PROJECT_DIR):
+            module = ".".join(path.relative_to(_PROJECT_DIR).with_suffix("").parts)
+            label = f"{module}.{qualname}"
+            is_service = str(path).startswith(_SERVICES_DIR)
+    except (OSError, ValueError):
+        pass
+    return label, is_service
+
+
+def _caller() -> str:
+    """The service method running the statement, else the nearest project code"""
+    frame = sys._getframe(1)
+    nearest = None
+    depth = 0
+    while frame is not None and depth < 40:
+        code = frame.f_code
+        label, is_service = _classify(code.co_filename, getattr(code, 'co_qualname', code.co_name))
+        if is_service:
+            return label
+        if nearest is None:
+            nearest = label
+        frame = frame.f_back
+        depth += 1
+    return nearest or "-"
+
+
+def _get_slow_logger() -> logging.Logger:
+    global _slow_logger
+    with _slow_logger_lock:
+        if _slow_logger is None:
+            logger = logging.getLogger("supermarket.slow_sql")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            try:
+                Path(SLOW_QUERY_LOG_PATH).parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(
+                    SLOW_QUERY_LOG_PATH,
+                    maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+                    backupCount=SLOW_QUERY_LOG_BACKUPS,
+                    delay=True
+                )
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                logger.addHandler(handler)
+            except OSError as e:
+                print(f"Error opening slow query log: {e}")
+            _slow_logger = logger
+        return _slow_logger
+
+
+def record(sql_fingerprint: str, caller: str, duration_ms: float, rows: int, timed: bool = True):
+    """Add one execution of a statement to the statistics"""
+    with _stats_lock:
+        entry = _stats.get(sql_fingerprint)
+        if entry is None:
+            entry = _stats[sql_fingerprint] = {
+                "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "slow": 0, "callers": Counter()
+            }
+        entry["calls"] += 1
+        entry["total_ms"] += duration_ms
+        entry["rows"] += rows
+        entry["callers"][caller] += 1
+        if duration_ms > entry["max_ms"]:
+            entry["max_ms"] = duration_ms
+        slow = timed and duration_ms >= SLOW_QUERY_THRESHOLD_MS
+        if slow:
+            entry["slow"] += 1
+
+    if slow:
+        _log_slow(sql_fingerprint, caller, duration_ms, rows)
+
+
+def _log_slow(sql_fingerprint: str, caller: str, duration_ms: float, rows: int):
+    _get_slow_logger().info("%.1fms rows=%d caller=%s | %s", duration_ms, rows, caller, sql_fingerprint)
+
+
+def get_summary(limit: int = 20, sort: str = "total_ms") -> List[Dict[str, Any]]:
+    """Hottest statements since start (or the last reset), worst first"""
+    with _stats_lock:
+        rows = [
+            {
+                "fingerprint": sql,
+                "calls": entry["calls"],
+                "total_ms": round(entry["total_ms"], 2),
+                "avg_ms": round(entry["total_ms"] / entry["calls"], 3),
+                "max_ms": round(entry["max_ms"], 2),
+                "rows": entry["rows"],
+                "slow": entry["slow"],
+                "caller": entry["callers"].most_common(1)[0][0],
+            }
+            for sql, entry in _stats.items()
+        ]
+    rows.sort(key=lambda row: row[sort], reverse=True)
+    return rows[:limit]
+
+
+def reset_stats():
+    """Forget the statistics gathered so far"""
+    with _stats_lock:
+        _stats.clear()
+
+
+def format_summary(rows: List[Dict[str, Any]], width: int = 70) -> str:
+    """Plain-text table of summary rows"""
+    if not rows:
+        return "No statements recorded yet."
+    lines = [f"{'calls':>7} {'total ms':>10} {'avg ms':>8} {'max ms':>9} {'rows':>8}  statement / caller"]
+    for row in rows:
+        sql = row["fingerprint"]
+        if len(sql) > width:
+            sql = sql[:width - 3] + "..."
+        lines.append(f"{row['calls']:>7} {row['total_ms']:>10} {row['avg_ms']:>8} {row['max_ms']:>9} "
+                     f"{row['rows']:>8}  {sql}")
+        lines.append(f"{'':>47}  ↳ {row['caller']}")
+    return "\n".join(lines)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that times each statement from execute until its rows are read"""
+
+    _trace = None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        _local.current = sql
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _local.current = None
+            self._begin(sql, start)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        _local.current = sql
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _local.current = None
+            self._begin(sql, start)
+
+    def executescript(self, sql_script):
+        self._finish()
+        start = time.perf_counter()
+        _local.in_script = True
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _local.in_script = False
+            record(fingerprint(sql_script), _caller(), (time.perf_counter() - start) * 1000, 0)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+    def _begin(self, sql: str, start: float):
+        elapsed = (time.perf_counter() - start) * 1000
+        trace = [fingerprint(sql), _caller(), elapsed, 0]
+        try:
+            description, rowcount = self.description, self.rowcount
+        except sqlite3.Error:
+            description, rowcount = None, 0
+        if description is None:
+            # No result set: done, rows are the ones written
+            trace[3] = max(rowcount, 0)
+            record(*trace)
+        else:
+            self._trace = trace
+
+    def _fetched(self, start: float, rows: int, done: bool):
+        trace = self._trace
+        if trace is None:
+            return
+        trace[2] += (time.perf_counter() - start) * 1000
+        trace[3] += rows
+        if done:
+            self._finish()
+
+    def _finish(self):
+        trace = self._trace
+        if trace is not None:
+            self._trace = None
+            record(*trace)
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose cursors, shortcuts and commits are traced"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(self._on_statement)
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        self._timed("COMMIT", super().commit)
+
+    def rollback(self):
+        self._timed("ROLLBACK", super().rollback)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        sql = "COMMIT" if exc_type is None else "ROLLBACK"
+        self._timed(sql, lambda: super(TracedConnection, self).__exit__(exc_type, exc_value, traceback))
+        return False
+
+    def _timed(self, sql: str, func):
+        _local.current = sql
+        start = time.perf_counter()
+        try:
+            func()
+        finally:
+            _local.current = None
+            record(sql, _caller(), (time.perf_counter() - start) * 1000, 0)
+
+    @staticmethod
+    def _on_statement(sql: str):
+        # Statements run through execute/commit are timed there; what's left is
+        # SQLite's own work: the implicit BEGIN, trigger bodies, script lines
+        current = _local.current
+        if _local.in_script or (current is not None and not sql.startswith(("BEGIN", "--"))):
+            return
+        if current is not None and sql == current:
+            return
+        record(fingerprint(sql), _caller(), 0.0, 0, timed=False)
+
+
+class SlowQueryCursor(sqlite3.Cursor):
+    """Cursor that logs statements whose execute call takes longer than the threshold"""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._check(sql, start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._check(sql, start)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._check(sql_script, start)
+
+    def _check(self, sql: str, start: float):
+        elapsed = (time.perf_counter() - start) * 1000
+        if elapsed >= SLOW_QUERY_THRESHOLD_MS:
+            _log_slow(fingerprint(sql), _caller(), elapsed, max(self.rowcount, 0))
+
+
+class SlowQueryConnection(sqlite3.Connection):
+    """Connection that only logs slow statements and commits; the default when tracing is off"""
+
+    def cursor(self, factory=SlowQueryCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            if elapsed >= SLOW_QUERY_THRESHOLD_MS:
+                _log_slow("COMMIT", _caller(), elapsed, 0)
+
+
+def summarise_slow_log(path=SLOW_QUERY_LOG_PATH, limit: int = 20, sort: str = "total_ms") -> List[Dict[str, Any]]:
+    """Aggregate the slow-query log (and its rotated files) by fingerprint"""
+    entries: Dict[str, Dict[str, Any]] = {}
+    files = [Path(f"{path}.{i}") for i in range(SLOW_QUERY_LOG_BACKUPS, 0, -1)] + [Path(path)]
+    for file in files:
+        if not file.exists():
+            continue
+        with open(file, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                match = _SLOW_LINE.search(line)
+                if not match:
+                    continue
+                ms = float(match["ms"])
+                entry = entries.setdefault(match["sql"].strip(), {
+                    "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "callers": Counter()
+                })
+                entry["calls"] += 1
+                entry["total_ms"] += ms
+                entry["max_ms"] = max(entry["max_ms"], ms)
+                entry["rows"] += int(match["rows"])
+                entry["callers"][match["caller"]] += 1
+
+    rows = [
+        {
+            "fingerprint": sql,
+            "calls": entry["calls"],
+            "total_ms": round(entry["total_ms"], 2),
+            "avg_ms": round(entry["total_ms"] / entry["calls"], 3),
+            "max_ms": round(entry["max_ms"], 2),
+            "rows": entry["rows"],
+            "caller": entry["callers"].most_common(1)[0][0],
+        }
+        for sql, entry in entries.items()
+    ]
+    rows.sort(key=lambda row: row[sort], reverse=True)
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise the slow-query log by statement")
+    parser.add_argument("--log", default=str(SLOW_QUERY_LOG_PATH), help="Slow-query log file")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--sort", choices=("total_ms", "max_ms", "avg_ms", "calls"), default="total_ms")
+    args = parser.parse_args()
+
+    print(format_summary(summarise_slow_log(args.log, args.limit, args.sort), width=100))
+
+
+if __name__ == "__main__":
+    main()
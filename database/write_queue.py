@@ -0,0 +1,199 @@
+"""Single-writer queue that commits writes from many producers in group transactions.
+
+Producers submit a write operation (a callable taking a cursor) and get a
+``Future`` back. One writer thread collects operations for a few
+milliseconds or until the batch is full, runs each inside its own SAVEPOINT
+and commits the whole batch with a single fsync. A failing operation only
+rolls back its own savepoint; the rest of the batch still commits.
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from config.settings import DATABASE_PATH, WRITE_QUEUE_MAX_BATCH, WRITE_QUEUE_MAX_DELAY
+from database.connection import get_db_connection, is_busy_error
+from utils import metrics
+
+# Attempts for BEGIN/COMMIT when another process holds the write lock
+BUSY_RETRY_ATTEMPTS = 20
+BUSY_RETRY_BACKOFF = 0.005  # seconds, doubled per attempt up to 0.1 s
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Group-commit write queue bound to one database file"""
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None,
+                 max_batch: int = WRITE_QUEUE_MAX_BATCH,
+                 max_delay: float = WRITE_QUEUE_MAX_DELAY):
+        self.db_path = db_path or DATABASE_PATH
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats = {"operations": 0, "batches": 0, "failed": 0, "busy_retries": 0}
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._last_batch_size = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the writer thread"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+            self._thread.start()
+            metrics.gauge("write_queue_pending", "Writes waiting for the group-commit writer") \
+                .set_function(self._queue.qsize, database=Path(self.db_path).name)
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Commit everything queued so far and stop the writer thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, operation: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue ``operation(cursor, *args, **kwargs)``; the future holds its return value"""
+        future: Future = Future()
+        self._queue.put((operation, args, kwargs, future))
+        if not self._thread:
+            self.start()
+        return future
+
+    def _collect(self, first) -> Tuple[List[tuple], bool]:
+        """Collect a batch starting with ``first``; returns (batch, stop_requested)"""
+        batch = [first]
+        # Only linger for more work while producers are actually overlapping,
+        # so a single lane doesn't pay the delay on every sale
+        delay = self.max_delay if self._last_batch_size > 1 else 0.0
+        deadline = time.perf_counter() + delay
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _retry_busy(self, conn: sqlite3.Connection, sql: str):
+        """Execute BEGIN/COMMIT, backing off while another writer holds the lock"""
+        delay = BUSY_RETRY_BACKOFF
+        for attempt in range(BUSY_RETRY_ATTEMPTS):
+            try:
+                conn.execute(sql)
+                return
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == BUSY_RETRY_ATTEMPTS - 1:
+                    raise
+                self.stats["busy_retries"] += 1
+                time.sleep(delay)
+                delay = min(delay * 2, 0.1)
+
+    def _run_batch(self, conn: sqlite3.Connection, batch: List[tuple]):
+        results: List[Tuple[Future, bool, Any]] = []
+        cursor = conn.cursor()
+
+        try:
+            self._retry_busy(conn, "BEGIN IMMEDIATE")
+
+            for operation, args, kwargs, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                cursor.execute("SAVEPOINT write_op")
+                try:
+                    result = operation(cursor, *args, **kwargs)
+                    cursor.execute("RELEASE write_op")
+                    results.append((future, True, result))
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO write_op")
+                    cursor.execute("RELEASE write_op")
+                    results.append((future, False, e))
+
+            self._retry_busy(conn, "COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for operation, args, kwargs, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            self.stats["failed"] += len(batch)
+            return
+
+        # Results are only published once the batch is durable
+        self.stats["batches"] += 1
+        self.stats["operations"] += len(results)
+        for future, ok, value in results:
+            if ok:
+                future.set_result(value)
+            else:
+                self.stats["failed"] += 1
+                future.set_exception(value)
+
+    def _run(self):
+        conn = get_db_connection(self.db_path, check_same_thread=False, isolation_level=None)
+        try:
+            stop = False
+            while not stop:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                batch, stop = self._collect(first)
+                self._last_batch_size = len(batch)
+                self._run_batch(conn, batch)
+
+            # Drain anything submitted before stop()
+            leftovers = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    leftovers.append(item)
+            if leftovers:
+                self._run_batch(conn, leftovers)
+        finally:
+            conn.close()
+
+
+_write_queues: Dict[str, WriteQueue] = {}
+_write_queues_lock = threading.Lock()
+
+
+def get_write_queue(db_path: Optional[Union[str, Path]] = None) -> WriteQueue:
+    """Get the shared write queue for a database file"""
+    key = str(db_path or DATABASE_PATH)
+    with _write_queues_lock:
+        write_queue = _write_queues.get(key)
+        if write_queue is None:
+            write_queue = WriteQueue(key)
+            _write_queues[key] = write_queue
+            write_queue.start()
+        return write_queue
+
+
+def stop_write_queues():
+    """Flush and stop every write queue"""
+    with _write_queues_lock:
+        queues = list(_write_queues.values())
+        _write_queues.clear()
+    for write_queue in queues:
+        write_queue.stop()
+
+
+atexit.register(stop_write_queues)
@@ -1,22 +1,32 @@
 import os
 import sys
-import customtkinter as ctk
+
+# Record startup phases from here on
+from utils import startup
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import SupermarketApp
 
-# Configure customtkinter
-ctk.set_appearance_mode("light")  # Modes: "System" (standard), "Dark", "Light"
-ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
-ctk.set_widget_scaling(1.0)  # widget dimensions and text size
-ctk.set_window_scaling(1.0)  # window dimensions
+def main():
+    """Configure customtkinter, build the app and run its main loop"""
+    import customtkinter as ctk
+    from config.settings import ensure_directories
+    from app import SupermarketApp
+    startup.mark("imports")
+
+    ensure_directories()
 
-# Create application instance
-app = SupermarketApp()
+    # Configure customtkinter
+    ctk.set_appearance_mode("light")  # Modes: "System" (standard), "Dark", "Light"
+    ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
+    ctk.set_widget_scaling(1.0)  # widget dimensions and text size
+    ctk.set_window_scaling(1.0)  # window dimensions
 
+    # Create application instance
+    app = SupermarketApp()
+    app.mainloop()
 
 
 if __name__ == "__main__":
-    app.mainloop()
+    main()
@@ -0,0 +1,43 @@
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database.archive import (
+    archive_year, archive_closed_periods, list_archive_years, vacuum_hot_database
+)
+
+def main():
+    """Move closed sales periods into the yearly archive files"""
+    parser = argparse.ArgumentParser(description="Archive closed sales periods")
+    parser.add_argument("--year", type=int, help="Archive a single closed year")
+    parser.add_argument("--before", type=int, help="Archive every year before this one (default: current year)")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the hot database afterwards")
+    parser.add_argument("--list", action="store_true", help="List existing archive years and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        years = list_archive_years()
+        print("Archived years: " + (", ".join(map(str, years)) if years else "none"))
+        return
+
+    if args.year:
+        results = {args.year: archive_year(args.year)}
+    else:
+        results = archive_closed_periods(args.before)
+
+    if not results:
+        print("Nothing to archive.")
+
+    for year, moved in results.items():
+        counts = ", ".join(f"{table}: {count}" for table, count in moved.items())
+        print(f"Archived {year} ({counts})")
+
+    if args.vacuum and results:
+        vacuum_hot_database()
+        print("Hot database vacuumed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.settings import BACKUP_KEEP, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP
+from database.backup import (
+    backup_database, has_changed, list_backups, read_manifest, restore_backup, verify_database
+)
+
+def main():
+    """Back up the database while the tills are running, or list, verify and restore backups"""
+    parser = argparse.ArgumentParser(description="Online backup of the supermarket database")
+    parser.add_argument("--db", help="Database file (default: the shop database)")
+    parser.add_argument("--dir", help="Backup directory (default: data/backups)")
+    parser.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP, help="Pages copied per step")
+    parser.add_argument("--sleep", type=float, default=BACKUP_STEP_SLEEP, help="Seconds to pause between steps")
+    parser.add_argument("--keep", type=int, default=BACKUP_KEEP, help="Newest backups kept after rotation")
+    parser.add_argument("--if-changed", action="store_true", help="Skip if nothing changed since the last backup")
+    parser.add_argument("--list", action="store_true", help="List backups and exit")
+    parser.add_argument("--verify", action="store_true", help="Run an integrity check on every backup and exit")
+    parser.add_argument("--restore", metavar="BACKUP", help="Restore a backup directory (stop every till first)")
+    args = parser.parse_args()
+
+    if args.list:
+        backups = list_backups(args.dir)
+        for backup in backups:
+            manifest = read_manifest(backup)
+            print(f"{backup.name}  {manifest['duration_seconds']:.2f}s  {', '.join(manifest['files'])}")
+        if not backups:
+            print("No backups.")
+        return
+
+    if args.verify:
+        failed = [
+            backup.name for backup in list_backups(args.dir)
+            if not all(verify_database(backup / name) for name in read_manifest(backup)['files'])
+        ]
+        print(f"Corrupt backups: {', '.join(failed)}" if failed else "All backups passed the integrity check.")
+        sys.exit(1 if failed else 0)
+
+    if args.restore:
+        if not restore_backup(args.restore, args.db):
+            sys.exit(1)
+        print(f"Restored {args.restore}")
+        return
+
+    if args.if_changed and not has_changed(args.db, args.dir):
+        print("Nothing changed since the last backup.")
+        return
+
+    backup = backup_database(args.db, args.dir, args.pages, args.sleep, args.keep)
+    if backup is None:
+        sys.exit(1)
+
+    manifest = read_manifest(backup)
+    print(f"Backup written to {backup} in {manifest['duration_seconds']:.2f}s")
+    for name, stats in manifest['files'].items():
+        print(f"  {name}: {stats['pages']} pages in {stats['steps']} steps, {stats['restarts']} restarts")
+
+if __name__ == "__main__":
+    main()
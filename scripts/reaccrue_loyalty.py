@@ -0,0 +1,22 @@
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.settings import LOYALTY_POINTS_RATE
+from services.customer_service import CustomerService
+
+def main():
+    """Credit loyalty points for past sales that never accrued any"""
+    parser = argparse.ArgumentParser(description="Re-accrue loyalty points for historic sales")
+    parser.add_argument("--rate", type=float, default=LOYALTY_POINTS_RATE,
+                        help=f"Points per unit of currency (default: {LOYALTY_POINTS_RATE})")
+    args = parser.parse_args()
+
+    credited = CustomerService().reaccrue_loyalty_points(args.rate)
+    print(f"Credited loyalty points for {credited} sales.")
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,13 @@ import os
 import sys
 import sqlite3
 from pathlib import Path
-from werkzeug.security import generate_password_hash
 
 # Add project root to Python path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from config.settings import DATABASE_PATH
 from config.constants import ROLE_ADMIN
+from utils.security import hash_password
 
 def reset_database():
     """Reset the database and create a fresh admin user"""
@@ -126,7 +126,7 @@ def reset_database():
                     username, password, full_name, email, role
                 ) VALUES (?, ?, ?, ?, ?)
                 """,
-                (username, generate_password_hash(password), full_name, email, role)
+                (username, hash_password(password), full_name, email, role)
             )
         
         print("\nAdmin user created successfully!")
@@ -2,9 +2,9 @@ import os
 import sys
 
 # Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from main import app
+from main import main
 
 if __name__ == "__main__":
-    app.mainloop() 
\ No newline at end of file
+    main()
@@ -0,0 +1,29 @@
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database.ledger import split_ledger, merge_ledger, is_ledger_split, ledger_path_for
+
+def main():
+    """Move the inventory ledger into its own database file (or back)"""
+    parser = argparse.ArgumentParser(description="Split the inventory ledger into its own database file")
+    parser.add_argument("--merge", action="store_true", help="Move the ledger back into the main database")
+    args = parser.parse_args()
+
+    if args.merge:
+        if merge_ledger():
+            print("Ledger merged back into the main database.")
+        else:
+            print("Ledger is not split.")
+        return
+
+    if split_ledger():
+        print(f"Ledger moved to {ledger_path_for()}")
+    elif is_ledger_split():
+        print(f"Ledger already split: {ledger_path_for()}")
+
+if __name__ == "__main__":
+    main()
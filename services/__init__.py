@@ -1,15 +1,20 @@
 """Services for the application"""
 
-from services.auth_service import AuthService
-from services.product_service import ProductService
-from services.customer_service import CustomerService
-from services.sale_service import SaleService
-from services.statistics_service import StatisticsService
-
-__all__ = [
-    'AuthService',
-    'ProductService',
-    'CustomerService',
-    'SaleService',
-    'StatisticsService'
-] 
\ No newline at end of file
+import importlib
+
+# Imported on first use so importing one service doesn't load them all
+_SERVICES = {
+    'AuthService': 'services.auth_service',
+    'ProductService': 'services.product_service',
+    'CustomerService': 'services.customer_service',
+    'SaleService': 'services.sale_service',
+    'StatisticsService': 'services.statistics_service'
+}
+
+__all__ = list(_SERVICES)
+
+
+def __getattr__(name):
+    if name in _SERVICES:
+        return getattr(importlib.import_module(_SERVICES[name]), name)
+    raise AttributeError(f"module 'services' has no attribute {name!r}")
@@ -1,23 +1,29 @@
 import sqlite3
 from datetime import datetime
 from typing import Optional, Dict, Any
-from werkzeug.security import generate_password_hash, check_password_hash
+from config.settings import DATABASE_PATH
 from database.connection import get_db_connection
+from database.repositories import Repositories, SQLiteRepositories
+from utils.security import hash_password, verify_password, needs_rehash
 from utils.session import SessionManager
+from utils.metrics import instrumented
 
+@instrumented
 class AuthService:
     """Service class for authentication and user management"""
     
-    def __init__(self):
+    def __init__(self, repositories: Optional[Repositories] = None):
         """Initialize the auth service"""
         self.session_manager = SessionManager()
+        self.repositories = repositories or SQLiteRepositories(DATABASE_PATH)
     
     def authenticate(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate a user with username and password"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+        conn = cursor = None
         try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            
             # Get user by username
             cursor.execute("""
                 SELECT id, username, password, full_name, email, role
@@ -27,7 +33,20 @@ class AuthService:
             
             user = cursor.fetchone()
             
-            if user and check_password_hash(user[2], password):
+            if user and verify_password(password, user[2]):
+                # Upgrade hashes made with an older scheme or cost; a busy
+                # database must not turn away a correct password
+                try:
+                    if needs_rehash(user[2]):
+                        cursor.execute(
+                            "UPDATE users SET password = ? WHERE id = ?",
+                            (hash_password(password), user[0])
+                        )
+                        conn.commit()
+                except (sqlite3.Error, ValueError) as e:
+                    print(f"Error upgrading password hash: {e}")
+                    conn.rollback()
+                
                 user_data = {
                     'id': user[0],
                     'username': user[1],
@@ -35,19 +54,21 @@ class AuthService:
                     'email': user[4],
                     'role': user[5]
                 }
-                # Set user in session
-                self.session_manager.set_user(user_data)
+                # Set user in session; callers decide whether to persist it
+                self.session_manager.set_user(user_data, remember=False)
                 return user_data
             
             return None
             
-        except sqlite3.Error as e:
+        except (sqlite3.Error, ValueError) as e:
             print(f"Database error: {e}")
             return None
             
         finally:
-            cursor.close()
-            conn.close()
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
     
     def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         """Get user by username without password verification (for session-based auth)"""
@@ -84,36 +105,11 @@ class AuthService:
     
     def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user by ID"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("""
-                SELECT id, username, full_name, email, role
-                FROM users
-                WHERE id = ? AND is_active = 1
-            """, (user_id,))
-            
-            user = cursor.fetchone()
-            
-            if user:
-                return {
-                    'id': user[0],
-                    'username': user[1],
-                    'full_name': user[2],
-                    'email': user[3],
-                    'role': user[4]
-                }
-            
-            return None
-            
+            return self.repositories.users.get(user_id)
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-            
-        finally:
-            cursor.close()
-            conn.close()
     
     def create_user(self, user_data: Dict[str, Any]) -> Optional[int]:
         """Create a new user"""
@@ -124,7 +120,7 @@ class AuthService:
             now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
             # Hash password
-            password_hash = generate_password_hash(user_data['password'])
+            password_hash = hash_password(user_data['password'])
             
             cursor.execute("""
                 INSERT INTO users (
@@ -167,7 +163,7 @@ class AuthService:
             # Add password if provided
             if 'password' in user_data:
                 fields.append('password')
-                values.append(generate_password_hash(user_data['password']))
+                values.append(hash_password(user_data['password']))
             
             # Build update query
             query = f"""
@@ -232,12 +228,12 @@ class AuthService:
             cursor.execute("SELECT password FROM users WHERE id = ?", (user_id,))
             row = cursor.fetchone()
             
-            if not row or not check_password_hash(row[0], current_password):
+            if not row or not verify_password(current_password, row[0]):
                 return False
             
             # Update password
             now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            new_password_hash = generate_password_hash(new_password)
+            new_password_hash = hash_password(new_password)
             
             cursor.execute("""
                 UPDATE users
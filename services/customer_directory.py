@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from config.settings import CUSTOMER_CACHE_SIZE, CUSTOMER_CACHE_TTL
+from database.models.customer import Customer
+from utils.phone import normalize_phone
+
+class CustomerDirectory:
+    """Bounded in-memory cache of recently used customers, by id and phone.
+
+    Entries are updated in place by CustomerService writes on this lane and
+    re-read after CUSTOMER_CACHE_TTL seconds to pick up other lanes' changes.
+    """
+
+    def __init__(self, max_entries: int = CUSTOMER_CACHE_SIZE, ttl: float = CUSTOMER_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # id -> (data, loaded_at)
+        self._by_phone: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, customer_id: int) -> Optional[Customer]:
+        """Get a customer by ID"""
+        data = self._lookup(customer_id)
+        if data is None:
+            customer = Customer.get_by_id(customer_id)
+            if customer:
+                self.put(customer)
+            return customer
+        return Customer.from_dict(data)
+
+    def find_by_phone(self, phone: str) -> Optional[Customer]:
+        """Get a customer by phone number, ignoring spaces and punctuation"""
+        phone_normalized = normalize_phone(phone)
+        if not phone_normalized:
+            return None
+
+        with self._lock:
+            customer_id = self._by_phone.get(phone_normalized)
+        data = self._lookup(customer_id) if customer_id else None
+        # The cached number may have been changed on another lane
+        if data is not None and normalize_phone(data.get('phone')) == phone_normalized:
+            return Customer.from_dict(data)
+
+        customer = Customer.get_by_phone(phone)
+        if customer:
+            self.put(customer)
+        return customer
+
+    def put(self, customer: Customer):
+        """Add or refresh a customer"""
+        data = customer.to_dict()
+        with self._lock:
+            self._drop(customer.id)
+            self._entries[customer.id] = (data, time.monotonic())
+            phone_normalized = normalize_phone(data.get('phone'))
+            if phone_normalized:
+                self._by_phone[phone_normalized] = customer.id
+
+            while len(self._entries) > self.max_entries:
+                oldest_id = next(iter(self._entries))
+                self._drop(oldest_id)
+
+    def remove(self, customer_id: int):
+        """Forget a customer"""
+        with self._lock:
+            self._drop(customer_id)
+
+    def clear(self):
+        """Forget every customer"""
+        with self._lock:
+            self._entries.clear()
+            self._by_phone.clear()
+
+    def _lookup(self, customer_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(customer_id)
+            if entry is None:
+                return None
+            data, loaded_at = entry
+            if time.monotonic() - loaded_at > self.ttl:
+                self._drop(customer_id)
+                return None
+            self._entries.move_to_end(customer_id)
+            return data
+
+    def _drop(self, customer_id: int):
+        entry = self._entries.pop(customer_id, None)
+        if entry:
+            phone_normalized = normalize_phone(entry[0].get('phone'))
+            if phone_normalized and self._by_phone.get(phone_normalized) == customer_id:
+                del self._by_phone[phone_normalized]
+
+
+# Shared by every CustomerService so updates on one screen are seen by all
+customer_directory = CustomerDirectory()
@@ -1,7 +1,14 @@
-from typing import Dict, Any, List, Optional
+import sqlite3
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import Future
 
+from config.settings import LOYALTY_POINTS_RATE
 from database.models.customer import Customer
+from database.write_queue import get_write_queue
+from services.customer_directory import customer_directory
+from utils.metrics import instrumented
 
+@instrumented
 class CustomerService:
     """Service for managing customers"""
     
@@ -10,13 +17,14 @@ class CustomerService:
         try:
             # Check if customer with same phone exists
             if customer_data.get('phone'):
-                existing = Customer.get_by_phone(customer_data['phone'])
+                existing = customer_directory.find_by_phone(customer_data['phone'])
                 if existing:
                     return None
             
             # Create and save customer
             customer = Customer.from_dict(customer_data)
             if customer.save():
+                customer_directory.put(customer)
                 return customer
             return None
         except Exception as e:
@@ -27,24 +35,26 @@ class CustomerService:
         """Update an existing customer"""
         try:
             # Get existing customer
-            customer = Customer.get_by_id(customer_id)
+            customer = customer_directory.get(customer_id)
             if not customer:
                 return None
             
             # Check if phone is being changed and new phone exists
             if customer_data.get('phone') and customer_data['phone'] != customer.phone:
-                existing = Customer.get_by_phone(customer_data['phone'])
-                if existing:
+                existing = customer_directory.find_by_phone(customer_data['phone'])
+                if existing and existing.id != customer_id:
                     return None
             
-            # Update customer fields
-            customer.name = customer_data.get('name', customer.name)
-            customer.phone = customer_data.get('phone', customer.phone)
-            customer.email = customer_data.get('email', customer.email)
-            customer.address = customer_data.get('address', customer.address)
+            # Write a copy so a failed save leaves the cached customer untouched
+            updated = Customer.from_dict(customer.to_dict())
+            updated.name = customer_data.get('name', customer.name)
+            updated.phone = customer_data.get('phone', customer.phone)
+            updated.email = customer_data.get('email', customer.email)
+            updated.address = customer_data.get('address', customer.address)
             
-            if customer.save():
-                return customer
+            if updated.save():
+                customer_directory.put(updated)
+                return updated
             return None
         except Exception as e:
             print(f"Error updating customer: {e}")
@@ -53,9 +63,10 @@ class CustomerService:
     def delete_customer(self, customer_id: int) -> bool:
         """Delete a customer"""
         try:
-            customer = Customer.get_by_id(customer_id)
-            if customer:
-                return customer.delete()
+            customer = customer_directory.get(customer_id)
+            if customer and customer.delete():
+                customer_directory.remove(customer_id)
+                return True
             return False
         except Exception as e:
             print(f"Error deleting customer: {e}")
@@ -64,11 +75,19 @@ class CustomerService:
     def get_customer(self, customer_id: int) -> Optional[Customer]:
         """Get a customer by ID"""
         try:
-            return Customer.get_by_id(customer_id)
+            return customer_directory.get(customer_id)
         except Exception as e:
             print(f"Error getting customer: {e}")
             return None
     
+    def find_by_phone(self, phone: str) -> Optional[Customer]:
+        """Find a customer by phone number (loyalty lookup at the till)"""
+        try:
+            return customer_directory.find_by_phone(phone)
+        except Exception as e:
+            print(f"Error finding customer: {e}")
+            return None
+    
     def get_customers(self) -> List[Customer]:
         """Get all customers"""
         try:
@@ -77,21 +96,62 @@ class CustomerService:
             print(f"Error getting customers: {e}")
             return []
     
-    def search_customers(self, search_term: str) -> List[Customer]:
-        """Search for customers"""
+    def search_customers(self, search_term: str, limit: Optional[int] = None) -> List[Customer]:
+        """Search for customers by name, email or phone prefix"""
         try:
-            return Customer.search(search_term)
+            return Customer.search(search_term, limit)
         except Exception as e:
             print(f"Error searching customers: {e}")
             return []
     
+    def get_customer_page(self, search_term: str = "", after: Optional[Tuple[str, int]] = None,
+                          limit: int = 100) -> List[Customer]:
+        """Get a page of customers by name, continuing after the (name, id) of the last one"""
+        try:
+            return Customer.get_page(search_term, after, limit)
+        except Exception as e:
+            print(f"Error getting customers: {e}")
+            return []
+    
     def update_loyalty_points(self, customer_id: int, points: int) -> bool:
         """Update customer loyalty points"""
         try:
-            customer = Customer.get_by_id(customer_id)
-            if customer:
-                return customer.update_loyalty_points(points)
-            return False
+            balance = Customer.add_loyalty_points(customer_id, points)
+            customer_directory.remove(customer_id)
+            return balance is not None
         except Exception as e:
             print(f"Error updating loyalty points: {e}")
-            return False 
\ No newline at end of file
+            return False
+    
+    def reaccrue_loyalty_points(self, rate: float = LOYALTY_POINTS_RATE) -> int:
+        """Credit points for completed sales that never accrued any; returns the sales credited"""
+        try:
+            credited = Customer.reaccrue_loyalty_points(rate)
+            customer_directory.clear()
+            return credited
+        except Exception as e:
+            print(f"Error re-accruing loyalty points: {e}")
+            return 0
+    
+    def submit_loyalty_points(self, customer_id: int, points: int) -> Future:
+        """Queue a loyalty points change on the shared write queue; the future resolves to a bool"""
+        future = get_write_queue().submit(self._write_loyalty_points, customer_id, points)
+        # Re-read the customer once the new balance is committed
+        future.add_done_callback(lambda _: customer_directory.remove(customer_id))
+        return future
+    
+    @staticmethod
+    def points_for(total: float, rate: float = LOYALTY_POINTS_RATE) -> int:
+        """Loyalty points earned by a sale total"""
+        return max(0, int(total * rate))
+    
+    @staticmethod
+    def _write_loyalty_points(cursor: sqlite3.Cursor, customer_id: int, points: int) -> bool:
+        """Add (or remove) loyalty points inside the caller's transaction"""
+        cursor.execute("""
+            UPDATE customers
+            SET loyalty_points = loyalty_points + ?,
+                updated_at = DATETIME('now')
+            WHERE id = ?
+        """, (points, customer_id))
+        return cursor.rowcount > 0
@@ -0,0 +1,177 @@
+import json
+import sqlite3
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.constants import TAX_RATE
+from config.settings import DATABASE_PATH, LANE_ID
+from database.connection import get_db_connection
+from services.product_service import ProductService
+from utils.metrics import instrumented
+
+@instrumented
+class HeldSaleService:
+    """Service for carts put on hold at any lane"""
+
+    def __init__(self, db_path: Optional[str] = None, lane_id: str = LANE_ID):
+        """Initialize the service"""
+        self.db_path = db_path or DATABASE_PATH
+        self.lane_id = lane_id
+        self.product_service = ProductService(self.db_path)
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Get database connection"""
+        return get_db_connection(self.db_path)
+
+    def hold_sale(
+        self,
+        cart_items: List[Dict[str, Any]],
+        customer: Optional[Dict[str, Any]] = None,
+        user_id: Optional[int] = None
+    ) -> Optional[int]:
+        """Store a compact snapshot of a cart with its totals"""
+        # Only product ids, quantities and prices are stored
+        items = [
+            [item["product"]["id"], item["quantity"], item["product"]["price"]]
+            for item in cart_items
+        ]
+        subtotal = sum(quantity * price for _, quantity, price in items)
+        tax = subtotal * TAX_RATE
+
+        with self.get_connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO held_sales (
+                        lane_id, user_id, customer_id, customer_name,
+                        items, item_count, subtotal, tax, total
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    self.lane_id,
+                    user_id,
+                    customer["id"] if customer else None,
+                    customer.get("name") if customer else None,
+                    json.dumps(items, separators=(',', ':')),
+                    len(items),
+                    subtotal,
+                    tax,
+                    subtotal + tax
+                ))
+                conn.commit()
+                return cursor.lastrowid
+            except sqlite3.Error as e:
+                print(f"Error holding sale: {e}")
+                return None
+
+    def get_held_sales(self, lane_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List held carts (all lanes unless one is given), oldest first"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            query = """
+                SELECT id, lane_id, user_id, customer_id, customer_name,
+                       item_count, subtotal, tax, total, held_at
+                FROM held_sales
+            """
+            params = []
+
+            if lane_id:
+                query += " WHERE lane_id = ?"
+                params.append(lane_id)
+
+            query += " ORDER BY held_at, id"
+
+            cursor.execute(query, params)
+            return [{
+                "id": row[0],
+                "lane_id": row[1],
+                "user_id": row[2],
+                "customer_id": row[3],
+                "customer_name": row[4],
+                "item_count": row[5],
+                "subtotal": float(row[6]),
+                "tax": float(row[7]),
+                "total": float(row[8]),
+                "held_at": row[9]
+            } for row in cursor.fetchall()]
+
+    def count_held_sales(self) -> int:
+        """Count held carts across all lanes"""
+        with self.get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM held_sales").fetchone()[0]
+
+    def recall_sale(self, held_id: int) -> Optional[Dict[str, Any]]:
+        """Take a held cart off hold and return it as cart items.
+
+        The row is read and deleted in one write transaction, so two lanes
+        can't recall the same cart. Lines whose product no longer exists are
+        left out, listed in "missing_products", and the totals are recomputed
+        from the lines that are kept.
+        """
+        conn = get_db_connection(self.db_path, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                SELECT customer_id, customer_name, items
+                FROM held_sales
+                WHERE id = ?
+            """, (held_id,))
+
+            row = cursor.fetchone()
+            if not row:
+                cursor.execute("ROLLBACK")
+                return None
+
+            # Rebuild the cart before deleting, so a bad row stays on hold
+            cart_items, missing = self._cart_items(json.loads(row[2]))
+
+            cursor.execute("DELETE FROM held_sales WHERE id = ?", (held_id,))
+            cursor.execute("COMMIT")
+        except (sqlite3.Error, ValueError, TypeError) as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Error recalling held sale: {e}")
+            return None
+        finally:
+            conn.close()
+
+        subtotal = sum(item["subtotal"] for item in cart_items)
+        tax = subtotal * TAX_RATE
+        return {
+            "customer": {"id": row[0], "name": row[1]} if row[0] else None,
+            "items": cart_items,
+            "missing_products": missing,
+            "subtotal": subtotal,
+            "tax": tax,
+            "total": subtotal + tax
+        }
+
+    def _cart_items(self, items: List[List[Any]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """Cart items for held [product_id, quantity, price] lines, and the ids of missing products"""
+        cart_items, missing = [], []
+        for product_id, quantity, price in items:
+            product = self.product_service.get_cached_product(product_id)
+            if not product:
+                print(f"Held product {product_id} no longer exists")
+                missing.append(product_id)
+                continue
+            # Keep the price the cart was held at
+            product = dict(product, price=price)
+            cart_items.append({
+                "product": product,
+                "quantity": quantity,
+                "price": price,
+                "subtotal": quantity * price
+            })
+        return cart_items, missing
+
+    def delete_held_sale(self, held_id: int) -> bool:
+        """Discard a held cart"""
+        with self.get_connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM held_sales WHERE id = ?", (held_id,))
+                conn.commit()
+                return cursor.rowcount > 0
+            except sqlite3.Error as e:
+                print(f"Error deleting held sale: {e}")
+                return False
@@ -1,19 +1,35 @@
 import sqlite3
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+from concurrent.futures import Future
 
-from config.settings import DATABASE_PATH
+from config.settings import DATABASE_PATH, WRITE_QUEUE_ENABLED
+from database.connection import get_db_connection
+from database.records import InventoryProductRecord, ProductSummaryRecord
+from database.repositories import Repositories, SQLiteRepositories
+from database.write_queue import get_write_queue
+from services.product_service import ProductService
+from utils.metrics import instrumented
 
+@instrumented
 class InventoryService:
     """Service for managing inventory"""
     
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None, use_write_queue: Optional[bool] = None,
+                 repositories: Optional[Repositories] = None):
         """Initialize the service"""
-        self.db_path = DATABASE_PATH
+        self.repositories = repositories or SQLiteRepositories(db_path or DATABASE_PATH)
+        # None when the repositories are not backed by a database file
+        self.db_path = self.repositories.db_path
+        use_write_queue = WRITE_QUEUE_ENABLED if use_write_queue is None else use_write_queue
+        self.use_write_queue = use_write_queue and self.db_path is not None
+        self.product_service = ProductService(self.db_path, repositories=self.repositories)
     
     def get_connection(self) -> sqlite3.Connection:
         """Get database connection"""
-        return sqlite3.connect(self.db_path)
+        if self.db_path is None:
+            raise RuntimeError("InventoryService is not backed by a database")
+        return get_db_connection(self.db_path)
     
     def get_all_products(self) -> List[Dict[str, Any]]:
         """Get all products"""
@@ -31,25 +47,7 @@ class InventoryService:
                 GROUP BY p.id
                 ORDER BY p.name
             """)
-            products = [{
-                "id": row[0],
-                "name": row[1],
-                "description": row[2],
-                "category": row[3],
-                "barcode": row[4],
-                "price": float(row[5]),
-                "cost_price": float(row[6]),
-                "stock": int(row[7]),  # Alias for backward compatibility
-                "stock_quantity": int(row[7]),
-                "reorder_level": int(row[8]),
-                "low_stock_threshold": int(row[8]),  # Alias for backward compatibility
-                "image_path": row[9],
-                "is_active": bool(row[10]),
-                "created_at": row[11],
-                "updated_at": row[12],
-                "last_updated": row[12],  # Alias for backward compatibility
-                "total_sales": float(row[13])
-            } for row in cursor.fetchall()]
+            products = InventoryProductRecord.from_rows(cursor.fetchall())
             return products
     
     def search_products(self, search_term: str) -> List[Dict[str, Any]]:
@@ -67,19 +65,7 @@ class InventoryService:
                 ORDER BY name
             """, (search_pattern, search_pattern, search_pattern))
             
-            return [{
-                "id": row[0],
-                "name": row[1],
-                "description": row[2],
-                "barcode": row[3],
-                "category": row[4],
-                "price": float(row[5]),
-                "stock": int(row[6]),  # Alias for backward compatibility
-                "stock_quantity": int(row[6]),
-                "created_at": row[7],
-                "updated_at": row[8],
-                "last_updated": row[8]  # Alias for backward compatibility
-            } for row in cursor.fetchall()]
+            return ProductSummaryRecord.from_rows(cursor.fetchall())
     
     def get_product(self, product_id: int) -> Optional[Dict[str, Any]]:
         """Get a single product by ID"""
@@ -96,19 +82,7 @@ class InventoryService:
             if not row:
                 return None
                 
-            return {
-                "id": row[0],
-                "name": row[1],
-                "description": row[2],
-                "barcode": row[3],
-                "category": row[4],
-                "price": float(row[5]),
-                "stock": int(row[6]),  # Alias for backward compatibility
-                "stock_quantity": int(row[6]),
-                "created_at": row[7],
-                "updated_at": row[8],
-                "last_updated": row[8]  # Alias for backward compatibility
-            }
+            return ProductSummaryRecord(*row)
     
     def add_product(self, product_data: Dict[str, Any]) -> bool:
         """Add a new product"""
@@ -133,6 +107,7 @@ class InventoryService:
                     product_data.get('image_path', '')
                 ))
                 conn.commit()
+                self.product_service.clear_cache()
                 return True
             except sqlite3.Error as e:
                 return False
@@ -161,6 +136,7 @@ class InventoryService:
                     product_data['id']
                 ))
                 conn.commit()
+                self.product_service.clear_cache()
                 return cursor.rowcount > 0
             except Exception as e:
                 return False
@@ -179,6 +155,7 @@ class InventoryService:
                 """, (product_id,))
                 
                 conn.commit()
+                self.product_service.clear_cache()
                 return True
                 
             except sqlite3.Error as e:
@@ -187,122 +164,68 @@ class InventoryService:
     
     def adjust_stock(self, product_id: int, quantity_change: int, reason: str = "", notes: str = "", user_id: Optional[int] = None) -> bool:
         """Adjust product stock quantity and record the transaction"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        try:
+            if self.use_write_queue:
+                adjusted = self.submit_stock_adjustment(
+                    product_id, quantity_change, reason, notes, user_id
+                ).result()
+            else:
+                with self.repositories.transaction() as repositories:
+                    adjusted = self._save_stock_adjustment(
+                        repositories, product_id, quantity_change, reason, notes, user_id
+                    )
             
-            try:
-                # Start transaction
-                cursor.execute("BEGIN TRANSACTION")
-                
-                # Get current stock
-                cursor.execute("""
-                    SELECT stock_quantity 
-                    FROM products 
-                    WHERE id = ? AND is_active = 1
-                """, (product_id,))
-                
-                row = cursor.fetchone()
-                if not row:
-                    return False
-                
-                current_stock = row[0]
-                new_stock = current_stock + quantity_change
+            if adjusted:
+                self.product_service.apply_stock_changes({product_id: quantity_change})
+            return adjusted
                 
-                # Don't allow negative stock
-                if new_stock < 0:
-                    return False
-                
-                # Update stock
-                cursor.execute("""
-                    UPDATE products SET
-                    stock_quantity = ?,
-                    updated_at = DATETIME('now')
-                    WHERE id = ?
-                """, (new_stock, product_id))
-                
-                # Record transaction
-                cursor.execute("""
-                    INSERT INTO inventory_transactions (
-                        product_id, quantity_change, previous_quantity,
-                        new_quantity, transaction_type, reason,
-                        notes, user_id
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    product_id,
-                    quantity_change,
-                    current_stock,
-                    new_stock,
-                    'manual' if abs(quantity_change) > 0 else 'correction',
-                    reason,
-                    notes,
-                    user_id
-                ))
-                
-                # Commit transaction
-                conn.commit()
-                return True
-                
-            except sqlite3.Error as e:
-                print(f"Database error: {e}")
-                conn.rollback()
-                return False
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return False
     
-    def get_product_transactions(self, product_id: int, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get transaction history for a product"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    t.id, t.quantity_change, t.previous_quantity,
-                    t.new_quantity, t.transaction_type, t.reason,
-                    t.notes, t.created_at,
-                    u.username as user_name
-                FROM inventory_transactions t
-                LEFT JOIN users u ON t.user_id = u.id
-                WHERE t.product_id = ?
-                ORDER BY t.created_at DESC
-                LIMIT ?
-            """, (product_id, limit))
-            
-            return [{
-                "id": row[0],
-                "quantity_change": row[1],
-                "previous_quantity": row[2],
-                "new_quantity": row[3],
-                "transaction_type": row[4],
-                "reason": row[5],
-                "notes": row[6],
-                "created_at": row[7],
-                "user_name": row[8] if row[8] else "System"
-            } for row in cursor.fetchall()]
+    def submit_stock_adjustment(self, product_id: int, quantity_change: int, reason: str = "",
+                                notes: str = "", user_id: Optional[int] = None) -> Future:
+        """Queue a stock adjustment on the shared write queue; the future resolves to a bool"""
+        return get_write_queue(self.db_path).submit(
+            self._write_stock_adjustment, product_id, quantity_change, reason, notes, user_id
+        )
     
-    def get_recent_transactions(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get recent inventory transactions across all products"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    t.id, t.quantity_change, t.previous_quantity,
-                    t.new_quantity, t.transaction_type, t.reason,
-                    t.notes, t.created_at,
-                    p.name as product_name,
-                    u.username as user_name
-                FROM inventory_transactions t
-                JOIN products p ON t.product_id = p.id
-                LEFT JOIN users u ON t.user_id = u.id
-                ORDER BY t.created_at DESC
-                LIMIT ?
-            """, (limit,))
-            
-            return [{
-                "id": row[0],
-                "quantity_change": row[1],
-                "previous_quantity": row[2],
-                "new_quantity": row[3],
-                "transaction_type": row[4],
-                "reason": row[5],
-                "notes": row[6],
-                "created_at": row[7],
-                "product_name": row[8],
-                "user_name": row[9] if row[9] else "System"
-            } for row in cursor.fetchall()]
\ No newline at end of file
+    def _write_stock_adjustment(self, cursor: sqlite3.Cursor, product_id: int, quantity_change: int,
+                                reason: str = "", notes: str = "", user_id: Optional[int] = None) -> bool:
+        """Adjust stock and record the transaction inside the caller's transaction"""
+        return self._save_stock_adjustment(
+            self.repositories.bound(cursor), product_id, quantity_change, reason, notes, user_id
+        )
+    
+    @staticmethod
+    def _save_stock_adjustment(repositories: Repositories, product_id: int, quantity_change: int,
+                               reason: str = "", notes: str = "", user_id: Optional[int] = None) -> bool:
+        """Adjust stock and record the transaction; negative stock is refused"""
+        stock = repositories.products.adjust_stock(product_id, quantity_change)
+        if stock is None:
+            return False
+        
+        current_stock, new_stock = stock
+        repositories.ledger.record(
+            product_id,
+            quantity_change,
+            current_stock,
+            new_stock,
+            'manual' if abs(quantity_change) > 0 else 'correction',
+            reason,
+            notes,
+            user_id
+        )
+        return True
+    
+    def get_product_transactions(self, product_id: int, limit: int = 50, after: Optional[Tuple[str, int]] = None,
+                                 user: Optional[str] = None, transaction_type: Optional[str] = None,
+                                 reason: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get a page of a product's transaction history, continuing after the (created_at, id) of the last row"""
+        return self.repositories.ledger.for_product(product_id, limit, after, user, transaction_type, reason)
+    
+    def get_recent_transactions(self, limit: int = 50, after: Optional[Tuple[str, int]] = None,
+                                user: Optional[str] = None, transaction_type: Optional[str] = None,
+                                reason: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get a page of inventory transactions across all products, newest first"""
+        return self.repositories.ledger.recent(limit, after, user, transaction_type, reason)
@@ -0,0 +1,167 @@
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+from config.settings import CATALOG_CACHE_TTL, CATALOG_MAX_STALE
+
+Loader = Callable[[], List[Dict[str, Any]]]
+
+class ProductCatalog:
+    """Active products of one database, indexed by id, barcode and search text.
+
+    Shared by every ProductService on the database, so a catalog loaded in the
+    background (see utils.warmup) makes the first POS visit warm. Stock is
+    updated in place by this lane's sales and adjustments; other product
+    edits force a reload. After CATALOG_CACHE_TTL seconds the catalog is
+    reloaded in the background to pick up other lanes' changes while the
+    current one is still served, up to CATALOG_MAX_STALE seconds old.
+    """
+
+    def __init__(self, loader: Loader, ttl: float = CATALOG_CACHE_TTL, max_stale: float = CATALOG_MAX_STALE):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._products: Optional[List[Dict[str, Any]]] = None
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._by_barcode: Dict[str, Dict[str, Any]] = {}
+        self._search_text: List[str] = []
+        self._loaded_at: Optional[float] = None
+        # Bumped by every change so a reload that started earlier doesn't overwrite it
+        self._version = 0
+        self._reloading = False
+        self._last_search = None  # (products, category, term, matching indexes)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def products(self) -> List[Dict[str, Any]]:
+        """All active products ordered by name"""
+        with self._lock:
+            products, loaded_at = self._products, self._loaded_at
+        age = time.monotonic() - loaded_at if loaded_at is not None else None
+
+        if products is None or age is None or age > self.max_stale:
+            return self.load()
+        if age > self.ttl:
+            self.reload_in_background()
+        return products
+
+    def is_fresh(self) -> bool:
+        """Whether the catalog is loaded and within its TTL"""
+        with self._lock:
+            return self._loaded_at is not None and time.monotonic() - self._loaded_at <= self.ttl
+
+    def get(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Get an active product by ID"""
+        self.products()
+        return self._by_id.get(product_id)
+
+    def peek(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Get a product from the loaded catalog without ever reading the database"""
+        with self._lock:
+            return self._by_id.get(product_id)
+
+    def find_by_barcode(self, barcode: str) -> Optional[Dict[str, Any]]:
+        """Get an active product by its exact barcode"""
+        self.products()
+        return self._by_barcode.get(barcode.strip())
+
+    def search(self, search_term: Optional[str] = None, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Products in a category whose name, description or barcode contains the term"""
+        self.products()
+        with self._lock:
+            products, search_text = self._products, self._search_text
+        if not search_term:
+            if not category:
+                return list(products)
+            return [product for product in products if product['category'] == category]
+
+        term = search_term.lower()
+        candidates = range(len(products))
+        # Typing extends the previous term, so only its matches need checking
+        last = self._last_search
+        if last and last[0] is products and last[1] == category and term.startswith(last[2]):
+            candidates = last[3]
+
+        matches = [
+            i for i in candidates
+            if term in search_text[i] and (not category or products[i]['category'] == category)
+        ]
+        self._last_search = (products, category, term, matches)
+        return [products[i] for i in matches]
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Read the catalog from the database now"""
+        requested = time.monotonic()
+        with self._load_lock:
+            with self._lock:
+                # A load that finished while this one waited (e.g. the warm-up) is fresh enough
+                if self._loaded_at is not None and self._loaded_at >= requested:
+                    return self._products
+                version = self._version
+            products = self.loader()
+            self._install(products, version)
+            return products
+
+    def reload_in_background(self):
+        """Start a reload unless one is already running"""
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+
+        def run():
+            try:
+                self.load()
+            finally:
+                with self._lock:
+                    self._reloading = False
+
+        threading.Thread(target=run, name="catalog-reload", daemon=True).start()
+
+    def adjust_stock(self, quantity_changes: Dict[int, int]):
+        """Apply stock changes this lane has written"""
+        with self._lock:
+            self._version += 1
+            for product_id, change in quantity_changes.items():
+                product = self._by_id.get(product_id)
+                if product is not None:
+                    product['stock'] += change
+                    product['stock_quantity'] = product['stock']
+
+    def invalidate(self):
+        """Reload on next use, e.g. after a product was added, edited or removed"""
+        with self._lock:
+            self._version += 1
+            self._loaded_at = None
+
+    def _install(self, products: List[Dict[str, Any]], version: int):
+        by_id = {product['id']: product for product in products}
+        by_barcode = {product['barcode']: product for product in products if product.get('barcode')}
+        search_text = [
+            "\n".join((product['name'] or '', product['description'] or '', product['barcode'] or '')).lower()
+            for product in products
+        ]
+        with self._lock:
+            if version != self._version and self._products is not None:
+                # Changed while loading; the next read loads again
+                self._loaded_at = None
+                return
+            self._products = products
+            self._by_id = by_id
+            self._by_barcode = by_barcode
+            self._search_text = search_text
+            self._loaded_at = time.monotonic()
+            self._last_search = None
+
+
+_catalogs: Dict[str, ProductCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+def get_product_catalog(db_path, loader: Loader) -> ProductCatalog:
+    """Get the shared catalog for a database, created with ``loader`` on first use"""
+    key = str(db_path)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = ProductCatalog(loader)
+        return catalog
@@ -1,92 +1,67 @@
 import sqlite3
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, timedelta
 from database.connection import get_db_connection
+from database.repositories import Repositories, SQLiteRepositories
 
-from config.settings import DATABASE_PATH
+from config.settings import DATABASE_PATH, DATETIME_FORMAT
+from services.product_catalog import get_product_catalog
+from utils.metrics import instrumented
 
+@instrumented
 class ProductService:
     """Service for managing products"""
     
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None, repositories: Optional[Repositories] = None):
         """Initialize the service"""
-        self.db_path = DATABASE_PATH
-        self._products_cache = None
-        self._cache_timestamp = None
+        self.repositories = repositories or SQLiteRepositories(db_path or DATABASE_PATH)
+        # None when the repositories are not backed by a database file
+        self.db_path = self.repositories.db_path
+        self._catalog = get_product_catalog(self.repositories.name, self._load_all_products)
     
     def get_connection(self) -> sqlite3.Connection:
         """Get database connection"""
-        return sqlite3.connect(self.db_path)
+        if self.db_path is None:
+            raise RuntimeError("ProductService is not backed by a database")
+        return get_db_connection(self.db_path)
     
     def _load_all_products(self) -> List[Dict[str, Any]]:
-        """Load all products from database"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+        """Load all active products, ordered by name"""
         try:
-            # Load all active products
-            query = """
-                SELECT id, name, description, category, barcode,
-                       price, cost_price, stock_quantity, reorder_level,
-                       image_path, is_active, created_at, updated_at
-                FROM products
-                WHERE is_active = 1
-                ORDER BY name
-            """
-            
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            
-            # Convert rows to dictionaries
-            products = []
-            for row in rows:
-                products.append({
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'category': row[3],
-                    'barcode': row[4],
-                    'price': float(row[5]),
-                    'cost_price': float(row[6]),
-                    'stock': int(row[7]),
-                    'stock_quantity': int(row[7]),
-                    'reorder_level': int(row[8]),
-                    'image_path': row[9],
-                    'is_active': bool(row[10]),
-                    'created_at': row[11],
-                    'updated_at': row[12]
-                })
-            
-            return products
-            
+            return self.repositories.products.list_active()
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return []
-            
-        finally:
-            cursor.close()
-            conn.close()
     
     def _get_cached_products(self) -> List[Dict[str, Any]]:
-        """Get products from cache or load from database"""
-        import time
-        current_time = time.time()
-        
-        # Cache for 30 seconds
-        if (self._products_cache is None or 
-            self._cache_timestamp is None or 
-            current_time - self._cache_timestamp > 30):
-            
-            self._products_cache = self._load_all_products()
-            self._cache_timestamp = current_time
-        
-        return self._products_cache or []
+        """Get products from the shared catalog"""
+        return self._catalog.products()
     
     def clear_cache(self):
         """Clear the products cache"""
-        self._products_cache = None
-        self._cache_timestamp = None
+        self._catalog.invalidate()
+
+    def warm_cache(self):
+        """Load the shared catalog now unless it is already fresh"""
+        if not self._catalog.is_fresh():
+            self._catalog.load()
+
+    def apply_stock_changes(self, quantity_changes: Dict[int, int]):
+        """Update cached stock after this lane wrote stock changes, by product ID"""
+        self._catalog.adjust_stock(quantity_changes)
+
+    def get_cached_product(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Get an active product by ID from the cache, falling back to the database"""
+        return self._catalog.get(product_id) or self.get_product(product_id)
+
+    def get_loaded_product(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Get a product only if the shared catalog already holds it (never queries)"""
+        return self._catalog.peek(product_id)
+
+    def get_product_by_barcode(self, barcode: str) -> Optional[Dict[str, Any]]:
+        """Get an active product by its exact barcode"""
+        return self._catalog.find_by_barcode(barcode)
 
     def get_products(
         self, 
@@ -94,76 +69,20 @@ class ProductService:
         search_term: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Get products based on category and search term"""
-        # Get all products from cache
-        all_products = self._get_cached_products()
-        
-        # Filter products in memory (much faster than DB queries)
-        filtered_products = []
-        
-        for product in all_products:
-            # Apply category filter
-            if category and product['category'] != category:
-                continue
-            
-            # Apply search filter
-            if search_term:
-                search_lower = search_term.lower()
-                if not (search_lower in product['name'].lower() or
-                       search_lower in product['description'].lower() or
-                       search_lower in product['barcode'].lower()):
-                    continue
-            
-            filtered_products.append(product)
-        
-        return filtered_products
+        # Filter the shared catalog in memory (much faster than DB queries)
+        return self._catalog.search(search_term, category)
     
     def get_product(self, product_id: int) -> Optional[Dict[str, Any]]:
         """Get a single product by ID"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("""
-                SELECT id, name, description, category, barcode,
-                       price, cost_price, stock_quantity, reorder_level,
-                       image_path, is_active, created_at, updated_at
-                FROM products
-                WHERE id = ?
-            """, (product_id,))
-            
-            row = cursor.fetchone()
-            
-            if row:
-                return {
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'category': row[3],
-                    'barcode': row[4],
-                    'price': float(row[5]),
-                    'cost_price': float(row[6]),
-                    'stock': int(row[7]),
-                    'stock_quantity': int(row[7]),
-                    'reorder_level': int(row[8]),
-                    'image_path': row[9],
-                    'is_active': bool(row[10]),
-                    'created_at': row[11],
-                    'updated_at': row[12]
-                }
-            
-            return None
-            
+            return self.repositories.products.get(product_id)
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-            
-        finally:
-            cursor.close()
-            conn.close()
     
     def create_product(self, product_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create a new product"""
-        conn = get_db_connection()
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
@@ -187,6 +106,7 @@ class ProductService:
             ))
             
             conn.commit()
+            self._catalog.invalidate()
             product_id = cursor.lastrowid
             return self.get_product(product_id)
             
@@ -201,7 +121,7 @@ class ProductService:
     
     def update_product(self, product_id: int, product_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update an existing product"""
-        conn = get_db_connection()
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
@@ -225,6 +145,7 @@ class ProductService:
             ))
             
             conn.commit()
+            self._catalog.invalidate()
             return self.get_product(product_id)
             
         except sqlite3.Error as e:
@@ -238,7 +159,7 @@ class ProductService:
     
     def delete_product(self, product_id: int) -> bool:
         """Soft delete a product"""
-        conn = get_db_connection()
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
@@ -250,6 +171,7 @@ class ProductService:
             """, (product_id,))
             
             conn.commit()
+            self._catalog.invalidate()
             return True
             
         except sqlite3.Error as e:
@@ -263,7 +185,7 @@ class ProductService:
     
     def update_stock(self, product_id: int, quantity_change: int) -> bool:
         """Update product stock quantity"""
-        conn = get_db_connection()
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
@@ -290,6 +212,7 @@ class ProductService:
             """, (new_stock, product_id))
             
             conn.commit()
+            self._catalog.adjust_stock({product_id: quantity_change})
             return True
             
         except sqlite3.Error as e:
@@ -301,6 +224,31 @@ class ProductService:
             cursor.close()
             conn.close()
     
+    def get_top_selling_product_ids(self, limit: int = 20, days: int = 30) -> List[int]:
+        """Get the IDs of the products with the most units sold recently, best first"""
+        since = (datetime.now() - timedelta(days=days)).strftime(DATETIME_FORMAT)
+        conn = self.get_connection()
+        
+        try:
+            # CROSS JOIN keeps the date range driving; otherwise SQLite may walk every sale line
+            rows = conn.execute("""
+                SELECT si.product_id
+                FROM sales s
+                CROSS JOIN sale_items si ON si.sale_id = s.id
+                WHERE s.sale_date >= ?
+                GROUP BY si.product_id
+                ORDER BY SUM(si.quantity) DESC
+                LIMIT ?
+            """, (since, limit)).fetchall()
+            return [row[0] for row in rows]
+            
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
+            
+        finally:
+            conn.close()
+    
     def get_low_stock_products(self, threshold: int = 10) -> List[Dict[str, Any]]:
         """Get products with stock below threshold"""
         with self.get_connection() as conn:
@@ -308,11 +256,11 @@ class ProductService:
             
             cursor.execute("""
                 SELECT 
-                    id, name, description, price, stock, category, barcode, 
+                    id, name, description, price, stock_quantity, category, barcode, 
                     created_at, updated_at
                 FROM products
-                WHERE stock <= ?
-                ORDER BY stock ASC
+                WHERE stock_quantity <= ?
+                ORDER BY stock_quantity ASC
             """, (threshold,))
             
             rows = cursor.fetchall()
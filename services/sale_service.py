@@ -1,180 +1,199 @@
 import sqlite3
+import calendar
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+from concurrent.futures import Future
 
-from config.settings import DATABASE_PATH
+from config.settings import DATABASE_PATH, DATETIME_FORMAT, WRITE_QUEUE_ENABLED, CHECKOUT_JOURNAL_ENABLED
+from database.checkout_journal import get_checkout_journal, get_failed_entries
+from database.connection import get_db_connection
+from database.repositories import Repositories, SQLiteRepositories
+from database.write_queue import get_write_queue
 from services.product_service import ProductService
+from services.customer_service import CustomerService
+from services.customer_directory import customer_directory
+from utils.metrics import instrumented
 
+@instrumented
 class SaleService:
     """Service for managing sales"""
     
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None, use_write_queue: Optional[bool] = None,
+                 repositories: Optional[Repositories] = None):
         """Initialize the service"""
-        self.db_path = DATABASE_PATH
-        self.product_service = ProductService()
+        self.repositories = repositories or SQLiteRepositories(db_path or DATABASE_PATH)
+        # None when the repositories are not backed by a database file
+        self.db_path = self.repositories.db_path
+        use_write_queue = WRITE_QUEUE_ENABLED if use_write_queue is None else use_write_queue
+        self.use_write_queue = use_write_queue and self.db_path is not None
+        self.product_service = ProductService(self.db_path, repositories=self.repositories)
     
     def get_connection(self) -> sqlite3.Connection:
         """Get database connection"""
-        return sqlite3.connect(self.db_path)
+        if self.db_path is None:
+            raise RuntimeError("SaleService is not backed by a database")
+        return get_db_connection(self.db_path)
     
     def create_sale(self, sale_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create a new sale"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        try:
+            if self.use_write_queue:
+                sale_id = self.submit_sale(sale_data).result()
+            else:
+                sale_id = self._create_sale_direct(sale_data)
+            
+            # The customer's balance changed with the sale
+            if sale_data.get("customer_id"):
+                customer_directory.remove(sale_data["customer_id"])
+            self._apply_stock_changes(sale_data)
             
-            try:
-                # Start transaction
-                cursor.execute("BEGIN TRANSACTION")
-                
-                # Generate invoice number
-                invoice_number = self._generate_invoice_number()
-                
-                # Insert sale record
-                cursor.execute("""
-                    INSERT INTO sales (
-                        invoice_number, customer_id, user_id,
-                        total_amount, discount_amount, tax_amount,
-                        payment_method, payment_status, sale_date
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, DATETIME('now'))
-                """, (
-                    invoice_number,
-                    sale_data.get("customer_id"),
-                    sale_data["user_id"],
-                    sale_data["total"],
-                    sale_data.get("discount", 0.0),
-                    sale_data["tax"],
-                    sale_data["payment_method"],
-                    "completed",  # Default status
-                ))
-                
-                sale_id = cursor.lastrowid
-                
-                # Insert sale items and update stock
-                for item in sale_data["items"]:
-                    # Get current stock
-                    cursor.execute("""
-                        SELECT stock_quantity
-                        FROM products
-                        WHERE id = ? AND stock_quantity >= ?
-                    """, (
-                        item["product_id"],
-                        item["quantity"]
-                    ))
-                    
-                    row = cursor.fetchone()
-                    if not row:
-                        raise Exception(f"Not enough stock for product {item['product_id']}")
-                    
-                    current_stock = row[0]
-                    new_stock = current_stock - item["quantity"]
-                    
-                    # Insert sale item
-                    cursor.execute("""
-                        INSERT INTO sale_items (
-                            sale_id, product_id, quantity,
-                            unit_price, discount_percent, subtotal
-                        ) VALUES (?, ?, ?, ?, ?, ?)
-                    """, (
-                        sale_id,
-                        item["product_id"],
-                        item["quantity"],
-                        item["price"],
-                        item.get("discount_percent", 0.0),
-                        (item["quantity"] * item["price"]) * (1 - item.get("discount_percent", 0.0) / 100)
-                    ))
-                    
-                    # Update product stock
-                    cursor.execute("""
-                        UPDATE products
-                        SET stock_quantity = ?,
-                            updated_at = DATETIME('now')
-                        WHERE id = ?
-                    """, (
-                        new_stock,
-                        item["product_id"]
-                    ))
-                    
-                    # Record inventory transaction
-                    cursor.execute("""
-                        INSERT INTO inventory_transactions (
-                            product_id, quantity_change, previous_quantity,
-                            new_quantity, transaction_type, reason,
-                            notes, user_id
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        item["product_id"],
-                        -item["quantity"],  # Negative for sales
-                        current_stock,
-                        new_stock,
-                        'sale',
-                        f'Sale #{invoice_number}',
-                        None,
-                        sale_data["user_id"]
-                    ))
-                
-                # Commit transaction
-                conn.commit()
-                
-                # Return created sale
-                return self.get_sale(sale_id)
-                
-            except Exception as e:
-                # Rollback transaction on error
-                conn.rollback()
-                print(f"Error creating sale: {e}")
-                return None
+            # Return created sale
+            return self.get_sale(sale_id)
+            
+        except Exception as e:
+            print(f"Error creating sale: {e}")
+            return None
+    
+    def record_sale(self, sale_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Finish a checkout without waiting for the database.
+
+        The cart is fsync'd to the lane's checkout journal and applied in the
+        background; the returned sale carries a PENDING invoice number.
+        """
+        if not CHECKOUT_JOURNAL_ENABLED or self.db_path is None:
+            return self.create_sale(sale_data)
+        
+        try:
+            journal = self._checkout_journal()
+            # Refuse carts the catalog already knows are short; the database has the final say
+            self._check_stock(sale_data)
+            sale = journal.record_sale(sale_data)
+            self._apply_stock_changes(sale_data)
+            return sale
+        except OSError as e:
+            print(f"Error writing checkout journal: {e}")
+            return self.create_sale(sale_data)
+        except Exception as e:
+            print(f"Error creating sale: {e}")
+            return None
+    
+    def _check_stock(self, sale_data: Dict[str, Any]):
+        """Raise if the shared catalog's stock can't cover the cart.
+
+        Only the in-memory catalog is read, so a locked database never holds up
+        the till; its stock already excludes this lane's journaled sales. Carts
+        it can't judge (product not loaded) or that another lane emptied are
+        refused when the journal applies them (see get_failed_checkouts).
+        """
+        wanted: Dict[int, int] = {}
+        for item in sale_data["items"]:
+            wanted[item["product_id"]] = wanted.get(item["product_id"], 0) + item["quantity"]
+        for product_id, quantity in wanted.items():
+            product = self.product_service.get_loaded_product(product_id)
+            if product is not None and product["stock"] < quantity:
+                raise Exception(f"Not enough stock for product {product_id}")
+    
+    def _apply_stock_changes(self, sale_data: Dict[str, Any], sign: int = -1):
+        """Take the sold quantities off the shared catalog's stock (or put them back)"""
+        changes: Dict[int, int] = {}
+        for item in sale_data["items"]:
+            changes[item["product_id"]] = changes.get(item["product_id"], 0) + sign * item["quantity"]
+        self.product_service.apply_stock_changes(changes)
+    
+    def _on_journal_failure(self, sale_data: Dict[str, Any]):
+        """The database refused a journaled cart: its stock never left the shelf"""
+        self._apply_stock_changes(sale_data, sign=1)
+    
+    def _checkout_journal(self):
+        return get_checkout_journal(self._write_sale, self.db_path, on_failure=self._on_journal_failure)
+    
+    def replay_checkout_journal(self):
+        """Start applying checkout journal entries left by a previous run"""
+        if CHECKOUT_JOURNAL_ENABLED and self.db_path is not None:
+            self._checkout_journal()
+    
+    def get_failed_checkouts(self) -> List[Dict[str, Any]]:
+        """Journaled checkouts the database refused, oldest first, for a manager to review"""
+        if not CHECKOUT_JOURNAL_ENABLED or self.db_path is None:
+            return []
+        try:
+            return get_failed_entries(self.db_path)
+        except sqlite3.Error as e:
+            print(f"Error reading failed checkouts: {e}")
+            return []
+    
+    def submit_sale(self, sale_data: Dict[str, Any]) -> Future:
+        """Queue a sale on the shared write queue; the future resolves to the sale ID"""
+        return get_write_queue(self.db_path).submit(self._write_sale, sale_data)
+    
+    def _create_sale_direct(self, sale_data: Dict[str, Any]) -> int:
+        """Write a sale in its own transaction, bypassing the write queue"""
+        with self.repositories.transaction() as repositories:
+            return self._save_sale(repositories, sale_data)
+    
+    def _write_sale(self, cursor: sqlite3.Cursor, sale_data: Dict[str, Any]) -> int:
+        """Insert a sale inside the caller's transaction (write queue and checkout journal)"""
+        return self._save_sale(self.repositories.bound(cursor), sale_data)
+    
+    def _save_sale(self, repositories: Repositories, sale_data: Dict[str, Any]) -> int:
+        """Insert a sale, its items and stock movements inside one transaction"""
+        # Generate invoice number under the same write lock as the insert
+        invoice_number = self._generate_invoice_number(repositories)
+        
+        customer_id = sale_data.get("customer_id")
+        loyalty_points = CustomerService.points_for(sale_data["total"]) if customer_id else 0
+        
+        sale_id = repositories.sales.add({
+            "invoice_number": invoice_number,
+            "customer_id": customer_id,
+            "user_id": sale_data["user_id"],
+            "total_amount": sale_data["total"],
+            "discount_amount": sale_data.get("discount", 0.0),
+            "tax_amount": sale_data["tax"],
+            "payment_method": sale_data["payment_method"],
+            "payment_status": "completed",  # Default status
+            "sale_date": sale_data.get("sale_date"),  # Journaled sales keep their checkout time
+            "loyalty_points": loyalty_points
+        })
+        
+        # Accrue loyalty points in the same transaction as the sale
+        if loyalty_points:
+            repositories.customers.add_loyalty_points(customer_id, loyalty_points)
+        
+        # Insert sale items and update stock
+        for item in sale_data["items"]:
+            stock = repositories.products.take_stock(item["product_id"], item["quantity"])
+            if stock is None:
+                raise Exception(f"Not enough stock for product {item['product_id']}")
+            current_stock, new_stock = stock
+            
+            discount_percent = item.get("discount_percent", 0.0)
+            repositories.sales.add_item(
+                sale_id,
+                item["product_id"],
+                item["quantity"],
+                item["price"],
+                discount_percent,
+                (item["quantity"] * item["price"]) * (1 - discount_percent / 100)
+            )
+            
+            # Record inventory transaction
+            repositories.ledger.record(
+                item["product_id"],
+                -item["quantity"],  # Negative for sales
+                current_stock,
+                new_stock,
+                'sale',
+                f'Sale #{invoice_number}',
+                None,
+                sale_data["user_id"]
+            )
+        
+        return sale_id
     
     def get_sale(self, sale_id: int) -> Optional[Dict[str, Any]]:
         """Get a sale by ID"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get sale
-            cursor.execute("""
-                SELECT 
-                    id, invoice_number, customer_id, user_id,
-                    total_amount, discount_amount, tax_amount,
-                    payment_method, payment_status, sale_date
-                FROM sales
-                WHERE id = ?
-            """, (sale_id,))
-            
-            sale_row = cursor.fetchone()
-            if not sale_row:
-                return None
-            
-            # Get sale items
-            cursor.execute("""
-                SELECT 
-                    si.product_id, p.name, si.quantity, si.unit_price,
-                    si.discount_percent, si.subtotal
-                FROM sale_items si
-                JOIN products p ON p.id = si.product_id
-                WHERE si.sale_id = ?
-            """, (sale_id,))
-            
-            items = [{
-                "product_id": row[0],
-                "product_name": row[1],
-                "quantity": row[2],
-                "price": float(row[3]),
-                "discount_percent": float(row[4]),
-                "subtotal": float(row[5])
-            } for row in cursor.fetchall()]
-            
-            return {
-                "id": sale_row[0],
-                "invoice_number": sale_row[1],
-                "customer_id": sale_row[2],
-                "user_id": sale_row[3],
-                "total": float(sale_row[4]),
-                "discount": float(sale_row[5]),
-                "tax": float(sale_row[6]),
-                "payment_method": sale_row[7],
-                "payment_status": sale_row[8],
-                "sale_date": sale_row[9],
-                "items": items
-            }
+        return self.repositories.sales.get(sale_id)
     
     def get_sales(
         self,
@@ -182,101 +201,22 @@ class SaleService:
         end_date: Optional[datetime] = None
     ) -> List[Dict[str, Any]]:
         """Get sales within date range"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            query = """
-                SELECT 
-                    id, invoice_number, customer_id, user_id,
-                    total_amount, discount_amount, tax_amount,
-                    payment_method, payment_status, sale_date
-                FROM sales
-                WHERE 1=1
-            """
-            params = []
-            
-            if start_date:
-                query += " AND sale_date >= ?"
-                params.append(start_date.strftime("%Y-%m-%d %H:%M:%S"))
-            
-            if end_date:
-                query += " AND sale_date <= ?"
-                params.append(end_date.strftime("%Y-%m-%d %H:%M:%S"))
-            
-            query += " ORDER BY sale_date DESC"
-            
-            cursor.execute(query, params)
-            sales = []
-            
-            for row in cursor.fetchall():
-                sale_id = row[0]
-                
-                # Get sale items
-                cursor.execute("""
-                    SELECT 
-                        si.product_id, p.name, si.quantity, si.unit_price,
-                        si.discount_percent, si.subtotal
-                    FROM sale_items si
-                    JOIN products p ON p.id = si.product_id
-                    WHERE si.sale_id = ?
-                """, (sale_id,))
-                
-                items = [{
-                    "product_id": item_row[0],
-                    "product_name": item_row[1],
-                    "quantity": item_row[2],
-                    "price": float(item_row[3]),
-                    "discount_percent": float(item_row[4]),
-                    "subtotal": float(item_row[5])
-                } for item_row in cursor.fetchall()]
-                
-                sales.append({
-                    "id": row[0],
-                    "invoice_number": row[1],
-                    "customer_id": row[2],
-                    "user_id": row[3],
-                    "total": float(row[4]),
-                    "discount": float(row[5]),
-                    "tax": float(row[6]),
-                    "payment_method": row[7],
-                    "payment_status": row[8],
-                    "sale_date": row[9],
-                    "items": items
-                })
-            
-            return sales
+        return self.repositories.sales.find(
+            start_date.strftime(DATETIME_FORMAT) if start_date else None,
+            end_date.strftime(DATETIME_FORMAT) if end_date else None
+        )
     
     def get_daily_sales_total(self, date: Optional[datetime] = None) -> float:
         """Get total sales for a day"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            if date:
-                date_str = date.strftime("%Y-%m-%d")
-            else:
-                date_str = datetime.now().strftime("%Y-%m-%d")
-            
-            cursor.execute("""
-                SELECT COALESCE(SUM(total_amount), 0)
-                FROM sales
-                WHERE DATE(sale_date) = DATE(?)
-            """, (date_str,))
-            
-            return float(cursor.fetchone()[0])
+        date_str = (date or datetime.now()).strftime("%Y-%m-%d")
+        return self.repositories.sales.total(date_str, f"{date_str} 23:59:59")
     
     def get_monthly_sales_total(self, year: int, month: int) -> float:
         """Get total sales for a month"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT COALESCE(SUM(total_amount), 0)
-                FROM sales
-                WHERE strftime('%Y', sale_date) = ?
-                AND strftime('%m', sale_date) = ?
-            """, (str(year), str(month).zfill(2)))
-            
-            return float(cursor.fetchone()[0])
+        last_day = calendar.monthrange(year, month)[1]
+        return self.repositories.sales.total(
+            f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-{last_day:02d} 23:59:59"
+        )
     
     def get_sales_by_payment_method(
         self,
@@ -284,60 +224,23 @@ class SaleService:
         end_date: Optional[datetime] = None
     ) -> List[Dict[str, Any]]:
         """Get sales totals grouped by payment method"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            query = """
-                SELECT 
-                    payment_method,
-                    COUNT(*) as count,
-                    SUM(total_amount) as total
-                FROM sales
-                WHERE 1=1
-            """
-            params = []
-            
-            if start_date:
-                query += " AND sale_date >= ?"
-                params.append(start_date.strftime("%Y-%m-%d %H:%M:%S"))
-            
-            if end_date:
-                query += " AND sale_date <= ?"
-                params.append(end_date.strftime("%Y-%m-%d %H:%M:%S"))
-            
-            query += " GROUP BY payment_method"
-            
-            cursor.execute(query, params)
-            
-            return [{
-                "payment_method": row[0],
-                "count": row[1],
-                "total": float(row[2])
-            } for row in cursor.fetchall()]
+        return self.repositories.sales.payment_method_totals(
+            start_date.strftime(DATETIME_FORMAT) if start_date else None,
+            end_date.strftime(DATETIME_FORMAT) if end_date else None
+        )
     
-    def _generate_invoice_number(self) -> str:
-        """Generate a unique invoice number"""
-        prefix = datetime.now().strftime('%Y%m%d')
+    def _generate_invoice_number(self, repositories: Repositories) -> str:
+        """Generate a unique invoice number inside the caller's write transaction"""
+        prefix = f"INV-{datetime.now().strftime('%Y%m%d')}-"
         
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get the last invoice number for today
-            cursor.execute("""
-                SELECT invoice_number
-                FROM sales
-                WHERE DATE(sale_date) = DATE('now')
-                ORDER BY invoice_number DESC
-                LIMIT 1
-            """)
-            
-            row = cursor.fetchone()
-            if row:
-                # Extract sequence number and increment
-                last_number = int(row[0].split('-')[-1])
-                sequence = str(last_number + 1).zfill(4)
-            else:
-                # Start with 0001
-                sequence = '0001'
-            
-            return f"INV-{prefix}-{sequence}"
\ No newline at end of file
+        # Get the last invoice number for today
+        last_invoice = repositories.sales.last_invoice_number(prefix)
+        if last_invoice:
+            # Extract sequence number and increment
+            last_number = int(last_invoice.split('-')[-1])
+            sequence = str(last_number + 1).zfill(4)
+        else:
+            # Start with 0001
+            sequence = '0001'
+        
+        return f"{prefix}{sequence}"
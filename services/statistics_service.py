@@ -1,32 +1,38 @@
 import sqlite3
 from typing import Dict, Any, Optional
-from datetime import datetime, date
+from datetime import date, timedelta
 
 from config.settings import DATABASE_PATH, LOW_STOCK_THRESHOLD
+from database.connection import get_db_connection
+from database.query_cache import query_cache
+from utils.metrics import instrumented
 
+@instrumented
 class StatisticsService:
     """Service for getting dashboard statistics"""
     
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None):
         """Initialize the service"""
-        self.db_path = DATABASE_PATH
+        self.db_path = db_path or DATABASE_PATH
     
     def get_connection(self) -> sqlite3.Connection:
         """Get database connection"""
-        return sqlite3.connect(self.db_path)
+        return get_db_connection(self.db_path)
     
     def get_today_stats(self) -> Dict[str, Any]:
         """Get today's statistics"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            today = date.today().strftime("%Y-%m-%d")
+            # Date ranges rather than DATE()/strftime() on the column, so the sale_date index is used
+            today = date.today()
+            today_range = (today.strftime("%Y-%m-%d"), (today + timedelta(days=1)).strftime("%Y-%m-%d"))
             
             # Get today's sales total
             cursor.execute("""
                 SELECT COALESCE(SUM(total_amount), 0)
                 FROM sales
-                WHERE DATE(sale_date) = ?
-            """, (today,))
+                WHERE sale_date >= ? AND sale_date < ?
+            """, today_range)
             today_sales = cursor.fetchone()[0]
             
             # Get items sold today
@@ -34,32 +40,31 @@ class StatisticsService:
                 SELECT COALESCE(SUM(quantity), 0)
                 FROM sale_items si
                 JOIN sales s ON s.id = si.sale_id
-                WHERE DATE(s.sale_date) = ?
-            """, (today,))
+                WHERE s.sale_date >= ? AND s.sale_date < ?
+            """, today_range)
             items_sold = cursor.fetchone()[0]
             
             # Get low stock items count using fixed threshold
-            cursor.execute("""
+            low_stock = query_cache.fetch_one("""
                 SELECT COUNT(*)
                 FROM products
                 WHERE stock_quantity <= ?
-            """, (LOW_STOCK_THRESHOLD,))
-            low_stock = cursor.fetchone()[0]
+            """, (LOW_STOCK_THRESHOLD,), self.db_path)[0]
             
             # Get total customers (for now, just count sales with unique dates)
-            cursor.execute("""
+            total_customers = query_cache.fetch_one("""
                 SELECT COUNT(*)
                 FROM customers
-            """)
-            total_customers = cursor.fetchone()[0]
+            """, db_path=self.db_path)[0]
             
             # Get monthly revenue
-            current_month = datetime.now().strftime("%Y-%m")
+            month_start = today.replace(day=1)
+            next_month = (month_start + timedelta(days=32)).replace(day=1)
             cursor.execute("""
                 SELECT COALESCE(SUM(total_amount), 0)
                 FROM sales
-                WHERE strftime('%Y-%m', sale_date) = ?
-            """, (current_month,))
+                WHERE sale_date >= ? AND sale_date < ?
+            """, (month_start.strftime("%Y-%m-%d"), next_month.strftime("%Y-%m-%d")))
             monthly_revenue = cursor.fetchone()[0]
             
             # Get pending orders (not implemented yet)
@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.checkout_journal import stop_checkout_journals
+from database.db_manager import DBManager
+from database.write_queue import stop_write_queues
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A fresh database with the schema, sample products and the default admin"""
+    path = tmp_path / "supermarket.db"
+    DBManager(str(path)).close()
+    yield str(path)
+    stop_checkout_journals()
+    stop_write_queues()
@@ -0,0 +1,104 @@
+import sqlite3
+
+import pytest
+
+from database import archive
+from database.connection import get_db_connection
+from database.ledger import is_ledger_split, merge_ledger, split_ledger
+from database.repositories import SQLiteRepositories
+
+
+@pytest.fixture
+def old_year(db_path, tmp_path, monkeypatch):
+    """A 2020 sale with its item and stock movement, archived under tmp_path"""
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", tmp_path / "archive")
+    conn = get_db_connection(db_path)
+    sale_id = conn.execute("""
+        INSERT INTO sales (invoice_number, user_id, total_amount, payment_method, payment_status, sale_date)
+        VALUES ('INV-2020', 1, 3.0, 'cash', 'paid', '2020-06-01 10:00:00')
+    """).lastrowid
+    conn.execute("""
+        INSERT INTO sale_items (sale_id, product_id, quantity, unit_price, subtotal)
+        VALUES (?, 1, 2, 1.5, 3.0)
+    """, (sale_id,))
+    conn.execute("""
+        INSERT INTO inventory_transactions (
+            product_id, quantity_change, previous_quantity, new_quantity, transaction_type, created_at
+        ) VALUES (1, -2, 52, 50, 'sale', '2020-06-01 10:00:00')
+    """)
+    conn.commit()
+    conn.close()
+    return 2020
+
+
+def _archived(year, table):
+    conn = sqlite3.connect(archive.archive_path(year))
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("split", [False, True])
+def test_archive_year_copies_tables_and_indexes(db_path, old_year, split):
+    if split:
+        assert split_ledger(db_path)
+
+    moved = archive.archive_year(old_year, db_path)
+
+    assert moved == {"sales": 1, "sale_items": 1, "inventory_transactions": 1}
+    for table in archive.ARCHIVED_TABLES:
+        assert _archived(old_year, table) == 1
+    conn = sqlite3.connect(archive.archive_path(old_year))
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    assert "idx_inventory_transactions_created" in indexes
+
+
+def test_ledger_split_and_merge_keep_rows(db_path):
+    conn = get_db_connection(db_path)
+    before = conn.execute("SELECT COUNT(*) FROM inventory_transactions").fetchone()[0]
+    conn.close()
+
+    assert split_ledger(db_path) and is_ledger_split(db_path)
+    assert merge_ledger(db_path) and not is_ledger_split(db_path)
+
+    conn = get_db_connection(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM main.inventory_transactions").fetchone()[0] == before
+    conn.close()
+
+
+@pytest.fixture
+def three_years(db_path, tmp_path, monkeypatch):
+    """Sales archived for 2018, 2019 and 2020, with two archives attachable at once"""
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", tmp_path / "archive")
+    monkeypatch.setattr(archive, "MAX_ATTACHED_ARCHIVES", 2)
+    conn = get_db_connection(db_path)
+    sale_ids = {}
+    for year in (2018, 2019, 2020):
+        sale_ids[year] = conn.execute("""
+            INSERT INTO sales (invoice_number, user_id, total_amount, payment_method, payment_status, sale_date)
+            VALUES (?, 1, ?, 'cash', 'paid', ?)
+        """, (f"INV-{year}", float(year - 2000), f"{year}-06-01 10:00:00")).lastrowid
+    conn.commit()
+    conn.close()
+    for year in sale_ids:
+        archive.archive_year(year, db_path)
+    return sale_ids
+
+
+def test_wide_range_is_refused_not_shortened(db_path, three_years):
+    sales = SQLiteRepositories(db_path).sales
+
+    with pytest.raises(archive.ArchiveRangeError):
+        sales.total("2018-01-01 00:00:00", "2020-12-31 23:59:59")
+    assert sales.total("2019-01-01 00:00:00", "2020-12-31 23:59:59") == 39.0
+    assert sales.total("2018-01-01 00:00:00", "2018-12-31 23:59:59") == 18.0
+
+
+def test_any_archived_sale_can_be_read_by_id(db_path, three_years):
+    sales = SQLiteRepositories(db_path).sales
+
+    for year, sale_id in three_years.items():
+        assert sales.get(sale_id)["invoice_number"] == f"INV-{year}"
+    assert sales.get(max(three_years.values()) + 1) is None
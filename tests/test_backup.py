@@ -0,0 +1,101 @@
+import sqlite3
+import time
+from types import SimpleNamespace
+
+from database import backup as backup_module
+from database.backup import (
+    backup_database, has_changed, list_backups, read_manifest, restore_backup, verify_database
+)
+
+
+def _stock(db_path, name="Milk"):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT stock_quantity FROM products WHERE name = ?", (name,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _set_stock(db_path, quantity, name="Milk"):
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE products SET stock_quantity = ? WHERE name = ?", (quantity, name))
+    conn.commit()
+    conn.close()
+
+
+def _backup(db_path, backup_dir, **kwargs):
+    kwargs.setdefault("step_sleep", 0)
+    return backup_database(db_path, backup_dir, include_archives=False, **kwargs)
+
+
+def test_backup_is_verified_and_described(db_path, tmp_path):
+    backup_dir = tmp_path / "backups"
+    backup = _backup(db_path, backup_dir, pages=2)
+
+    assert list_backups(backup_dir) == [backup]
+    manifest = read_manifest(backup)
+    assert manifest["integrity_check"] == "ok"
+    assert manifest["files"]["supermarket.db"]["steps"] > 1
+    assert verify_database(backup / "supermarket.db")
+    assert _stock(backup / "supermarket.db") == 50
+    assert not list(backup_dir.glob("*.partial"))
+
+
+def test_write_during_copy_restarts_from_a_consistent_point(db_path, tmp_path, monkeypatch):
+    writes = []
+
+    def write_once(seconds):
+        if not writes:
+            writes.append(seconds)
+            _set_stock(db_path, 7)
+
+    monkeypatch.setattr(backup_module, "time", SimpleNamespace(sleep=write_once, perf_counter=time.perf_counter))
+    backup = _backup(db_path, tmp_path / "backups", pages=1, step_sleep=0.01)
+
+    assert writes
+    assert read_manifest(backup)["files"]["supermarket.db"]["restarts"] >= 1
+    assert _stock(backup / "supermarket.db") == 7
+
+
+def test_unchanged_database_is_not_backed_up_again(db_path, tmp_path):
+    backup_dir = tmp_path / "backups"
+    _backup(db_path, backup_dir)
+    assert not has_changed(db_path, backup_dir)
+    assert _backup(db_path, backup_dir, only_if_changed=True) is None
+
+    _set_stock(db_path, 12)
+    assert has_changed(db_path, backup_dir)
+    assert _backup(db_path, backup_dir, only_if_changed=True) is not None
+    assert len(list_backups(backup_dir)) == 2
+
+
+def test_rotation_keeps_the_newest_backups(db_path, tmp_path):
+    backup_dir = tmp_path / "backups"
+    backups = [_backup(db_path, backup_dir, keep=2) for _ in range(3)]
+
+    assert list_backups(backup_dir) == backups[1:]
+    assert not backups[0].exists()
+
+
+def test_corrupt_file_fails_verification(tmp_path):
+    broken = tmp_path / "broken.db"
+    broken.write_bytes(b"SQLite format 3\x00" + b"\xff" * 4096)
+
+    assert not verify_database(broken)
+
+
+def test_restore_brings_back_the_backed_up_data(db_path, tmp_path):
+    backup = _backup(db_path, tmp_path / "backups")
+    _set_stock(db_path, 3)
+
+    assert restore_backup(backup, db_path)
+    assert _stock(db_path) == 50
+
+
+def test_restore_refuses_a_corrupt_backup(db_path, tmp_path):
+    backup = _backup(db_path, tmp_path / "backups")
+    (backup / "supermarket.db").write_bytes(b"not a database")
+    _set_stock(db_path, 3)
+
+    assert not restore_backup(backup, db_path)
+    assert _stock(db_path) == 3
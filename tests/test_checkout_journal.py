@@ -0,0 +1,169 @@
+import sqlite3
+import time
+
+from database.checkout_journal import (
+    CheckoutJournal, _create_applied_table, encode_entry, get_failed_entries, journal_path_for
+)
+from services.sale_service import SaleService
+
+
+def _product(db_path, name="Milk"):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT id, stock_quantity, price FROM products WHERE name = ?", (name,)).fetchone()
+    finally:
+        conn.close()
+
+
+def _cart(product_id, quantity, price=1.0):
+    return {
+        "user_id": 1,
+        "items": [{"product_id": product_id, "quantity": quantity, "price": price}],
+        "payment_method": "cash",
+        "total": quantity * price,
+        "tax": 0.0
+    }
+
+
+def _sale_count(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_record_sale_refuses_cart_over_stock(db_path):
+    service = SaleService(db_path)
+    product_id, stock, price = _product(db_path)
+    service.product_service.warm_cache()
+
+    assert service.record_sale(_cart(product_id, stock + 1, price)) is None
+    assert service.product_service.get_cached_product(product_id)["stock"] == stock
+    path = journal_path_for(db_path)
+    assert not path.exists() or path.stat().st_size == 0
+
+
+def test_record_sale_does_not_wait_for_a_locked_database(db_path):
+    service = SaleService(db_path)
+    product_id, stock, price = _product(db_path)
+    service.product_service.warm_cache()
+    service._checkout_journal()
+
+    # Maintenance or a backup can hold the database for seconds
+    blocker = sqlite3.connect(db_path, isolation_level=None)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        started = time.perf_counter()
+        sale = service.record_sale(_cart(product_id, 2, price))
+        elapsed = time.perf_counter() - started
+    finally:
+        blocker.execute("COMMIT")
+        blocker.close()
+
+    assert sale["invoice_number"].startswith("PENDING-")
+    assert elapsed < 0.05
+    assert service._checkout_journal().flush(10)
+    assert _product(db_path)[1] == stock - 2
+
+
+def test_record_sale_counts_carts_not_yet_applied(db_path):
+    service = SaleService(db_path)
+    product_id, stock, price = _product(db_path)
+    service.product_service.warm_cache()
+
+    # Hold the write lock so the first cart stays in the journal
+    blocker = sqlite3.connect(db_path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        sale = service.record_sale(_cart(product_id, stock - 1, price))
+        assert sale["invoice_number"].startswith("PENDING-")
+        assert service.record_sale(_cart(product_id, 2, price)) is None
+        assert service.record_sale(_cart(product_id, 1, price)) is not None
+    finally:
+        blocker.execute("COMMIT")
+        blocker.close()
+
+    assert service._checkout_journal().flush(10)
+    assert _product(db_path)[1] == 0
+    assert _sale_count(db_path) == 2
+
+
+def test_refused_entry_is_kept_and_its_stock_restored(db_path):
+    service = SaleService(db_path)
+    product_id, stock, price = _product(db_path)
+    service.product_service.warm_cache()
+
+    # Another lane sells the shelf empty between the check and the apply
+    blocker = sqlite3.connect(db_path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        assert service.record_sale(_cart(product_id, 3, price)) is not None
+        assert service.product_service.get_cached_product(product_id)["stock"] == stock - 3
+        blocker.execute("UPDATE products SET stock_quantity = 0 WHERE id = ?", (product_id,))
+    finally:
+        blocker.execute("COMMIT")
+        blocker.close()
+
+    assert service._checkout_journal().flush(10)
+    assert _sale_count(db_path) == 0
+    # The catalog gives back what the refused cart took
+    assert service.product_service.get_cached_product(product_id)["stock"] == stock
+
+    failed = service.get_failed_checkouts()
+    assert len(failed) == 1
+    assert "Not enough stock" in failed[0]["error"]
+    assert failed[0]["sale_data"]["items"][0]["quantity"] == 3
+
+
+def test_replay_skips_applied_entries_and_does_not_undo_stock(db_path):
+    applied, failures = [], []
+
+    def write_sale(cursor, sale_data):
+        if sale_data["total"] < 0:
+            raise ValueError("refused")
+        applied.append(sale_data["total"])
+        return len(applied)
+
+    path = journal_path_for(db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        for entry_id, total in (("done", 1.0), ("todo", 2.0), ("bad", -1.0)):
+            f.write(encode_entry(entry_id, _cart(1, 1, total), "2024-05-01 10:00:00"))
+        f.write(b'{"id": "torn", "t"')
+
+    conn = sqlite3.connect(db_path)
+    _create_applied_table(conn)
+    conn.execute("INSERT INTO checkout_journal_applied (entry_id, sale_id) VALUES ('done', 99)")
+    conn.commit()
+    conn.close()
+
+    journal = CheckoutJournal(write_sale, db_path, on_failure=failures.append)
+    journal.start()
+    try:
+        assert journal.flush(10)
+    finally:
+        journal.stop()
+
+    assert applied == [2.0]
+    assert journal.sale_id("todo") == 1
+    # Entries from an earlier run never touched this run's catalog
+    assert failures == []
+    assert [entry["entry_id"] for entry in get_failed_entries(db_path)] == ["bad"]
+    assert path.stat().st_size == 0
+
+
+def test_failed_entries_read_tables_from_before_the_cart_column(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE checkout_journal_applied (
+            entry_id TEXT PRIMARY KEY, sale_id INTEGER, error TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("INSERT INTO checkout_journal_applied (entry_id, error) VALUES ('old', 'boom')")
+    conn.commit()
+    conn.close()
+
+    [failed] = get_failed_entries(db_path)
+    assert (failed["entry_id"], failed["error"], failed["sale_data"]) == ("old", "boom", None)
@@ -0,0 +1,127 @@
+import sqlite3
+
+import pytest
+
+from database import db_manager, query_cache as query_cache_module
+from database.migrations import get_schema_version, run_migrations
+from database.models.customer import Customer, _prefix_range
+from services.customer_directory import customer_directory
+from services.customer_service import CustomerService
+
+
+@pytest.fixture
+def default_db(db_path, monkeypatch):
+    """Point the customer model's default database at the test database"""
+    monkeypatch.setattr(db_manager, "DATABASE_PATH", db_path)
+    monkeypatch.setattr(query_cache_module, "DATABASE_PATH", db_path)
+    customer_directory.clear()
+    yield db_path
+    customer_directory.clear()
+
+
+def _add(name, phone="", email=""):
+    customer = Customer(name=name, phone=phone, email=email)
+    assert customer.save()
+    return customer
+
+
+def test_prefix_range_folds_ascii_case():
+    assert _prefix_range("Z") == ("z", "{")
+    assert _prefix_range("AbZ") == ("abz", "ab{")
+    # NOCASE leaves non-ASCII letters alone, so the bounds must too
+    assert _prefix_range("É") == ("É", "Ê")
+
+
+def test_prefix_range_at_the_top_of_unicode():
+    top = chr(0x10FFFF)
+    assert _prefix_range("a" + top) == ("a" + top, "b")
+    assert _prefix_range(top + top) == (top + top, None)
+    assert _prefix_range(chr(0xD7FF)) == (chr(0xD7FF), chr(0xE000))
+
+
+def test_search_matches_any_case(default_db):
+    zoe = _add("Zoe Zimmer", email="zoe@example.com")
+    _add("Adam Young")
+
+    for term in ("Z", "z", "ZOE", "zoe z"):
+        assert [c.id for c in Customer.search(term)] == [zoe.id], term
+
+
+def test_search_by_email_and_phone_prefix(default_db):
+    ann = _add("Ann", phone="0550 12-34-56", email="ann@shop.dz")
+    _add("Bob", phone="0661 000000", email="bob@shop.dz")
+
+    assert [c.id for c in Customer.search("ANN@")] == [ann.id]
+    assert [c.id for c in Customer.search("0550 12")] == [ann.id]
+    assert [c.name for c in Customer.search("0")] == ["Ann", "Bob"]
+
+
+def test_search_with_unbounded_prefix(default_db):
+    top = chr(0x10FFFF)
+    odd = _add(top + "name")
+    _add("Normal")
+
+    assert [c.id for c in Customer.search(top)] == [odd.id]
+
+
+def test_get_page_keyset_with_search(default_db):
+    names = ["mia", "Mia", "MIA", "Milo", "Max"]
+    ids = [_add(name).id for name in names]
+
+    first = Customer.get_page("mi", limit=2)
+    rest = Customer.get_page("mi", after=(first[-1].name, first[-1].id), limit=10)
+
+    assert [c.id for c in first + rest] == [ids[0], ids[1], ids[2], ids[3]]
+
+
+def test_failed_update_leaves_cached_customer(default_db):
+    ann = _add("Ann", phone="0550123456")
+    service = CustomerService()
+    assert service.get_customer(ann.id).name == "Ann"
+
+    conn = sqlite3.connect(default_db)
+    conn.execute("""
+        CREATE TRIGGER refuse_update BEFORE UPDATE ON customers
+        BEGIN SELECT RAISE(ABORT, 'read only'); END
+    """)
+    conn.commit()
+    conn.close()
+
+    assert service.update_customer(ann.id, {"name": "Changed", "phone": "0661000000"}) is None
+    cached = service.get_customer(ann.id)
+    assert (cached.name, cached.phone) == ("Ann", "0550123456")
+
+
+def test_migration_reports_duplicate_phones(db_path, capsys):
+    conn = sqlite3.connect(db_path)
+    try:
+        # Roll the customers table back to before migration 1
+        conn.execute("DROP INDEX idx_customers_phone_normalized")
+        conn.execute("ALTER TABLE customers DROP COLUMN phone_normalized")
+        conn.execute("DROP TABLE customer_phone_duplicates")
+        conn.executemany(
+            "INSERT INTO customers (name, phone) VALUES (?, ?)",
+            [("First", "0550 12 34 56"), ("Second", "0550-123-456"), ("Other", "0661000000")]
+        )
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+        capsys.readouterr()
+
+        run_migrations(conn)
+
+        assert get_schema_version(conn) == 4
+        first, second, other = [row[0] for row in conn.execute(
+            "SELECT id FROM customers WHERE name IN ('First', 'Second', 'Other') ORDER BY id"
+        )]
+        assert conn.execute(
+            "SELECT customer_id, phone, kept_customer_id FROM customer_phone_duplicates"
+        ).fetchall() == [(second, "0550-123-456", first)]
+        # The number itself is kept; only the unique lookup column is left to the oldest customer
+        assert conn.execute("SELECT phone FROM customers WHERE id = ?", (second,)).fetchone()[0] == "0550-123-456"
+        assert dict(conn.execute("SELECT id, phone_normalized FROM customers WHERE id IN (?, ?, ?)",
+                                 (first, second, other))) == {
+            first: "0550123456", second: None, other: "0661000000"
+        }
+        assert f"customer {second} (0550-123-456) duplicates customer {first}" in capsys.readouterr().out
+    finally:
+        conn.close()
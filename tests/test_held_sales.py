@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from config.constants import TAX_RATE
+from services.held_sale_service import HeldSaleService
+from services.product_service import ProductService
+
+
+def _products(db_path, *names):
+    service = ProductService(db_path)
+    return [dict(next(p for p in service.get_products() if p["name"] == name)) for name in names]
+
+
+def _held_count(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM held_sales").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_item_count_is_the_number_of_lines(db_path):
+    milk, bread = _products(db_path, "Milk", "Bread")
+    service = HeldSaleService(db_path)
+    service.hold_sale([{"product": milk, "quantity": 3}, {"product": bread, "quantity": 2}])
+
+    [held] = service.get_held_sales()
+    assert held["item_count"] == 2
+    subtotal = 3 * milk["price"] + 2 * bread["price"]
+    assert held["total"] == pytest.approx(subtotal * (1 + TAX_RATE))
+
+
+def test_recall_recomputes_totals_without_missing_products(db_path):
+    milk, bread = _products(db_path, "Milk", "Bread")
+    service = HeldSaleService(db_path)
+    held_id = service.hold_sale([{"product": milk, "quantity": 3}, {"product": bread, "quantity": 2}])
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.execute("DELETE FROM products WHERE id = ?", (bread["id"],))
+    conn.commit()
+    conn.close()
+    service.product_service.clear_cache()
+
+    recalled = service.recall_sale(held_id)
+
+    assert [item["product"]["id"] for item in recalled["items"]] == [milk["id"]]
+    assert recalled["missing_products"] == [bread["id"]]
+    assert recalled["subtotal"] == pytest.approx(3 * milk["price"])
+    assert recalled["total"] == pytest.approx(3 * milk["price"] * (1 + TAX_RATE))
+    assert _held_count(db_path) == 0
+    assert service.recall_sale(held_id) is None
+
+
+def test_unreadable_held_sale_stays_on_hold(db_path):
+    service = HeldSaleService(db_path)
+    conn = sqlite3.connect(db_path)
+    held_id = conn.execute("""
+        INSERT INTO held_sales (lane_id, items, item_count, subtotal, tax, total)
+        VALUES ('lane-1', 'not json', 1, 1.0, 0.1, 1.1)
+    """).lastrowid
+    conn.commit()
+    conn.close()
+
+    assert service.recall_sale(held_id) is None
+    assert _held_count(db_path) == 1
@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import pytest
+
+from config.settings import DATETIME_FORMAT
+from database.connection import get_db_connection
+from database.repositories import SQLiteRepositories
+from database.repositories.memory import InMemoryRepositories
+
+# Several rows share a timestamp, so pages must break ties on id
+TIMESTAMPS = ["2026-03-01 09:00:00"] * 7 + ["2026-03-01 09:00:05"] * 3 + ["2026-03-02 18:30:00"] * 6 + [
+    "2026-03-03 08:00:00", "2026-03-03 08:00:01"
+] * 4
+TYPES = ("sale", "manual", "correction")
+REASONS = ("Restock shelf", "Damaged", "Sale")
+
+
+@pytest.fixture
+def backends(db_path):
+    """The same ledger in SQLite and in memory"""
+    conn = get_db_connection(db_path)
+    conn.execute("DELETE FROM inventory_transactions")
+    conn.execute("INSERT INTO users (username, password, role) VALUES ('bob', 'x', 'cashier')")
+    product_ids = [row[0] for row in conn.execute("SELECT id FROM products ORDER BY id LIMIT 2")]
+    bob = conn.execute("SELECT id FROM users WHERE username = 'bob'").fetchone()[0]
+    conn.commit()
+
+    clock = iter(TIMESTAMPS)
+    memory = InMemoryRepositories.from_database(
+        db_path, clock=lambda: datetime.strptime(next(clock), DATETIME_FORMAT)
+    )
+    for i, created_at in enumerate(TIMESTAMPS):
+        row = (product_ids[i % 2], i + 1, 100, 101 + i, TYPES[i % 3], REASONS[i % 3], None, (1, bob, None)[i % 3])
+        conn.execute("""
+            INSERT INTO inventory_transactions (
+                product_id, quantity_change, previous_quantity, new_quantity,
+                transaction_type, reason, notes, user_id, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, row + (created_at,))
+        memory.ledger.record(*row)
+    conn.commit()
+    conn.close()
+
+    return {"sqlite": SQLiteRepositories(db_path), "memory": memory}, product_ids
+
+
+def _all_pages(fetch, page_size, **filters):
+    rows, after = [], None
+    while True:
+        page = fetch(page_size, after, **filters)
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        after = (page[-1]["created_at"], page[-1]["id"])
+
+
+def _without_ids(rows):
+    return [{key: value for key, value in row.items() if key != "id"} for row in rows]
+
+
+@pytest.mark.parametrize("page_size", [1, 4, 7, 100])
+def test_pages_cover_every_row_once_newest_first(backends, page_size):
+    repositories, _ = backends
+    for name, repo in repositories.items():
+        rows = _all_pages(repo.ledger.recent, page_size)
+        keys = [(row["created_at"], row["id"]) for row in rows]
+
+        assert len(rows) == len(TIMESTAMPS), name
+        assert len(set(keys)) == len(keys), name
+        assert keys == sorted(keys, reverse=True), name
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"transaction_type": "MANUAL"},
+    {"user": "bo"},
+    {"reason": "shelf"},
+    {"user": "admin", "transaction_type": "sale"},
+])
+def test_sqlite_and_memory_pages_agree(backends, filters):
+    repositories, product_ids = backends
+    sqlite, memory = repositories["sqlite"], repositories["memory"]
+
+    assert _without_ids(_all_pages(sqlite.ledger.recent, 3, **filters)) == \
+        _without_ids(_all_pages(memory.ledger.recent, 3, **filters))
+
+    for product_id in product_ids:
+        for_product = lambda repo: lambda limit, after, **f: repo.ledger.for_product(product_id, limit, after, **f)
+        assert _without_ids(_all_pages(for_product(sqlite), 3, **filters)) == \
+            _without_ids(_all_pages(for_product(memory), 3, **filters))
+
+
+def test_filters_apply_to_every_page(backends):
+    repositories, _ = backends
+    rows = _all_pages(repositories["sqlite"].ledger.recent, 2, transaction_type="correction", reason="sale")
+
+    assert rows
+    assert all(row["transaction_type"] == "correction" and row["reason"] == "Sale" for row in rows)
+    assert len(rows) == sum(1 for i in range(len(TIMESTAMPS)) if i % 3 == 2)
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+from database import maintenance
+from database.maintenance import MaintenanceRun
+
+
+@pytest.fixture
+def fragmented(db_path):
+    """The shop database in auto_vacuum = NONE with most of its pages free"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE scratch (data BLOB)")
+    conn.executemany("INSERT INTO scratch VALUES (randomblob(4000))", [()] * 500)
+    conn.commit()
+    conn.execute("DELETE FROM scratch")
+    conn.commit()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    conn.close()
+    return db_path
+
+
+def _auto_vacuum(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_closing_run_leaves_files_too_big_for_the_budget(fragmented, monkeypatch):
+    monkeypatch.setattr(maintenance, "MAINTENANCE_VACUUM_BYTES_PER_SECOND", 1024)
+
+    run = MaintenanceRun(fragmented, task_budget=1.0, closing=True)
+    result = run.run()["tasks"]["vacuum"]
+
+    assert result["status"] == "done"
+    assert result["needs_full_vacuum"] == ["main"]
+    assert _auto_vacuum(fragmented) == 0
+
+
+def test_full_vacuum_converts_regardless_of_size(fragmented, monkeypatch):
+    monkeypatch.setattr(maintenance, "MAINTENANCE_VACUUM_BYTES_PER_SECOND", 1024)
+
+    run = MaintenanceRun(fragmented, task_budget=1.0, closing=True, full_vacuum=True)
+    report = run.run()
+
+    assert report["tasks"]["vacuum"]["converted_to_incremental"] == ["main"]
+    assert report["free_pages_after"] < report["free_pages_before"]
+    assert _auto_vacuum(fragmented) == 2
+
+
+def test_cli_writes_to_the_given_log(fragmented, tmp_path, monkeypatch, capsys):
+    log = tmp_path / "maintenance.log"
+    monkeypatch.setattr("sys.argv", ["maintenance", "--db", str(fragmented), "--log", str(log), "--run"])
+
+    maintenance.main()
+
+    assert len(maintenance.load_runs(log)) == 1
+    assert maintenance.load_runs(log)[0]["database"] == str(fragmented)
@@ -0,0 +1,43 @@
+import sqlite3
+import threading
+
+from database.query_cache import QueryCache
+
+SQL = "SELECT name, stock_quantity FROM products WHERE name = ?"
+
+
+def test_hit_until_the_table_changes(db_path):
+    cache = QueryCache(max_entries=10, enabled=True)
+    try:
+        assert cache.fetch_one(SQL, ("Milk",), db_path) == ("Milk", 50)
+        assert cache.fetch_one(SQL, ("Milk",), db_path) == ("Milk", 50)
+        assert (cache.stats["misses"], cache.stats["hits"]) == (1, 1)
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE products SET stock_quantity = 7 WHERE name = 'Milk'")
+        conn.commit()
+        conn.close()
+
+        assert cache.fetch_one(SQL, ("Milk",), db_path) == ("Milk", 7)
+        assert cache.stats["misses"] == 2
+    finally:
+        cache.close()
+
+
+def test_counts_lookups_from_many_threads(db_path):
+    cache = QueryCache(max_entries=10, enabled=True)
+    threads, lookups = 8, 200
+
+    def worker():
+        for _ in range(lookups):
+            cache.fetch(SQL, ("Milk",), db_path)
+
+    try:
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        assert cache.stats["hits"] + cache.stats["misses"] == threads * lookups
+    finally:
+        cache.close()
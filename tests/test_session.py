@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+from database.models import Product, Sale, SaleItem, Session
+
+
+def _query(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def _milk_id(db_path):
+    return _query(db_path, "SELECT id FROM products WHERE name = 'Milk'")[0][0]
+
+
+def test_identity_map_loads_a_row_once(db_path):
+    milk_id = _milk_id(db_path)
+    with Session(db_path) as session:
+        first = session.get(Product, milk_id)
+        again = session.get(Product, milk_id)
+        [by_batch] = session.get_many(Product, [milk_id, milk_id]).values()
+
+        assert first is again is by_batch
+        assert session.stats["selects"] == 1
+
+
+def test_only_changed_columns_are_written(db_path):
+    milk_id = _milk_id(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE price_writes (product_id INTEGER);
+        CREATE TRIGGER log_price_writes AFTER UPDATE OF price ON products
+        BEGIN INSERT INTO price_writes VALUES (new.id); END;
+    """)
+    conn.close()
+
+    with Session(db_path) as session:
+        session.get(Product, milk_id).stock_quantity -= 2
+        session.get(Product, milk_id).stock_quantity -= 1
+
+    assert _query(db_path, "SELECT stock_quantity FROM products WHERE id = ?", (milk_id,)) == [(47,)]
+    assert _query(db_path, "SELECT * FROM price_writes") == []
+
+    with Session(db_path) as session:
+        session.get(Product, milk_id)
+    assert session.stats["updates"] == 0
+
+
+def test_new_sale_and_items_are_inserted_with_their_foreign_key(db_path):
+    milk_id = _milk_id(db_path)
+    items = [SaleItem(product_id=milk_id, quantity=q, unit_price=1.5, subtotal=1.5 * q) for q in (1, 2)]
+    sale = Sale(user_id=1, total_amount=4.5, payment_method="cash", items=items)
+
+    with Session(db_path) as session:
+        session.add(sale)
+        session.flush()
+        assert sale.id is not None
+        assert [item.sale_id for item in items] == [sale.id, sale.id]
+        assert session.stats["inserts"] == 3
+
+    assert _query(db_path, "SELECT sale_id, quantity FROM sale_items WHERE sale_id = ? ORDER BY id",
+                  (sale.id,)) == [(sale.id, 1), (sale.id, 2)]
+
+
+def test_rollback_forgets_allocated_ids(db_path):
+    milk_id = _milk_id(db_path)
+    item = SaleItem(product_id=milk_id, quantity=1, unit_price=1.0, subtotal=1.0)
+    sale = Sale(user_id=1, total_amount=1.0, payment_method="cash", items=[item])
+
+    with pytest.raises(RuntimeError):
+        with Session(db_path) as session:
+            session.add(sale)
+            session.flush()
+            session.get(Product, milk_id).stock_quantity = 0
+            raise RuntimeError("checkout failed")
+
+    assert sale.id is None
+    assert _query(db_path, "SELECT COUNT(*) FROM sales") == [(0,)]
+    assert _query(db_path, "SELECT stock_quantity FROM products WHERE id = ?", (milk_id,)) == [(50,)]
+
+    # The sale can be saved again afterwards
+    with Session(db_path) as session:
+        session.add(sale)
+    assert _query(db_path, "SELECT COUNT(*) FROM sales WHERE id = ?", (sale.id,)) == [(1,)]
+
+
+def test_attach_rejects_a_second_copy_of_a_row(db_path):
+    milk_id = _milk_id(db_path)
+    with Session(db_path) as session:
+        session.get(Product, milk_id)
+        copy = Product.from_dict({"id": milk_id, "name": "Milk"})
+        with pytest.raises(ValueError):
+            session.attach(copy)
@@ -0,0 +1,23 @@
+from database import tracing
+from database.connection import get_db_connection
+
+
+def test_slow_statements_are_logged_without_full_tracing(db_path, monkeypatch):
+    logged = []
+    monkeypatch.setattr(tracing, "_log_slow", lambda *entry: logged.append(entry))
+    conn = get_db_connection(db_path)
+    assert isinstance(conn, tracing.SlowQueryConnection)
+
+    conn.execute("UPDATE products SET stock_quantity = 7 WHERE name = 'Milk'")
+    conn.commit()
+    assert logged == []
+
+    monkeypatch.setattr(tracing, "SLOW_QUERY_THRESHOLD_MS", 0)
+    conn.execute("UPDATE products SET stock_quantity = 8 WHERE name = 'Milk'")
+    conn.commit()
+    conn.close()
+
+    assert [(sql, rows) for sql, _, _, rows in logged] == [
+        ("UPDATE products SET stock_quantity = ? WHERE name = ?", 1), ("COMMIT", 0)
+    ]
+    assert tracing.get_summary() == []
@@ -0,0 +1,140 @@
+import customtkinter as ctk
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from config.constants import PADDING_SMALL
+
+class VirtualList(ctk.CTkFrame):
+    """List that draws only the visible rows from a fixed pool of widgets.
+
+    Rows are plain tuples of column text with a payload each; scrolling just
+    rewrites the pooled labels, so the cost of showing the list doesn't grow
+    with the number of rows. ``on_need_more`` is called when the view nears
+    the end of the loaded rows and more are available.
+    """
+
+    def __init__(
+        self,
+        master,
+        columns: Sequence[Tuple[str, int]],
+        on_select: Optional[Callable[[Any], None]] = None,
+        on_need_more: Optional[Callable[[], None]] = None,
+        visible_rows: int = 12,
+        **kwargs
+    ):
+        super().__init__(master, **kwargs)
+
+        self.columns = columns
+        self.on_select = on_select
+        self.on_need_more = on_need_more
+        self.visible_rows = visible_rows
+
+        self.rows: List[Tuple[str, ...]] = []
+        self.payloads: List[Any] = []
+        self.has_more = False
+        self.offset = 0
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        body = ctk.CTkFrame(self, fg_color="transparent")
+        body.grid(row=0, column=0, sticky="nsew")
+        for i, (_, weight) in enumerate(columns):
+            body.grid_columnconfigure(i, weight=weight, uniform="column")
+
+        # Headers
+        for i, (title, _) in enumerate(columns):
+            header = ctk.CTkLabel(body, text=title, font=ctk.CTkFont(weight="bold"), anchor="w")
+            header.grid(row=0, column=i, sticky="ew", padx=PADDING_SMALL)
+
+        # Fixed pool of row labels
+        self.pool: List[List[ctk.CTkLabel]] = []
+        for r in range(visible_rows):
+            labels = []
+            for c in range(len(columns)):
+                label = ctk.CTkLabel(body, text="", anchor="w", cursor="hand2")
+                label.grid(row=r + 1, column=c, sticky="ew", padx=PADDING_SMALL, pady=1)
+                label.bind("<Button-1>", lambda e, r=r: self._on_click(r))
+                label.bind("<MouseWheel>", self._on_mousewheel)
+                label.bind("<Button-4>", lambda e: self.scroll(-3))
+                label.bind("<Button-5>", lambda e: self.scroll(3))
+                labels.append(label)
+            self.pool.append(labels)
+
+        self.empty_label = ctk.CTkLabel(body, text="", text_color="gray")
+        self.empty_label.grid(row=visible_rows + 1, column=0, columnspan=len(columns), pady=PADDING_SMALL)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        for widget in (self, body):
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+            widget.bind("<Button-4>", lambda e: self.scroll(-3))
+            widget.bind("<Button-5>", lambda e: self.scroll(3))
+
+        self._render()
+
+    def set_rows(self, rows: List[Tuple[str, ...]], payloads: List[Any], has_more: bool = False,
+                 empty_text: str = "No results"):
+        """Replace the rows and scroll back to the top"""
+        self.rows = list(rows)
+        self.payloads = list(payloads)
+        self.has_more = has_more
+        self.offset = 0
+        self.empty_label.configure(text="" if rows else empty_text)
+        self._render()
+
+    def append_rows(self, rows: List[Tuple[str, ...]], payloads: List[Any], has_more: bool = False):
+        """Add rows loaded for the end of the list"""
+        self.rows.extend(rows)
+        self.payloads.extend(payloads)
+        self.has_more = has_more
+        self._render()
+
+    def scroll(self, delta: int):
+        """Scroll by a number of rows"""
+        self._scroll_to(self.offset + delta)
+
+    def _scroll_to(self, offset: int):
+        max_offset = max(0, len(self.rows) - self.visible_rows)
+        offset = max(0, min(offset, max_offset))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+        elif offset == max_offset:
+            self._maybe_need_more()
+
+    def _render(self):
+        for r, labels in enumerate(self.pool):
+            index = self.offset + r
+            values = self.rows[index] if index < len(self.rows) else ("",) * len(labels)
+            for label, value in zip(labels, values):
+                if label.cget("text") != value:
+                    label.configure(text=value)
+
+        total = max(len(self.rows), 1)
+        first = self.offset / total
+        last = min(1.0, (self.offset + self.visible_rows) / total)
+        self.scrollbar.set(first, last)
+
+        self._maybe_need_more()
+
+    def _maybe_need_more(self):
+        # Ask for the next page while a screenful of loaded rows is still left
+        if self.has_more and self.on_need_more and \
+                self.offset + 2 * self.visible_rows >= len(self.rows):
+            self.on_need_more()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            step = self.visible_rows if len(args) > 2 and args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_click(self, pool_row: int):
+        index = self.offset + pool_row
+        if index < len(self.payloads) and self.on_select:
+            self.on_select(self.payloads[index])
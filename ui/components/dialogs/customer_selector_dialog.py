@@ -1,8 +1,14 @@
 import customtkinter as ctk
-from typing import Optional, Callable, Dict, Any
+from typing import Optional, Callable, Dict, Any, List
 
 from config.constants import PADDING_SMALL, PADDING_MEDIUM
 from services.customer_service import CustomerService
+from ui.base.virtual_list import VirtualList
+from utils.background import BackgroundLoader
+
+# Customers fetched per query and typing pause before searching
+PAGE_SIZE = 100
+SEARCH_DELAY_MS = 150
 
 class CustomerSelectorDialog(ctk.CTkToplevel):
     """Dialog for selecting a customer"""
@@ -12,6 +18,11 @@ class CustomerSelectorDialog(ctk.CTkToplevel):
         
         # Initialize service
         self.customer_service = CustomerService()
+        self.loader = BackgroundLoader(self)
+        self.search_timer = None
+        self.search_term = ""
+        self.last_key = None
+        self.loading = False
         
         # Store callback
         self.callback = callback
@@ -60,29 +71,21 @@ class CustomerSelectorDialog(ctk.CTkToplevel):
         search_button = ctk.CTkButton(
             search_frame,
             text="Search",
-            command=self.search_customers
+            command=self.load_customers
         )
         search_button.grid(row=0, column=1, padx=PADDING_SMALL)
         
         
-        # Customer list
-        columns = ("Name", "Phone", "Email", "Address")
+        # Customer list (only the visible rows are drawn)
+        columns = (("Name", 3), ("Phone", 2), ("Email", 3), ("Address", 4))
         
-        self.customer_tree = ctk.CTkScrollableFrame(self)
+        self.customer_tree = VirtualList(
+            self,
+            columns,
+            on_select=self.on_customer_click,
+            on_need_more=self.load_more_customers
+        )
         self.customer_tree.grid(row=2, column=0, sticky="nsew", padx=PADDING_MEDIUM, pady=PADDING_MEDIUM)
-        self.customer_tree.grid_columnconfigure(0, weight=3)
-        self.customer_tree.grid_columnconfigure(1, weight=2)
-        self.customer_tree.grid_columnconfigure(2, weight=3)
-        self.customer_tree.grid_columnconfigure(3, weight=4)
-        
-        # Add headers
-        for i, col in enumerate(columns):
-            header = ctk.CTkLabel(
-                self.customer_tree,
-                text=col,
-                font=ctk.CTkFont(weight="bold")
-            )
-            header.grid(row=0, column=i, sticky="w", padx=PADDING_SMALL)
         
         # Buttons frame
         button_frame = ctk.CTkFrame(self)
@@ -104,101 +107,58 @@ class CustomerSelectorDialog(ctk.CTkToplevel):
         select_button.grid(row=0, column=1, padx=PADDING_SMALL)
     
     def load_customers(self):
-        """Load all customers"""
-        # Clear existing items
-        for widget in self.customer_tree.winfo_children()[4:]:  # Skip headers
-            widget.destroy()
-        
-        # Get customers
-        customers = self.customer_service.get_customers()
-        
-        # Add customers to tree
-        for i, customer in enumerate(customers):
-            row = i + 1  # Skip header row
-            
-            name_label = ctk.CTkLabel(
-                self.customer_tree,
-                text=customer.name,
-                cursor="hand2"
-            )
-            name_label.grid(row=row, column=0, sticky="w", padx=PADDING_SMALL, pady=2)
-            name_label.bind("<Button-1>", lambda e, c=customer: self.on_customer_click(c))
-            
-            phone_label = ctk.CTkLabel(
-                self.customer_tree,
-                text=customer.phone or "",
-                cursor="hand2"
-            )
-            phone_label.grid(row=row, column=1, sticky="w", padx=PADDING_SMALL, pady=2)
-            phone_label.bind("<Button-1>", lambda e, c=customer: self.on_customer_click(c))
-            
-            email_label = ctk.CTkLabel(
-                self.customer_tree,
-                text=customer.email or "",
-                cursor="hand2"
-            )
-            email_label.grid(row=row, column=2, sticky="w", padx=PADDING_SMALL, pady=2)
-            email_label.bind("<Button-1>", lambda e, c=customer: self.on_customer_click(c))
-            
-            address_label = ctk.CTkLabel(
-                self.customer_tree,
-                text=customer.address or "",
-                cursor="hand2"
-            )
-            address_label.grid(row=row, column=3, sticky="w", padx=PADDING_SMALL, pady=2)
-            address_label.bind("<Button-1>", lambda e, c=customer: self.on_customer_click(c))
+        """Load the first page of customers for the current search"""
+        self.search_timer = None
+        self.search_term = self.search_var.get().strip()
+        self.last_key = None
+        self.loading = True
+        self.loader.submit(
+            self.customer_service.get_customer_page,
+            lambda customers: self.on_page_loaded(customers, reset=True),
+            self.search_term, None, PAGE_SIZE,
+            key="page",
+            on_error=self.on_page_failed
+        )
     
-    def search_customers(self):
-        """Search customers"""
-        search_term = self.search_var.get().strip()
-        
-        if not search_term:
-            self.load_customers()
+    def load_more_customers(self):
+        """Load the page after the last loaded customer"""
+        if self.loading or not self.last_key:
             return
-        
-        # Clear existing items
-        for widget in self.customer_tree.winfo_children()[4:]:  # Skip headers
-            widget.destroy()
-        
-        # Search customers
-        customers = self.customer_service.search_customers(search_term)
-        
-        # Add customers to tree
-        for i, customer in enumerate(customers):
-            row = i + 1  # Skip header row
-            
-            name_label = ctk.CTkLabel(
-                self.customer_tree,
-                text=customer.name,
-                cursor="hand2"
-            )
-            name_label.grid(row=row, column=0, sticky="w", padx=PADDING_SMALL, pady=2)
-            name_label.bind("<Button-1>", lambda e, c=customer: self.on_customer_click(c))
-            
-            phone_label = ctk.CTkLabel(
-                self.customer_tree,
-                text=customer.phone or "",
-                cursor="hand2"
-            )
-            phone_label.grid(row=row, column=1, sticky="w", padx=PADDING_SMALL, pady=2)
-            phone_label.bind("<Button-1>", lambda e, c=customer: self.on_customer_click(c))
-            
-            email_label = ctk.CTkLabel(
-                self.customer_tree,
-                text=customer.email or "",
-                cursor="hand2"
-            )
-            email_label.grid(row=row, column=2, sticky="w", padx=PADDING_SMALL, pady=2)
-            email_label.bind("<Button-1>", lambda e, c=customer: self.on_customer_click(c))
-            
-            address_label = ctk.CTkLabel(
-                self.customer_tree,
-                text=customer.address or "",
-                cursor="hand2"
-            )
-            address_label.grid(row=row, column=3, sticky="w", padx=PADDING_SMALL, pady=2)
-            address_label.bind("<Button-1>", lambda e, c=customer: self.on_customer_click(c))
+        self.loading = True
+        self.loader.submit(
+            self.customer_service.get_customer_page,
+            lambda customers: self.on_page_loaded(customers, reset=False),
+            self.search_term, self.last_key, PAGE_SIZE,
+            key="page",
+            on_error=self.on_page_failed
+        )
+    
+    def on_page_loaded(self, customers: List[Any], reset: bool):
+        """Show a page of customers (runs on the UI thread)"""
+        self.loading = False
+        rows = [
+            (customer.name, customer.phone or "", customer.email or "", customer.address or "")
+            for customer in customers
+        ]
+        has_more = len(customers) == PAGE_SIZE
+        if customers:
+            self.last_key = (customers[-1].name, customers[-1].id)
+        
+        if reset:
+            self.customer_tree.set_rows(rows, customers, has_more, empty_text="No customers found")
+        else:
+            self.customer_tree.append_rows(rows, customers, has_more)
+    
+    def on_page_failed(self, error: Exception):
+        """Let the next scroll or search try again (runs on the UI thread)"""
+        self.loading = False
     
+    def search_customers(self):
+        """Search customers as the user types"""
+        # Debounce keystrokes; a newer search supersedes any query still running
+        if self.search_timer:
+            self.after_cancel(self.search_timer)
+        self.search_timer = self.after(SEARCH_DELAY_MS, self.load_customers)
     
     def on_customer_click(self, customer: Any):
         """Handle customer selection"""
@@ -214,4 +174,12 @@ class CustomerSelectorDialog(ctk.CTkToplevel):
     def cancel(self):
         """Cancel selection and close dialog"""
         self.callback(None)
-        self.destroy() 
\ No newline at end of file
+        self.destroy()
+    
+    def destroy(self):
+        """Stop background loading and close the dialog"""
+        if self.search_timer:
+            self.after_cancel(self.search_timer)
+            self.search_timer = None
+        self.loader.close()
+        super().destroy() 
\ No newline at end of file
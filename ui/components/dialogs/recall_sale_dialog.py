@@ -47,12 +47,10 @@ class RecallSaleDialog(ctk.CTkToplevel):
     def populate_sales_list(self):
         self.sales_listbox.configure(state="normal")
         self.sales_listbox.delete("1.0", "end")
+        # Totals are precomputed when the sale is held
         for i, sale in enumerate(self.held_sales):
-            customer_name = sale['customer']['full_name'] if sale.get('customer') else 'N/A'
-            item_count = len(sale['items'])
-            total_amount = sum(item['quantity'] * item['product']['price'] for item in sale['items'])
-            hold_time = sale['hold_time'].strftime("%Y-%m-%d %H:%M:%S")
-            self.sales_listbox.insert("end", f"{i+1}. Time: {hold_time}, Customer: {customer_name}, Items: {item_count}, Total: {total_amount:.2f}\n")
+            customer_name = sale['customer_name'] or 'N/A'
+            self.sales_listbox.insert("end", f"{i+1}. Time: {sale['held_at']}, Lane: {sale['lane_id']}, Customer: {customer_name}, Items: {sale['item_count']}, Total: {sale['total']:.2f}\n")
         self.sales_listbox.configure(state="disabled")
 
     def recall_selected(self):
@@ -65,7 +63,8 @@ class RecallSaleDialog(ctk.CTkToplevel):
             return # Selection is empty
 
         self.selected_index = int(selected_text.split('.')[0]) - 1
-        self.on_recall(self.selected_index)
+        if 0 <= self.selected_index < len(self.held_sales):
+            self.on_recall(self.held_sales[self.selected_index]['id'])
         self.destroy()
 
     def delete_selected(self):
@@ -78,5 +77,6 @@ class RecallSaleDialog(ctk.CTkToplevel):
             return # Selection is empty
 
         self.selected_index = int(selected_text.split('.')[0]) - 1
-        self.on_delete(self.selected_index)
+        if 0 <= self.selected_index < len(self.held_sales):
+            self.on_delete(self.held_sales.pop(self.selected_index)['id'])
         self.populate_sales_list()
@@ -1,31 +1,46 @@
 import customtkinter as ctk
-from tkinter import ttk, filedialog
+from tkinter import filedialog
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
-from config.constants import PADDING_SMALL, PADDING_MEDIUM
+from config.constants import PADDING_SMALL, PADDING_MEDIUM, TRANSACTION_TYPES
 from services.inventory_service import InventoryService
+from ui.base.virtual_list import VirtualList
+from utils.background import BackgroundLoader
+
+# Transactions fetched per query, per export query, and typing pause before filtering
+PAGE_SIZE = 100
+EXPORT_PAGE_SIZE = 1000
+FILTER_DELAY_MS = 250
+ALL_TYPES = "All types"
 
 class TransactionHistoryDialog(ctk.CTkToplevel):
     """Dialog for viewing inventory transaction history"""
-    
+
     def __init__(self, parent, product: Optional[Dict[str, Any]] = None):
         super().__init__(parent)
-        
+
         self.title("Inventory Transaction History")
         self.geometry("800x600")
-        
+
         self.product = product
         self.inventory_service = InventoryService()
-        
+        self.loader = BackgroundLoader(self)
+        self.filter_timer = None
+        self.filters: Dict[str, Optional[str]] = {}
+        self.transactions: List[Dict[str, Any]] = []
+        self.last_key = None
+        self.has_more = False
+        self.loading = False
+
         # Create UI
         self.create_ui()
         self.load_transactions()
-        
+
         self.grab_set()
         self.focus_force()
         self.wait_window()
-    
+
     def create_ui(self):
         """Create the dialog UI with enhanced features"""
         self.grid_columnconfigure(0, weight=1)
@@ -44,17 +59,6 @@ class TransactionHistoryDialog(ctk.CTkToplevel):
             font=ctk.CTkFont(size=16, weight="bold")
         ).pack(side="left")
 
-        # Search/filter entry
-        self.search_var = ctk.StringVar()
-        self.search_var.trace_add("write", lambda *args: self.filter_transactions())
-        search_entry = ctk.CTkEntry(
-            header_frame,
-            placeholder_text="Search by user, reason, or type...",
-            textvariable=self.search_var,
-            width=220
-        )
-        search_entry.pack(side="right", padx=(0, 10))
-
         # Export button
         export_btn = ctk.CTkButton(
             header_frame,
@@ -66,13 +70,38 @@ class TransactionHistoryDialog(ctk.CTkToplevel):
         )
         export_btn.pack(side="right", padx=(0, 10))
 
-        # Table frame
-        table_frame = ctk.CTkFrame(self)
-        table_frame.grid(row=1, column=0, sticky="nsew", padx=PADDING_MEDIUM, pady=(0, PADDING_MEDIUM))
-        table_frame.grid_columnconfigure(0, weight=1)
-        table_frame.grid_rowconfigure(0, weight=1)
+        # Filters, applied by the query so every page is already filtered
+        filter_frame = ctk.CTkFrame(self, fg_color="transparent")
+        filter_frame.grid(row=1, column=0, sticky="ew", padx=PADDING_MEDIUM, pady=(0, PADDING_SMALL))
+
+        self.type_var = ctk.StringVar(value=ALL_TYPES)
+        ctk.CTkOptionMenu(
+            filter_frame,
+            variable=self.type_var,
+            values=[ALL_TYPES] + [transaction_type.title() for transaction_type in TRANSACTION_TYPES],
+            command=lambda _: self.load_transactions(),
+            width=130
+        ).pack(side="left", padx=(0, 10))
+
+        self.user_var = ctk.StringVar()
+        self.user_var.trace_add("write", lambda *args: self.filter_transactions())
+        ctk.CTkEntry(
+            filter_frame,
+            placeholder_text="User...",
+            textvariable=self.user_var,
+            width=140
+        ).pack(side="left", padx=(0, 10))
+
+        self.reason_var = ctk.StringVar()
+        self.reason_var.trace_add("write", lambda *args: self.filter_transactions())
+        ctk.CTkEntry(
+            filter_frame,
+            placeholder_text="Reason contains...",
+            textvariable=self.reason_var,
+            width=220
+        ).pack(side="left")
 
-        # Treeview columns
+        # Transaction list (only the visible rows are drawn; scrolling near the end loads the next page)
         self.columns = [
             "Date/Time",
             "Change" if self.product else "Product",
@@ -82,27 +111,17 @@ class TransactionHistoryDialog(ctk.CTkToplevel):
             "Reason",
             "User"
         ]
-        tree_columns = [f"col{i}" for i in range(len(self.columns))]
-        self.tree = ttk.Treeview(table_frame, columns=tree_columns, show="headings", selectmode="browse", height=18)
-        for idx, col in enumerate(self.columns):
-            self.tree.heading(tree_columns[idx], text=col, command=lambda c=tree_columns[idx]: self.sort_by_column(c, False))
-            self.tree.column(tree_columns[idx], anchor="center", width=120)
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=vsb.set)
-        vsb.grid(row=0, column=1, sticky="ns")
-
-        # Style for highlighting
-        style = ttk.Style()
-        style.map("Treeview", background=[('selected', '#b3d9ff')])
-        style.configure("LowStock.Treeview", background="#fff3cd")
-        style.configure("OutStock.Treeview", background="#ffcccc")
-        style.configure("Positive.Treeview", foreground="#2ecc71")
-        style.configure("Negative.Treeview", foreground="#e74c3c")
+        self.transaction_list = VirtualList(
+            self,
+            [(column, 3 if column in ("Product", "Reason") else 2) for column in self.columns],
+            on_need_more=self.load_more_transactions,
+            visible_rows=18
+        )
+        self.transaction_list.grid(row=2, column=0, sticky="nsew", padx=PADDING_MEDIUM, pady=(0, PADDING_MEDIUM))
 
         # Transaction count label
         self.count_label = ctk.CTkLabel(self, text="", font=ctk.CTkFont(size=12))
-        self.count_label.grid(row=2, column=0, sticky="w", padx=PADDING_MEDIUM, pady=(0, PADDING_SMALL))
+        self.count_label.grid(row=3, column=0, sticky="w", padx=PADDING_MEDIUM, pady=(0, PADDING_SMALL))
 
         # Close button
         ctk.CTkButton(
@@ -110,89 +129,137 @@ class TransactionHistoryDialog(ctk.CTkToplevel):
             text="Close",
             command=self.destroy,
             width=100
-        ).grid(row=3, column=0, pady=PADDING_MEDIUM)
-    
+        ).grid(row=4, column=0, pady=PADDING_MEDIUM)
+
+    def _current_filters(self) -> Dict[str, Optional[str]]:
+        transaction_type = self.type_var.get()
+        return {
+            "user": self.user_var.get().strip() or None,
+            "transaction_type": None if transaction_type == ALL_TYPES else transaction_type.lower(),
+            "reason": self.reason_var.get().strip() or None
+        }
+
+    def _fetch_page(self, after, limit: int, filters: Dict[str, Optional[str]]) -> List[Dict[str, Any]]:
+        """One page of transactions, newest first (runs in the background)"""
+        if self.product:
+            return self.inventory_service.get_product_transactions(self.product['id'], limit, after, **filters)
+        return self.inventory_service.get_recent_transactions(limit, after, **filters)
+
     def load_transactions(self):
-        """Load and display transactions in the treeview"""
-        try:
-            if self.product:
-                self.transactions = self.inventory_service.get_product_transactions(self.product['id'])
-            else:
-                self.transactions = self.inventory_service.get_recent_transactions()
-        except Exception as e:
-            self.transactions = []
-            self.count_label.configure(text=f"Error loading transactions: {str(e)}")
+        """Load the first page of transactions for the current filters"""
+        self.filter_timer = None
+        self.filters = self._current_filters()
+        self.last_key = None
+        self.loading = True
+        self.count_label.configure(text="Loading...")
+        self.loader.submit(
+            self._fetch_page,
+            lambda transactions: self.on_page_loaded(transactions, reset=True),
+            None, PAGE_SIZE, self.filters,
+            key="page",
+            on_error=self.on_page_failed
+        )
+
+    def load_more_transactions(self):
+        """Load the page after the last loaded transaction"""
+        if self.loading or not self.last_key:
             return
-        self.filter_transactions()
+        self.loading = True
+        self.loader.submit(
+            self._fetch_page,
+            lambda transactions: self.on_page_loaded(transactions, reset=False),
+            self.last_key, PAGE_SIZE, self.filters,
+            key="page",
+            on_error=self.on_page_failed
+        )
+
+    def on_page_loaded(self, transactions: List[Dict[str, Any]], reset: bool):
+        """Show a page of transactions (runs on the UI thread)"""
+        self.loading = False
+        self.has_more = len(transactions) == PAGE_SIZE
+        if transactions:
+            self.last_key = (transactions[-1]['created_at'], transactions[-1]['id'])
+
+        rows = [self._row(t) for t in transactions]
+        if reset:
+            self.transactions = list(transactions)
+            self.transaction_list.set_rows(rows, transactions, self.has_more, empty_text="No transactions found")
+        else:
+            self.transactions.extend(transactions)
+            self.transaction_list.append_rows(rows, transactions, self.has_more)
+
+        more = "+" if self.has_more else ""
+        self.count_label.configure(text=f"{len(self.transactions)}{more} transaction(s) found")
+
+    def on_page_failed(self, error: Exception):
+        """Let the next scroll or filter change try again (runs on the UI thread)"""
+        self.loading = False
+        self.count_label.configure(text="Could not load transactions")
 
     def filter_transactions(self):
-        """Filter transactions based on search entry and update the treeview"""
-        search = self.search_var.get().lower()
-        filtered = []
-        for t in self.transactions:
-            if (
-                search in str(t.get('user_name', '')).lower() or
-                search in str(t.get('reason', '')).lower() or
-                search in str(t.get('transaction_type', '')).lower()
-            ):
-                filtered.append(t)
-        self.update_treeview(filtered)
-
-    def update_treeview(self, transactions):
-        # Clear tree
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        for t in transactions:
-            try:
-                date_str = datetime.fromisoformat(t['created_at']).strftime("%Y-%m-%d %H:%M")
-            except (ValueError, TypeError):
-                date_str = "N/A"
-            change = t['quantity_change']
-            change_str = f"+{change}" if change > 0 else str(change)
-            change_color = "Positive.Treeview" if change > 0 else "Negative.Treeview" if change < 0 else ""
-            row = [
-                date_str,
-                change_str if self.product else t.get('product_name', ''),
-                str(t['previous_quantity']),
-                str(t['new_quantity']),
-                t['transaction_type'].title(),
-                t.get('reason', ''),
-                t.get('user_name', 'System')
-            ]
-            tags = ()
-            if self.product:
-                if change > 0:
-                    tags = ("positive",)
-                elif change < 0:
-                    tags = ("negative",)
-            self.tree.insert("", "end", values=row, tags=tags)
-        self.tree.tag_configure("positive", foreground="#2ecc71")
-        self.tree.tag_configure("negative", foreground="#e74c3c")
-        self.count_label.configure(text=f"{len(transactions)} transaction(s) found")
-
-    def sort_by_column(self, col, reverse):
-        l = [(self.tree.set(k, col), k) for k in self.tree.get_children("")]
+        """Reload from the first page as the filters are typed"""
+        # Debounce keystrokes; a newer query supersedes any page still loading
+        if self.filter_timer:
+            self.after_cancel(self.filter_timer)
+        self.filter_timer = self.after(FILTER_DELAY_MS, self.load_transactions)
+
+    def _row(self, t: Dict[str, Any]) -> tuple:
         try:
-            l.sort(key=lambda t: float(t[0]) if t[0].replace('.', '', 1).replace('-', '', 1).isdigit() else t[0], reverse=reverse)
-        except Exception:
-            l.sort(key=lambda t: t[0], reverse=reverse)
-        for index, (val, k) in enumerate(l):
-            self.tree.move(k, '', index)
-        self.tree.heading(col, command=lambda: self.sort_by_column(col, not reverse))
+            date_str = datetime.fromisoformat(t['created_at']).strftime("%Y-%m-%d %H:%M")
+        except (ValueError, TypeError):
+            date_str = "N/A"
+        change = t['quantity_change']
+        change_str = f"+{change}" if change > 0 else str(change)
+        return (
+            date_str,
+            change_str if self.product else t.get('product_name', ''),
+            str(t['previous_quantity']),
+            str(t['new_quantity']),
+            t['transaction_type'].title(),
+            t.get('reason') or '',
+            t.get('user_name', 'System')
+        )
+
+    def _fetch_all(self, filters: Dict[str, Optional[str]]) -> List[Dict[str, Any]]:
+        """Every transaction matching the filters, a page at a time (runs in the background)"""
+        transactions, after = [], None
+        while True:
+            page = self._fetch_page(after, EXPORT_PAGE_SIZE, filters)
+            transactions.extend(page)
+            if len(page) < EXPORT_PAGE_SIZE:
+                return transactions
+            after = (page[-1]['created_at'], page[-1]['id'])
 
     def export_to_csv(self):
-        import csv
+        """Export every transaction matching the filters, not just the loaded pages"""
         file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
         if not file_path:
             return
-        # Get currently displayed transactions
-        displayed = [self.tree.item(i)['values'] for i in self.tree.get_children()]
+        self.count_label.configure(text="Exporting...")
+        self.loader.submit(
+            self._fetch_all,
+            lambda transactions: self._write_csv(file_path, transactions),
+            dict(self.filters),
+            key="export",
+            on_error=lambda e: self.count_label.configure(text=f"Export failed: {str(e)}")
+        )
+
+    def _write_csv(self, file_path: str, transactions: List[Dict[str, Any]]):
+        import csv
         try:
             with open(file_path, mode='w', newline='', encoding='utf-8') as file:
                 writer = csv.writer(file)
                 writer.writerow(self.columns)
-                for row in displayed:
-                    writer.writerow(row)
-            self.count_label.configure(text=f"Exported {len(displayed)} transactions to CSV.")
+                for t in transactions:
+                    writer.writerow(self._row(t))
+            self.count_label.configure(text=f"Exported {len(transactions)} transactions to CSV.")
         except Exception as e:
-            self.count_label.configure(text=f"Export failed: {str(e)}") 
\ No newline at end of file
+            self.count_label.configure(text=f"Export failed: {str(e)}")
+
+    def destroy(self):
+        """Stop background loading and close the dialog"""
+        if self.filter_timer:
+            self.after_cancel(self.filter_timer)
+            self.filter_timer = None
+        self.loader.close()
+        super().destroy()
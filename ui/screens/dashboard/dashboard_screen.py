@@ -10,8 +10,10 @@ from config.constants import (
 )
 from ui.base.base_frame import BaseFrame
 from services.auth_service import AuthService
+from services.sale_service import SaleService
 from services.statistics_service import StatisticsService
 from utils.session import SessionManager
+from utils.metrics import ui_action
 
 class ModernCard(ctk.CTkFrame):
     """A modern, glassmorphic card widget"""
@@ -117,6 +119,7 @@ class DashboardScreen(BaseFrame):
         # Initialize services
         self.auth_service = AuthService()
         self.stats_service = StatisticsService()
+        self.sale_service = SaleService()
         self.session_manager = SessionManager()
         
         # Initialize UI elements that need to be accessed later
@@ -299,6 +302,16 @@ class DashboardScreen(BaseFrame):
         )
         date_label.grid(row=0, column=1, sticky="e")
         
+        # Checkouts the database refused after the till accepted them (shown only when there are any)
+        self.failed_checkouts_label = ctk.CTkLabel(
+            self.content,
+            text="",
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS["accent_red"],
+            justify="left",
+            anchor="w"
+        )
+        
         # Stats grid with modern cards
         stats_frame = ctk.CTkFrame(self.content, fg_color="transparent")
         stats_frame.grid(row=2, column=0, sticky="nsew")
@@ -349,6 +362,7 @@ class DashboardScreen(BaseFrame):
         # Create content area
         self.create_content_area()
     
+    @ui_action("dashboard.update_statistics")
     def update_statistics(self):
         """Update dashboard statistics with modern loading states"""
         if self.is_loading_stats:
@@ -429,6 +443,24 @@ class DashboardScreen(BaseFrame):
         
         # Update statistics
         self.update_statistics()
+        self.update_failed_checkouts()
+    
+    def update_failed_checkouts(self):
+        """Warn about journaled checkouts that never reached the database"""
+        failed = self.sale_service.get_failed_checkouts()
+        if not failed:
+            self.failed_checkouts_label.grid_forget()
+            return
+        
+        lines = [f"⚠️ {len(failed)} checkout(s) were accepted at the till but could not be saved:"]
+        for entry in failed[-5:]:
+            sale_data = entry["sale_data"] or {}
+            total = f"{CURRENCY_SYMBOL}{sale_data['total']:.2f}" if "total" in sale_data else "unknown total"
+            lines.append(f"   {entry['failed_at']}  {total}  {entry['error']}")
+        if len(failed) > 5:
+            lines.append(f"   ... and {len(failed) - 5} earlier")
+        self.failed_checkouts_label.configure(text="\n".join(lines))
+        self.failed_checkouts_label.grid(row=1, column=0, sticky="ew", pady=(0, PADDING_MEDIUM))
     
     def logout(self):
         """Log out the current user"""
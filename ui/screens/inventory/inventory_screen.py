@@ -13,6 +13,7 @@ from ui.base.base_frame import BaseFrame
 from services.inventory_service import InventoryService
 from services.auth_service import AuthService
 from utils.session import SessionManager
+from utils.metrics import ui_action
 from ui.components.dialogs.product_dialog import ProductDialog
 from ui.components.dialogs.stock_adjustment_dialog import StockAdjustmentDialog
 from ui.components.dialogs.transaction_history_dialog import TransactionHistoryDialog
@@ -295,6 +296,7 @@ class InventoryScreen(BaseFrame):
 
         self.load_products()
     
+    @ui_action("inventory.load_products")
     def load_products(self):
         """Load products from database"""
         try:
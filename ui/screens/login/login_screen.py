@@ -8,7 +8,9 @@ from config.settings import LOGO_PATH, APP_NAME
 from config.constants import PADDING_SMALL, PADDING_MEDIUM, PADDING_LARGE, SCREEN_DASHBOARD, SCREEN_CASHIER_MAIN, ROLES
 from ui.base.base_frame import BaseFrame
 from services.auth_service import AuthService
+from utils.background import BackgroundLoader
 from utils.session import SessionManager
+from utils.warmup import start_catalog_warmup
 
 class LoginScreen(BaseFrame):
     """Login screen for the application"""
@@ -21,6 +23,10 @@ class LoginScreen(BaseFrame):
         self.auth_service = AuthService()
         self.session_manager = SessionManager()
         
+        # Password hashing is slow by design; keep it off the UI thread
+        self.loader = BackgroundLoader(self)
+        self.logging_in = False
+        
         # Set background color
         self.configure(fg_color=("#f0f0f0", "#2c3e50"))
     
@@ -105,13 +111,13 @@ class LoginScreen(BaseFrame):
         forgot_button.grid(row=6, column=0, padx=PADDING_MEDIUM, pady=PADDING_SMALL)
         
         # Login button
-        login_button = ctk.CTkButton(
+        self.login_button = ctk.CTkButton(
             self.login_frame, 
             text="Login",
             width=300,
             command=self.login
         )
-        login_button.grid(row=7, column=0, padx=PADDING_MEDIUM, pady=PADDING_MEDIUM)
+        self.login_button.grid(row=7, column=0, padx=PADDING_MEDIUM, pady=PADDING_MEDIUM)
         
         # Create account button
         create_account_button = ctk.CTkButton(
@@ -142,6 +148,9 @@ class LoginScreen(BaseFrame):
     
     def login(self):
         """Handle login button click"""
+        if self.logging_in:
+            return
+        
         username = self.username_var.get().strip()
         password = self.password_var.get()
         
@@ -149,8 +158,22 @@ class LoginScreen(BaseFrame):
             self.error_label.configure(text="Please enter both username and password")
             return
         
-        # Authenticate user
-        user = self.auth_service.authenticate(username, password)
+        # Authenticate user in the background
+        self.logging_in = True
+        self.login_button.configure(state="disabled", text="Signing in...")
+        self.error_label.configure(text="")
+        self.loader.submit(
+            self.auth_service.authenticate,
+            self.on_login_result,
+            username, password,
+            key="login",
+            on_error=self.on_login_error
+        )
+    
+    def on_login_result(self, user: Optional[Dict[str, Any]]):
+        """Finish logging in once authentication is done (runs on the UI thread)"""
+        self.logging_in = False
+        self.login_button.configure(state="normal", text="Login")
         
         if user:
             # Clear error message
@@ -159,10 +182,12 @@ class LoginScreen(BaseFrame):
             # Save session if remember me is checked
             self.session_manager.set_user(user, remember=self.remember_var.get())
             
-            # Navigate based on role
+            # Navigate based on role; this screen is left behind, so stop its worker
             if user.get('role') == 'admin':
+                self.loader.close()
                 self.navigate_to(SCREEN_DASHBOARD, {"user": user})
             elif user.get('role') == 'cashier':
+                self.loader.close()
                 self.navigate_to(SCREEN_CASHIER_MAIN, {"user": user})
             else:
                 # Default navigation or error
@@ -170,6 +195,12 @@ class LoginScreen(BaseFrame):
         else:
             self.error_label.configure(text="Invalid username or password")
     
+    def on_login_error(self, error: Exception):
+        """Let the cashier try again when authentication itself failed"""
+        self.logging_in = False
+        self.login_button.configure(state="normal", text="Login")
+        self.error_label.configure(text="Could not sign in, please try again")
+    
     def forgot_password(self):
         """Handle forgot password link click"""
         # For now, just show a message
@@ -318,6 +349,9 @@ class LoginScreen(BaseFrame):
     
     def on_screen_shown(self):
         """Called when screen is shown"""
+        # Load the POS catalog and thumbnails while the cashier types
+        start_catalog_warmup()
+        
         # Check for saved session
         self.check_saved_session()
     
@@ -9,12 +9,15 @@ from config.constants import (
     CATEGORIES, PAYMENT_METHODS, PAYMENT_CASH, PAYMENT_CARD, PAYMENT_MOBILE, TAX_RATE,
     SCREEN_DASHBOARD, CURRENCY_SYMBOL
 )
+from config.settings import PRODUCT_THUMBNAIL_SIZE
 from ui.base.base_frame import BaseFrame
 from ui.base.scrollable_frame import ScrollableFrame
 from services.auth_service import AuthService
 from services.product_service import ProductService
 from services.sale_service import SaleService
+from services.held_sale_service import HeldSaleService
 from utils.session import SessionManager
+from utils.metrics import ui_action
 from ui.components.dialogs.customer_selector_dialog import CustomerSelectorDialog
 from ui.components.dialogs.recall_sale_dialog import RecallSaleDialog
 
@@ -26,6 +29,7 @@ class POSScreen(BaseFrame):
         self.auth_service = AuthService()
         self.product_service = ProductService()
         self.sale_service = SaleService()
+        self.held_sale_service = HeldSaleService()
         self.session_manager = SessionManager()
 
 
@@ -33,7 +37,6 @@ class POSScreen(BaseFrame):
         
         # Current cart items
         self.cart_items: List[Dict[str, Any]] = []
-        self.held_sales: List[Dict[str, Any]] = []
         
         # Search debouncing
         self.search_timer = None
@@ -388,6 +391,7 @@ class POSScreen(BaseFrame):
         }
         self.print_ticket(sale)
     
+    @ui_action("pos.load_products")
     def load_products(self, category: Optional[str] = None):
         """Load products into the product list"""
         try:
@@ -443,7 +447,7 @@ class POSScreen(BaseFrame):
         image_handler = ProductImageHandler()
         product_image = image_handler.get_product_image(
             product.get('image_path', ''), 
-            size=(120, 80)
+            size=PRODUCT_THUMBNAIL_SIZE
         )
         
         if product_image:
@@ -451,7 +455,7 @@ class POSScreen(BaseFrame):
             image_label = ctk.CTkLabel(card, image=product_image, text="")
         else:
             # Create placeholder label
-            image_label = image_handler.create_placeholder_label(card, size=(120, 80))
+            image_label = image_handler.create_placeholder_label(card, size=PRODUCT_THUMBNAIL_SIZE)
         
         image_label.grid(row=0, column=0, padx=PADDING_SMALL, pady=PADDING_SMALL, sticky="ew")
 
@@ -510,6 +514,7 @@ class POSScreen(BaseFrame):
             self.after_cancel(self.search_timer)
         self.search_timer = self.after(300, self.search_products)  # 300ms delay
     
+    @ui_action("pos.search_products")
     def search_products(self):
         """Search for products"""
         search_term = self.search_var.get().strip()
@@ -560,12 +565,14 @@ class POSScreen(BaseFrame):
         if not barcode:
             return
         
-        # Search for product by barcode
-        products = self.product_service.get_products(search_term=barcode)
+        # Look the barcode up exactly, then fall back to a partial match
+        product = self.product_service.get_product_by_barcode(barcode)
+        if not product:
+            products = self.product_service.get_products(search_term=barcode)
+            product = products[0] if products else None
         
-        if products:
-            # Assume the first product with matching barcode
-            self.add_to_cart(products[0])
+        if product:
+            self.add_to_cart(product)
         else:
             # Show error message
             self.show_message("Barcode Not Found", f"No product found with barcode: {barcode}")
@@ -600,6 +607,7 @@ class POSScreen(BaseFrame):
         # Update cart display
         self.update_cart_display()
     
+    @ui_action("pos.update_cart_display")
     def update_cart_display(self):
         """Update the cart display"""
         # Clear existing items
@@ -775,32 +783,41 @@ class POSScreen(BaseFrame):
     
     def recall_sale(self):
         """Recall a held sale"""
-        if not self.held_sales:
+        held_sales = self.held_sale_service.get_held_sales()
+        if not held_sales:
             self.show_message("No Held Sales", "There are no sales currently on hold.")
             return
 
-        dialog = RecallSaleDialog(self, self.held_sales, on_recall=self.on_sale_recalled, on_delete=self.on_sale_deleted)
+        dialog = RecallSaleDialog(self, held_sales, on_recall=self.on_sale_recalled, on_delete=self.on_sale_deleted)
         dialog.mainloop()
 
-    def on_sale_recalled(self, index: int):
+    def on_sale_recalled(self, held_id: int):
         """Callback function when a sale is recalled from the dialog."""
-        if 0 <= index < len(self.held_sales):
-            if self.cart_items:
-                self.show_message("Cart Not Empty", "Please clear or complete the current sale before recalling another.")
-                return
+        if self.cart_items:
+            self.show_message("Cart Not Empty", "Please clear or complete the current sale before recalling another.")
+            return
+
+        recalled_sale = self.held_sale_service.recall_sale(held_id)
+        if not recalled_sale:
+            self.show_message("Not Found", "This sale has already been recalled or deleted.")
+            return
 
-            recalled_sale = self.held_sales.pop(index)
-            self.cart_items = recalled_sale["items"]
-            self.selected_customer = recalled_sale["customer"]
+        self.cart_items = recalled_sale["items"]
+        self.selected_customer = recalled_sale["customer"]
+        if self.selected_customer:
+            self.customer_info.configure(text=f"{self.selected_customer['name']}")
 
-            self.update_cart_display()
-            self.update_cart_summary()
+        self.update_cart_display()
+        self.update_cart_summary()
+        missing = len(recalled_sale["missing_products"])
+        if missing:
+            self.show_message("Recalled", f"Sale recalled without {missing} product(s) that no longer exist.")
+        else:
             self.show_message("Success", "Sale has been successfully recalled.")
 
-    def on_sale_deleted(self, index: int):
+    def on_sale_deleted(self, held_id: int):
         """Callback function when a sale is deleted from the dialog."""
-        if 0 <= index < len(self.held_sales):
-            self.held_sales.pop(index)
+        if self.held_sale_service.delete_held_sale(held_id):
             self.show_message("Success", "Held sale has been deleted.")
 
     def hold_sale(self):
@@ -809,15 +826,20 @@ class POSScreen(BaseFrame):
             self.show_message("Empty Cart", "Cannot hold an empty sale.")
             return
 
-        held_sale = {
-            "items": self.cart_items,
-            "customer": self.selected_customer,
-            "hold_time": datetime.datetime.now()
-        }
-        self.held_sales.append(held_sale)
+        current_user = self.auth_service.get_current_user()
+        held_id = self.held_sale_service.hold_sale(
+            self.cart_items,
+            self.selected_customer,
+            current_user["id"] if current_user else None
+        )
+        if not held_id:
+            self.show_message("Error", "Could not hold the sale.")
+            return
+
         self.clear_cart()
-        self.show_message("Success", f"Sale held successfully. There are now {len(self.held_sales)} held sales.")
+        self.show_message("Success", f"Sale held successfully. There are now {self.held_sale_service.count_held_sales()} held sales.")
 
+    @ui_action("pos.checkout")
     def checkout(self):
         """Process checkout"""
         try:
@@ -839,6 +861,7 @@ class POSScreen(BaseFrame):
                 "items": [
                     {
                         "product_id": item["product"]["id"],
+                        "product_name": item["product"]["name"],
                         "quantity": item["quantity"],
                         "price": item["product"]["price"],
                         "discount_percent": 0.0
@@ -851,8 +874,8 @@ class POSScreen(BaseFrame):
                 "discount": 0.0
             }
             
-            # Create sale
-            sale = self.sale_service.create_sale(sale_data)
+            # Record sale (applied to the database in the background)
+            sale = self.sale_service.record_sale(sale_data)
             if not sale:
                 raise Exception("Failed to create sale")
             
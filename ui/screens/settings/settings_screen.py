@@ -9,6 +9,8 @@ from config.constants import (
 )
 from ui.base.base_frame import BaseFrame
 from services.auth_service import AuthService
+from config.settings import SQL_TRACE_ENABLED, SLOW_QUERY_LOG_ENABLED, SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG_PATH
+from database import tracing
 
 class SettingsScreen(BaseFrame):
     """Settings screen for the application"""
@@ -42,6 +44,10 @@ class SettingsScreen(BaseFrame):
         # Appearance section
         self.create_appearance_section(content)
         
+        # Diagnostics section
+        content.grid_rowconfigure(1, weight=1)
+        self.create_diagnostics_section(content)
+        
         # Add more sections here as needed
         
     def create_header(self):
@@ -137,6 +143,60 @@ class SettingsScreen(BaseFrame):
         )
         color_value.grid(row=3, column=1, sticky="w", padx=PADDING_MEDIUM, pady=PADDING_SMALL)
     
+    def create_diagnostics_section(self, parent):
+        """Create SQL statistics section"""
+        section = ctk.CTkFrame(parent)
+        section.grid(row=1, column=0, sticky="nsew", padx=PADDING_MEDIUM, pady=PADDING_MEDIUM)
+        section.grid_columnconfigure(0, weight=1)
+        section.grid_rowconfigure(2, weight=1)
+        
+        # Section title
+        title = ctk.CTkLabel(
+            section,
+            text="🔍 Diagnostics",
+            font=ctk.CTkFont(size=16, weight="bold")
+        )
+        title.grid(row=0, column=0, sticky="w", padx=PADDING_MEDIUM, pady=PADDING_MEDIUM)
+        
+        # Buttons
+        buttons = ctk.CTkFrame(section, fg_color="transparent")
+        buttons.grid(row=0, column=1, sticky="e", padx=PADDING_MEDIUM)
+        
+        refresh_button = ctk.CTkButton(buttons, text="Refresh", width=100, command=self.refresh_sql_stats)
+        refresh_button.grid(row=0, column=0, padx=(0, PADDING_SMALL))
+        
+        reset_button = ctk.CTkButton(buttons, text="Reset", width=100, command=self.reset_sql_stats)
+        reset_button.grid(row=0, column=1)
+        
+        # Where the slow statements go
+        info = ctk.CTkLabel(
+            section,
+            text=(f"Statements slower than {SLOW_QUERY_THRESHOLD_MS} ms are logged to {SLOW_QUERY_LOG_PATH}"
+                  if SQL_TRACE_ENABLED or SLOW_QUERY_LOG_ENABLED else "The slow-query log is off")
+            + ("" if SQL_TRACE_ENABLED else "; set SUPERMARKET_SQL_TRACE=1 for the statistics below"),
+            font=ctk.CTkFont(size=12),
+            text_color="gray50"
+        )
+        info.grid(row=1, column=0, columnspan=2, sticky="w", padx=PADDING_MEDIUM)
+        
+        # Hottest statements
+        self.sql_stats_text = ctk.CTkTextbox(section, height=220, font=ctk.CTkFont(family="Courier", size=12), wrap="none")
+        self.sql_stats_text.grid(row=2, column=0, columnspan=2, sticky="nsew", padx=PADDING_MEDIUM, pady=PADDING_MEDIUM)
+        
+        self.refresh_sql_stats()
+    
+    def refresh_sql_stats(self):
+        """Show the statements that took the most time in this session"""
+        self.sql_stats_text.configure(state="normal")
+        self.sql_stats_text.delete("1.0", "end")
+        self.sql_stats_text.insert("1.0", tracing.format_summary(tracing.get_summary(limit=15)))
+        self.sql_stats_text.configure(state="disabled")
+    
+    def reset_sql_stats(self):
+        """Start collecting SQL statistics afresh"""
+        tracing.reset_stats()
+        self.refresh_sql_stats()
+    
     def change_theme(self, theme: str):
         """Change application theme"""
         # Update customtkinter appearance mode
@@ -176,4 +236,5 @@ class SettingsScreen(BaseFrame):
     
     def on_screen_shown(self):
         """Called when screen is shown"""
-        pass 
\ No newline at end of file
+        if hasattr(self, 'sql_stats_text'):
+            self.refresh_sql_stats() 
\ No newline at end of file
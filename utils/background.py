@@ -0,0 +1,93 @@
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional
+
+class BackgroundLoader:
+    """Runs loads off the Tk thread and hands the results back on it.
+
+    Every ``submit`` for a key supersedes the previous one: a superseded job
+    is skipped if it hasn't started, and its result is dropped if it has.
+    Results are delivered by polling from the Tk event loop, so callbacks may
+    touch widgets and the worker thread never does. A job that raises goes to
+    its ``on_error`` callback instead, so callers can undo a busy state.
+    """
+
+    def __init__(self, widget, poll_ms: int = 30):
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self._generations: Dict[str, int] = {}
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._results: "queue.Queue" = queue.Queue()
+        self._outstanding = 0
+        self._polling = None
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="background-loader", daemon=True)
+        self._thread.start()
+
+    def submit(self, func: Callable[..., Any], callback: Callable[[Any], None], *args,
+               key: str = "default", on_error: Optional[Callable[[Exception], None]] = None, **kwargs):
+        """Run ``func(*args, **kwargs)`` in the background and pass its result to ``callback``"""
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        self._jobs.put((key, generation, func, args, kwargs, (callback, on_error)))
+        self._outstanding += 1
+        self._schedule_poll()
+
+    def cancel(self, key: str = "default"):
+        """Drop the result of any job for this key"""
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def close(self):
+        """Stop the worker and drop pending results"""
+        self._closed = True
+        self._jobs.put(None)
+        if self._polling:
+            try:
+                self.widget.after_cancel(self._polling)
+            except Exception:
+                pass
+            self._polling = None
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            key, generation, func, args, kwargs, callback = job
+            if self._generations.get(key) != generation:
+                # Superseded before it started
+                self._results.put((key, generation, None, None, callback, False))
+                continue
+            try:
+                self._results.put((key, generation, func(*args, **kwargs), None, callback, True))
+            except Exception as e:
+                self._results.put((key, generation, None, e, callback, True))
+
+    def _schedule_poll(self):
+        if self._polling is None and not self._closed:
+            self._polling = self.widget.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._polling = None
+        if self._closed:
+            return
+
+        while True:
+            try:
+                key, generation, result, error, callback, ran = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._outstanding -= 1
+            if not ran or self._generations.get(key) != generation:
+                continue
+            callback, on_error = callback
+            if error:
+                print(f"Background load failed: {error}")
+                if on_error:
+                    on_error(error)
+                continue
+            callback(result)
+
+        if self._outstanding > 0:
+            self._schedule_poll()
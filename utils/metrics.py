@@ -0,0 +1,427 @@
+"""In-process metrics: counters, gauges and latency histograms.
+
+Services are instrumented with ``@instrumented`` on the class, UI handlers
+with ``@ui_action("pos.checkout")``; both record call latency in seconds into
+log-bucketed histograms (HDR-style) so percentiles
+like checkout p99 are available over a whole shift without keeping samples.
+Percentiles are reported as the bucket's upper bound, at most about 3% high.
+A background thread writes everything to ``METRICS_EXPORT_PATH`` in
+Prometheus text or JSON format.
+
+With ``METRICS_ENABLED`` off, the decorators return the original functions
+and the factories hand out no-op metrics, so instrumented code runs as if
+it weren't.
+"""
+
+import os
+import json
+import math
+import time
+import atexit
+import threading
+import functools
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.settings import (
+    METRICS_ENABLED, METRICS_EXPORT_PATH, METRICS_EXPORT_FORMAT, METRICS_EXPORT_INTERVAL
+)
+
+# Sub-buckets per power of two; a percentile is reported at most 1/SUB_BUCKETS high
+SUB_BUCKETS = 32
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Public service methods that aren't service calls
+_UNTIMED_METHODS = {"get_connection"}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class _Series:
+    """One labelled series of a counter or gauge"""
+
+    __slots__ = ("value", "function", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from ``function`` at export time"""
+        self.function = function
+
+    def read(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return float("nan")
+        return self.value
+
+
+class _HistogramSeries:
+    """Log-linear buckets: exact count, sum, min and max; percentiles within a bucket"""
+
+    __slots__ = ("buckets", "count", "sum", "min", "max", "_lock")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _index(value: float) -> int:
+        if value <= 0:
+            return -(1 << 30)
+        mantissa, exponent = math.frexp(value)
+        return exponent * SUB_BUCKETS + int((mantissa * 2 - 1) * SUB_BUCKETS)
+
+    @staticmethod
+    def _upper_bound(index: int) -> float:
+        exponent, sub = divmod(index, SUB_BUCKETS)
+        return math.ldexp((1 + (sub + 1) / SUB_BUCKETS) / 2, exponent)
+
+    def observe(self, value: float):
+        index = self._index(value)
+        with self._lock:
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, math.ceil(q * self.count))
+            seen = 0
+            for index in sorted(self.buckets):
+                seen += self.buckets[index]
+                if seen >= rank:
+                    return min(self._upper_bound(index), self.max)
+            return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        result = {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+        }
+        for q in QUANTILES:
+            result[f"p{int(q * 100)}"] = self.quantile(q)
+        return result
+
+
+class Metric:
+    """A named metric with one series per label combination"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str = ""):
+        self.name = name
+        self.help = help_text
+        self._series: Dict[LabelKey, Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_series(self):
+        return _Series()
+
+    def labels(self, **labels):
+        """The series for these label values"""
+        key = _label_key(labels)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, self._new_series())
+        return series
+
+    def series(self) -> List[Tuple[LabelKey, Any]]:
+        with self._lock:
+            return list(self._series.items())
+
+
+class Counter(Metric):
+    """Monotonic count"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        self.labels(**labels).inc(amount)
+
+
+class Gauge(Metric):
+    """Value that goes up and down, or is read from a function at export"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self.labels(**labels).set(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        self.labels(**labels).inc(amount)
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.labels(**labels).dec(amount)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        self.labels(**labels).set_function(function)
+
+
+class Histogram(Metric):
+    """Distribution of observed values (seconds for latencies)"""
+
+    kind = "summary"
+
+    def _new_series(self):
+        return _HistogramSeries()
+
+    def observe(self, value: float, **labels):
+        self.labels(**labels).observe(value)
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager observing the time spent inside it"""
+        return _Timer(self.labels(**labels))
+
+
+class _Timer:
+    __slots__ = ("series", "start")
+
+    def __init__(self, series):
+        self.series = series
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.series.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullMetric:
+    """Stands in for every metric while metrics are disabled"""
+
+    def labels(self, **labels):
+        return self
+
+    def inc(self, *args, **kwargs):
+        pass
+
+    dec = set = set_function = observe = inc
+
+    def time(self, **labels):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_METRIC = _NullMetric()
+
+_registry: Dict[str, Metric] = {}
+_registry_lock = threading.Lock()
+
+
+def _get_or_create(cls, name: str, help_text: str):
+    if not METRICS_ENABLED:
+        return _NULL_METRIC
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help_text)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+
+def counter(name: str, help_text: str = "") -> Counter:
+    """Get or register a counter"""
+    return _get_or_create(Counter, name, help_text)
+
+
+def gauge(name: str, help_text: str = "") -> Gauge:
+    """Get or register a gauge"""
+    return _get_or_create(Gauge, name, help_text)
+
+
+def histogram(name: str, help_text: str = "") -> Histogram:
+    """Get or register a histogram"""
+    return _get_or_create(Histogram, name, help_text)
+
+
+def _timed_wrapper(func: Callable, latency: Histogram, errors: Counter, label: str, key: str):
+    series = latency.labels(**{key: label})
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            errors.inc(**{key: label})
+            raise
+        finally:
+            series.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+def instrumented(cls):
+    """Class decorator timing every public method of a service"""
+    if not METRICS_ENABLED:
+        return cls
+
+    latency = histogram("service_call_seconds", "Service method latency")
+    errors = counter("service_call_errors_total", "Service method calls that raised")
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_") or attr in _UNTIMED_METHODS or not callable(value):
+            continue
+        if isinstance(value, (staticmethod, classmethod, type)):
+            continue
+        setattr(cls, attr, _timed_wrapper(value, latency, errors, f"{cls.__name__}.{attr}", "method"))
+    return cls
+
+
+def ui_action(name: str):
+    """Decorator timing a UI handler such as ``pos.checkout``"""
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+        latency = histogram("ui_action_seconds", "Time spent in UI handlers on the Tk thread")
+        errors = counter("ui_action_errors_total", "UI handlers that raised")
+        return _timed_wrapper(func, latency, errors, name, "action")
+    return decorator
+
+
+def snapshot() -> Dict[str, Any]:
+    """Every metric and series as plain data"""
+    with _registry_lock:
+        metrics = list(_registry.values())
+
+    result = {}
+    for metric in metrics:
+        series = []
+        for key, value in metric.series():
+            entry = {"labels": dict(key)}
+            if isinstance(metric, Histogram):
+                # Methods that were never called
+                if not value.count:
+                    continue
+                entry.update(value.snapshot())
+            else:
+                entry["value"] = value.read()
+            series.append(entry)
+        result[metric.name] = {"type": metric.kind, "help": metric.help, "series": series}
+    return result
+
+
+def _format_labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = (f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for name, value in items)
+    return "{" + ",".join(escaped) + "}"
+
+
+def to_prometheus(data: Optional[Dict[str, Any]] = None) -> str:
+    """Prometheus text exposition of a snapshot"""
+    data = snapshot() if data is None else data
+    lines = []
+    for name, metric in sorted(data.items()):
+        if metric["help"]:
+            lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for series in metric["series"]:
+            labels = series["labels"]
+            if metric["type"] == "summary":
+                for q in QUANTILES:
+                    value = series[f"p{int(q * 100)}"]
+                    lines.append(f"{name}{_format_labels(labels, ('quantile', str(q)))} {value:.6g}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {series['sum']:.6g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {series['count']}")
+            else:
+                lines.append(f"{name}{_format_labels(labels)} {series['value']:.6g}")
+    return "\n".join(lines) + "\n"
+
+
+def export(path=None, fmt: Optional[str] = None) -> bool:
+    """Write all metrics to a file, replacing it atomically"""
+    if not METRICS_ENABLED:
+        return False
+    path = Path(path or METRICS_EXPORT_PATH)
+    fmt = fmt or METRICS_EXPORT_FORMAT
+    try:
+        if fmt == "json":
+            text = json.dumps({"timestamp": datetime.now().isoformat(timespec="seconds"),
+                               "metrics": snapshot()}, indent=2)
+        else:
+            text = to_prometheus()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+        return True
+    except OSError as e:
+        print(f"Error exporting metrics: {e}")
+        return False
+
+
+_exporter: Optional[threading.Thread] = None
+_exporter_stop = threading.Event()
+
+
+def start_exporter(interval: float = METRICS_EXPORT_INTERVAL):
+    """Export metrics periodically from a background thread"""
+    global _exporter
+    if not METRICS_ENABLED or _exporter is not None:
+        return
+
+    def run():
+        while not _exporter_stop.wait(interval):
+            export()
+
+    _exporter = threading.Thread(target=run, name="metrics-exporter", daemon=True)
+    _exporter.start()
+
+
+def stop_exporter():
+    """Stop periodic export and write a final snapshot"""
+    global _exporter
+    if _exporter is None:
+        return
+    _exporter_stop.set()
+    _exporter = None
+    export()
+
+
+atexit.register(stop_exporter)
@@ -0,0 +1,14 @@
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r'\D')
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Reduce a phone number to its digits for lookups ('+213 555-12-34' -> '2135551234')"""
+    if not phone:
+        return None
+    digits = _NON_DIGITS.sub('', phone)
+    # '00' is the international dialling prefix written out
+    if digits.startswith('00'):
+        digits = digits[2:]
+    return digits or None
@@ -1,7 +1,36 @@
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import customtkinter as ctk
 from PIL import Image
-from typing import Optional, Tuple
+from typing import Iterable, Optional, Tuple
+
+from config.settings import THUMBNAIL_CACHE_SIZE
+
+# (full path, size) -> decoded image already scaled to size, most recently used last
+_thumbnails: "OrderedDict[Tuple[str, Tuple[int, int]], Image.Image]" = OrderedDict()
+_thumbnails_lock = threading.Lock()
+
+def _load_thumbnail(full_image_path: str, size: Tuple[int, int]) -> Image.Image:
+    """Decode and scale an image once, then serve it from memory"""
+    key = (full_image_path, tuple(size))
+    with _thumbnails_lock:
+        image = _thumbnails.get(key)
+        if image is not None:
+            _thumbnails.move_to_end(key)
+            return image
+
+    with Image.open(full_image_path) as source:
+        # Let JPEG decode at a reduced scale when the thumbnail is much smaller
+        source.draft("RGB", size)
+        image = source.convert("RGBA").resize(size, Image.LANCZOS)
+
+    with _thumbnails_lock:
+        _thumbnails[key] = image
+        while len(_thumbnails) > THUMBNAIL_CACHE_SIZE:
+            _thumbnails.popitem(last=False)
+    return image
 
 class ProductImageHandler:
     """Utility class for handling product images"""
@@ -34,7 +63,7 @@ class ProductImageHandler:
                 full_image_path = os.path.join(self.base_path, image_path)
                 
                 if os.path.exists(full_image_path):
-                    image = Image.open(full_image_path)
+                    image = _load_thumbnail(full_image_path, size)
                     return ctk.CTkImage(
                         light_image=image, 
                         dark_image=image, 
@@ -50,6 +79,36 @@ class ProductImageHandler:
             print(f"Error loading product image {image_path}: {e}")
             return None
     
+    def prefetch_thumbnails(self, image_paths: Iterable[str], size: Tuple[int, int] = (120, 80),
+                            workers: int = 2) -> int:
+        """
+        Decode images into the thumbnail cache ahead of time, off the Tk thread
+        
+        Args:
+            image_paths: Relative paths of the images
+            size: Tuple of (width, height) the images will be shown at
+            workers: Number of decoding threads
+            
+        Returns:
+            Number of thumbnails now cached
+        """
+        full_paths = {
+            os.path.join(self.base_path, image_path)
+            for image_path in image_paths if image_path and image_path.strip()
+        }
+        full_paths = [path for path in full_paths if os.path.exists(path)]
+        
+        def decode(full_image_path):
+            try:
+                _load_thumbnail(full_image_path, size)
+                return True
+            except Exception as e:
+                print(f"Error prefetching image {full_image_path}: {e}")
+                return False
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail") as executor:
+            return sum(executor.map(decode, full_paths))
+    
     def create_placeholder_label(self, master, size: Tuple[int, int] = (120, 80)) -> ctk.CTkLabel:
         """Create a placeholder image label with proper master"""
         return ctk.CTkLabel(
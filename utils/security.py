@@ -1,14 +1,70 @@
+"""Password hashing for every account in the application.
+
+Hashes use werkzeug's ``method$salt$hash`` format, so accounts created by
+older versions (werkzeug scrypt or pbkdf2) keep working, as do the legacy
+fixed-salt SHA-256 hashes. ``PASSWORD_HASH_METHOD`` sets the cost for
+new hashes; ``needs_rehash`` tells the login path when a stored hash was made
+with different parameters so it can be upgraded transparently.
+"""
+
 import hashlib
-import os
+import hmac
+import secrets
+import string
+
+from config.settings import PASSWORD_HASH_METHOD
+
+_SALT_CHARS = string.ascii_letters + string.digits
+_SALT_LENGTH = 16
+
+# Fixed salt of the original SHA-256 scheme, only used to verify old hashes
+_LEGACY_SALT = "supermarket_salt"
+
+
+def _hash_internal(method: str, salt: str, password: str) -> str:
+    """Compute the hex digest for a werkzeug-style method string"""
+    name, *args = method.split(":")
+    password_bytes = password.encode("utf-8")
+    salt_bytes = salt.encode("utf-8")
+
+    if name == "scrypt":
+        n, r, p = (int(arg) for arg in args[:3]) if args else (2 ** 15, 8, 1)
+        return hashlib.scrypt(
+            password_bytes, salt=salt_bytes, n=n, r=r, p=p, maxmem=132 * n * r * p
+        ).hex()
+
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else 600000
+        return hashlib.pbkdf2_hmac(hash_name, password_bytes, salt_bytes, iterations).hex()
+
+    raise ValueError(f"Unsupported password hash method: {method}")
+
+
+def hash_password(password: str, method: str = PASSWORD_HASH_METHOD) -> str:
+    """Hash a password with a random salt"""
+    salt = "".join(secrets.choice(_SALT_CHARS) for _ in range(_SALT_LENGTH))
+    return f"{method}${salt}${_hash_internal(method, salt, password)}"
 
-def hash_password(password: str) -> str:
-    """Hash a password using SHA-256 with a salt"""
-    # In a real application, you would use a proper password hashing algorithm like bcrypt
-    # This is a simplified version for demonstration purposes
-    salt = "supermarket_salt"  # In production, this should be a random salt per user
-    salted = password + salt
-    return hashlib.sha256(salted.encode()).hexdigest()
 
 def verify_password(password: str, hashed: str) -> bool:
-    """Verify a password against its hash"""
-    return hash_password(password) == hashed
\ No newline at end of file
+    """Verify a password against any hash this application has produced"""
+    if not hashed:
+        return False
+
+    if hashed.count("$") < 2:
+        legacy = hashlib.sha256((password + _LEGACY_SALT).encode()).hexdigest()
+        return hmac.compare_digest(legacy, hashed)
+
+    method, salt, digest = hashed.split("$", 2)
+    try:
+        return hmac.compare_digest(_hash_internal(method, salt, password), digest)
+    except ValueError:
+        return False
+
+
+def needs_rehash(hashed: str, method: str = PASSWORD_HASH_METHOD) -> bool:
+    """Check whether a stored hash was made with other parameters than the current ones"""
+    if not hashed or hashed.count("$") < 2:
+        return True
+    return hashed.split("$", 1)[0] != method
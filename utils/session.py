@@ -1,11 +1,22 @@
 import os
 import json
+import atexit
+import threading
 from pathlib import Path
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 
+# Marks a pending request to delete the session file
+_CLEAR = object()
+
 class SessionManager:
-    """Manages user sessions"""
+    """Manages user sessions.
+    
+    The current user is kept in memory. Persisting it is handed to a
+    background writer: requests made in quick succession collapse into one
+    write of the latest state, and the file is replaced atomically so a
+    crash never leaves a half-written session behind.
+    """
     
     _instance = None
     _user = None
@@ -25,8 +36,11 @@ class SessionManager:
         self.session_dir = Path.home() / '.supermarket_app'
         self.session_file = self.session_dir / 'session.json'
         
-        # Create session directory if it doesn't exist
-        self.session_dir.mkdir(exist_ok=True)
+        # Pending write (session data or _CLEAR) and the writer thread
+        self._pending = None
+        self._writing = False
+        self._condition = threading.Condition()
+        self._writer = None
         
         # Load existing session if any
         if self.session_file.exists():
@@ -37,7 +51,7 @@ class SessionManager:
                         SessionManager._user = session_data.get('user')
             except Exception as e:
                 print(f"Error loading session: {e}")
-        
+                
         self._initialized = True
     
     def set_user(self, user_data: Dict[str, Any], remember: bool = True):
@@ -59,30 +73,77 @@ class SessionManager:
     def clear_session(self):
         """Clear the current session"""
         SessionManager._user = None
-        if self.session_file.exists():
-            try:
-                self.session_file.unlink()
-            except Exception as e:
-                print(f"Error deleting session file: {e}")
+        self._schedule(_CLEAR)
     
     def save_session(self, user_data: Dict[str, Any]) -> bool:
-        """Save session data"""
+        """Queue session data to be saved"""
+        session_data = {
+            'user': user_data,
+            'remember': True,
+            'timestamp': datetime.now().isoformat()
+        }
+        self._schedule(session_data)
+        return True
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued session changes are on disk"""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._pending is None and not self._writing, timeout
+            )
+    
+    def is_session_valid(self) -> bool:
+        """Check if current session is valid"""
+        return SessionManager._user is not None
+    
+    def _schedule(self, pending):
+        with self._condition:
+            # Only the latest state matters; replace anything not yet written
+            self._pending = pending
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="session-writer", daemon=True)
+                self._writer.start()
+            self._condition.notify_all()
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None)
+                pending, self._pending = self._pending, None
+                self._writing = True
+            try:
+                if pending is _CLEAR:
+                    self._delete_file()
+                else:
+                    self._write_file(pending)
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+    
+    def _write_file(self, session_data: Dict[str, Any]):
+        temp_file = self.session_file.with_suffix('.json.tmp')
         try:
-            session_data = {
-                'user': user_data,
-                'remember': True,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            with open(self.session_file, 'w') as f:
+            self.session_dir.mkdir(exist_ok=True)
+            with open(temp_file, 'w') as f:
                 json.dump(session_data, f)
-            
-            return True
-            
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.session_file)
         except Exception as e:
             print(f"Error saving session: {e}")
-            return False
     
-    def is_session_valid(self) -> bool:
-        """Check if current session is valid"""
-        return SessionManager._user is not None 
\ No newline at end of file
+    def _delete_file(self):
+        try:
+            self.session_file.unlink(missing_ok=True)
+        except Exception as e:
+            print(f"Error deleting session file: {e}")
+
+
+def flush_session(timeout: float = 5.0):
+    """Write out any queued session change before the process exits"""
+    if SessionManager._instance is not None and SessionManager._instance._initialized:
+        SessionManager._instance.flush(timeout)
+
+
+atexit.register(flush_session)
@@ -0,0 +1,223 @@
+"""Watchdog for the Tk main loop: finds out what the till was doing when it froze.
+
+The main loop is asked to run a heartbeat every ``STALL_HEARTBEAT_MS`` via
+``after()``. A watchdog thread checks that the heartbeat keeps arriving; when
+it is more than ``STALL_THRESHOLD_MS`` late the main thread is busy with
+something else, and the watchdog samples its stack with
+``sys._current_frames`` until the heartbeat comes back.
+
+Each stall is reduced to a signature, the innermost few frames of project
+code seen most often in its samples (e.g. ``pos_screen.POSScreen.update_cart_display``),
+and aggregated by signature. Every stall is appended to ``stalls.log`` and the
+aggregate is rewritten to ``stall_report.txt`` in the logs folder, worst first.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config.settings import (
+    STALL_HEARTBEAT_MS, STALL_THRESHOLD_MS, STALL_LOG_PATH, STALL_REPORT_PATH
+)
+from utils import metrics
+
+_PROJECT_DIR = str(Path(__file__).resolve().parent.parent) + os.sep
+_THIS_FILE = str(Path(__file__).resolve())
+
+# Project frames kept in a signature, innermost first
+SIGNATURE_DEPTH = 3
+
+# Stack samples kept per stall
+MAX_SAMPLES = 50
+
+
+# code object -> "module.qualname", or None outside the project
+_code_labels: Dict[Any, Optional[str]] = {}
+
+
+def _label(code) -> Optional[str]:
+    if code not in _code_labels:
+        path = os.path.abspath(code.co_filename)
+        label = None
+        # Pseudo-files such as <frozen ...> are never project code
+        if not code.co_filename.startswith("<") and path.startswith(_PROJECT_DIR) and path != _THIS_FILE:
+            label = f"{Path(path).stem}.{getattr(code, 'co_qualname', code.co_name)}"
+        _code_labels[code] = label
+    return _code_labels[code]
+
+
+def _project_frames(frame) -> List[str]:
+    """Labels of the project code on a stack, innermost first"""
+    labels = []
+    while frame is not None:
+        label = _label(frame.f_code)
+        if label:
+            labels.append(f"{label}:{frame.f_lineno}")
+        frame = frame.f_back
+    return labels
+
+
+def _signature(stack: List[str]) -> str:
+    if not stack:
+        return "(outside project code)"
+    # Line numbers make stacks precise but would split one slow function into many signatures
+    return " < ".join(label.rsplit(":", 1)[0] for label in stack[:SIGNATURE_DEPTH])
+
+
+class StallDetector:
+    """Heartbeat on the Tk main loop plus a watchdog thread sampling it when late"""
+
+    def __init__(self, root, threshold_ms: float = STALL_THRESHOLD_MS,
+                 heartbeat_ms: int = STALL_HEARTBEAT_MS,
+                 log_path=STALL_LOG_PATH, report_path=STALL_REPORT_PATH):
+        self.root = root
+        self.threshold = threshold_ms / 1000
+        self.heartbeat_ms = heartbeat_ms
+        self.log_path = Path(log_path)
+        self.report_path = Path(report_path)
+
+        self._main_thread_id: Optional[int] = None
+        self._last_beat: Optional[float] = None
+        self._after_id = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._logger: Optional[logging.Logger] = None
+
+        self._lock = threading.Lock()
+        self.signatures: Dict[str, Dict[str, Any]] = {}
+        self._stall_seconds = metrics.histogram("ui_stall_seconds", "Time the Tk main loop was unresponsive")
+
+    def start(self):
+        """Start the heartbeat and the watchdog; call from the Tk thread"""
+        if self._thread:
+            return
+        self._main_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._after_id = self.root.after(self.heartbeat_ms, self._beat)
+        self._thread = threading.Thread(target=self._watch, name="stall-detector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching and write the final report"""
+        if not self._thread:
+            return
+        self._stop.set()
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        self.write_report()
+
+    def _beat(self):
+        self._last_beat = time.perf_counter()
+        if not self._stop.is_set():
+            self._after_id = self.root.after(self.heartbeat_ms, self._beat)
+
+    def _watch(self):
+        interval = self.heartbeat_ms / 1000
+        poll = min(self.threshold, interval) / 4
+
+        while not self._stop.wait(poll):
+            last_beat = self._last_beat
+            # Not armed until the main loop is running
+            if last_beat is None:
+                continue
+            due = last_beat + interval
+            if time.perf_counter() - due < self.threshold:
+                continue
+
+            samples = []
+            while self._last_beat == last_beat and not self._stop.is_set():
+                frame = sys._current_frames().get(self._main_thread_id)
+                if frame is None:
+                    break
+                if len(samples) < MAX_SAMPLES:
+                    samples.append(_project_frames(frame))
+                del frame
+                time.sleep(poll)
+
+            if self._last_beat != last_beat:
+                self._record(self._last_beat - due, samples)
+
+    def _record(self, duration: float, samples: List[List[str]]):
+        """Add one stall to the aggregate and the logs"""
+        signatures = Counter(_signature(stack) for stack in samples)
+        signature = signatures.most_common(1)[0][0] if signatures else "(no samples)"
+        stack = next((s for s in samples if _signature(s) == signature), [])
+        duration_ms = duration * 1000
+
+        with self._lock:
+            entry = self.signatures.setdefault(signature, {
+                "signature": signature, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "stack": stack
+            })
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            if duration_ms > entry["max_ms"]:
+                entry["max_ms"] = duration_ms
+                entry["stack"] = stack
+
+        self._stall_seconds.observe(duration)
+        self._get_logger().info("stall %.0fms in %s\n    %s", duration_ms, signature,
+                                "\n    ".join(stack) or "-")
+        self.write_report()
+
+    def get_summary(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Stall signatures by total time frozen, worst first"""
+        with self._lock:
+            rows = [dict(entry) for entry in self.signatures.values()]
+        rows.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return rows[:limit]
+
+    def write_report(self) -> bool:
+        """Rewrite the stall report from the aggregate"""
+        rows = self.get_summary(limit=100)
+        lines = [
+            f"Tk main-loop stalls over {self.threshold * 1000:.0f}ms, "
+            f"updated {datetime.now().isoformat(timespec='seconds')}",
+            ""
+        ]
+        if not rows:
+            lines.append("No stalls recorded.")
+        for entry in rows:
+            lines.append(f"{entry['count']:>5} stalls  {entry['total_ms']:>9.0f}ms total  "
+                         f"{entry['max_ms']:>7.0f}ms max  {entry['signature']}")
+            lines.extend(f"          {label}" for label in entry["stack"][:10])
+            lines.append("")
+
+        try:
+            self.report_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.report_path.with_name(self.report_path.name + ".tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(temp_path, self.report_path)
+            return True
+        except OSError as e:
+            print(f"Error writing stall report: {e}")
+            return False
+
+    def _get_logger(self) -> logging.Logger:
+        if self._logger is None:
+            logger = logging.getLogger("supermarket.stalls")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            if not logger.handlers:
+                try:
+                    self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                    handler = RotatingFileHandler(self.log_path, maxBytes=1024 * 1024, backupCount=3, delay=True)
+                    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                    logger.addHandler(handler)
+                except OSError as e:
+                    print(f"Error opening stall log: {e}")
+            self._logger = logger
+        return self._logger
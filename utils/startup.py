@@ -0,0 +1,123 @@
+"""Startup timeline: how long each phase takes from launch to the login window.
+
+``main.py`` imports this module first, so its import time is the zero point.
+The app calls ``mark`` after each phase (imports, settings, window, login
+screen, first frame, database). The database is first opened right after the
+first frame, to replay the checkout journal; once that is done the run is
+appended as one JSON line to ``STARTUP_LOG_PATH``, so time-to-login can be tracked
+across changes:
+
+    python -m utils.startup            # last runs and the median of each phase
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_START = time.perf_counter()
+
+# (phase, seconds since start), in the order they happened
+_marks: List[tuple] = []
+_finished = False
+
+
+def mark(phase: str):
+    """Record that a startup phase has just finished"""
+    if not _finished:
+        _marks.append((phase, time.perf_counter() - _START))
+
+
+def timeline() -> List[Dict[str, float]]:
+    """Phases so far with their own duration and the time since start, in ms"""
+    rows, previous = [], 0.0
+    for phase, at in _marks:
+        rows.append({"phase": phase, "ms": round((at - previous) * 1000, 1), "at_ms": round(at * 1000, 1)})
+        previous = at
+    return rows
+
+
+def format_timeline(rows: Optional[List[Dict[str, float]]] = None) -> str:
+    rows = timeline() if rows is None else rows
+    lines = [f"{'phase':<28} {'ms':>8} {'at ms':>9}"]
+    lines.extend(f"{row['phase']:<28} {row['ms']:>8.1f} {row['at_ms']:>9.1f}" for row in rows)
+    return "\n".join(lines)
+
+
+def finish(log_path=None, show: bool = False) -> bool:
+    """Stop recording and append this run to the startup log"""
+    global _finished
+    if _finished:
+        return False
+    _finished = True
+
+    from config.settings import STARTUP_LOG_PATH
+    rows = timeline()
+    if show:
+        print(format_timeline(rows))
+
+    path = Path(log_path or STARTUP_LOG_PATH)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "timeline": rows,
+            }) + "\n")
+        return True
+    except OSError as e:
+        print(f"Error writing startup log: {e}")
+        return False
+
+
+def load_runs(log_path=None) -> List[Dict[str, Any]]:
+    """Every run recorded in the startup log, oldest first"""
+    from config.settings import STARTUP_LOG_PATH
+    path = Path(log_path or STARTUP_LOG_PATH)
+    if not path.exists():
+        return []
+    runs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                continue
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise recorded app startups")
+    parser.add_argument("--log", help="Startup log (default: STARTUP_LOG_PATH)")
+    parser.add_argument("--last", type=int, default=10, help="Runs to summarise")
+    args = parser.parse_args()
+
+    runs = load_runs(args.log)[-args.last:]
+    if not runs:
+        print("No startups recorded yet")
+        return
+
+    print(f"{'run':<20} {'time to first frame ms':>24}")
+    for run in runs:
+        total = next((row["at_ms"] for row in run["timeline"] if row["phase"] == "first frame"), 0.0)
+        print(f"{run['timestamp']:<20} {total:>24.1f}")
+
+    phases: Dict[str, List[float]] = {}
+    for run in runs:
+        for row in run["timeline"]:
+            phases.setdefault(row["phase"], []).append(row["ms"])
+    print()
+    print(f"{'phase':<28} {'median ms':>10} {'max ms':>9}")
+    for phase, samples in phases.items():
+        print(f"{phase:<28} {statistics.median(samples):>10.1f} {max(samples):>9.1f}")
+
+
+if __name__ == "__main__":
+    # Add project root to Python path
+    sys.path.append(str(Path(__file__).parent.parent))
+    main()
@@ -0,0 +1,60 @@
+"""Background warm-up of the POS catalog while the login screen is shown.
+
+Cashiers spend seconds typing their password; ``start_catalog_warmup`` uses
+that time to load the shared product catalog (building its id, barcode and
+search indexes) and to decode the thumbnails of the best sellers, so the POS
+grid opens warm after login. Everything runs on background threads and only
+fills caches, so a slow or failed warm-up never delays the login itself.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from config.settings import (
+    CATALOG_WARMUP_ENABLED, WARMUP_TOP_PRODUCTS, WARMUP_TOP_SELLERS_DAYS,
+    WARMUP_IMAGE_WORKERS, PRODUCT_THUMBNAIL_SIZE
+)
+from utils import metrics
+
+_running: Optional[threading.Thread] = None
+_running_lock = threading.Lock()
+
+
+def start_catalog_warmup(db_path=None) -> Optional[threading.Thread]:
+    """Start warming the catalog and thumbnails unless a warm-up is already running"""
+    global _running
+    if not CATALOG_WARMUP_ENABLED:
+        return None
+    with _running_lock:
+        if _running is not None and _running.is_alive():
+            return _running
+        _running = threading.Thread(target=warm_up_catalog, args=(db_path,), name="catalog-warmup", daemon=True)
+        _running.start()
+        return _running
+
+
+def warm_up_catalog(db_path=None):
+    """Load the shared catalog and decode the best sellers' thumbnails"""
+    from services.product_service import ProductService
+    from utils.product_images import ProductImageHandler
+
+    steps = metrics.histogram("warmup_seconds", "Time spent on each catalog warm-up step")
+    try:
+        product_service = ProductService(db_path)
+
+        start = time.perf_counter()
+        product_service.warm_cache()
+        steps.observe(time.perf_counter() - start, step="catalog")
+
+        start = time.perf_counter()
+        top_ids = product_service.get_top_selling_product_ids(WARMUP_TOP_PRODUCTS, WARMUP_TOP_SELLERS_DAYS)
+        image_paths = []
+        for product_id in top_ids:
+            product = product_service.get_cached_product(product_id)
+            if product and product.get('image_path'):
+                image_paths.append(product['image_path'])
+        ProductImageHandler().prefetch_thumbnails(image_paths, PRODUCT_THUMBNAIL_SIZE, WARMUP_IMAGE_WORKERS)
+        steps.observe(time.perf_counter() - start, step="thumbnails")
+    except Exception as e:
+        print(f"Error warming up catalog: {e}")